@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+
+# Incremental build of the pipeline stages (make-like): each stage is rebuilt
+# only if it is stale, i.e. if the content of its inputs or the value of the
+# configuration keys it depends on changed since its last build, or if any of
+# its outputs is missing. Stages are chained through their files (e.g. SAT INFO
+# -> SAT STAT -> figures): a rebuilt stage with identical outputs does not make
+# the stages downstream stale. The build records are kept in a JSON manifest.
+
+# Size of the blocks read to hash the files [bytes]
+HASH_BLOCK = 1 << 20
+
+# ------------------------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def computeFileHash(BuildGraph, Path):
+    """
+    Compute the content hash of a file (None if it does not exist). The hashes
+    are cached in the manifest by file size and modification time, so that
+    unchanged files are not read again.
+    """
+    try:
+        Stat = os.stat(Path)
+    except OSError:
+        return None
+
+    Cached = BuildGraph["Hashes"].get(Path)
+    if Cached is not None and Cached[0] == Stat.st_size and Cached[1] == Stat.st_mtime_ns:
+        return Cached[2]
+
+    Hash = hashlib.sha1()
+    with open(Path, 'rb') as f:
+        for Block in iter(lambda: f.read(HASH_BLOCK), b''):
+            Hash.update(Block)
+    BuildGraph["Hashes"][Path] = [Stat.st_size, Stat.st_mtime_ns, Hash.hexdigest()]
+
+    return Hash.hexdigest()
+
+def computeStageSignature(BuildGraph, Inputs, Conf, ConfKeys):
+    """
+    Signature of a stage: the content hash of its inputs and the value of its
+    configuration keys (None for the keys not in the configuration).
+    """
+    return {
+        "Inputs": {Path: computeFileHash(BuildGraph, Path) for Path in Inputs},
+        "Conf": {Key: str(Conf[Key]) if Key in Conf else None for Key in ConfKeys},
+    }
+
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def loadBuildGraph(ManifestFile, Force=False):
+    """
+    Load the build records of the manifest file (empty if it does not exist).
+
+    Parameters:
+    - ManifestFile: JSON manifest file of the build records.
+    - Force: Rebuild all the stages, regardless of their records.
+
+    Returns:
+    - BuildGraph: Dictionary with the build records of the "Stages" and the
+      cached file "Hashes".
+    """
+    Manifest = {"Stages": {}, "Hashes": {}}
+    if os.path.isfile(ManifestFile):
+        with open(ManifestFile, 'r') as f:
+            Manifest.update(json.load(f))
+
+    return {
+        "File": ManifestFile,
+        "Force": Force,
+        "Stages": Manifest["Stages"],
+        "Hashes": Manifest["Hashes"],
+        "Pending": {},
+    }
+
+def isStageStale(BuildGraph, Stage, Inputs, Outputs=(), Conf=None, ConfKeys=()):
+    """
+    Check if a stage must be rebuilt. If so, its signature is kept pending
+    until the stage is built (see recordStage).
+
+    Parameters:
+    - Stage: Unique name of the stage (e.g. the product and the day).
+    - Inputs: Input files of the stage.
+    - Outputs: Output files of the stage (stale if any of them is missing).
+    - Conf: Configuration dictionary.
+    - ConfKeys: Configuration keys the stage depends on.
+    """
+    Signature = computeStageSignature(BuildGraph, Inputs, Conf or {}, ConfKeys)
+    Stale = BuildGraph["Force"] or \
+        BuildGraph["Stages"].get(Stage) != Signature or \
+        not all(os.path.isfile(Path) for Path in Outputs) or \
+        None in Signature["Inputs"].values()
+    if Stale:
+        BuildGraph["Pending"][Stage] = Signature
+
+    return Stale
+
+def recordStage(BuildGraph, Stage):
+    """
+    Record a stage as built with the signature of its last staleness check,
+    and save the manifest (so that the stages built survive an interruption).
+    """
+    BuildGraph["Stages"][Stage] = BuildGraph["Pending"].pop(Stage)
+    saveBuildGraph(BuildGraph)
+
+def saveBuildGraph(BuildGraph):
+    """
+    Write the manifest file, replacing the previous one at once.
+    """
+    TmpFile = BuildGraph["File"] + ".tmp"
+    with open(TmpFile, 'w') as f:
+        json.dump({"Stages": BuildGraph["Stages"], "Hashes": BuildGraph["Hashes"]}, f, indent=1)
+    os.replace(TmpFile, BuildGraph["File"])
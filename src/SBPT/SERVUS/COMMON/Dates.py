@@ -142,3 +142,15 @@ def convertJulianDay2EgnosEpoch(Jd):
     EgnosEpoch = (CorrectedJd - 2444244.5 - (1024.0 * 7.0)) * 86400.0
 
     return EgnosEpoch
+
+def convertYearMonthDay2GpsTime(Year, Month, Day, Sod = 0.0):
+    # Compute the seconds elapsed since the GPS start epoch (1980 January 6)
+    JulianDay = convertYearMonthDay2JulianDay(Year, Month, Day)
+
+    return (JulianDay - 2444244.5) * 86400.0 + Sod
+
+def convertYearMonthDay2GpsWeek(Year, Month, Day):
+    # Compute the GPS week and the day of week (0: Sunday)
+    GpsDays = int(round(convertYearMonthDay2GpsTime(Year, Month, Day) / 86400.0))
+
+    return GpsDays // 7, GpsDays % 7
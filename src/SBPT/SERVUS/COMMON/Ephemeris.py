@@ -0,0 +1,383 @@
+import numpy as np
+from COMMON import GnssConstants
+from COMMON.Dates import convertYearMonthDay2GpsTime
+from COMMON.Compression import openDataFile
+
+# Define RINEX 2 NAVIGATION records Columns (GPS broadcast ephemerides)
+# Times are given in seconds since the GPS start epoch
+NavIdx = dict([
+    ("PRN", 0),
+    ("TOC", 1),         # Time of clock
+    ("AF0", 2),
+    ("AF1", 3),
+    ("AF2", 4),
+    ("IODE", 5),
+    ("CRS", 6),
+    ("DN", 7),
+    ("M0", 8),
+    ("CUC", 9),
+    ("E", 10),
+    ("CUS", 11),
+    ("SQRTA", 12),
+    ("TOE", 13),        # Time of ephemeris
+    ("CIC", 14),
+    ("OMEGA0", 15),
+    ("CIS", 16),
+    ("I0", 17),
+    ("CRC", 18),
+    ("OMEGA", 19),
+    ("OMEGADOT", 20),
+    ("IDOT", 21),
+    ("L2CODES", 22),
+    ("WEEK", 23),
+    ("L2PFLAG", 24),
+    ("SVACC", 25),
+    ("HEALTH", 26),
+    ("TGD", 27),
+    ("IODC", 28),
+    ("TOT", 29),        # Transmission time of message
+    ("FIT", 30),        # Fit interval [h]
+])
+
+# Number of lines of a RINEX 2 navigation record
+NAV_RECORD_LINES = 8
+
+# Default fit interval of the broadcast ephemerides [h]
+NAV_DEFAULT_FIT = 4.0
+
+# Bad or absent values in SP3 files
+SP3_BAD_CLOCK = 999999.0
+
+# Number of points of the Lagrange interpolation of SP3 orbits
+SP3_LAGRANGE_POINTS = 10
+
+# Frequencies of the ANTEX phase centre offsets combined for the GPS
+# broadcast orbits and clocks (ionosphere-free L1/L2)
+ANTEX_FREQUENCIES = ("G01", "G02")
+
+# ------------------------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def readNavValue(Line, Start):
+    Field = Line[Start:Start + 19].strip()
+    if not Field:
+        return np.nan
+
+    return float(Field.replace('D', 'E').replace('d', 'e'))
+
+def convertNavEpoch2GpsTime(Fields):
+    Year, Month, Day, Hour, Minute = [int(Field) for Field in Fields[:5]]
+    Year = Year + 2000 if Year < 80 else Year + 1900
+
+    return convertYearMonthDay2GpsTime(Year, Month, Day,
+        Hour * 3600.0 + Minute * 60.0 + float(Fields[5]))
+
+def solveKeplerEquation(M, E, Iterations=10):
+    # Fixed number of Newton iterations, enough for the GPS eccentricities
+    Ek = M.copy()
+    for _ in range(Iterations):
+        Ek = Ek - (Ek - E * np.sin(Ek) - M) / (1.0 - E * np.cos(Ek))
+
+    return Ek
+
+def computeLagrangeWeights(Nodes, Times):
+    """
+    Compute the Lagrange interpolation weights of the nodes at the given times.
+
+    Parameters:
+    - Nodes: Nodes of the interpolation of each time (NTimes x NPoints).
+    - Times: Interpolation times (NTimes).
+    """
+    NPoints = Nodes.shape[1]
+    Diagonal = np.eye(NPoints, dtype=bool)
+
+    # Numerator: prod (t - tm) for m != j; Denominator: prod (tj - tm) for m != j
+    Num = np.where(Diagonal, 1.0, (Times[:, None] - Nodes)[:, None, :])
+    Den = np.where(Diagonal, 1.0, Nodes[:, :, None] - Nodes[:, None, :])
+
+    return np.prod(Num, axis=2) / np.prod(Den, axis=2)
+
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def readAntexEpoch(Line):
+    """
+    Convert a VALID FROM / VALID UNTIL epoch of an ANTEX file into seconds
+    since the GPS start epoch.
+    """
+    Fields = Line[:43].split()
+
+    return convertYearMonthDay2GpsTime(int(Fields[0]), int(Fields[1]), int(Fields[2]),
+        int(Fields[3]) * 3600.0 + int(Fields[4]) * 60.0 + float(Fields[5]))
+
+def readNavFile(NavFile):
+    """
+    Read a RINEX 2 GPS navigation file.
+
+    Returns:
+    - Nav: Array of broadcast ephemerides, one row per record (see NavIdx).
+      TOE and TOT are converted to seconds since the GPS start epoch.
+    """
+    with openDataFile(NavFile) as f:
+        Lines = f.readlines()
+
+    # Skip the header
+    for Start, Line in enumerate(Lines):
+        if "END OF HEADER" in Line: break
+    Lines = [Line for Line in Lines[Start + 1:] if Line.strip()]
+
+    Records = []
+    for First in range(0, len(Lines) - NAV_RECORD_LINES + 1, NAV_RECORD_LINES):
+        Line = Lines[First]
+        Record = [int(Line[0:2]), convertNavEpoch2GpsTime(Line[2:22].split())]
+        Record.extend([readNavValue(Line, Start) for Start in (22, 41, 60)])
+        for Line in Lines[First + 1:First + NAV_RECORD_LINES]:
+            Record.extend([readNavValue(Line, Start) for Start in (3, 22, 41, 60)])
+        Records.append(Record[:len(NavIdx)])
+
+    Nav = np.array(Records, dtype=float).reshape(-1, len(NavIdx))
+
+    # Convert the times of week into times since the GPS start epoch
+    Week = Nav[:, NavIdx["WEEK"]] * GnssConstants.S_IN_W
+    Nav[:, NavIdx["TOE"]] += Week
+    Nav[:, NavIdx["TOT"]] += Week
+
+    # The transmission time may refer to the previous week
+    WeekRollover = Nav[:, NavIdx["TOT"]] - Nav[:, NavIdx["TOE"]] > GnssConstants.S_IN_W / 2
+    Nav[WeekRollover, NavIdx["TOT"]] -= GnssConstants.S_IN_W
+
+    return Nav
+
+def selectEphemerides(Nav, Prns, Times):
+    """
+    Select, for each satellite and time, the last healthy broadcast ephemeris
+    transmitted before the time and within its fit interval, as a user would do.
+
+    Parameters:
+    - Nav: Broadcast ephemerides (see readNavFile).
+    - Prns: PRN number of each sample.
+    - Times: Time of each sample [s since the GPS start epoch].
+
+    Returns:
+    - Rows: Row of the selected ephemeris in Nav of each sample (-1 if none).
+    """
+    Prns = np.asarray(Prns, dtype=np.int64)
+    Times = np.asarray(Times, dtype=float)
+
+    # Sort the healthy ephemerides by PRN and transmission time
+    Healthy = np.flatnonzero(Nav[:, NavIdx["HEALTH"]] == 0)
+    Order = Healthy[np.lexsort((Nav[Healthy, NavIdx["TOT"]], Nav[Healthy, NavIdx["PRN"]]))]
+
+    # Search the samples in the sorted (PRN, TOT) keys
+    Keys = Nav[Order, NavIdx["PRN"]].astype(np.int64) * 10**10 + \
+        np.floor(Nav[Order, NavIdx["TOT"]]).astype(np.int64)
+    SampleKeys = Prns * 10**10 + np.floor(Times).astype(np.int64)
+    Positions = np.searchsorted(Keys, SampleKeys, side='right') - 1
+
+    Rows = np.where(Positions >= 0, Order[np.maximum(Positions, 0)], -1)
+    Found = Rows >= 0
+    Found[Found] = Nav[Rows[Found], NavIdx["PRN"]] == Prns[Found]
+
+    # Check the fit interval
+    Fit = Nav[Rows, NavIdx["FIT"]]
+    Fit = np.where(np.isfinite(Fit) & (Fit > 0), Fit, NAV_DEFAULT_FIT) * GnssConstants.S_IN_H
+    Found &= np.abs(Times - Nav[Rows, NavIdx["TOE"]]) <= Fit / 2
+
+    return np.where(Found, Rows, -1)
+
+def computeBroadcastOrbits(Nav, Rows, Times):
+    """
+    Compute the satellite positions and clocks from the broadcast ephemerides
+    (GPS ICD algorithm), for all the samples at once.
+
+    The clock is the polynomial of the navigation message, without the TGD
+    (ionosphere-free P1/P2 clock, as the IGS clocks) and without the relativistic
+    correction (removed as well from the IGS clocks).
+
+    Parameters:
+    - Nav: Broadcast ephemerides (see readNavFile).
+    - Rows: Row of the ephemeris of each sample (see selectEphemerides), all valid.
+    - Times: Time of each sample [s since the GPS start epoch].
+
+    Returns:
+    - Positions: ECEF positions [m] (NSamples x 3).
+    - Clocks: Clock offsets [s].
+    """
+    Eph = Nav[Rows]
+    Times = np.asarray(Times, dtype=float)
+
+    # Time from ephemeris reference epoch
+    Tk = Times - Eph[:, NavIdx["TOE"]]
+
+    # Mean anomaly and Kepler equation
+    A = Eph[:, NavIdx["SQRTA"]]**2
+    N = np.sqrt(GnssConstants.GPS_MU_EARTH / A**3) + Eph[:, NavIdx["DN"]]
+    M = Eph[:, NavIdx["M0"]] + N * Tk
+    E = Eph[:, NavIdx["E"]]
+    Ek = solveKeplerEquation(M, E)
+
+    # True anomaly and argument of latitude
+    V = np.arctan2(np.sqrt(1.0 - E**2) * np.sin(Ek), np.cos(Ek) - E)
+    Phi = V + Eph[:, NavIdx["OMEGA"]]
+    Sin2Phi = np.sin(2 * Phi)
+    Cos2Phi = np.cos(2 * Phi)
+
+    # Second harmonic perturbations
+    U = Phi + Eph[:, NavIdx["CUS"]] * Sin2Phi + Eph[:, NavIdx["CUC"]] * Cos2Phi
+    R = A * (1.0 - E * np.cos(Ek)) + Eph[:, NavIdx["CRS"]] * Sin2Phi + Eph[:, NavIdx["CRC"]] * Cos2Phi
+    I = Eph[:, NavIdx["I0"]] + Eph[:, NavIdx["IDOT"]] * Tk + \
+        Eph[:, NavIdx["CIS"]] * Sin2Phi + Eph[:, NavIdx["CIC"]] * Cos2Phi
+
+    # Positions in the orbital plane
+    Xp = R * np.cos(U)
+    Yp = R * np.sin(U)
+
+    # Corrected longitude of ascending node (time of week of TOE)
+    Toe = np.mod(Eph[:, NavIdx["TOE"]], GnssConstants.S_IN_W)
+    Omega = Eph[:, NavIdx["OMEGA0"]] + \
+        (Eph[:, NavIdx["OMEGADOT"]] - GnssConstants.OMEGA_EARTH) * Tk - GnssConstants.OMEGA_EARTH * Toe
+
+    Positions = np.column_stack((
+        Xp * np.cos(Omega) - Yp * np.cos(I) * np.sin(Omega),
+        Xp * np.sin(Omega) + Yp * np.cos(I) * np.cos(Omega),
+        Yp * np.sin(I)))
+
+    # Clock polynomial
+    Dt = Times - Eph[:, NavIdx["TOC"]]
+    Clocks = Eph[:, NavIdx["AF0"]] + Eph[:, NavIdx["AF1"]] * Dt + Eph[:, NavIdx["AF2"]] * Dt**2
+
+    return Positions, Clocks
+
+def readSp3File(Sp3File, Constellation = 'G'):
+    """
+    Read the positions and clocks of a SP3-c/d precise orbit file.
+
+    Returns:
+    - Sp3: Dictionary with
+        "Times": Epochs [s since the GPS start epoch] (NEpochs).
+        "Prns": PRN number of each satellite (NSats).
+        "Positions": ECEF positions [m] (NEpochs x NSats x 3), NaN if absent.
+        "Clocks": Clock offsets [s] (NEpochs x NSats), NaN if absent.
+    """
+    Times = []
+    Records = {}
+    with openDataFile(Sp3File) as f:
+        for Line in f:
+            if Line.startswith('*'):
+                Fields = Line[1:].split()
+                Times.append(convertYearMonthDay2GpsTime(
+                    int(Fields[0]), int(Fields[1]), int(Fields[2]),
+                    int(Fields[3]) * 3600.0 + int(Fields[4]) * 60.0 + float(Fields[5])))
+            elif Line.startswith('P' + Constellation):
+                Records[(len(Times) - 1, int(Line[2:4]))] = \
+                    [float(Line[4:18]), float(Line[18:32]), float(Line[32:46]), float(Line[46:60])]
+
+    Prns = np.array(sorted(set(Prn for _, Prn in Records)), dtype=int)
+    PrnColumns = {Prn: Column for Column, Prn in enumerate(Prns)}
+    Values = np.full((len(Times), len(Prns), 4), np.nan)
+    for (Epoch, Prn), Record in Records.items():
+        Values[Epoch, PrnColumns[Prn]] = Record
+
+    # Bad or absent positions are set to 0, and bad clocks to 999999.999999
+    Positions = Values[:, :, :3] * 1000.0
+    Positions[np.all(Values[:, :, :3] == 0, axis=2)] = np.nan
+    Clocks = np.where(Values[:, :, 3] >= SP3_BAD_CLOCK, np.nan, Values[:, :, 3] * 1e-6)
+
+    return {
+        "Times": np.array(Times),
+        "Prns": Prns,
+        "Positions": Positions,
+        "Clocks": Clocks,
+    }
+
+def readAntexOffsets(AntexFile, Time, Constellation = 'G'):
+    """
+    Read the phase centre offsets of the satellite antennas of an ANTEX file
+    (e.g. igs14.atx) valid at a time: the offset along the satellite body
+    Z axis (towards the Earth) of the ionosphere-free L1/L2 phase centre.
+
+    Parameters:
+    - AntexFile: ANTEX file.
+    - Time: Time [s since the GPS start epoch] (e.g. the day of the analysis).
+
+    Returns:
+    - Offsets: Dictionary PRN number -> Z offset [m].
+    """
+    Gamma = GnssConstants.GPS_GAMMA_L1L2
+    Offsets = {}
+    with openDataFile(AntexFile) as f:
+        for Line in f:
+            Label = Line[60:].strip()
+            if Label == "START OF ANTENNA":
+                Serial, ValidFrom, ValidUntil, Frequency, Antenna = "", -np.inf, np.inf, None, {}
+            elif Label == "TYPE / SERIAL NO":
+                Serial = Line[20:40].strip()
+            elif Label == "VALID FROM":
+                ValidFrom = readAntexEpoch(Line)
+            elif Label == "VALID UNTIL":
+                ValidUntil = readAntexEpoch(Line)
+            elif Label == "START OF FREQUENCY":
+                Frequency = Line[3:6]
+            elif Label == "NORTH / EAST / UP" and Frequency is not None:
+                # Satellite offsets are X, Y, Z in the body frame [mm]
+                Antenna[Frequency] = float(Line[20:30]) / 1000.0
+            elif Label == "END OF ANTENNA":
+                if not (len(Serial) == 3 and Serial[0] == Constellation and \
+                    ValidFrom <= Time < ValidUntil):
+                    continue
+                Z1, Z2 = (Antenna.get(Frequency) for Frequency in ANTEX_FREQUENCIES)
+                if Z1 is not None and Z2 is not None:
+                    Offsets[int(Serial[1:])] = (Gamma * Z1 - Z2) / (Gamma - 1)
+                elif Z1 is not None:
+                    Offsets[int(Serial[1:])] = Z1
+
+    return Offsets
+
+def interpolateSp3Orbits(Sp3, Times, NPoints = SP3_LAGRANGE_POINTS):
+    """
+    Interpolate the SP3 positions of all the satellites at the given times,
+    with a Lagrange polynomial of NPoints nodes centred on each time.
+
+    Returns:
+    - Positions: ECEF positions [m] (NTimes x NSats x 3), NaN outside the
+      SP3 time span or if a node is absent.
+    """
+    Sp3Times = Sp3["Times"]
+    Times = np.asarray(Times, dtype=float)
+    NPoints = min(NPoints, len(Sp3Times))
+
+    # First node of the window of each time
+    Epochs = np.searchsorted(Sp3Times, Times, side='right') - 1
+    First = np.clip(Epochs - NPoints // 2 + 1, 0, len(Sp3Times) - NPoints)
+    Nodes = First[:, None] + np.arange(NPoints)
+
+    Weights = computeLagrangeWeights(Sp3Times[Nodes], Times)
+    Positions = np.einsum('tn,tnsc->tsc', Weights, Sp3["Positions"][Nodes])
+
+    Outside = (Times < Sp3Times[0]) | (Times > Sp3Times[-1])
+    Positions[Outside] = np.nan
+
+    return Positions
+
+def interpolateSp3Clocks(Sp3, Times):
+    """
+    Interpolate linearly the SP3 clocks of all the satellites at the given times.
+
+    Returns:
+    - Clocks: Clock offsets [s] (NTimes x NSats), NaN outside the SP3 time span
+      or if a neighbour clock is absent.
+    """
+    Sp3Times = Sp3["Times"]
+    Times = np.asarray(Times, dtype=float)
+
+    Epochs = np.clip(np.searchsorted(Sp3Times, Times, side='right') - 1, 0, len(Sp3Times) - 2)
+    Weights = ((Times - Sp3Times[Epochs]) / (Sp3Times[Epochs + 1] - Sp3Times[Epochs]))[:, None]
+    Clocks = (1.0 - Weights) * Sp3["Clocks"][Epochs] + Weights * Sp3["Clocks"][Epochs + 1]
+
+    Outside = (Times < Sp3Times[0]) | (Times > Sp3Times[-1])
+    Clocks[Outside] = np.nan
+
+    return Clocks
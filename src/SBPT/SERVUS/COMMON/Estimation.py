@@ -0,0 +1,188 @@
+import numpy as np
+
+# Default threshold of the normalized residuals monitor (sigmas)
+ESTIMATION_THRESHOLD = 5.0
+
+# Relative tolerance of the rank of the square root information matrix
+ESTIMATION_RANK_EPS = 1e3 * np.finfo(float).eps
+
+# ------------------------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def setCovariance(Estimation, X, P):
+    """
+    Set the state and its covariance, converting them to the square root
+    information form: R = chol(P^-1)', Z = R X.
+    """
+    L = np.linalg.cholesky(np.linalg.inv(P))
+    Estimation["R"] = np.swapaxes(L, -1, -2)
+    Estimation["Z"] = (Estimation["R"] @ X[..., None])[..., 0]
+
+def updateRow(Estimation, A, B):
+    """
+    Measurement update of the state with one weighted observation row
+    (A = H / s, B = Y / s), in square root information form: Givens
+    rotations fold the row into the triangular R and Z, column by column
+    (O(n^2) per observation). The remainder of B is the normalized innovation
+    of the observation. Unlike the covariance form update, it keeps the
+    accuracy of the batch WLSQ with diffuse a priori.
+    """
+    R, Z = Estimation["R"], Estimation["Z"]
+    for Column in range(R.shape[-1]):
+        Diagonal, Value = R[..., Column, Column], A[..., Column]
+        Norm = np.hypot(Diagonal, Value)
+        Cos = np.divide(Diagonal, Norm, out=np.ones_like(Norm), where=Norm > 0)
+        Sin = np.divide(Value, Norm, out=np.zeros_like(Norm), where=Norm > 0)
+
+        RRow = R[..., Column, Column:].copy()
+        R[..., Column, Column:] = Cos[..., None] * RRow + Sin[..., None] * A[..., Column:]
+        A[..., Column:] = Cos[..., None] * A[..., Column:] - Sin[..., None] * RRow
+        ZValue = Z[..., Column].copy()
+        Z[..., Column] = Cos * ZValue + Sin * B
+        B = Cos * B - Sin * ZValue
+
+    # Chi-square of the innovations (equal to the sum of the weighted squared
+    # residuals of the batch WLSQ solution when there is no process noise)
+    Estimation["Chi2"] = Estimation["Chi2"] + B**2
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def initializeEstimation(X0, P0, Forgetting=1.0):
+    """
+    Initialize a recursive Weighted Least Squares / Kalman filter estimation.
+
+    Several independent estimations of the same problem (e.g. a clock model
+    per satellite) can be run at once stacking them in the leading dimensions
+    of X0 (... x NParams) and P0 (... x NParams x NParams).
+
+    Parameters:
+    - X0: A priori state.
+    - P0: A priori state covariance (large values for an unknown state), or
+      None for no a priori (diffuse: zero information).
+    - Forgetting: Forgetting factor of the recursive WLSQ in (0, 1], fading
+      the observations of the previous updates (e.g. epochs) at each update
+      (1 weights all the observations equally).
+
+    Returns:
+    - Estimation: Dictionary with the square root information matrix "R" and
+      vector "Z" (R X = Z, see getEstimationState), the "Forgetting" factor,
+      the chi-square of the innovations "Chi2" and the number of
+      observations processed "NObs".
+    """
+    X0 = np.asarray(X0, dtype=float)
+    Estimation = {
+        "Forgetting": Forgetting,
+        "Chi2": np.zeros(X0.shape[:-1]),
+        "NObs": 0,
+    }
+    if P0 is None:
+        Estimation["R"] = np.zeros(X0.shape + X0.shape[-1:])
+        Estimation["Z"] = np.zeros(X0.shape)
+    else:
+        setCovariance(Estimation, X0, np.array(P0, dtype=float))
+
+    return Estimation
+
+def getEstimationState(Estimation):
+    """
+    Solve the state and its covariance from the square root information
+    matrix R and vector Z (R X = Z, P = R^-1 R^-T), only when needed.
+
+    Returns:
+    - X: State (... x NParams), NaN while it is not observable (e.g. without
+      a priori, before enough observations are processed).
+    - P: State covariance (... x NParams x NParams), NaN if not observable.
+    """
+    R, Z = Estimation["R"], Estimation["Z"]
+
+    # Rank of R from its diagonal, with a margin over the rounding errors
+    Diagonal = np.abs(np.diagonal(R, axis1=-2, axis2=-1))
+    Tolerance = Diagonal.max(axis=-1, keepdims=True) * R.shape[-1] * ESTIMATION_RANK_EPS
+    Observable = np.all(Diagonal > Tolerance, axis=-1)
+
+    # The unobservable states are solved with the identity and then discarded
+    Identity = np.eye(R.shape[-1])
+    R = np.where(Observable[..., None, None], R, Identity)
+    RInv = np.linalg.solve(R, np.broadcast_to(Identity, R.shape))
+    X = (RInv @ Z[..., None])[..., 0]
+    P = RInv @ np.swapaxes(RInv, -1, -2)
+
+    return np.where(Observable[..., None], X, np.nan), np.where(Observable[..., None, None], P, np.nan)
+
+def predictEstimation(Estimation, F=None, Q=None):
+    """
+    Time update of the Kalman filter: X = F X, P = F P F' + Q.
+    Without F and Q the state is constant (recursive WLSQ). F alone is
+    applied in information form (R = R F^-1), so it works with an
+    unobservable state, while Q needs an observable one.
+    """
+    if F is not None:
+        F = np.asarray(F, dtype=float)
+        Estimation["R"] = np.swapaxes(np.linalg.solve(np.swapaxes(F, -1, -2),
+            np.swapaxes(Estimation["R"], -1, -2)), -1, -2)
+    if Q is not None:
+        X, P = getEstimationState(Estimation)
+        setCovariance(Estimation, X, P + Q)
+
+def updateEstimation(Estimation, H, Y, Sigmas):
+    """
+    Measurement update of the estimation with a batch of uncorrelated
+    observations Y = H X + e, e ~ N(0, Sigmas^2). The observations are
+    folded one at a time (O(n^2) each), so the cost grows linearly with the
+    number of observations, and the result is the one of the batch WLSQ.
+
+    Parameters:
+    - H: Design matrix (... x NObs x NParams).
+    - Y: Observations (... x NObs).
+    - Sigmas: Sigma of each observation (... x NObs, or a scalar).
+    """
+    Y = np.asarray(Y, dtype=float)
+    Sigmas = np.broadcast_to(np.asarray(Sigmas, dtype=float), Y.shape)
+    Weighted = np.asarray(H, dtype=float) / Sigmas[..., None]
+    Y = Y / Sigmas
+
+    # Stacked estimations are updated in place, in arrays of the batch shape
+    Shape = Y.shape[:-1]
+    NParams = Weighted.shape[-1]
+    Estimation["R"] = np.array(np.broadcast_to(Estimation["R"], Shape + (NParams, NParams)))
+    Estimation["Z"] = np.array(np.broadcast_to(Estimation["Z"], Shape + (NParams,)))
+
+    # Fade the past observations of the recursive WLSQ (P / Forgetting)
+    if Estimation["Forgetting"] != 1.0:
+        Estimation["R"] *= np.sqrt(Estimation["Forgetting"])
+        Estimation["Z"] *= np.sqrt(Estimation["Forgetting"])
+
+    for Row in range(Y.shape[-1]):
+        updateRow(Estimation, Weighted[..., Row, :].copy(), Y[..., Row])
+    Estimation["NObs"] += Y.shape[-1]
+
+def monitorResiduals(Estimation, H, Y, Sigmas, Threshold=ESTIMATION_THRESHOLD):
+    """
+    Compute the normalized residuals of a batch of observations against the
+    current state, without updating it: (Y - H X) / sqrt(diag(H P H') + Sigmas^2).
+    It can be run before updateEstimation to exclude the outliers.
+
+    Returns:
+    - Normalized: Normalized residual of each observation (... x NObs).
+    - Outliers: Observations whose normalized residual exceeds the threshold.
+    """
+    X, P = getEstimationState(Estimation)
+    H = np.asarray(H, dtype=float)
+    Residuals = np.asarray(Y, dtype=float) - (H @ X[..., None])[..., 0]
+
+    # Only the diagonal of H P H' is needed
+    Variances = np.einsum('...ij,...jk,...ik->...i', H, P, H) + \
+        np.asarray(Sigmas, dtype=float)**2
+    Normalized = Residuals / np.sqrt(Variances)
+
+    return Normalized, np.abs(Normalized) > Threshold
+
+def buildPolynomialDesign(Times, Degree, Epoch=0.0):
+    """
+    Build the design matrix of a polynomial of time (e.g. 1 for an offset and
+    drift clock model, 2 for a parabola): columns 1, t, t^2... with t = Times - Epoch.
+    """
+    return (np.asarray(Times, dtype=float)[..., None] - Epoch)**np.arange(Degree + 1)
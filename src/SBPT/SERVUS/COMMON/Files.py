@@ -1,29 +1,438 @@
 import sys
-from pandas import read_csv
+import os
+import io
+import numpy as np
+from itertools import chain
 from COMMON.Dates import convertYearMonthDay2JulianDay
+from COMMON.Compression import openDataFile, removeCompressionSuffix
+from COMMON.Schemas import getSchemaColumns, getSchemaDtypes, getSchemaHeader, getSchemaFormat
+from COMMON.Parquet import getFilePartitions, getParquetPath, writeParquetData, readParquetData
 from collections import OrderedDict
 
-def readDataFile(dataFilePath, columnNameList, skipRows = 1):
+# Fast parsing of the data files written with fixed printf formats (INFO,
+# STAT... files), whose lines have all the same layout: the file is read as
+# bytes and viewed as a matrix of lines, the fields are located from the
+# first line and only the requested columns are converted, with array
+# operations over all the lines at once. Numeric fields are converted
+# exactly (integer mantissa over a power of ten, as read_csv does) and text
+# fields (e.g. the PRN G05) are mapped to integer codes of their labels.
+# Files with irregular lines (e.g. a field wider than its format) are left
+# to the generic pandas parser.
+
+# Maximum mantissa converted exactly with the fast path (2^53)
+MAX_FAST_MANTISSA = float(1 << 53)
+
+# Number of lines whose fields are transposed at once (fitting in the cache)
+FIXED_BLOCK_LINES = 4096
+
+# Maximum number of digits accumulated in 32 bit integers
+MAX_UINT32_DIGITS = 9
+
+# Number of lines formatted at once by the bulk writers
+WRITE_BLOCK_LINES = 1 << 16
+
+def skipDataRows(Buffer, skipRows):
+    """
+    Get the offset of the first byte after the skipRows first lines.
+    """
+    Offset = 0
+    for _ in range(skipRows):
+        Offset = Buffer.find(b"\n", Offset) + 1
+        if Offset == 0:
+            return len(Buffer)
+
+    return Offset
+
+def getFixedLayout(Buffer, Offset):
+    """
+    View the lines of a data file from Offset as a matrix (NLines x LineLength)
+    and locate the end of each field from the first line.
+
+    Returns:
+    - Lines: Matrix of the bytes of the lines (None if the lines have not
+      all the same length).
+    - Ends: Offset after the last byte of each field in the lines. The
+      field k spans the bytes from Ends[k-1] (its leading blanks) to Ends[k].
+    """
+    LineLength = Buffer.find(b"\n", Offset) + 1 - Offset
+    if LineLength <= 0 or (len(Buffer) - Offset) % LineLength != 0:
+        return None, None
+    Lines = np.frombuffer(Buffer, dtype=np.uint8)[Offset:].reshape(-1, LineLength)
+    if not np.all(Lines[:, -1] == ord("\n")):
+        return None, None
+
+    Blank = Lines[0] <= ord(" ")
+    Ends = np.flatnonzero(~Blank[:-1] & Blank[1:]) + 1
+
+    return Lines, Ends
+
+def transposeFixedField(Field):
+    """
+    Transpose the bytes of a field (NLines x Width) into one array per byte
+    position (Width x NLines), by blocks of lines.
+    """
+    Planes = np.empty(Field.shape[::-1], dtype=np.uint8)
+    for Line in range(0, len(Field), FIXED_BLOCK_LINES):
+        Planes[:, Line:Line + FIXED_BLOCK_LINES] = Field[Line:Line + FIXED_BLOCK_LINES].T
+
+    return Planes
+
+def parseFixedNumbers(Planes):
+    """
+    Parse right aligned numbers (sign, digits and a decimal point in the same
+    position in all the lines) from the byte positions of their field.
+
+    Returns:
+    - Mantissa: Signed integer mantissa of the numbers (float64, exact).
+    - Decimals: Number of decimal digits (None if there is no decimal point).
+    Or None if the fields are not numbers with that layout.
+    """
+    Mantissa = np.zeros(Planes.shape[1], dtype=np.float64)
+    Accumulated = np.zeros(Planes.shape[1], dtype=np.uint32)
+    NAccumulated = 0
+    Negative = None
+    PreviousDigits = None
+    Decimals = None
+    for Plane in Planes:
+        if Plane[0] == ord(".") and Decimals is None and np.all(Plane == ord(".")):
+            Decimals = 0
+            continue
+        Digits = Plane - np.uint8(ord("0"))
+        IsDigit = Digits < 10
+        if not np.all(IsDigit):
+            # Leading blanks and sign: digits are followed by digits only
+            if Decimals is not None or (PreviousDigits is not None and \
+                np.any(PreviousDigits > IsDigit)):
+                return None
+            IsSign = Plane == ord("-")
+            if np.count_nonzero(IsDigit | IsSign | (Plane == ord(" ")) | (Plane == ord("+"))) != \
+                len(Plane):
+                return None
+            Negative = IsSign if Negative is None else Negative | IsSign
+            Digits = np.where(IsDigit, Digits, 0)
+            PreviousDigits = IsDigit
+        else:
+            PreviousDigits = None
+
+        # Digits accumulated in 32 bit integers, moved to the mantissa
+        # before they overflow
+        if NAccumulated == MAX_UINT32_DIGITS:
+            Mantissa = Mantissa * 10.0 ** NAccumulated + Accumulated
+            Accumulated[:] = 0
+            NAccumulated = 0
+        Accumulated *= 10
+        Accumulated += Digits
+        NAccumulated += 1
+        if Decimals is not None:
+            Decimals += 1
+
+    # The last byte of the fields is a digit in all the lines
+    if NAccumulated == 0 or PreviousDigits is not None:
+        return None
+
+    Mantissa = Mantissa * 10.0 ** NAccumulated + Accumulated
+    if np.max(Mantissa) >= MAX_FAST_MANTISSA:
+        return None
+    if Negative is not None:
+        Mantissa[Negative] = -Mantissa[Negative]
+
+    return Mantissa, Decimals
+
+def parseFixedLabels(Field):
+    """
+    Map the text fields of a column (matrix of their bytes) to integer codes.
+
+    Returns:
+    - Codes: Code of each field.
+    - Labels: Sorted labels of the codes (without the leading blanks).
+    """
+    Width = Field.shape[1]
+    if Width <= 8:
+        # Fields as 64 bit integers, whose order is the order of the text
+        Padded = np.zeros((len(Field), 8), dtype=np.uint8)
+        Padded[:, :Width] = Field
+        Keys, Codes = np.unique(Padded.view(">u8").reshape(-1), return_inverse=True)
+        Labels = Keys.astype(">u8").view("S8")
+    else:
+        Labels, Codes = np.unique(Field.view("S%d" % Width).reshape(-1), return_inverse=True)
+
+    return Codes.reshape(-1), np.char.strip(Labels.astype(str))
+
+def parseFixedColumn(Field):
+    """
+    Parse a column of fields (matrix of their bytes) into an array: int64 if
+    all the fields are integers, float64 if they are numbers, or else integer
+    codes of the field labels.
+
+    Returns:
+    - Column: Array of values (or codes) of the column, None if the fields
+      are irregular (e.g. two fields in the span of one).
+    - Labels: Sorted labels of the codes (None for numeric columns).
+    """
+    Numbers = parseFixedNumbers(transposeFixedField(Field))
+    if Numbers is not None:
+        Mantissa, Decimals = Numbers
+        if Decimals is None:
+            return Mantissa.astype(np.int64), None
+        return Mantissa / 10.0 ** Decimals, None
+
+    # One field per line: its bytes are not blank after the first one
+    Field = np.ascontiguousarray(Field)
+    Blank = Field == ord(" ")
+    if np.any(Blank[:, -1]) or np.any(Blank[:, 1:] > Blank[:, :-1]):
+        return None, None
+
+    # Other numbers (e.g. with exponents, nan or too many digits) or labels
+    Fields = Field.view("S%d" % Field.shape[1]).reshape(-1)
+    for Type in [np.int64, np.float64]:
+        try:
+            return Fields.astype(Type), None
+        except (ValueError, OverflowError):
+            continue
+
+    return parseFixedLabels(Field)
+
+def parseFixedBuffer(Buffer, columnNameList, skipRows = 1):
+    """
+    Parse specific columns of the content of a data file (see readFixedFile).
+    """
+    Lines, Ends = getFixedLayout(Buffer, skipDataRows(Buffer, skipRows))
+    if Lines is None or not columnNameList or max(columnNameList) >= len(Ends):
+        return None, {}
+
+    Columns = OrderedDict({})
+    Labels = {}
+    Starts = np.r_[0, Ends[:-1]]
+    for Column in sorted(set(columnNameList)):
+        # The field is separated from the previous one in all the lines
+        if Column > 0 and np.any(Lines[:, Starts[Column]] != ord(" ")):
+            return None, {}
+        Columns[Column], ColumnLabels = parseFixedColumn(Lines[:, Starts[Column]:Ends[Column]])
+        if Columns[Column] is None:
+            return None, {}
+        if ColumnLabels is not None:
+            Labels[Column] = ColumnLabels
+
+    return Columns, Labels
+
+def readFixedFile(dataFilePath, columnNameList, skipRows = 1):
+    """
+    Read specific columns from a data file written with fixed formats, with
+    the fast parser (see parseFixedColumn).
+
+    Parameters:
+    - dataFilePath: Path to the data file (compressed or not).
+    - columnNameList: List of column indexes to be read.
+    - skipRows: Number of rows to skip. 1 by default.
+
+    Returns:
+    - Columns: Dictionary with the array of each column, in file order (None
+      if the lines are irregular).
+    - Labels: Dictionary with the labels of the codes of each text column.
+    """
+    with openDataFile(dataFilePath, 'rb') as f:
+        Buffer = f.read()
+
+    return parseFixedBuffer(Buffer, list(columnNameList), skipRows)
+
+def readDataFile(dataFilePath, columnNameList, skipRows = 1, dtype = None):
     """
     Read specific columns from a statistics file and return a DataFrame.
+    Compressed files are decoded on the fly (see COMMON.Compression), and
+    regular files are parsed with the fast parser (see readFixedFile).
 
     Parameters:
     - statisticsFilePath: Path to the statistics file.
     - columnNameList: List of column names to be read.
     - skipRows: Number of rows to skip. 1 by default.
+    - dtype: Dictionary with the dtype of some columns (e.g. from the schema
+      of the file, see readSchemaFile), instead of the inferred ones.
 
     Returns:
     - FetchedData containing the specified columns.
     """
-    # Read the specified columns from the file
+    # pandas is imported here so that it is only loaded when needed
+    from pandas import read_csv, DataFrame
+
+    columnNameList = list(columnNameList)
+    dtype = dict((Column, Type) for Column, Type in (dtype or {}).items() if Column in columnNameList)
+    with openDataFile(dataFilePath, 'rb') as f:
+        Buffer = f.read()
+
+    # Parse the specified columns with the fast parser, text columns back
+    # to their labels
+    Columns, Labels = parseFixedBuffer(Buffer, columnNameList, skipRows)
+    if Columns is not None:
+        for Column, ColumnLabels in Labels.items():
+            Columns[Column] = ColumnLabels.astype(object)[Columns[Column]]
+        for Column, Type in dtype.items():
+            Columns[Column] = Columns[Column].astype(Type, copy=False)
+        return DataFrame(Columns)
+
+    # Read the specified columns from the file with the generic parser
     FetchedData = read_csv(
-        dataFilePath, delim_whitespace=True, skiprows=skipRows, header=None, usecols=columnNameList)    
+        io.BytesIO(Buffer), sep=r"\s+", skiprows=skipRows, header=None, usecols=columnNameList,
+        dtype=dtype or None)
 
     # Set column names based on the provided columnList    
     #FetchedData.columns = columnNameList
 
     return FetchedData
 
+def readSchemaFile(dataFilePath, Schema, Names = None, skipRows = 1):
+    """
+    Read specific columns from a data file with the dtypes of its schema
+    (see COMMON.Schemas), so that the types are not inferred and the flags
+    and counters are held in compact integers.
+
+    Parameters:
+    - dataFilePath: Path to the data file.
+    - Schema: Schema of the file type (e.g. SatInfoSchema).
+    - Names: List of column names to be read (all of them by default).
+    - skipRows: Number of rows to skip. 1 by default.
+
+    Returns:
+    - FetchedData with the specified columns, labelled by their index.
+    """
+    return readDataFile(dataFilePath, getSchemaColumns(Schema, Names), skipRows,
+        dtype=getSchemaDtypes(Schema, Names))
+
+def isSingleValue(Column):
+    """
+    Check if a column to be written is a single value, repeated in all the lines.
+    """
+    return isinstance(Column, (str, bytes)) or not hasattr(Column, "__len__") or \
+        (isinstance(Column, np.ndarray) and Column.ndim == 0)
+
+def getColumnValues(Column, NLines):
+    """
+    Get the values of a column to be written as a list (numpy arrays are
+    converted at once, single values repeated in all the lines).
+    """
+    if isSingleValue(Column):
+        return [Column.item() if isinstance(Column, np.ndarray) else Column] * NLines
+    if isinstance(Column, np.ndarray):
+        return Column.tolist()
+
+    return list(Column)
+
+def writeDataLines(f, LineFormat, Columns):
+    """
+    Write the lines of a data file from its columns, formatting blocks of
+    lines with a single printf operation (the line format repeated over the
+    values of the block), so that the text is the same as formatting each
+    line with LineFormat, and written with one write per block.
+
+    Parameters:
+    - f: File open to write.
+    - LineFormat: printf format of one line, with its line end.
+    - Columns: List of the columns of the lines (lists, arrays or single
+      values), in the order of the format fields.
+    """
+    NLines = max([len(Column) for Column in Columns if not isSingleValue(Column)], default=0)
+    Columns = [getColumnValues(Column, NLines) for Column in Columns]
+    for First in range(0, NLines, WRITE_BLOCK_LINES):
+        Block = [Column[First:First + WRITE_BLOCK_LINES] for Column in Columns]
+        f.write((LineFormat * len(Block[0])) % tuple(chain.from_iterable(zip(*Block))))
+
+def writeDataFile(dataFilePath, Header, LineFormat, Columns):
+    """
+    Write a data file: its header line and its lines from their columns
+    (see writeDataLines).
+    """
+    with open(dataFilePath, 'w') as f:
+        f.write(Header)
+        writeDataLines(f, LineFormat, Columns)
+
+def writeSchemaFile(dataFilePath, Schema, Columns, LineFormat = None):
+    """
+    Write a data file with the header and the line format of its schema
+    (see COMMON.Schemas).
+
+    Parameters:
+    - dataFilePath: Path to the data file.
+    - Schema: Schema of the file type (e.g. SatGridSchema).
+    - Columns: Dictionary with the values of each column, by name.
+    - LineFormat: Line format, if not the one of the schema.
+    """
+    if LineFormat is None:
+        LineFormat = getSchemaFormat(Schema) + "\n"
+    writeDataFile(dataFilePath, getSchemaHeader(Schema), LineFormat,
+        [Columns[Name] for Name in Schema["Names"]])
+
+def writeSchemaRows(dataFilePath, Schema, Rows, LineFormat = None):
+    """
+    Write a data file from its lines, given as tuples of values in the order
+    of the columns of its schema (see writeSchemaFile).
+    """
+    Columns = list(zip(*Rows)) or [[] for _ in Schema["Names"]]
+    writeSchemaFile(dataFilePath, Schema, dict(zip(Schema["Names"], Columns)), LineFormat)
+
+def getParquetFilePath(dataFilePath, Schema, ParquetDir):
+    """
+    Get the path of the Parquet file of a text file in the dataset of its
+    file type, partitioned by its day and GEO set (see COMMON.Parquet).
+    """
+    Name = os.path.splitext(os.path.basename(removeCompressionSuffix(dataFilePath)))[0]
+
+    return getParquetPath(ParquetDir, Schema["Type"], getFilePartitions(dataFilePath), Name)
+
+def exportParquetFile(dataFilePath, Schema, ParquetDir, skipRows = 1):
+    """
+    Export a text file to the Parquet dataset of its file type, with the
+    names and dtypes of its schema.
+
+    Parameters:
+    - dataFilePath: Path to the data file (compressed or not).
+    - Schema: Schema of the file type (e.g. SatInfoSchema).
+    - ParquetDir: Directory of the datasets.
+    - skipRows: Number of rows to skip. 1 by default.
+
+    Returns:
+    - ParquetPath: Path of the Parquet file written.
+    """
+    Data = readSchemaFile(dataFilePath, Schema, skipRows=skipRows)
+    Data.columns = Schema["Names"]
+    ParquetPath = getParquetFilePath(dataFilePath, Schema, ParquetDir)
+    writeParquetData(Data, ParquetPath)
+
+    return ParquetPath
+
+def readParquetFile(ParquetDir, Schema, Names = None, Filters = None):
+    """
+    Read specific columns of the rows of the Parquet dataset of a file type
+    selected by filters, e.g. {"DAY": ["Y19D014"], "SoD": (0, 3600),
+    "PRN": ["G01"]} (see COMMON.Parquet.readParquetData).
+
+    Returns:
+    - FetchedData with the specified columns, labelled by their name.
+    """
+    return readParquetData(ParquetDir, Schema["Type"], Names, Filters)
+
+# Function to read the command line options following the scenario path
+def readOptions(Args):
+    """
+    Read the command line options, given as --option or --option=value.
+
+    Parameters:
+    - Args: List of arguments (i.e. sys.argv[2:]).
+
+    Returns:
+    - Options: Dictionary with the value of each option (True if no value given).
+    """
+    Options = OrderedDict({})
+    for Arg in Args:
+        if not Arg.startswith("--"):
+            sys.stderr.write("ERROR: Bad option: %s\n" % Arg)
+            continue
+        if "=" in Arg:
+            Key, Value = Arg.split("=", 1)
+            Options[Key] = Value
+        else:
+            Options[Arg] = True
+
+    return Options
+
 # Function to read the configuration file
 def readConf(CfgFile):
     Conf = OrderedDict({})
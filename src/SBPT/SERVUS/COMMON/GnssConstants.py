@@ -26,6 +26,9 @@ OMEGA_EARTH=7.2921151467e-5
 # Earth's gravitational 
 MU_EARTH=3.986004415e+14
 
+# GPS ICD value of the Earth's gravitational constant (m^3/s^2)
+GPS_MU_EARTH=3.986005e+14
+
 # Earth's eccentricity
 ECCENTRICITY_EARTH=8.2e-2
 
@@ -99,6 +102,9 @@ S_IN_D = 86400
 # Days in one week
 D_IN_W = 7
 
+# Seconds in one week
+S_IN_W = 604800
+
 # Julian date for GPS start epoch (1980 January 6)
 JD_0 = 2444244.5
 
@@ -0,0 +1,250 @@
+import numpy as np
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def prnLabel2Number(PrnLabel):
+    """
+    Convert a PRN label (e.g. G05) into its number (e.g. 5).
+    """
+    return int(PrnLabel[1:])
+
+def buildGroupIndex(Keys, KeyParser=None):
+    """
+    Build a grouping index of the rows of a table by a key column (PRN, IGP id...),
+    so that the rows of each group can be sliced without filtering the whole table.
+
+    Parameters:
+    - Keys: Key of each row (array-like).
+    - KeyParser: Optional function converting each key into a number
+      (e.g. prnLabel2Number). It is applied once per group, not per row.
+
+    Returns:
+    - GroupIndex: Dictionary with
+        "Keys": Sorted unique keys.
+        "Codes": Categorical code of each row (position of its key in "Keys").
+        "Order": Row positions sorted by group, keeping the rows order inside each group.
+        "Offsets": Start of each group in "Order" (plus the total number of rows at the end).
+        "KeyValues": Parsed value of each key (only if KeyParser is given).
+        "RowValues": Parsed value of each row (only if KeyParser is given).
+    """
+    Keys = np.asarray(Keys)
+
+    GroupIndex = {}
+    GroupIndex["Keys"], GroupIndex["Codes"] = np.unique(Keys, return_inverse=True)
+    GroupIndex["Codes"] = GroupIndex["Codes"].reshape(-1)
+    GroupIndex["Order"] = np.argsort(GroupIndex["Codes"], kind="stable")
+    GroupIndex["Offsets"] = np.r_[0, np.cumsum(np.bincount(GroupIndex["Codes"],
+        minlength=len(GroupIndex["Keys"])))]
+
+    if KeyParser is not None:
+        GroupIndex["KeyValues"] = np.array([KeyParser(Key) for Key in GroupIndex["Keys"]])
+        GroupIndex["RowValues"] = GroupIndex["KeyValues"][GroupIndex["Codes"]]
+
+    return GroupIndex
+
+def getGroupPosition(GroupIndex, Key):
+    """
+    Get the position of a key in the index, or None if it is not present.
+    """
+    Position = np.searchsorted(GroupIndex["Keys"], Key)
+    if Position < len(GroupIndex["Keys"]) and GroupIndex["Keys"][Position] == Key:
+        return Position
+
+    return None
+
+def getGroupRows(GroupIndex, Key):
+    """
+    Get the positions of the rows of a group (a view of the index, no copy).
+    Use them with DataFrame.iloc or with NumPy arrays.
+    """
+    Position = getGroupPosition(GroupIndex, Key)
+    if Position is None:
+        return GroupIndex["Order"][:0]
+
+    return GroupIndex["Order"][GroupIndex["Offsets"][Position]:GroupIndex["Offsets"][Position + 1]]
+
+def iterateGroups(GroupIndex):
+    """
+    Iterate over the groups of the index, yielding (Key, Rows) in key order.
+    """
+    Offsets = GroupIndex["Offsets"]
+    for Position, Key in enumerate(GroupIndex["Keys"]):
+        yield Key, GroupIndex["Order"][Offsets[Position]:Offsets[Position + 1]]
+
+def buildLocationIndex(Ids, Lats, Lons):
+    """
+    Build a spatial index of the rows of a table by location id (e.g. IGP id),
+    so that the time series of any location can be sliced from the table
+    and the nearest location to arbitrary coordinates can be found.
+
+    Parameters:
+    - Ids: Location id of each row.
+    - Lats, Lons: Latitude and longitude [deg] of each row.
+
+    Returns:
+    - LocationIndex: Group index by id (see buildGroupIndex) plus
+        "Lats", "Lons": Coordinates of each id.
+    """
+    LocationIndex = buildGroupIndex(Ids)
+
+    # Coordinates of each id, taken from its first row
+    FirstRows = LocationIndex["Order"][LocationIndex["Offsets"][:-1]]
+    LocationIndex["Lats"] = np.asarray(Lats, dtype=float)[FirstRows]
+    LocationIndex["Lons"] = np.asarray(Lons, dtype=float)[FirstRows]
+
+    return LocationIndex
+
+def findNearestLocation(LocationIndex, Lat, Lon):
+    """
+    Find the location of the index nearest to the given coordinates [deg],
+    using the great circle (haversine) distance.
+
+    Returns:
+    - Position: Position of the location in LocationIndex["Keys"].
+    - Distance: Great circle distance [deg].
+    """
+    Lat1 = np.radians(Lat)
+    Lat2 = np.radians(LocationIndex["Lats"])
+    DeltaLat = Lat2 - Lat1
+    DeltaLon = np.radians(LocationIndex["Lons"] - Lon)
+
+    Hav = np.sin(DeltaLat / 2)**2 + np.cos(Lat1) * np.cos(Lat2) * np.sin(DeltaLon / 2)**2
+    Distance = np.degrees(2 * np.arcsin(np.sqrt(np.clip(Hav, 0, 1))))
+    Position = int(np.argmin(Distance))
+
+    return Position, Distance[Position]
+
+def findNearestLocations(LocationIndex, Lats, Lons, ChunkSize=10000):
+    """
+    Find the locations of the index nearest to arrays of coordinates [deg]
+    (e.g. the pierce points of all the LOS of a day) in one array pass.
+    The nearest location along the great circle is the one whose unit vector
+    has the largest scalar product with the unit vector of the point.
+
+    Parameters:
+    - LocationIndex: Location index (see buildLocationIndex).
+    - Lats, Lons: Coordinates of the points [deg].
+    - ChunkSize: Number of points processed at once, bounding the memory used.
+
+    Returns:
+    - Positions: Position of the nearest location of each point in LocationIndex["Keys"].
+    - Distances: Great circle distances [deg].
+    """
+    def unitVectors(Lats, Lons):
+        Lats = np.radians(np.atleast_1d(np.asarray(Lats, dtype=float)))
+        Lons = np.radians(np.atleast_1d(np.asarray(Lons, dtype=float)))
+        return np.column_stack((np.cos(Lats) * np.cos(Lons),
+            np.cos(Lats) * np.sin(Lons), np.sin(Lats)))
+
+    Locations = unitVectors(LocationIndex["Lats"], LocationIndex["Lons"])
+    Points = unitVectors(Lats, Lons)
+    Positions = np.zeros(len(Points), dtype=int)
+    Distances = np.zeros(len(Points))
+
+    for First in range(0, len(Points), ChunkSize):
+        Rows = slice(First, min(First + ChunkSize, len(Points)))
+        Positions[Rows] = np.argmax(Points[Rows] @ Locations.T, axis=1)
+        # Chord length to great circle distance (accurate also for close points)
+        Chords = np.linalg.norm(Points[Rows] - Locations[Positions[Rows]], axis=1)
+        Distances[Rows] = np.degrees(2 * np.arcsin(np.clip(Chords / 2, 0, 1)))
+
+    return Positions, Distances
+
+def getLocationRows(LocationIndex, Lat, Lon):
+    """
+    Get the rows of the location nearest to the given coordinates [deg].
+
+    Returns:
+    - Rows: Positions of the rows of the location (a view of the index).
+    - Key: Id of the location.
+    - LocLat, LocLon: Coordinates of the location [deg].
+    """
+    Position, _ = findNearestLocation(LocationIndex, Lat, Lon)
+    Offsets = LocationIndex["Offsets"]
+    Rows = LocationIndex["Order"][Offsets[Position]:Offsets[Position + 1]]
+
+    return Rows, LocationIndex["Keys"][Position], \
+        LocationIndex["Lats"][Position], LocationIndex["Lons"][Position]
+
+def computeStatusRuns(GroupIndex, Times, Status, RunStatus=1, MaxGap=None, Step=0):
+    """
+    Find, for every group of the index (PRN, IGP...), the runs of consecutive
+    rows with a given status (e.g. the monitoring windows), in a single
+    columnar pass. The rows of each group must be sorted by time.
+
+    Parameters:
+    - GroupIndex: Group index of the rows (see buildGroupIndex).
+    - Times: Time of each row [s].
+    - Status: Status of each row.
+    - RunStatus: Status of the runs (1: Monitored by default).
+    - MaxGap: Optional maximum time between two rows of a run [s]. Larger gaps
+      (missing rows) split the run, without counting a transition.
+    - Step: Time covered by each row [s], added to the duration of the runs.
+
+    Returns:
+    - Runs: Dictionary with
+        "Codes": Group position (in GroupIndex["Keys"]) of each run.
+        "Start", "End": Time of the first and last row of each run.
+        "Duration": End - Start + Step.
+        "NSAMPS": Number of rows of each run.
+        "Rows": Row positions sorted by group (GroupIndex["Order"]).
+        "StartRows", "EndRows": First and last row of each run in "Rows" (see reduceRuns).
+        "NTRANS": Number of transitions from RunStatus to another status of each group.
+    """
+    Order = GroupIndex["Order"]
+    Offsets = GroupIndex["Offsets"]
+    Times = np.asarray(Times)[Order]
+    InRun = np.asarray(Status)[Order] == RunStatus
+    NRows = len(Order)
+
+    # Boundaries of the groups in the sorted rows
+    GroupStart = np.zeros(NRows, dtype=bool)
+    GroupStart[Offsets[:-1][Offsets[:-1] < NRows]] = True
+    GroupEnd = np.zeros(NRows, dtype=bool)
+    GroupEnd[Offsets[1:][Offsets[1:] > 0] - 1] = True
+
+    # Rows following a data gap in their group
+    Gap = np.zeros(NRows, dtype=bool)
+    if MaxGap is not None and NRows > 1:
+        Gap[1:] = np.diff(Times) > MaxGap
+
+    # A run starts where the previous row (of the same group, without gap) is not in run,
+    # and ends where the next one is not
+    PrevInRun = np.r_[False, InRun[:-1]] & ~GroupStart & ~Gap
+    NextInRun = np.r_[InRun[1:], False] & ~GroupEnd & ~np.r_[Gap[1:], False]
+    StartRows = np.flatnonzero(InRun & ~PrevInRun)
+    EndRows = np.flatnonzero(InRun & ~NextInRun)
+
+    Runs = {}
+    Runs["Codes"] = GroupIndex["Codes"][Order[StartRows]]
+    Runs["Start"] = Times[StartRows]
+    Runs["End"] = Times[EndRows]
+    Runs["Duration"] = Runs["End"] - Runs["Start"] + Step
+    Runs["NSAMPS"] = EndRows - StartRows + 1
+    Runs["Rows"] = Order
+    Runs["StartRows"] = StartRows
+    Runs["EndRows"] = EndRows
+
+    # A transition is a run followed by a row of the same group with another status
+    NextRows = np.minimum(EndRows + 1, NRows - 1)
+    Transition = ~GroupEnd[EndRows] & ~InRun[NextRows]
+    Runs["NTRANS"] = np.bincount(Runs["Codes"][Transition], minlength=len(GroupIndex["Keys"]))
+
+    return Runs
+
+def reduceRuns(Runs, Values, Ufunc=np.minimum):
+    """
+    Reduce the values of the rows of each run (see computeStatusRuns)
+    with a NumPy ufunc, e.g. the minimum number of RIMS of each monitoring window.
+    """
+    if len(Runs["StartRows"]) == 0:
+        return np.asarray(Values)[:0]
+
+    # Sentinel row, so that the end of the last run is a valid index
+    Values = np.asarray(Values)[Runs["Rows"]]
+    Values = np.r_[Values, Values[-1:]]
+    Limits = np.ravel(np.column_stack((Runs["StartRows"], Runs["EndRows"] + 1)))
+
+    return Ufunc.reduceat(Values, Limits)[::2]
@@ -0,0 +1,91 @@
+import numpy as np
+from COMMON.StreamingStatistics import initializeMoments, updateMoments, getMomentsStatistics
+from COMMON.StreamingStatistics import initializeHistogram, updateHistogram, collapseHistogram
+from COMMON.StreamingStatistics import computeOverboundingSigma
+
+# Gaussian overbounding of normalized errors (error / broadcast sigma, e.g.
+# SREW/SFLT-W or GIVDE/SigmaGIVE): the overbounding sigma of the normalized
+# errors is the inflation factor k of the broadcast sigma for N(0, k sigma)
+# to overbound the error distribution in the tails.
+
+# Default resolution of the normalized error histograms
+OVERBOUND_RESOLUTION = 0.01
+
+# Default percentile [%] above which the CDF is overbounded (the tails)
+OVERBOUND_MIN_PERCENTILE = 68.0
+
+# Default minimum number of samples in the tail of an overbounded bin
+OVERBOUND_MIN_TAIL_SAMPLES = 10
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def initializeOverbounding(Keys, Resolution=OVERBOUND_RESOLUTION):
+    """
+    Initialize the overbounding accumulators, updated epoch by epoch in the
+    same pass as the daily statistics.
+
+    Parameters:
+    - Keys: Keys of the overbounding (e.g. PRN labels or IGP ids).
+    - Resolution: Resolution of the normalized error histograms.
+
+    Returns:
+    - Overbound: Dictionary with the keys, their codes, the moments of the
+      normalized errors and the histograms of their absolute values.
+    """
+    Keys = list(Keys)
+
+    return {
+        "Keys": Keys,
+        "Codes": {Key: Code for Code, Key in enumerate(Keys)},
+        "Moments": initializeMoments(len(Keys)),
+        "Histogram": initializeHistogram(Resolution, len(Keys)),
+    }
+
+def updateOverbounding(Overbound, Keys, Errors):
+    """
+    Update the overbounding with the normalized errors of an epoch.
+
+    Parameters:
+    - Overbound: Overbounding accumulators (see initializeOverbounding).
+    - Keys: Key of each normalized error.
+    - Errors: Normalized errors.
+    """
+    if len(Errors) == 0:
+        return
+
+    Codes = np.array([Overbound["Codes"][Key] for Key in Keys], dtype=int)
+    updateMoments(Overbound["Moments"], Errors, Codes)
+    updateHistogram(Overbound["Histogram"], np.abs(Errors), Codes)
+
+def iterateOverbounding(Overbound, MinP=OVERBOUND_MIN_PERCENTILE,
+    MinTailSamples=OVERBOUND_MIN_TAIL_SAMPLES):
+    """
+    Iterate over the keys with samples, yielding (Key, NSAMPS, MEAN, STD, MAXABS, K)
+    in key order, and then the same outputs over all the keys with Key None.
+    K is the overbounding inflation factor, searched over all the CDF bins of
+    every key at once (see computeOverboundingSigma).
+
+    Parameters:
+    - MinP: Percentile [%] above which the CDF is overbounded.
+    - MinTailSamples: Minimum number of samples above a bin for it to be overbounded.
+    """
+    Moments = Overbound["Moments"]
+    Histogram = Overbound["Histogram"]
+
+    Stats = getMomentsStatistics(Moments)
+    MaxAbs = np.maximum(np.abs(Stats["MIN"]), np.abs(Stats["MAX"]))
+    Factors = computeOverboundingSigma(Histogram, MinP, MinTailSamples)
+    for Code, Key in enumerate(Overbound["Keys"]):
+        if Stats["N"][Code] > 0:
+            yield Key, Stats["N"][Code], Stats["MEAN"][Code], Stats["STD"][Code], \
+                MaxAbs[Code], Factors[Code]
+
+    # All the keys: moments weighted by the samples of each key
+    N = np.sum(Stats["N"])
+    if N > 0:
+        Mean = np.sum(Stats["N"] * Stats["MEAN"]) / N
+        Std = np.sqrt(np.sum(Stats["N"] * (Stats["STD"]**2 + (Stats["MEAN"] - Mean)**2)) / N)
+        Factor = computeOverboundingSigma(collapseHistogram(Histogram), MinP, MinTailSamples)[0]
+        yield None, N, Mean, Std, np.max(MaxAbs), Factor
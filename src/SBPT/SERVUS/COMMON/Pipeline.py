@@ -0,0 +1,200 @@
+import threading
+import queue
+from collections import deque
+from multiprocessing import Pool, resource_tracker
+from COMMON.Profiler import span, getTimestamp, getWorkerConfig, initWorker
+
+# Overlapped read / compute / render pipeline over the days of a scenario:
+# a reader thread prefetches the inputs of the next days while the main thread
+# computes the current day, and the figures of the previous days are rendered
+# by a pool of worker processes. The stages are connected by bounded queues,
+# so that a slow stage holds back the others (back-pressure) instead of
+# piling up days in memory.
+
+# Default number of days queued between the stages
+PIPELINE_QUEUE_SIZE = 1
+
+# Size of the blocks read to prefetch the files [bytes]
+PREFETCH_BLOCK = 1 << 20
+
+# Marker of the end of the items in the reader queue
+END_OF_ITEMS = object()
+
+# ------------------------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def runReader(Pipeline, Items, readItem):
+    """
+    Reader thread: read the items in order, blocking while the queue is full.
+    A failure is passed to the main thread, raised when the item is reached.
+    """
+    for Item in Items:
+        if Pipeline["Stop"].is_set():
+            return
+        try:
+            with span("Prefetch", "prefetch"):
+                Pipeline["Queue"].put((Item, readItem(Item), None))
+        except Exception as Error:
+            Pipeline["Queue"].put((Item, None, Error))
+            return
+
+    Pipeline["Queue"].put((END_OF_ITEMS, None, None))
+
+def runRenderTask(Task):
+    """
+    Render a figure task in a worker process: (Name, Function, Args, QueuedAt).
+    """
+    Name, Function, Args, QueuedAt = Task
+    with span(Name, "render", QueuedAt=QueuedAt):
+        return Function(*Args)
+
+def stopPipeline(Pipeline, Terminate):
+    """
+    Stop the reader thread and the render workers (terminated if Terminate,
+    else once their tasks are done). Nothing is done if already stopped.
+    """
+    Pipeline["Stop"].set()
+    # Unblock the reader if it is waiting on a full queue
+    while Pipeline["Reader"].is_alive():
+        try:
+            Pipeline["Queue"].get(timeout=0.1)
+        except queue.Empty:
+            pass
+    if Pipeline["Pool"] is not None:
+        if Terminate:
+            Pipeline["Pool"].terminate()
+        else:
+            Pipeline["Pool"].close()
+        Pipeline["Pool"].join()
+        Pipeline["Pool"] = None
+
+def completeRender(Pipeline):
+    """
+    Wait for the render tasks of the oldest item and run its callback.
+    """
+    Results, Callback = Pipeline["Pending"].popleft()
+    for Result in Results:
+        # Raise the errors of the workers
+        Result.get()
+    if Callback is not None:
+        Callback()
+
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def prefetchFiles(Paths):
+    """
+    Read the existing files of the list in blocks, so that they are served
+    from the page cache when they are processed (hiding the latency of
+    network storages).
+
+    Returns:
+    - Size: Number of bytes read.
+    """
+    Size = 0
+    for Path in Paths:
+        try:
+            with open(Path, 'rb', buffering=0) as f:
+                while True:
+                    Block = f.read(PREFETCH_BLOCK)
+                    if not Block: break
+                    Size += len(Block)
+        except OSError:
+            continue
+
+    return Size
+
+def startPipeline(Items, readItem, RenderProcs=1, QueueSize=PIPELINE_QUEUE_SIZE):
+    """
+    Start the pipeline: the reader thread starts reading the items ahead.
+
+    Parameters:
+    - Items: Items to process in order (e.g. the Julian days).
+    - readItem: Function reading an item in the reader thread (e.g. prefetchFiles
+      of the inputs of the day), whose result is yielded with the item.
+    - RenderProcs: Number of render worker processes (0 to render in the main
+      process, when the tasks are submitted).
+    - QueueSize: Number of items read ahead of the one being computed, and
+      number of items whose rendering may be pending.
+
+    Returns:
+    - Pipeline: Dictionary with the state of the pipeline.
+    """
+    # Start the resource tracker before the workers, so that they share it and
+    # the shared memory blocks of the main process (see COMMON.SharedData) are
+    # not removed when a worker exits
+    if RenderProcs > 0:
+        resource_tracker.ensure_running()
+
+    Pipeline = {
+        "Queue": queue.Queue(maxsize=max(QueueSize, 1)),
+        "QueueSize": max(QueueSize, 1),
+        "Stop": threading.Event(),
+        "Pending": deque(),
+        "Pool": Pool(RenderProcs, initializer=initWorker, initargs=(getWorkerConfig(),)) \
+            if RenderProcs > 0 else None,
+    }
+    Pipeline["Reader"] = threading.Thread(target=runReader, args=(Pipeline, list(Items), readItem),
+        daemon=True)
+    Pipeline["Reader"].start()
+
+    return Pipeline
+
+def iteratePipeline(Pipeline):
+    """
+    Iterate over the items in order, yielding (Item, Data) as soon as the reader
+    thread has read them. Errors of the reader are raised here.
+    """
+    while True:
+        Item, Data, Error = Pipeline["Queue"].get()
+        if Item is END_OF_ITEMS:
+            return
+        if Error is not None:
+            raise Error
+        yield Item, Data
+
+def submitRender(Pipeline, Tasks, Callback=None):
+    """
+    Submit the render tasks of an item. If the rendering of more than QueueSize
+    items is pending, wait for the oldest one before returning (back-pressure).
+
+    Parameters:
+    - Tasks: List of (Name, Function, Args) render tasks. The functions and
+      their arguments are sent to the workers, so they must be picklable
+      (module level functions, DataFrames, file names...).
+    - Callback: Function called in the main process when all the tasks of the
+      item are rendered (e.g. to record the figures as built).
+    """
+    if Pipeline["Pool"] is None:
+        for Task in Tasks:
+            runRenderTask(Task + (None,))
+        if Callback is not None:
+            Callback()
+        return
+
+    Results = [Pipeline["Pool"].apply_async(runRenderTask, ((Task + (getTimestamp(),)),))
+        for Task in Tasks]
+    Pipeline["Pending"].append((Results, Callback))
+    while len(Pipeline["Pending"]) > Pipeline["QueueSize"]:
+        completeRender(Pipeline)
+
+def finishPipeline(Pipeline):
+    """
+    Wait for all the pending render tasks and stop the reader and the workers.
+    """
+    while Pipeline["Pending"]:
+        completeRender(Pipeline)
+    stopPipeline(Pipeline, False)
+
+def abortPipeline(Pipeline):
+    """
+    Stop the pipeline on any exit path (to be called in a finally clause
+    after finishPipeline): if it was not finished (e.g. a day or a render
+    task failed), the render workers are terminated and the pending figures
+    dropped, without running their callbacks.
+    """
+    Pipeline["Pending"].clear()
+    stopPipeline(Pipeline, True)
@@ -1,21 +1,62 @@
-
 import sys, os
-import matplotlib as mpl
-from matplotlib.lines import Line2D
-from matplotlib.patches import Patch
-import matplotlib.pyplot as plt
-from mpl_toolkits.axes_grid1 import make_axes_locatable
 import numpy as np
-import conda
-CondaFileDir = conda.__file__
-CondaDir = CondaFileDir.split('lib')[0]
-ProjLib = os.path.join(os.path.join(CondaDir, 'share'), 'proj')
-os.environ["PROJ_LIB"] = ProjLib
-from mpl_toolkits.basemap import Basemap
 
-import warnings
-import matplotlib.cbook
-warnings.filterwarnings("ignore", category=matplotlib.cbook.mplDeprecation)
+# Resolution of the saved figures [dots per inch]
+FIGURE_DPI = 150.
+
+# Plotting libraries: they are imported on the first figure generated
+# (see importPlottingLibraries) so that compute-only runs do not pay their
+# import time and do not need them installed
+mpl = None
+plt = None
+make_axes_locatable = None
+Line2D = None
+Patch = None
+Basemap = None
+
+def resolveProjLib():
+    """
+    Resolve the PROJ data directory needed by Basemap without importing conda:
+    keep PROJ_LIB if already defined, otherwise look in the active conda
+    environment and in the Python installation prefix.
+    """
+    if os.environ.get("PROJ_LIB"):
+        return os.environ["PROJ_LIB"]
+
+    for Prefix in [os.environ.get("CONDA_PREFIX"), sys.prefix]:
+        if not Prefix: continue
+        ProjLib = os.path.join(os.path.join(Prefix, 'share'), 'proj')
+        if os.path.isdir(ProjLib):
+            os.environ["PROJ_LIB"] = ProjLib
+            return ProjLib
+
+    return None
+
+def importPlottingLibraries():
+    global mpl, plt, make_axes_locatable
+    global Line2D, Patch
+
+    if plt is not None:
+        return
+
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+    from matplotlib.lines import Line2D
+    from matplotlib.patches import Patch
+    from mpl_toolkits.axes_grid1 import make_axes_locatable
+
+    import warnings
+    import matplotlib.cbook
+    warnings.filterwarnings("ignore", category=matplotlib.cbook.mplDeprecation)
+
+def importBasemap():
+    global Basemap
+
+    if Basemap is not None:
+        return
+
+    resolveProjLib()
+    from mpl_toolkits.basemap import Basemap
 
 #import PlotsConstants as Const
 
@@ -38,7 +79,7 @@ def saveFigure(fig, Path):
     try:
         os.makedirs(Dir)
     except: pass
-    fig.savefig(Path, dpi=150., bbox_inches='tight')
+    fig.savefig(Path, dpi=FIGURE_DPI, bbox_inches='tight')
     plt.close(fig)  # Close the figure to release memory
 
 def prepareAxis(PlotConf, ax):
@@ -119,6 +160,7 @@ def prepareColorBar(PlotConf, ax, Values):
     return normalize, cmap
 
 def drawMap(PlotConf, ax,):
+    importBasemap()
     Map = Basemap(projection = 'cyl',
     llcrnrlat  = PlotConf["LatMin"]-0,
     urcrnrlat  = PlotConf["LatMax"]+0,
@@ -148,6 +190,200 @@ def drawMap(PlotConf, ax,):
     # Draw countries
     Map.drawcountries(linewidth=0.25)
 
+def getDecimationCells(PlotConf, xData, yData, DropOutside):
+    """
+    Compute the grid cell of each point, where the grid covers the axes with
+    cells of PlotConf["Decimate"] pixels (1 pixel if True), keyed on the figure
+    size and resolution, and on the axis limits (data limits if not configured).
+
+    Returns:
+    - xCell, yCell: Cell indices of the points.
+    - Ny: Number of cells in the y axis.
+    - Valid: Mask of the points to be considered (finite, and inside the
+      axis limits if DropOutside is set, as the others are not visible).
+    """
+    CellPixels = 1.0 if PlotConf["Decimate"] is True else float(PlotConf["Decimate"])
+    FigSize = PlotConf["FigSize"] if "FigSize" in PlotConf else (6.4, 4.8)
+    Nx = max(int(FigSize[0] * FIGURE_DPI / CellPixels), 1)
+    Ny = max(int(FigSize[1] * FIGURE_DPI / CellPixels), 1)
+
+    Valid = np.isfinite(xData) & np.isfinite(yData)
+    if not Valid.any():
+        return None
+
+    Cells = []
+    for Data, Lim, N in [(xData, "xLim", Nx), (yData, "yLim", Ny)]:
+        if Lim in PlotConf:
+            Min, Max = min(PlotConf[Lim]), max(PlotConf[Lim])
+        else:
+            Min, Max = Data[Valid].min(), Data[Valid].max()
+        if DropOutside:
+            Valid &= (Data >= Min) & (Data <= Max)
+        Span = (Max - Min) if Max > Min else 1.0
+        Cell = np.zeros(len(Data), dtype=np.int64)
+        Cell[Valid] = np.clip(((Data[Valid] - Min) / Span * N).astype(np.int64), 0, N - 1)
+        Cells.append(Cell)
+
+    return Cells[0], Cells[1], Ny, Valid
+
+def decimateScatterPoints(PlotConf, xData, yData):
+    """
+    Per-pixel binning: keep one point per grid cell, the last one drawn, so
+    that the figure looks the same. Isolated points (i.e. outliers) always
+    occupy their own cell, so they are never lost.
+    Returns the sorted indices of the points to be drawn.
+    """
+    Grid = getDecimationCells(PlotConf, xData, yData, DropOutside=True)
+    if Grid is None:
+        return np.arange(0)
+    xCell, yCell, Ny, Valid = Grid
+
+    Idx = np.flatnonzero(Valid)
+    Cells = xCell[Idx] * Ny + yCell[Idx]
+    _, LastReversed = np.unique(Cells[::-1], return_index=True)
+
+    return np.sort(Idx[len(Idx) - 1 - LastReversed])
+
+def decimateLinePoints(PlotConf, xData, yData):
+    """
+    Min/max preserving downsampling of a line (M4 aggregation): keep the first,
+    last, minimum and maximum points of each pixel column, so that the line
+    drawn is the same and its extremes remain visible.
+    Non-finite points are kept, as they break the line.
+    Returns the sorted indices of the points to be drawn, or None if the
+    x data is not sorted.
+    """
+    Grid = getDecimationCells(PlotConf, xData, yData, DropOutside=False)
+    if Grid is None:
+        return None
+    xCell, yCell, Ny, Valid = Grid
+
+    Idx = np.flatnonzero(Valid)
+    Columns = xCell[Idx]
+    if np.any(np.diff(Columns) < 0):
+        return None
+
+    # Segments of consecutive points in the same column
+    Starts = np.flatnonzero(np.r_[True, np.diff(Columns) != 0])
+    Ends = np.r_[Starts[1:], len(Idx)] - 1
+
+    # Sort by column and value, so that the minimum and maximum of each
+    # column are the first and last elements of its segment
+    Order = np.lexsort((yData[Idx], Columns))
+
+    Keep = np.concatenate((
+        Idx[Starts], Idx[Ends], Idx[Order[Starts]], Idx[Order[Ends]],
+        np.flatnonzero(~Valid)))
+
+    return np.unique(Keep)
+
+def decimateData(PlotConf, xData, yData, zData=None, Line=False):
+    """
+    Decimate the data of a label if PlotConf["Decimate"] is configured.
+    Non numeric data is not decimated.
+    """
+    if "Decimate" not in PlotConf or not PlotConf["Decimate"]:
+        return xData, yData, zData
+
+    try:
+        x = np.asarray(xData, dtype=float)
+        y = np.asarray(yData, dtype=float)
+    except (TypeError, ValueError):
+        return xData, yData, zData
+
+    if x.ndim != 1 or x.shape != y.shape:
+        return xData, yData, zData
+
+    if Line:
+        Keep = decimateLinePoints(PlotConf, x, y)
+    else:
+        Keep = decimateScatterPoints(PlotConf, x, y)
+
+    if Keep is None:
+        return xData, yData, zData
+
+    if zData is not None:
+        zData = np.asarray(zData)[Keep]
+
+    return x[Keep], y[Keep], zData
+
+def buildDensityRaster(PlotConf):
+    """
+    Build the density raster of all the labels in PlotConf, with cells of
+    PlotConf["RasterCellPixels"] pixels (1 by default) covering the axis
+    limits (data limits if not configured).
+    """
+    CellPixels = PlotConf["RasterCellPixels"] if "RasterCellPixels" in PlotConf else 1.0
+    FigSize = PlotConf["FigSize"] if "FigSize" in PlotConf else (6.4, 4.8)
+    Shape = (max(int(FigSize[0] * FIGURE_DPI / CellPixels), 1),
+             max(int(FigSize[1] * FIGURE_DPI / CellPixels), 1))
+
+    xData = np.concatenate([np.asarray(PlotConf["xData"][Label], dtype=float) for Label in PlotConf["yData"]])
+    yData = np.concatenate([np.asarray(PlotConf["yData"][Label], dtype=float) for Label in PlotConf["yData"]])
+    zData = None
+    if "zData" in PlotConf:
+        zData = np.concatenate([np.asarray(PlotConf["zData"][Label], dtype=float) for Label in PlotConf["yData"]])
+
+    Extent = []
+    for Data, Lim in [(xData, "xLim"), (yData, "yLim")]:
+        if Lim in PlotConf:
+            Extent.extend([min(PlotConf[Lim]), max(PlotConf[Lim])])
+        else:
+            Finite = Data[np.isfinite(Data)]
+            Extent.extend([Finite.min(), Finite.max()] if len(Finite) else [0.0, 1.0])
+
+    return computeDensityRaster(xData, yData, zData, Extent, Shape)
+
+def generateRasterPlot(PlotConf):
+    """
+    Draw the data as a density raster with a single imshow call, so that the
+    rendering cost depends on the figure size and not on the number of points.
+    PlotConf["Raster"] selects the value of the cells:
+     - "count": number of points in the cell
+     - "mean" / "max": mean / max of the colour bar variable (zData) in the cell
+    A raster computed beforehand (e.g. merged over several days or cropped
+    to a zoom region) can be given in PlotConf["RasterData"].
+    """
+    fig, ax = createFigure(PlotConf)
+
+    prepareAxis(PlotConf, ax)
+
+    if "Map" in PlotConf and PlotConf["Map"] == True:
+        drawMap(PlotConf, ax)
+
+    if "RasterData" in PlotConf:
+        Raster = PlotConf["RasterData"]
+    else:
+        Raster = buildDensityRaster(PlotConf)
+
+    Image = getDensityRasterImage(Raster, PlotConf["Raster"])
+    Values = Image[np.isfinite(Image)]
+    if len(Values) == 0:
+        Values = np.zeros(1)
+
+    # Colour bar of the raster values: the number of points in count mode
+    ColorBarConf = dict(PlotConf)
+    if "ColorBar" not in ColorBarConf:
+        ColorBarConf["ColorBar"] = "gnuplot"
+    if PlotConf["Raster"] == "count":
+        ColorBarConf["ColorBarMin"] = Values.min()
+        ColorBarConf["ColorBarMax"] = Values.max()
+        ColorBarConf["ColorBarLabel"] = "Number of Samples"
+        ColorBarConf.pop("ColorBarTicks", None)
+    elif "ColorBarLabel" not in ColorBarConf:
+        ColorBarConf["ColorBarLabel"] = ""
+    normalize, cmap = prepareColorBar(ColorBarConf, ax, {0: Values})
+
+    ax.imshow(Image,
+    origin = 'lower',
+    extent = Raster["Extent"],
+    aspect = 'auto',
+    interpolation = 'nearest',
+    cmap = cmap,
+    norm = normalize)
+
+    saveFigure(fig, PlotConf["Path"])
+
 def generateLinesPlot(PlotConf):
     LineWidth = 1.5
     LineStyle = '-'
@@ -190,11 +426,21 @@ def generateLinesPlot(PlotConf):
                 handles.extend(ax2_handles)
                 continue
 
-        if "ColorBar" in PlotConf:
-            ax.scatter(PlotConf["xData"][Label], PlotConf["yData"][Label], 
+        if "ColorBar" in PlotConf and "xEndData" in PlotConf:
+            # Horizontal segments from xData to xEndData (e.g. time windows)
+            ax.hlines(PlotConf["yData"][Label],
+            PlotConf["xData"][Label], PlotConf["xEndData"][Label],
+            linewidth = LineWidth,
+            colors = cmap(normalize(np.array(PlotConf["zData"][Label]))))
+
+        elif "ColorBar" in PlotConf:
+            xData, yData, zData = PlotConf["xData"][Label], PlotConf["yData"][Label], PlotConf["zData"][Label]
+            if "Text" not in PlotConf:
+                xData, yData, zData = decimateData(PlotConf, xData, yData, zData)
+            ax.scatter(xData, yData, 
             marker = PlotConf["Marker"][Label],
             linewidth = LineWidth,
-            c = cmap(normalize(np.array(PlotConf["zData"][Label]))))
+            c = cmap(normalize(np.array(zData))))
 
         if "Text" in PlotConf:
             # Add text to each point
@@ -208,8 +454,11 @@ def generateLinesPlot(PlotConf):
                     ax.text(PlotConf["xData"][Label][i], y + 0.5 , f'{txt}',
                             ha='center', va='bottom', fontsize=8, color=color)
         
-        else:
-            ax.plot(PlotConf["xData"][Label], PlotConf["yData"][Label],
+        elif "ColorBar" not in PlotConf:
+            IsLine = LineWidth > 0 and LineStyle not in ['', ' ', 'None', 'none']
+            xData, yData, _ = decimateData(PlotConf,
+                PlotConf["xData"][Label], PlotConf["yData"][Label], Line=IsLine)
+            ax.plot(xData, yData,
             marker = PlotConf["Marker"][Label],
             color = PlotConf["Color"][Label],
             linewidth = LineWidth,
@@ -325,11 +574,146 @@ def generateVerticalBarPlot(PlotConf):
 
 
 def generatePlot(PlotConf):
-    if(PlotConf["Type"] == "Lines"):
+    importPlottingLibraries()
+
+    if "Raster" in PlotConf:
+        generateRasterPlot(PlotConf)
+    elif(PlotConf["Type"] == "Lines"):
         generateLinesPlot(PlotConf)
     elif PlotConf["Type"] == "VerticalBar":
         generateVerticalBarPlot(PlotConf)
 
+def computeDensityRaster(xData, yData, zData, Extent, Shape):
+    """
+    Bin (x, y) data into a 2-D grid.
+
+    Parameters:
+        xData, yData (array): Coordinates of the points.
+        zData (array): Colour bar variable of the points, or None.
+        Extent (list): Grid limits [xMin, xMax, yMin, yMax]. Points outside are discarded.
+        Shape (tuple): Number of cells (Nx, Ny).
+
+    Returns:
+        Raster (dict): Count, Sum and Max of zData per cell (arrays of Ny x Nx), Extent.
+    """
+    Nx, Ny = Shape
+    xMin, xMax, yMin, yMax = Extent
+    xData = np.asarray(xData, dtype=float)
+    yData = np.asarray(yData, dtype=float)
+
+    Valid = np.isfinite(xData) & np.isfinite(yData) & \
+        (xData >= xMin) & (xData <= xMax) & (yData >= yMin) & (yData <= yMax)
+    if zData is not None:
+        zData = np.asarray(zData, dtype=float)
+        Valid &= np.isfinite(zData)
+        zData = zData[Valid]
+
+    xSpan = (xMax - xMin) if xMax > xMin else 1.0
+    ySpan = (yMax - yMin) if yMax > yMin else 1.0
+    xCell = np.clip(((xData[Valid] - xMin) / xSpan * Nx).astype(np.int64), 0, Nx - 1)
+    yCell = np.clip(((yData[Valid] - yMin) / ySpan * Ny).astype(np.int64), 0, Ny - 1)
+    Cells = yCell * Nx + xCell
+
+    Raster = {}
+    Raster["Count"] = np.bincount(Cells, minlength=Nx*Ny).reshape(Ny, Nx)
+    Raster["Sum"] = None
+    Raster["Max"] = None
+    if zData is not None:
+        Raster["Sum"] = np.bincount(Cells, weights=zData, minlength=Nx*Ny).reshape(Ny, Nx)
+
+        # Sort by cell and value: the maximum of each cell is its last element
+        Max = np.full(Nx*Ny, -np.inf)
+        Order = np.lexsort((zData, Cells))
+        SortedCells = Cells[Order]
+        Last = np.flatnonzero(np.r_[SortedCells[1:] != SortedCells[:-1], True]) if len(Cells) else Cells
+        Max[SortedCells[Last]] = zData[Order][Last]
+        Raster["Max"] = Max.reshape(Ny, Nx)
+    Raster["Extent"] = [xMin, xMax, yMin, yMax]
+
+    return Raster
+
+def mergeDensityRasters(Raster1, Raster2):
+    """
+    Merge two rasters with the same extent and shape (e.g. two days or two stations).
+    """
+    Raster = {}
+    Raster["Count"] = Raster1["Count"] + Raster2["Count"]
+    Raster["Sum"] = None
+    Raster["Max"] = None
+    if Raster1["Sum"] is not None and Raster2["Sum"] is not None:
+        Raster["Sum"] = Raster1["Sum"] + Raster2["Sum"]
+        Raster["Max"] = np.maximum(Raster1["Max"], Raster2["Max"])
+    Raster["Extent"] = list(Raster1["Extent"])
+
+    return Raster
+
+def coarsenDensityRaster(Raster, Factor):
+    """
+    Reduce the resolution of a raster, merging blocks of Factor x Factor cells.
+    Trailing cells not filling a whole block are merged into the last block.
+    """
+    Ny, Nx = Raster["Count"].shape
+    Rows = np.arange(0, Ny, Factor)
+    Cols = np.arange(0, Nx, Factor)
+
+    def reduce(Ufunc, Array):
+        return Ufunc.reduceat(Ufunc.reduceat(Array, Rows, axis=0), Cols, axis=1)
+
+    Coarse = {}
+    Coarse["Count"] = reduce(np.add, Raster["Count"])
+    Coarse["Sum"] = None
+    Coarse["Max"] = None
+    if Raster["Sum"] is not None:
+        Coarse["Sum"] = reduce(np.add, Raster["Sum"])
+        Coarse["Max"] = reduce(np.maximum, Raster["Max"])
+    Coarse["Extent"] = list(Raster["Extent"])
+
+    return Coarse
+
+def cropDensityRaster(Raster, xLim, yLim):
+    """
+    Crop a raster to the cells covering the given limits (zoom in).
+    The extent of the cropped raster is adjusted to its cell edges.
+    """
+    Ny, Nx = Raster["Count"].shape
+    xMin, xMax, yMin, yMax = Raster["Extent"]
+    xStep = (xMax - xMin) / Nx
+    yStep = (yMax - yMin) / Ny
+
+    Col0 = int(np.clip(np.floor((xLim[0] - xMin) / xStep), 0, Nx - 1))
+    Col1 = int(np.clip(np.ceil((xLim[1] - xMin) / xStep), Col0 + 1, Nx))
+    Row0 = int(np.clip(np.floor((yLim[0] - yMin) / yStep), 0, Ny - 1))
+    Row1 = int(np.clip(np.ceil((yLim[1] - yMin) / yStep), Row0 + 1, Ny))
+
+    Crop = {}
+    for Key in ["Count", "Sum", "Max"]:
+        Crop[Key] = None if Raster[Key] is None else Raster[Key][Row0:Row1, Col0:Col1]
+    Crop["Extent"] = [xMin + Col0 * xStep, xMin + Col1 * xStep,
+                      yMin + Row0 * yStep, yMin + Row1 * yStep]
+
+    return Crop
+
+def getDensityRasterImage(Raster, Mode):
+    """
+    Get the image to be drawn from a raster: "count", "mean" or "max" of the
+    colour bar variable per cell. Empty cells are NaN, so they are not painted.
+    """
+    Count = Raster["Count"]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if Mode == "count":
+            Image = Count.astype(float)
+        elif Mode == "mean":
+            Image = Raster["Sum"] / Count
+        elif Mode == "max":
+            Image = Raster["Max"].astype(float)
+        else:
+            sys.stderr.write("ERROR: Unknown raster mode %s\n" % Mode)
+            sys.exit()
+
+    Image[Count == 0] = np.nan
+
+    return Image
+
 def createPlotConfig2DVerticalBars(filepath, title, xData, yDataList, xLabel, yLabels, colors, legPos, yOffset = [0,0]):
     """
     Creates a new Plot Configuration for plotting vertical 2D bars.
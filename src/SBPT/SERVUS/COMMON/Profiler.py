@@ -0,0 +1,372 @@
+import sys, os
+import json
+import time
+import glob
+import threading
+import functools
+import types
+import contextlib
+
+# Profiler state: everything is disabled by default, so that the spans
+# placed in the drivers cost a single dictionary lookup
+ProfilerState = {
+    "Enabled": False,
+    "Worker": False,
+    "TraceFile": None,
+    "StacksFile": None,
+    "ProcessName": "main",
+    "Events": [],
+    "Profile": None,
+}
+
+# Depth of the open spans, per thread (e.g. the pipeline reader thread opens
+# its own spans while the main thread computes)
+SpanDepth = threading.local()
+
+# Suffixes of the partial files written by worker processes
+TRACE_PART_SUFFIX = ".part"
+STACKS_PART_SUFFIX = ".prof"
+
+# Maximum number of frames of the collapsed stacks
+STACKS_MAX_DEPTH = 64
+
+# Minimum time of a call of the collapsed stacks, as a fraction of the total
+# time: the shorter calls are not expanded, their time is counted in their caller
+STACKS_MIN_FRACTION = 1e-4
+
+# ------------------------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def getTimestamp():
+    """
+    Get the current timestamp in microseconds.
+    Wall-clock time is used so that events from several processes share the same time axis.
+    """
+    return time.time_ns() / 1000.0
+
+# Span returned when the profiler is disabled: it does nothing
+NULL_SPAN = contextlib.nullcontext()
+
+@contextlib.contextmanager
+def recordSpan(Name, Category, Args):
+    """
+    Record a span as a Chrome trace-event complete ("X") event.
+    """
+    SpanDepth.Value = getattr(SpanDepth, "Value", 0) + 1
+    Start = getTimestamp()
+
+    # Record the time the task spent waiting in a queue, if known
+    QueuedAt = Args.pop("QueuedAt", None)
+    if QueuedAt is not None:
+        addEvent("queued " + Name, "queue", QueuedAt, Start - QueuedAt, {})
+
+    try:
+        yield
+    finally:
+        addEvent(Name, Category, Start, getTimestamp() - Start, Args)
+        SpanDepth.Value -= 1
+
+        # Workers flush their events after each top level span
+        if ProfilerState["Worker"] and SpanDepth.Value == 0:
+            flushWorker()
+
+def addEvent(Name, Category, Start, Duration, Args):
+    ProfilerState["Events"].append({
+        "name": Name,
+        "cat": Category,
+        "ph": "X",
+        "ts": Start,
+        "dur": Duration,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "args": Args,
+    })
+
+def addProcessNameEvent():
+    ProfilerState["Events"].append({
+        "name": "process_name",
+        "ph": "M",
+        "pid": os.getpid(),
+        "args": {"name": "%s (%d)" % (ProfilerState["ProcessName"], os.getpid())},
+    })
+
+def startStacksProfile():
+    import cProfile
+    ProfilerState["Profile"] = cProfile.Profile()
+    ProfilerState["Profile"].enable()
+
+def flushWorker():
+    """
+    Append the events recorded by a worker process to its partial trace file,
+    and dump its cProfile statistics if collapsed stacks were requested.
+    """
+    PartFile = "%s.%d%s" % (ProfilerState["TraceFile"], os.getpid(), TRACE_PART_SUFFIX)
+    with open(PartFile, 'a') as f:
+        for Event in ProfilerState["Events"]:
+            f.write(json.dumps(Event) + "\n")
+    ProfilerState["Events"] = []
+
+    if ProfilerState["Profile"] is not None:
+        # dump_stats() disables the profiler, so it has to be enabled again
+        ProfilerState["Profile"].dump_stats("%s.%d%s" % \
+            (ProfilerState["StacksFile"], os.getpid(), STACKS_PART_SUFFIX))
+        ProfilerState["Profile"].enable()
+
+def collapseStacks(Stats):
+    """
+    Build collapsed stacks ("f1;f2;f3 <microseconds>") from cProfile statistics.
+
+    cProfile only keeps caller -> callee edges, so the stacks are rebuilt walking
+    the call graph from the root functions, and the time of each callee is
+    distributed among its callers proportionally to the time spent in each edge
+    (the share of each (function, caller) pair is computed once). The walk
+    stops at STACKS_MAX_DEPTH frames and at the calls shorter than
+    STACKS_MIN_FRACTION of the total time, whose time is counted in their
+    caller, so that the work is bounded on large call graphs.
+
+    Parameters:
+    - Stats: pstats.Stats object.
+
+    Returns:
+    - Dictionary mapping each collapsed stack to its self time in microseconds.
+    """
+    def getLabel(Func):
+        FileName, Line, FuncName = Func
+        return "%s:%s:%d" % (os.path.basename(FileName), FuncName, Line)
+
+    # Build the callee lists: Callees[Caller] = [(Callee, Share of the callee
+    # time spent in the calls of the caller)]
+    Callees = {}
+    for Func, (Cc, Nc, Tt, Ct, Callers) in Stats.stats.items():
+        if Ct <= 0: continue
+        for Caller, CallerStats in Callers.items():
+            Callees.setdefault(Caller, []).append((Func, min(CallerStats[3] / Ct, 1.0)))
+
+    Labels = dict((Func, getLabel(Func)) for Func in Stats.stats)
+    MinTime = sum(FuncStats[2] for FuncStats in Stats.stats.values()) * STACKS_MIN_FRACTION
+    Stacks = {}
+
+    def walk(Func, Stack, Scale, Visited):
+        Tt = Stats.stats[Func][2] * Scale
+        for Callee, Share in Callees.get(Func, []):
+            # Avoid infinite loops on recursive calls
+            if Callee in Visited: continue
+            CalleeCt = Stats.stats[Callee][3] * Share * Scale
+            if CalleeCt < MinTime or len(Visited) >= STACKS_MAX_DEPTH:
+                # Count the time of the short and the deep calls in this frame
+                Tt += CalleeCt
+                continue
+            Visited.add(Callee)
+            walk(Callee, Stack + ";" + Labels[Callee], Share * Scale, Visited)
+            Visited.remove(Callee)
+        Stacks[Stack] = Stacks.get(Stack, 0.0) + Tt
+
+    # Roots are the functions without callers, and the functions called from
+    # frames not profiled (e.g. the module being run) for the share of their
+    # time not spent in the calls of profiled callers
+    for Func, (Cc, Nc, Tt, Ct, Callers) in Stats.stats.items():
+        if Ct <= 0: continue
+        Share = 1.0 - sum(CallerStats[3] for CallerStats in Callers.values()) / Ct
+        if Share * Ct >= MinTime:
+            walk(Func, Labels[Func], Share, {Func})
+
+    return {Key: Value * 1e6 for Key, Value in Stacks.items() if Value > 0}
+
+def writeCollapsedStacks(StacksFile):
+    import pstats
+
+    Stats = None
+    if ProfilerState["Profile"] is not None:
+        ProfilerState["Profile"].disable()
+        Stats = pstats.Stats(ProfilerState["Profile"])
+
+    # Merge the statistics of the worker processes
+    for PartFile in glob.glob(StacksFile + ".*" + STACKS_PART_SUFFIX):
+        if Stats is None:
+            Stats = pstats.Stats(PartFile)
+        else:
+            Stats.add(PartFile)
+        os.remove(PartFile)
+
+    if Stats is None:
+        return
+
+    Stacks = collapseStacks(Stats)
+    with open(StacksFile, 'w') as f:
+        for Stack in sorted(Stacks):
+            f.write("%s %d\n" % (Stack, int(round(Stacks[Stack]))))
+
+def createTraceDir(TraceFile):
+    Dir = os.path.dirname(TraceFile)
+    try:
+        os.makedirs(Dir)
+    except: pass
+
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def enableProfiler(TraceFile, StacksFile=None):
+    """
+    Enable the recording of spans into a Chrome trace-event JSON file.
+
+    Parameters:
+    - TraceFile: Path of the output trace file (open it in chrome://tracing or Perfetto).
+    - StacksFile: Optional path of the output cProfile collapsed stacks file (flamegraph.pl input).
+    """
+    createTraceDir(TraceFile)
+    ProfilerState["Enabled"] = True
+    ProfilerState["TraceFile"] = TraceFile
+    ProfilerState["StacksFile"] = StacksFile
+    addProcessNameEvent()
+
+    if StacksFile:
+        startStacksProfile()
+
+def enableProfilerFromOptions(Options, ProfileDir, Name):
+    """
+    Enable the profiler if requested in the command line options:
+     --profile[=TRACE_FILE]         Chrome trace-event JSON file
+     --profile-stacks[=STACKS_FILE] Chrome trace plus cProfile collapsed stacks
+
+    Parameters:
+    - Options: Dictionary of command line options.
+    - ProfileDir: Directory of the default output files.
+    - Name: Name of the entry point, used to build the default file names.
+    """
+    if "--profile" not in Options and "--profile-stacks" not in Options:
+        return
+
+    TraceFile = Options.get("--profile", True)
+    if TraceFile is True:
+        TraceFile = os.path.join(ProfileDir, Name + "_trace.json")
+
+    StacksFile = Options.get("--profile-stacks")
+    if StacksFile is True:
+        StacksFile = os.path.join(ProfileDir, Name + "_stacks.txt")
+
+    enableProfiler(TraceFile, StacksFile)
+
+def isProfilerEnabled():
+    return ProfilerState["Enabled"]
+
+def span(Name, Category="stage", **Args):
+    """
+    Open a span to be used as context manager:
+
+        with span("Compute Statistics", Doy=14):
+            ...
+
+    Nested spans build the day -> stage -> function hierarchy.
+    When the profiler is disabled a shared no-op span is returned.
+    Keyword arguments are stored as event arguments; the special
+    argument QueuedAt (see getTimestamp()) adds a span with the queueing time.
+    """
+    if not ProfilerState["Enabled"]:
+        return NULL_SPAN
+
+    return recordSpan(Name, Category, Args)
+
+def traceFunction(Func, Category="function"):
+    """
+    Wrap a function so that each call is recorded as a span.
+    """
+    @functools.wraps(Func)
+    def tracedFunction(*Args, **KwArgs):
+        with recordSpan(Func.__name__, Category, {}):
+            return Func(*Args, **KwArgs)
+
+    return tracedFunction
+
+def instrumentModule(Module, Names=None, Category="function"):
+    """
+    Replace the functions defined in a module by traced functions.
+    Only done when the profiler is enabled, so there is no overhead otherwise.
+    Calls between functions of the module are also traced, as they are
+    resolved through the module globals.
+
+    Parameters:
+    - Module: Module to be instrumented.
+    - Names: Optional list of the function names to trace (all by default).
+      Per-sample functions should be left out, as each call adds an event.
+    - Category: Category of the spans.
+    """
+    if not ProfilerState["Enabled"]:
+        return
+
+    for Name, Value in list(vars(Module).items()):
+        if Names is not None and Name not in Names: continue
+        if isinstance(Value, types.FunctionType) and Value.__module__ == Module.__name__:
+            setattr(Module, Name, traceFunction(Value, Category))
+
+def getWorkerConfig():
+    """
+    Get the profiler configuration to be passed to the worker processes initializer,
+    e.g. Pool(N, initializer=initWorker, initargs=(getWorkerConfig(),)).
+    Returns None when the profiler is disabled.
+    """
+    if not ProfilerState["Enabled"]:
+        return None
+
+    return {
+        "TraceFile": ProfilerState["TraceFile"],
+        "StacksFile": ProfilerState["StacksFile"],
+    }
+
+def initWorker(WorkerConfig):
+    """
+    Enable the profiler in a worker process. Events are written to a partial
+    trace file per process, merged by finishProfiler() in the main process.
+    """
+    # Forked workers inherit the profile of the main process, which is discarded
+    if ProfilerState["Profile"] is not None:
+        ProfilerState["Profile"].disable()
+        ProfilerState["Profile"] = None
+
+    if WorkerConfig is None:
+        return
+
+    ProfilerState["Enabled"] = True
+    ProfilerState["Worker"] = True
+    ProfilerState["TraceFile"] = WorkerConfig["TraceFile"]
+    ProfilerState["StacksFile"] = WorkerConfig["StacksFile"]
+    ProfilerState["ProcessName"] = "worker"
+    ProfilerState["Events"] = []
+    SpanDepth.Value = 0
+    addProcessNameEvent()
+
+    if WorkerConfig["StacksFile"]:
+        startStacksProfile()
+
+def finishProfiler():
+    """
+    Write the trace file (merging the events of the worker processes) and,
+    if requested, the collapsed stacks file.
+    """
+    if not ProfilerState["Enabled"] or ProfilerState["Worker"]:
+        return
+
+    TraceFile = ProfilerState["TraceFile"]
+    Events = ProfilerState["Events"]
+
+    # Merge the events of the worker processes
+    for PartFile in glob.glob(TraceFile + ".*" + TRACE_PART_SUFFIX):
+        with open(PartFile, 'r') as f:
+            for Line in f:
+                Events.append(json.loads(Line))
+        os.remove(PartFile)
+
+    with open(TraceFile, 'w') as f:
+        json.dump({"traceEvents": Events, "displayTimeUnit": "ms"}, f)
+
+    if ProfilerState["StacksFile"]:
+        writeCollapsedStacks(ProfilerState["StacksFile"])
+
+    ProfilerState["Enabled"] = False
+    ProfilerState["Events"] = []
+
+    sys.stdout.write("Profiler trace written to %s\n" % TraceFile)
+    if ProfilerState["StacksFile"]:
+        sys.stdout.write("Profiler collapsed stacks written to %s\n" % ProfilerState["StacksFile"])
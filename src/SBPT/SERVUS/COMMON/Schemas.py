@@ -0,0 +1,86 @@
+from collections import OrderedDict
+
+# Typed schemas of the data files: the name, index, dtype, unit and print
+# format of each column of a file type, defined once and shared by its
+# readers (typed and selective reads, see COMMON.Files.readDataFile) and its
+# writers (header and line format). The column index maps of the modules
+# (e.g. SatInfoIdx) are the "Idx" of their schemas.
+
+# Registry of the schemas of the file types
+Schemas = OrderedDict({})
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def defineSchema(FileType, Columns):
+    """
+    Define the schema of a file type and register it.
+
+    Parameters:
+    - FileType: Name of the file type (e.g. "SAT_INFO").
+    - Columns: List of (Name, Dtype, Unit, Format) of the columns, in file
+      order. Unit is None for dimensionless columns and Format None for the
+      files written by other tools. Compact dtypes (int8, int16...) are only
+      used where the values are known to fit.
+
+    Returns:
+    - Schema: Dictionary with the file "Type", the column "Names", the "Idx"
+      map name -> index and the "Dtypes", "Units" and "Formats" of the columns
+      by name.
+    """
+    Schema = {
+        "Type": FileType,
+        "Names": [Name for Name, _, _, _ in Columns],
+        "Idx": dict((Name, Index) for Index, (Name, _, _, _) in enumerate(Columns)),
+        "Dtypes": dict((Name, Dtype) for Name, Dtype, _, _ in Columns),
+        "Units": dict((Name, Unit) for Name, _, Unit, _ in Columns),
+        "Formats": dict((Name, Format) for Name, _, _, Format in Columns),
+    }
+    Schemas[FileType] = Schema
+
+    return Schema
+
+def getSchema(FileType):
+    """
+    Get the registered schema of a file type.
+    """
+    return Schemas[FileType]
+
+def getSchemaColumns(Schema, Names=None):
+    """
+    Get the indexes of some columns (all of them by default).
+    """
+    return [Schema["Idx"][Name] for Name in (Names or Schema["Names"])]
+
+def getSchemaDtypes(Schema, Names=None):
+    """
+    Get the dtypes of some columns (all of them by default) by column index,
+    as readDataFile and pandas read_csv take them.
+    """
+    return dict((Schema["Idx"][Name], Schema["Dtypes"][Name]) for Name in (Names or Schema["Names"]))
+
+def getSchemaHeader(Schema, Delim=" "):
+    """
+    Get the header line of a file type (the names of its columns).
+    """
+    return Delim.join(Schema["Names"]) + "\n"
+
+def getSchemaFormat(Schema, Delim=" "):
+    """
+    Get the printf format of the lines of a file type (without line end).
+    """
+    return Delim.join(Schema["Formats"][Name] for Name in Schema["Names"])
+
+def wrapSchemaReader(readFunction, Schema):
+    """
+    Wrap a function reading columns of a data file by index (e.g. pandas
+    read_csv with usecols) so that they are read with the dtypes of a schema.
+    """
+    def readData(Path, *Args, **Kwargs):
+        Columns = Kwargs.get("usecols")
+        Names = [Name for Name in Schema["Names"] if Columns is None or Schema["Idx"][Name] in Columns]
+        Kwargs.setdefault("dtype", getSchemaDtypes(Schema, Names))
+        return readFunction(Path, *Args, **Kwargs)
+
+    return readData
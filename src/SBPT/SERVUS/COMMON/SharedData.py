@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+
+# Hand-off of parsed tables (e.g. the columns of a SAT INFO, IGP INFO or LOS
+# file) between processes without pickling them: the columns are copied once
+# into a shared memory block, and the worker processes attach to it through a
+# small picklable descriptor, getting arrays (or a DataFrame) that read the
+# block directly. Numeric columns are attached without copies; text columns
+# (e.g. the PRN) are stored as fixed-width strings.
+
+# Alignment of the columns in the shared memory block [bytes]
+SHARED_ALIGNMENT = 64
+
+# Blocks created by this process and not removed yet, by name: removed by
+# releaseSharedData if the process stops before releasing them (e.g. error)
+CreatedBlocks = {}
+
+# ------------------------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def prepareColumn(Values):
+    """
+    Convert a column into an array that can be placed in shared memory
+    (object columns, such as text, into fixed-width strings).
+    """
+    Column = np.asarray(Values)
+    if Column.dtype == object:
+        Column = Column.astype(str)
+
+    return Column
+
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def shareData(Data):
+    """
+    Copy the columns of a table into a new shared memory block.
+
+    Parameters:
+    - Data: DataFrame or dictionary of columns.
+
+    Returns:
+    - Descriptor: Picklable dictionary with the "Name" of the block, the
+      "Size" of the block and the "Columns" map: label -> (dtype, shape, offset).
+    - Block: Shared memory block, to be released with releaseData (with
+      Unlink=True) once the workers are done.
+    """
+    Columns = {Label: prepareColumn(Data[Label]) for Label in Data.keys()}
+
+    Layout = {}
+    Size = 0
+    for Label, Column in Columns.items():
+        Layout[Label] = (Column.dtype.str, Column.shape, Size)
+        Size += -(-Column.nbytes // SHARED_ALIGNMENT) * SHARED_ALIGNMENT
+
+    Block = shared_memory.SharedMemory(create=True, size=max(Size, 1))
+    for Label, Column in Columns.items():
+        Dtype, Shape, Offset = Layout[Label]
+        np.ndarray(Shape, dtype=Dtype, buffer=Block.buf, offset=Offset)[...] = Column
+
+    Descriptor = {"Name": Block.name, "Size": Size, "Columns": Layout}
+    CreatedBlocks[Block.name] = Block
+
+    return Descriptor, Block
+
+def attachData(Descriptor, AsDataFrame=True):
+    """
+    Attach to the shared memory block of a descriptor (see shareData).
+
+    Parameters:
+    - Descriptor: Descriptor of the shared table.
+    - AsDataFrame: Return a DataFrame instead of a dictionary of arrays.
+
+    Returns:
+    - Data: Columns of the table, reading the shared block (valid while the
+      block is attached).
+    - Block: Shared memory block, to be released with releaseData.
+    """
+    # Worker processes share the resource tracker of the main process, so
+    # the block is removed by the main process only (see releaseData)
+    Block = shared_memory.SharedMemory(name=Descriptor["Name"])
+
+    Data = {Label: np.ndarray(Shape, dtype=Dtype, buffer=Block.buf, offset=Offset)
+        for Label, (Dtype, Shape, Offset) in Descriptor["Columns"].items()}
+    if AsDataFrame:
+        Data = pd.DataFrame(Data, copy=False)
+
+    return Data, Block
+
+def releaseData(Block, Unlink=False):
+    """
+    Detach from a shared memory block, and remove it if Unlink (only by the
+    process that created it, once no worker uses it anymore).
+    The arrays attached to the block must not be used afterwards.
+    """
+    try:
+        Block.close()
+    except BufferError:
+        # Arrays of the block are still referenced: the mapping is closed
+        # when they are garbage collected
+        pass
+    if Unlink:
+        CreatedBlocks.pop(Block.name, None)
+        Block.unlink()
+
+def releaseSharedData():
+    """
+    Remove all the shared memory blocks created by this process and not
+    released yet, to be called in a finally clause of the drivers so that no
+    block outlives the process when a day or a worker fails.
+    """
+    for Block in list(CreatedBlocks.values()):
+        try:
+            releaseData(Block, Unlink=True)
+        except FileNotFoundError:
+            CreatedBlocks.pop(Block.name, None)
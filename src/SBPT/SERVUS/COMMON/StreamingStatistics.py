@@ -0,0 +1,324 @@
+import numpy as np
+
+# Streaming statistics accumulators, updated with batches of samples (e.g. the
+# samples of an epoch or of a chunk of file) and optionally split by key (PRN,
+# IGP...) through the categorical code of each sample (see Indexing.buildGroupIndex).
+
+# Coefficients of the rational approximations of the inverse normal CDF
+# (Ref.: P. J. Acklam, "An algorithm for computing the inverse normal
+# cumulative distribution function", relative error below 1.15e-9)
+ACKLAM_A = [-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+    1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00]
+ACKLAM_B = [-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+    6.680131188771972e+01, -1.328068155288572e+01]
+ACKLAM_C = [-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+    -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00]
+ACKLAM_D = [7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+    3.754408661907416e+00]
+ACKLAM_PLOW = 0.02425
+
+# Ratio between the number of samples and the histogram size below which the
+# histogram is updated in place instead of with a full bincount
+HIST_SPARSE_RATIO = 8
+
+# ------------------------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def prepareSamples(Values, Codes):
+    """
+    Convert the samples into arrays, dropping the NaN samples.
+    """
+    Values = np.asarray(Values, dtype=float).ravel()
+    Codes = np.zeros(len(Values), dtype=np.int64) if Codes is None \
+        else np.asarray(Codes, dtype=np.int64).ravel()
+    Valid = ~np.isnan(Values)
+    if not np.all(Valid):
+        Values, Codes = Values[Valid], Codes[Valid]
+
+    return Values, Codes
+
+def growHistogram(Histogram, MinBin, MaxBin):
+    """
+    Extend the bins of the histogram to cover [MinBin, MaxBin].
+    """
+    Counts = Histogram["Counts"]
+    Origin = Histogram["Origin"] if Counts.shape[1] > 0 else MinBin
+    NewOrigin = min(Origin, MinBin)
+    NewEnd = max(Origin + Counts.shape[1], MaxBin + 1)
+    if NewOrigin == Origin and NewEnd == Origin + Counts.shape[1]:
+        return
+
+    NewCounts = np.zeros((Counts.shape[0], NewEnd - NewOrigin), dtype=np.int64)
+    NewCounts[:, Origin - NewOrigin:Origin - NewOrigin + Counts.shape[1]] = Counts
+    Histogram["Counts"] = NewCounts
+    Histogram["Origin"] = NewOrigin
+
+def combineMoments(Moments, N, Mean, M2, Min, Max):
+    """
+    Combine the moments of a batch (per key) with the accumulated ones
+    (Ref.: Chan et al. parallel variance algorithm).
+    """
+    Total = Moments["N"] + N
+    Updated = N > 0
+    Delta = Mean[Updated] - Moments["Mean"][Updated]
+    Weight = N[Updated] / Total[Updated]
+
+    Moments["Mean"][Updated] += Delta * Weight
+    Moments["M2"][Updated] += M2[Updated] + Delta**2 * Moments["N"][Updated] * Weight
+    Moments["N"] = Total
+    np.minimum(Moments["Min"], Min, out=Moments["Min"])
+    np.maximum(Moments["Max"], Max, out=Moments["Max"])
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def initializeMoments(NKeys=1):
+    """
+    Initialize the accumulators of the number of samples, mean, variance
+    (Welford sum of squared deviations M2), minimum and maximum of each key.
+    """
+    return {
+        "N": np.zeros(NKeys, dtype=np.int64),
+        "Mean": np.zeros(NKeys),
+        "M2": np.zeros(NKeys),
+        "Min": np.full(NKeys, np.inf),
+        "Max": np.full(NKeys, -np.inf),
+    }
+
+def updateMoments(Moments, Values, Codes=None):
+    """
+    Update the moments with a batch of samples.
+
+    Parameters:
+    - Moments: Moments accumulators (see initializeMoments).
+    - Values: Samples (NaN samples are ignored).
+    - Codes: Key code of each sample (all the samples to key 0 if not given).
+    """
+    Values, Codes = prepareSamples(Values, Codes)
+    if len(Values) == 0:
+        return
+
+    NKeys = len(Moments["N"])
+    if NKeys == 1:
+        N = np.array([len(Values)])
+        Mean = np.array([np.mean(Values)])
+        M2 = np.array([np.sum((Values - Mean[0])**2)])
+        Min, Max = np.array([np.min(Values)]), np.array([np.max(Values)])
+    else:
+        N = np.bincount(Codes, minlength=NKeys)
+        Mean = np.bincount(Codes, weights=Values, minlength=NKeys) / np.maximum(N, 1)
+        M2 = np.bincount(Codes, weights=(Values - Mean[Codes])**2, minlength=NKeys)
+        Min, Max = np.full(NKeys, np.inf), np.full(NKeys, -np.inf)
+        np.minimum.at(Min, Codes, Values)
+        np.maximum.at(Max, Codes, Values)
+
+    combineMoments(Moments, N, Mean, M2, Min, Max)
+
+def mergeMoments(Moments, Other):
+    """
+    Merge the moments accumulated separately (e.g. by several workers) into Moments.
+    """
+    combineMoments(Moments, Other["N"], Other["Mean"], Other["M2"], Other["Min"], Other["Max"])
+
+def getMomentsStatistics(Moments):
+    """
+    Get the statistics of each key from the moments (0 for the keys without samples).
+
+    Returns:
+    - Statistics: Dictionary with the "N", "MEAN", "STD", "RMS", "MIN" and "MAX" arrays.
+    """
+    N = Moments["N"]
+    Valid = N > 0
+    Variance = np.where(Valid, Moments["M2"] / np.maximum(N, 1), 0.0)
+
+    return {
+        "N": N,
+        "MEAN": Moments["Mean"],
+        "STD": np.sqrt(Variance),
+        "RMS": np.sqrt(Moments["Mean"]**2 + Variance),
+        "MIN": np.where(Valid, Moments["Min"], 0.0),
+        "MAX": np.where(Valid, Moments["Max"], 0.0),
+    }
+
+def initializeHistogram(Resolution, NKeys=1):
+    """
+    Initialize an array-backed histogram of the given bin resolution, with
+    one row of bins per key. Bin i holds the samples in [i, i+1) * Resolution,
+    the bins being extended on demand to the range of the samples.
+    """
+    return {
+        "Resolution": Resolution,
+        "Origin": 0,
+        "Counts": np.zeros((NKeys, 0), dtype=np.int64),
+        "NSamples": np.zeros(NKeys, dtype=np.int64),
+    }
+
+def updateHistogram(Histogram, Values, Codes=None):
+    """
+    Update the histogram with a batch of samples.
+
+    Parameters:
+    - Histogram: Histogram (see initializeHistogram).
+    - Values: Samples (NaN samples are ignored).
+    - Codes: Key code of each sample (all the samples to key 0 if not given).
+    """
+    Values, Codes = prepareSamples(Values, Codes)
+    if len(Values) == 0:
+        return
+
+    Bins = np.floor(Values / Histogram["Resolution"]).astype(np.int64)
+    growHistogram(Histogram, int(np.min(Bins)), int(np.max(Bins)))
+
+    Counts = Histogram["Counts"]
+    Flat = Codes * Counts.shape[1] + (Bins - Histogram["Origin"])
+    if len(Flat) * HIST_SPARSE_RATIO < Counts.size:
+        np.add.at(Counts.reshape(-1), Flat, 1)
+    else:
+        Counts += np.bincount(Flat, minlength=Counts.size).reshape(Counts.shape)
+    Histogram["NSamples"] += np.bincount(Codes, minlength=Counts.shape[0])
+
+def mergeHistograms(Histogram, Other):
+    """
+    Merge a histogram of the same resolution and keys into Histogram.
+    """
+    if Other["Counts"].shape[1] == 0:
+        return
+
+    growHistogram(Histogram, Other["Origin"], Other["Origin"] + Other["Counts"].shape[1] - 1)
+    Start = Other["Origin"] - Histogram["Origin"]
+    Histogram["Counts"][:, Start:Start + Other["Counts"].shape[1]] += Other["Counts"]
+    Histogram["NSamples"] += Other["NSamples"]
+
+def collapseHistogram(Histogram):
+    """
+    Sum the histograms of all the keys into a single-key (global) histogram.
+    """
+    return {
+        "Resolution": Histogram["Resolution"],
+        "Origin": Histogram["Origin"],
+        "Counts": np.sum(Histogram["Counts"], axis=0, keepdims=True),
+        "NSamples": np.array([np.sum(Histogram["NSamples"])]),
+    }
+
+def computeHistogramCdf(Histogram):
+    """
+    Compute the CDF of each key from the histogram.
+
+    Returns:
+    - Edges: Upper edge of each bin, where the CDF is evaluated.
+    - Cdf: Fraction of the samples of each key below each edge (NKeys x NBins),
+      0 for the keys without samples.
+    """
+    Counts = Histogram["Counts"]
+    Edges = (Histogram["Origin"] + 1 + np.arange(Counts.shape[1])) * Histogram["Resolution"]
+    Cdf = np.cumsum(Counts, axis=1) / np.maximum(Histogram["NSamples"], 1)[:, None]
+
+    return Edges, Cdf
+
+def computeHistogramPercentile(Histogram, Percentile):
+    """
+    Compute a percentile [%] of each key: the upper edge of the first bin whose
+    CDF reaches it (0 for the keys without samples).
+    """
+    Edges, Cdf = computeHistogramCdf(Histogram)
+    if len(Edges) == 0:
+        return np.zeros(Cdf.shape[0])
+
+    Reached = Cdf * 100.0 >= Percentile - 1e-9
+    Percentiles = Edges[np.argmax(Reached, axis=1)]
+
+    return np.where(Histogram["NSamples"] > 0, Percentiles, 0.0)
+
+def computeInverseNormal(P):
+    """
+    Compute the inverse of the standard normal CDF for an array of probabilities
+    in (0, 1), with the Acklam rational approximation.
+    """
+    P = np.asarray(P, dtype=float)
+    X = np.empty_like(P)
+
+    Low = P < ACKLAM_PLOW
+    High = P > 1 - ACKLAM_PLOW
+    Central = ~(Low | High)
+
+    # Lower and upper tails
+    for Tail, Sign, Q in ((Low, 1.0, P[Low]), (High, -1.0, 1 - P[High])):
+        R = np.sqrt(-2 * np.log(Q))
+        Num = ((((ACKLAM_C[0] * R + ACKLAM_C[1]) * R + ACKLAM_C[2]) * R + ACKLAM_C[3]) * R + ACKLAM_C[4]) * R + ACKLAM_C[5]
+        Den = (((ACKLAM_D[0] * R + ACKLAM_D[1]) * R + ACKLAM_D[2]) * R + ACKLAM_D[3]) * R + 1
+        X[Tail] = Sign * Num / Den
+
+    # Central region
+    Q = P[Central] - 0.5
+    R = Q * Q
+    Num = (((((ACKLAM_A[0] * R + ACKLAM_A[1]) * R + ACKLAM_A[2]) * R + ACKLAM_A[3]) * R + ACKLAM_A[4]) * R + ACKLAM_A[5]) * Q
+    Den = ((((ACKLAM_B[0] * R + ACKLAM_B[1]) * R + ACKLAM_B[2]) * R + ACKLAM_B[3]) * R + ACKLAM_B[4]) * R + 1
+    X[Central] = Num / Den
+
+    return X
+
+def computeOverboundingSigma(Histogram, MinP=0.0, MinTailSamples=0):
+    """
+    Compute, for each key, the sigma of the smallest zero-mean Gaussian whose
+    folded CDF overbounds the CDF of the absolute samples in the bins above
+    the MinP percentile [%]: max(Edge / InvNormal((1 + Cdf) / 2)).
+
+    Parameters:
+    - Histogram: Histogram of the absolute samples (see initializeHistogram).
+    - MinP: Percentile [%] above which the CDF is overbounded.
+    - MinTailSamples: Minimum number of samples above a bin for it to be
+      overbounded, excluding the last bins whose CDF is dominated by a
+      few samples.
+
+    Returns:
+    - Sigmas: Overbounding sigma of each key (0 for the keys without samples).
+    """
+    Edges, Cdf = computeHistogramCdf(Histogram)
+    Tail = Histogram["NSamples"][:, None] - np.cumsum(Histogram["Counts"], axis=1)
+    Bounded = (Cdf * 100.0 > MinP) & (Cdf < 1.0) & (Edges[None, :] > 0) & \
+        (Tail >= max(MinTailSamples, 1))
+
+    Sigmas = np.zeros(Cdf.shape)
+    Sigmas[Bounded] = np.broadcast_to(Edges, Cdf.shape)[Bounded] / \
+        computeInverseNormal((1.0 + Cdf[Bounded]) / 2.0)
+
+    return np.max(Sigmas, axis=1, initial=0.0)
+
+
+# ------------------------------------------------------------------------------------
+# BENCHMARK
+# ------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    # Per-sample cost of the batch updates, for epoch-sized and chunk-sized batches
+    from time import perf_counter
+
+    NSamples = 2000000
+    NKeys = 64
+    Generator = np.random.default_rng(0)
+    Values = np.abs(Generator.standard_normal(NSamples))
+    Codes = Generator.integers(0, NKeys, NSamples)
+
+    def benchmark(Name, Function, BatchSize):
+        Start = perf_counter()
+        for First in range(0, NSamples, BatchSize):
+            Function(Values[First:First + BatchSize], Codes[First:First + BatchSize])
+        Elapsed = perf_counter() - Start
+        print("%-32s batch %8d: %8.1f ns/sample" % (Name, BatchSize, Elapsed / NSamples * 1e9))
+
+    for BatchSize in (32, 1000, 100000):
+        Moments = initializeMoments(NKeys)
+        benchmark("Moments per key", lambda V, C: updateMoments(Moments, V, C), BatchSize)
+        Histogram = initializeHistogram(0.001, NKeys)
+        benchmark("Histogram per key (0.001)", lambda V, C: updateHistogram(Histogram, V, C), BatchSize)
+        Global = initializeHistogram(0.001)
+        benchmark("Histogram global (0.001)", lambda V, C: updateHistogram(Global, V), BatchSize)
+
+    Start = perf_counter()
+    Percentiles = computeHistogramPercentile(Histogram, 95.0)
+    Sigmas = computeOverboundingSigma(Histogram, MinP=68.0, MinTailSamples=10)
+    print("Percentile and overbounding of %d keys: %.1f ms" % (NKeys, (perf_counter() - Start) * 1e3))
+    print("Mean 95%% percentile %.3f, overbounding sigma %.3f (half-normal samples)" %
+        (np.mean(Percentiles), np.mean(Sigmas)))
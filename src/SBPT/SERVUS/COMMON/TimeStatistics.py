@@ -0,0 +1,160 @@
+import numpy as np
+from collections import OrderedDict, deque
+
+# Reductions supported by the time statistics accumulators
+SUM = "sum"
+MAX = "max"
+
+# ------------------------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def initializeAccumulators(Fields, Size):
+    # Maximum fields start at 0, as the daily statistics (only positive values are tracked)
+    return {Field: np.zeros(Size) for Field in Fields}
+
+def reduceEpoch(TimeStats, Codes, Values):
+    """
+    Reduce the samples of an epoch into per-key and whole-epoch accumulators.
+    """
+    NKeys = len(TimeStats["Keys"])
+    PerKey = {}
+    Total = {}
+    for Field, Reduction in TimeStats["Fields"].items():
+        if Reduction == SUM:
+            PerKey[Field] = np.bincount(Codes, weights=Values[Field], minlength=NKeys)
+            Total[Field] = float(np.sum(Values[Field]))
+        else:
+            PerKey[Field] = np.zeros(NKeys)
+            np.maximum.at(PerKey[Field], Codes, Values[Field])
+            Total[Field] = float(np.max(Values[Field], initial=0.0))
+
+    return PerKey, Total
+
+def updateTimeBins(TimeStats, Sod, PerKey):
+    BinStart = Sod - Sod % TimeStats["TimeBin"]
+    Bins = TimeStats["Bins"]
+    if BinStart not in Bins:
+        Bins[BinStart] = initializeAccumulators(TimeStats["Fields"], len(TimeStats["Keys"]))
+
+    for Field, Reduction in TimeStats["Fields"].items():
+        if Reduction == SUM:
+            Bins[BinStart][Field] += PerKey[Field]
+        else:
+            np.maximum(Bins[BinStart][Field], PerKey[Field], out=Bins[BinStart][Field])
+
+def updateSlidingWindow(TimeStats, Sod, Total):
+    """
+    Update the sliding window with the totals of an epoch, using ring buffers:
+    sums are kept as running sums (added when entering the window and
+    subtracted when leaving it) and maxima as monotonic queues.
+    """
+    Window = TimeStats["Window"]
+    Ring = Window["Ring"]
+
+    Ring.append((Sod, Total))
+    for Field, Reduction in TimeStats["Fields"].items():
+        if Reduction == SUM:
+            Window["Sums"][Field] += Total[Field]
+        else:
+            MaxQueue = Window["MaxQueues"][Field]
+            while MaxQueue and MaxQueue[-1][1] <= Total[Field]:
+                MaxQueue.pop()
+            MaxQueue.append((Sod, Total[Field]))
+
+    # Expire the epochs out of the window (Sod - SlidingWindow, Sod]
+    Oldest = Sod - TimeStats["SlidingWindow"]
+    while Ring[0][0] <= Oldest:
+        _, OldTotal = Ring.popleft()
+        for Field, Reduction in TimeStats["Fields"].items():
+            if Reduction == SUM:
+                Window["Sums"][Field] -= OldTotal[Field]
+    for MaxQueue in Window["MaxQueues"].values():
+        while MaxQueue[0][0] <= Oldest:
+            MaxQueue.popleft()
+
+    Values = OrderedDict({"SoD": Sod})
+    for Field, Reduction in TimeStats["Fields"].items():
+        if Reduction == SUM:
+            Values[Field] = Window["Sums"][Field]
+        else:
+            Values[Field] = Window["MaxQueues"][Field][0][1]
+    Window["Values"].append(Values)
+
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def initializeTimeStats(Keys, Fields, TimeBin=0, SlidingWindow=0):
+    """
+    Initialize the time statistics accumulators, updated epoch by epoch
+    in the same pass as the daily statistics.
+
+    Parameters:
+    - Keys: Keys of the statistics (e.g. PRN labels or IGP ids).
+    - Fields: Dictionary mapping each accumulated field to its reduction (SUM or MAX).
+    - TimeBin: Size of the time bins [s], per key (0 to disable).
+    - SlidingWindow: Size of the sliding window [s], over all the keys (0 to disable).
+
+    Returns:
+    - TimeStats: Dictionary with the accumulators.
+    """
+    TimeStats = {
+        "Keys": list(Keys),
+        "Codes": {Key: Code for Code, Key in enumerate(Keys)},
+        "Fields": Fields,
+        "TimeBin": TimeBin,
+        "SlidingWindow": SlidingWindow,
+        "Bins": OrderedDict({}),
+        "Window": {
+            "Ring": deque(),
+            "Sums": {Field: 0.0 for Field in Fields},
+            "MaxQueues": {Field: deque() for Field in Fields if Fields[Field] == MAX},
+            "Values": [],
+        },
+    }
+
+    return TimeStats
+
+def isTimeStatsEnabled(TimeStats):
+    return TimeStats["TimeBin"] > 0 or TimeStats["SlidingWindow"] > 0
+
+def updateTimeStats(TimeStats, Sod, Keys, Values):
+    """
+    Update the time statistics with the samples of an epoch.
+
+    Parameters:
+    - TimeStats: Time statistics accumulators (see initializeTimeStats).
+    - Sod: Second of day of the epoch.
+    - Keys: Key of each sample of the epoch.
+    - Values: Dictionary with the array of values of each field, per sample.
+    """
+    if not isTimeStatsEnabled(TimeStats):
+        return
+
+    Codes = np.array([TimeStats["Codes"][Key] for Key in Keys], dtype=int)
+    PerKey, Total = reduceEpoch(TimeStats, Codes, Values)
+
+    if TimeStats["TimeBin"] > 0:
+        updateTimeBins(TimeStats, Sod, PerKey)
+
+    if TimeStats["SlidingWindow"] > 0:
+        updateSlidingWindow(TimeStats, Sod, Total)
+
+def iterateTimeBins(TimeStats):
+    """
+    Iterate over the time bins with samples, yielding (BinStart, Key, Values)
+    in time and key order, Values being a dictionary with the accumulated fields.
+    """
+    for BinStart, Bin in TimeStats["Bins"].items():
+        for Code, Key in enumerate(TimeStats["Keys"]):
+            yield BinStart, Key, {Field: Bin[Field][Code] for Field in TimeStats["Fields"]}
+
+def iterateSlidingWindow(TimeStats):
+    """
+    Iterate over the epochs, yielding the accumulated fields of the sliding
+    window ending at each epoch (dictionary, including the SoD).
+    """
+    for Values in TimeStats["Window"]["Values"]:
+        yield Values
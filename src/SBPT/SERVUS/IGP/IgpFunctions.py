@@ -17,7 +17,13 @@
 #----------------------------------------------------------------------
 import sys
 import numpy as np
-from COMMON.Files import readDataFile
+from COMMON.Files import readDataFile, writeDataLines, writeSchemaFile, writeSchemaRows
+from COMMON.Compression import openDataFile
+from COMMON.Indexing import buildGroupIndex, computeStatusRuns, reduceRuns
+from COMMON.TimeStatistics import initializeTimeStats, isTimeStatsEnabled
+from COMMON.TimeStatistics import updateTimeStats, iterateTimeBins, iterateSlidingWindow
+from COMMON.Overbounding import OVERBOUND_MIN_PERCENTILE, OVERBOUND_RESOLUTION
+from COMMON.Overbounding import initializeOverbounding, updateOverbounding, iterateOverbounding
 from collections import OrderedDict
 import IgpStatistics  as stat
 from IgpStatistics import IgpInfoIdx, IgpStatsIdx
@@ -26,22 +32,46 @@ from IgpStatistics import IgpInfoIdx, IgpStatsIdx
 # Define Satidistics Output file format list
 StatsOutputFormatList = stat.StatsOutputFormat.split()
 
+# Statistics lines, with a delimiter after each field
+StatsLineFormat = "".join(Format + " " for Format in StatsOutputFormatList) + "\n"
+
 # ------------------------------------------------------------------------------------
 # EXTERNAL FUNCTIONS 
 # ------------------------------------------------------------------------------------
-def computeIgpStats(igpInfoFile, igpStatsFile):
+def computeIgpStats(igpInfoFile, igpStatsFile, igpMonWinFile,
+    TimeBin = 0, igpStatBinFile = None, SlidingWindow = 0, igpStatWinFile = None,
+    igpOverboundFile = None, OverboundMinP = OVERBOUND_MIN_PERCENTILE,
+    OverboundResolution = OVERBOUND_RESOLUTION):
+    """
+    Compute the daily IGP Statistics reading the IGP INFO file once.
+
+    Optionally, the statistics per time bin of TimeBin seconds and per IGP
+    (igpStatBinFile) and over a sliding window of SlidingWindow seconds
+    (igpStatWinFile) are computed in the same pass.
+
+    If igpOverboundFile is given, the Gaussian overbounding of the normalized
+    error GIVDE/SigmaGIVE is computed per IGP and for all the IGPs, from the
+    histograms of the normalized errors above the OverboundMinP percentile [%]
+    (see COMMON.Overbounding).
+    """
     
     # Initialize Variables
     EndOfFile = False
     EpochInfo = []
     delim = " "
 
+    # Monitoring columns, processed at once at the end of the file
+    MonColumns = {"SoD": [], "ID": [], "STATUS": [], "NIPP": []}
+
     # Open IGP INFO file
-    with open(igpInfoFile, 'r') as fsat:
+    with openDataFile(igpInfoFile) as fsat:
         
         # Read header line of Sat Information file
         fsat.readline()
 
+        # Epochs of the file, read in sequence
+        Epochs = stat.readIgpInfoEpochs(fsat)
+
         # Open Output File Satellite Statistics file
         with open(igpStatsFile, 'w') as fOut:
             # Define and Initialize Variables            
@@ -51,12 +81,17 @@ def computeIgpStats(igpInfoFile, igpStatsFile):
             # Initialize Outputs
             stat.initializeOutputs(Outputs)
             stat.initializeInterOutputs(InterOutputs)
+            TimeStats = initializeTimeStats(Outputs.keys(), stat.TimeStatsFields, TimeBin, SlidingWindow)
+
+            # Normalized error accumulators of the overbounding (optional)
+            Overbound = initializeOverbounding(Outputs.keys(), OverboundResolution) \
+                if igpOverboundFile is not None else None
 
             # LOOP over all Epochs of IGP INFO file
             # ----------------------------------------------------------
             while not EndOfFile:                    
                 # Read Only One Epoch
-                EpochInfo = stat.readIgpInfoEpoch(fsat)
+                EpochInfo = next(Epochs, [])
                 
                 # If EpochInfor is not Null
                 if EpochInfo != []:
@@ -67,13 +102,40 @@ def computeIgpStats(igpInfoFile, igpStatsFile):
                     for IgpInfo in EpochInfo:
                         # Update the Intermediate Statistics
                         updateEpochStats(IgpInfo, InterOutputs, Outputs)                                            
+
+                    # Collect the monitoring columns of the epoch
+                    for Column in MonColumns:
+                        MonColumns[Column].extend([IgpInfo[IgpInfoIdx[Column]] for IgpInfo in EpochInfo])
+
+                    # Update the time binned and sliding window statistics
+                    if isTimeStatsEnabled(TimeStats):
+                        Ids, Values = stat.getEpochTimeStatsValues(EpochInfo)
+                        updateTimeStats(TimeStats, int(EpochInfo[0][IgpInfoIdx["SoD"]]), Ids, Values)
+
+                    # Update the normalized error accumulators of the overbounding
+                    if Overbound is not None:
+                        Ids, Errors = stat.getEpochNormalizedErrors(EpochInfo)
+                        updateOverbounding(Overbound, Ids, Errors)
                 
                 else:
                     EndOfFile = True
             
+            # Compute the Monitoring Windows and the Number of Transitions
+            # ----------------------------------------------------------
+            computeMonitoringWindows(MonColumns, Outputs, igpMonWinFile)
+
             # Compute the final Statistics
             # ----------------------------------------------------------
             computeFinalStatistics(InterOutputs, Outputs)
+
+            # Write the time binned and sliding window Statistics Files
+            # ----------------------------------------------------------
+            writeTimeStats(TimeStats, igpStatBinFile, igpStatWinFile)
+
+            # Write the Overbounding File
+            # ----------------------------------------------------------
+            if Overbound is not None:
+                writeOverbounding(Overbound, OverboundMinP, igpOverboundFile)
             
             # Write Statistics File
             # ----------------------------------------------------------
@@ -82,19 +144,10 @@ def computeIgpStats(igpInfoFile, igpStatsFile):
             header_string = "ID   BAND BIT   LON       LAT      MON    MINIPPs MAXIPPs NTRANS  RMSGIVDE MAXGIVD  MAXGIVE  MAXGIVEI  MAXVTEC  MAXSI     NMI\n"
             fOut.write(header_string)
 
-            for sat in Outputs.keys():
-                
-                # Remove 0% monitored satellites because we're not interested in them
-                if(Outputs[sat]["MON"] != 0):
-                    
-                    for i, result in enumerate(Outputs[sat]):
-                        fOut.write(((StatsOutputFormatList[i] + delim) % Outputs[sat][result]))
-
-                    fOut.write("\n")
-
-                    # End of for i, result in enumerate(Outputs[sat]):
-                # End of if(Outputs[sat]["MON"] != 0):
-            # End of for sat in Outputs.keys():
+            # Remove 0% monitored IGPs because we're not interested in them
+            Igps = [igpId for igpId in Outputs.keys() if Outputs[igpId]["MON"] != 0]
+            writeDataLines(fOut, StatsLineFormat,
+                [[Outputs[igpId][result] for igpId in Igps] for result in IgpStatsIdx])
         # End of with open(satStatsFile, 'w') as fOut:        
     # End of with open(igpInfoFile, 'r') as f:
 
@@ -133,11 +186,8 @@ def updateEpochStats(IgpInfo, InterOutputs, Outputs):
     # Add Number of samples
     InterOutputs[igpId]["NSAMPS"] = InterOutputs[igpId]["NSAMPS"] + 1
 
-    # Add NTRANS Monitored to Not Monitored (MtoNM) or to Don't USE (MtoDU)
-    prevMon = InterOutputs[igpId]["MONPREV"]
+    # NTRANS is computed from the Monitoring Windows (see computeMonitoringWindows)
     currMon = int(IgpInfo[IgpInfoIdx["STATUS"]])
-    if(((prevMon == 1) and (currMon == 0)) or ((prevMon == 1) and (currMon == -1))):
-        Outputs[igpId]["NTRANS"] += 1      
 
     updateEpochMaxMinStatsNonMonitored(IgpInfo, igpId, Outputs)
 
@@ -211,6 +261,69 @@ def updateEpochMaxMinStatsMonitored(IgpInfo, igpId, Outputs):
         Outputs[igpId]["NMI"] += 1    
 
 
+def computeMonitoringWindows(MonColumns, Outputs, igpMonWinFile):
+    """
+    Compute the Monitoring Windows of each IGP (runs of consecutive
+    monitored samples) and the Number of Transitions from Monitored to
+    Not Monitored or Don't Use (NTRANS), and write the Monitoring Windows file.
+
+    Parameters:
+    - MonColumns: SoD, ID, STATUS and NIPP columns of all the samples of the day.
+    - Outputs: Output dictionary, where NTRANS is updated.
+    - igpMonWinFile: Monitoring Windows output file path.
+    """
+    Sod = np.array(MonColumns["SoD"], dtype=int)
+    Status = np.array(MonColumns["STATUS"], dtype=int)
+    NIpp = np.array(MonColumns["NIPP"], dtype=int)
+    IgpIndex = buildGroupIndex(np.array(MonColumns["ID"], dtype=int))
+
+    # Sampling step of the file, which splits the windows with missing samples
+    Sods = np.unique(Sod)
+    Step = int(np.min(np.diff(Sods))) if len(Sods) > 1 else 0
+
+    Runs = computeStatusRuns(IgpIndex, Sod, Status, 1, Step, Step)
+    IppsMin = reduceRuns(Runs, NIpp, np.minimum)
+
+    # Update the Number of Transitions
+    for Position, igpId in enumerate(IgpIndex["Keys"]):
+        if igpId in Outputs:
+            Outputs[igpId]["NTRANS"] = Runs["NTRANS"][Position]
+
+    # Write Monitoring Windows file
+    writeSchemaFile(igpMonWinFile, stat.IgpMonWinSchema, {
+        "ID": IgpIndex["Keys"][Runs["Codes"]],
+        "START": Runs["Start"],
+        "END": Runs["End"],
+        "DURATION": Runs["Duration"],
+        "NSAMPS": Runs["NSAMPS"],
+        "MINIPPs": IppsMin,
+    })
+
+def writeTimeStats(TimeStats, igpStatBinFile, igpStatWinFile):
+    """
+    Write the time binned (per IGP) and the sliding window (all IGPs)
+    Statistics files, if enabled.
+    """
+    if TimeStats["TimeBin"] > 0:
+        # Skip the IGPs without samples in the bin
+        Lines = [(BinStart, igpId) + stat.computeTimeStatsOutputs(Values)
+            for BinStart, igpId, Values in iterateTimeBins(TimeStats) if Values["NSAMPS"] != 0]
+        writeSchemaRows(igpStatBinFile, stat.IgpStatBinSchema, Lines)
+
+    if TimeStats["SlidingWindow"] > 0:
+        Lines = [(Values["SoD"],) + stat.computeTimeStatsOutputs(Values)
+            for Values in iterateSlidingWindow(TimeStats)]
+        writeSchemaRows(igpStatWinFile, stat.IgpStatWinSchema, Lines)
+
+def writeOverbounding(Overbound, OverboundMinP, igpOverboundFile):
+    """
+    Write the Overbounding file: the moments of the normalized errors and
+    their overbounding inflation factor per IGP, and for all the IGPs (IGP 0).
+    """
+    writeSchemaRows(igpOverboundFile, stat.IgpOverboundSchema,
+        [(0 if igpId is None else igpId, NSamps, Mean, Std, MaxAbs, Factor)
+            for igpId, NSamps, Mean, Std, MaxAbs, Factor in iterateOverbounding(Overbound, OverboundMinP)])
+
 def computeFinalStatistics(InterOutputs, Outputs):
     for igpId in Outputs.keys():
 
@@ -16,7 +16,8 @@
 # -----------------------------------------------------------------
 #
 # Usage:
-# i.e: IgpPerformances $SCEN_PATH
+# i.e: IgpPerformances $SCEN_PATH [--no-plots] [--force]
+#      [--profile[=FILE]] [--profile-stacks[=FILE]]
 
 # Internal dependencies:
 #   COMMON
@@ -25,33 +26,88 @@
 # Import External and Internal functions and Libraries
 #----------------------------------------------------------------------
 import sys, os
+import functools
 projectDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, projectDir)
 from COMMON.Dates import convertJulianDay2YearMonthDay
 from COMMON.Dates import convertYearMonthDay2Doy
-from COMMON.Files import readDataFile, readConf, processConf
-from IgpFunctions import computeIgpStats
-import WP2Plots  as wp2
+from COMMON.Files import readDataFile, readConf, processConf, readOptions
+from COMMON.Files import exportParquetFile, getParquetFilePath
+from COMMON.Parquet import isArrowAvailable
+from COMMON.Compression import findDataFile, removeCompressionSuffix
+from COMMON.Profiler import enableProfilerFromOptions, instrumentModule
+from COMMON.Profiler import span, finishProfiler
+from COMMON.Overbounding import OVERBOUND_MIN_PERCENTILE, OVERBOUND_RESOLUTION
+from COMMON.BuildGraph import loadBuildGraph, isStageStale, recordStage
+from COMMON.Pipeline import startPipeline, iteratePipeline, submitRender, finishPipeline, abortPipeline
+from COMMON.Pipeline import prefetchFiles, PIPELINE_QUEUE_SIZE
+from COMMON.SharedData import shareData, releaseData, releaseSharedData
+import IgpFunctions
+from IgpStatistics import IgpInfoSchema, IgpStatsSchema, IgpMonWinSchema
+from IgpStatistics import IgpStatBinSchema, IgpStatWinSchema, IgpOverboundSchema
 
 
 #----------------------------------------------------------------------
 # INTERNAL FUNCTIONS
 #----------------------------------------------------------------------
 
+# Configuration keys the Statistics stage depends on (besides the IGP INFO file)
+STATS_CONF_KEYS = ["STATS_TIME_BIN", "STATS_SLIDING_WINDOW",
+    "OVERBOUND", "OVERBOUND_MIN_PERCENTILE", "OVERBOUND_RESOLUTION"]
+
 def displayUsage():
-    sys.stderr.write("ERROR: Please provide path to SCENARIO as a unique argument\n")
+    sys.stderr.write("ERROR: Please provide path to SCENARIO as first argument\n")
+    sys.stderr.write("Options: --no-plots --force --profile[=FILE] --profile-stacks[=FILE]\n")
+
+def getIgpInfoFile(Jd):
+    """
+    Get the IGP INFO file of a day (compressed if only archived compressed).
+    """
+    Year, Month, Day = convertJulianDay2YearMonthDay(Jd)
+    Doy = convertYearMonthDay2Doy(Year, Month, Day)
+
+    return findDataFile(Scen + \
+        '/OUT/IGP/' + 'IGP_INFO_Y%02dD%03d_G123_%ss.dat' % \
+            (Year % 100, Doy, Conf["TSTEP"]))
+
+def finishFigures(Stages, SharedBlocks):
+    """
+    Release the shared memory blocks of the figures of a day and record
+    their stages as built (called once the figures are rendered).
+    """
+    for Block in SharedBlocks:
+        releaseData(Block, Unlink=True)
+    for Stage in Stages:
+        recordStage(Build, Stage)
+
+def prefetchDay(Jd):
+    """
+    Prefetch the IGP INFO file of a day (run by the pipeline reader thread).
+    """
+    return prefetchFiles([getIgpInfoFile(Jd)])
 
 #######################################################
 # MAIN BODY
 #######################################################
 
 # Check Input Arguments
-if len(sys.argv) != 2:
+if len(sys.argv) < 2 or sys.argv[1].startswith("--"):
     displayUsage()
     sys.exit()
 
 # Extract the arguments
 Scen = sys.argv[1]
+Options = readOptions(sys.argv[2:])
+
+# Enable the profiler if requested, tracing the functions of the IGP modules
+enableProfilerFromOptions(Options, Scen + '/OUT/PROFILE', 'IgpPerformances')
+instrumentModule(IgpFunctions, ["computeIgpStats", "computeFinalStatistics"])
+
+# Plotting modules are only imported if figures are generated
+GeneratePlots = "--no-plots" not in Options
+if GeneratePlots:
+    import WP2Plots  as wp2
+    instrumentModule(wp2)
 
 # Select the conf file name
 CfgFile = Scen + '/CFG/igpperformances.cfg'
@@ -63,49 +119,174 @@ Conf = readConf(CfgFile)
 # Process Configuration Parameters
 Conf = processConf(Conf)
 
+# Time bin and sliding window of the intra-day Statistics [s] (optional, 0 to disable)
+TimeBin = int(Conf["STATS_TIME_BIN"]) if "STATS_TIME_BIN" in Conf else 0
+SlidingWindow = int(Conf["STATS_SLIDING_WINDOW"]) if "STATS_SLIDING_WINDOW" in Conf else 0
+
+# Gaussian overbounding of the normalized errors GIVDE/SigmaGIVE (optional):
+# percentile [%] above which the tails are overbounded and histogram resolution
+ComputeOverbound = "OVERBOUND" in Conf and int(Conf["OVERBOUND"]) == 1
+OverboundMinP = float(Conf["OVERBOUND_MIN_PERCENTILE"]) if "OVERBOUND_MIN_PERCENTILE" in Conf else \
+    OVERBOUND_MIN_PERCENTILE
+OverboundResolution = float(Conf["OVERBOUND_RESOLUTION"]) if "OVERBOUND_RESOLUTION" in Conf else \
+    OVERBOUND_RESOLUTION
+
+# Monitoring positions of the IGP time figures (optional, WP2Plots defaults otherwise)
+MonPositions = None
+if GeneratePlots and "IGP_MON_POINTS" in Conf:
+    MonPositions = wp2.parseMonitoringPositions(Conf["IGP_MON_POINTS"])
+
+# Export of the INFO and STAT products to Parquet datasets, partitioned by day
+# and GEO set (optional, needs pyarrow)
+ExportParquet = "PARQUET_EXPORT" in Conf and int(Conf["PARQUET_EXPORT"]) == 1
+if ExportParquet and not isArrowAvailable():
+    sys.stderr.write("ERROR: pyarrow not found, the Parquet export is disabled\n")
+    ExportParquet = False
+ParquetDir = Scen + '/OUT/IGP/PARQUET'
+
+# Build records of the stages: only the stale stages are rebuilt, unless forced
+Build = loadBuildGraph(Scen + '/OUT/IGP/BUILD_MANIFEST.json', "--force" in Options)
+
+# Pipeline of the days: number of days prefetched ahead and of figure
+# rendering processes (0 to render the figures of each day in sequence)
+PrefetchDays = int(Conf["PIPELINE_PREFETCH_DAYS"]) if "PIPELINE_PREFETCH_DAYS" in Conf else \
+    PIPELINE_QUEUE_SIZE
+RenderProcs = int(Conf["PIPELINE_RENDER_PROCS"]) if "PIPELINE_RENDER_PROCS" in Conf else 1
+
 # Print 
 print('------------------------------------')
 print('--> RUNNING IGP-PERFORMANCE ANALYSIS:')
 print('------------------------------------')
 
-# Loop over Julian Days in simulation
+# Loop over Julian Days in simulation: the IGP INFO files of the next days are
+# prefetched and the figures of the previous days rendered meanwhile
 #-----------------------------------------------------------------------
-for Jd in range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1):
+Pipeline = startPipeline(range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1), prefetchDay,
+    RenderProcs if GeneratePlots else 0, PrefetchDays)
+try:
+    for Jd, _ in iteratePipeline(Pipeline):
 
-    # Compute Year, Month and Day in order to build input file name
-    Year, Month, Day = convertJulianDay2YearMonthDay(Jd)
+        # Compute Year, Month and Day in order to build input file name
+        Year, Month, Day = convertJulianDay2YearMonthDay(Jd)
     
-    # Estimate the Day of Year DOY
-    Doy = convertYearMonthDay2Doy(Year, Month, Day)
-    yearDayText = 'Y%02dD%03d' % (Year % 100, Doy)
+        # Estimate the Day of Year DOY
+        Doy = convertYearMonthDay2Doy(Year, Month, Day)
+        yearDayText = 'Y%02dD%03d' % (Year % 100, Doy)
 
-    # Define the full path and name to the SAT INFO file to read
-    IgpInfoFilePath = Scen + \
-        '/OUT/IGP/' + 'IGP_INFO_%s_G123_%ss.dat' % \
-            (yearDayText, Conf["TSTEP"])
+        # Define the full path and name to the IGP INFO file to read
+        IgpInfoFilePath = getIgpInfoFile(Jd)
 
-    # Define the name of the Output file Statistics
-    IgpStatsFile = IgpInfoFilePath.replace("INFO", "STAT")
+        # The output files are named after the uncompressed IGP INFO file
+        IgpInfoFileName = removeCompressionSuffix(IgpInfoFilePath)
 
-    print('\n*** Processing Day of Year: ', Doy, '...***')
-    
-    print('1. Processing file: ', IgpInfoFilePath)
-    
-    # T1. Compute IGP Statistics and generate file
-    computeIgpStats(IgpInfoFilePath, IgpStatsFile)
-    
-    print('2. Created file:', IgpStatsFile) 
+        # Define the name of the Output file Statistics
+        IgpStatsFile = IgpInfoFileName.replace("INFO", "STAT")
 
-    print('3. Generating Figures...\n')
-    
-    # T2. Generate IGP Statistic Maps figures   
-    wp2.plotIgpStatsMaps(IgpStatsFile, yearDayText)
-    
-    # T3. Generate IGP Time figures     
-    wp2.plotIgpInfoTime(IgpInfoFilePath, yearDayText)   
-    
+        # Define the name of the Output file Monitoring Windows
+        IgpMonWinFile = IgpInfoFileName.replace("INFO", "MONWIN")
+
+        # Define the name of the Output files of the time binned and sliding window Statistics
+        IgpStatBinFile = IgpInfoFileName.replace("INFO", "STATBIN")
+        IgpStatWinFile = IgpInfoFileName.replace("INFO", "STATWIN")
+
+        # Define the name of the Output file of the Overbounding (optional)
+        IgpOverboundFile = IgpInfoFileName.replace("INFO", "OVERBOUND") if ComputeOverbound else None
+
+        print('\n*** Processing Day of Year: ', Doy, '...***')
+
+        # Output files of the Statistics stage
+        StatsOutputs = [IgpStatsFile, IgpMonWinFile] + \
+            ([IgpStatBinFile] if TimeBin > 0 else []) + \
+            ([IgpStatWinFile] if SlidingWindow > 0 else []) + \
+            ([IgpOverboundFile] if ComputeOverbound else [])
+
+        with span("Day %s" % yearDayText, "day", Doy=Doy):
+
+            print('1. Processing file: ', IgpInfoFilePath)
+
+            # T1. Compute IGP Statistics and generate file
+            if isStageStale(Build, "STAT " + yearDayText, [IgpInfoFilePath], StatsOutputs, Conf, STATS_CONF_KEYS):
+                with span("Compute Statistics"):
+                    IgpFunctions.computeIgpStats(IgpInfoFilePath, IgpStatsFile, IgpMonWinFile,
+                        TimeBin, IgpStatBinFile, SlidingWindow, IgpStatWinFile,
+                        IgpOverboundFile, OverboundMinP, OverboundResolution)
+                recordStage(Build, "STAT " + yearDayText)
+
+                print('2. Created files:','\n', IgpStatsFile,'\n', IgpMonWinFile)
+                if ComputeOverbound:
+                    print('   Created overbounding file:','\n', IgpOverboundFile)
+            else:
+                print('2. Statistics up to date:','\n', IgpStatsFile)
+
+            # Export the INFO, STAT and enabled optional products to the Parquet datasets
+            if ExportParquet:
+                ParquetProducts = [(IgpInfoFilePath, IgpInfoSchema), (IgpStatsFile, IgpStatsSchema),
+                    (IgpMonWinFile, IgpMonWinSchema)]
+                if TimeBin > 0:
+                    ParquetProducts.append((IgpStatBinFile, IgpStatBinSchema))
+                if SlidingWindow > 0:
+                    ParquetProducts.append((IgpStatWinFile, IgpStatWinSchema))
+                if ComputeOverbound:
+                    ParquetProducts.append((IgpOverboundFile, IgpOverboundSchema))
+                ParquetProducts = [(Path, Schema) for Path, Schema in ParquetProducts if os.path.isfile(Path)]
+                if isStageStale(Build, "PARQUET " + yearDayText, [Path for Path, _ in ParquetProducts],
+                    [getParquetFilePath(Path, Schema, ParquetDir) for Path, Schema in ParquetProducts]):
+                    with span("Export Parquet"):
+                        for Path, Schema in ParquetProducts:
+                            exportParquetFile(Path, Schema, ParquetDir)
+                    recordStage(Build, "PARQUET " + yearDayText)
+                    print('   Exported Parquet datasets:','\n', ParquetDir)
+
+            if not GeneratePlots:
+                continue
+
+            # Figures stages, with their input files and configuration keys, and
+            # their figures as outputs: only the stale figures are generated
+            StaleFigures = [Figure for Figure, Inputs, ConfKeys in [
+                    ("FIG-STAT", [IgpStatsFile], []),
+                    ("FIG-TIME", [IgpInfoFilePath], ["IGP_MON_POINTS"]),
+                ] if isStageStale(Build, Figure + " " + yearDayText, Inputs,
+                    wp2.getFigurePaths(Figure, yearDayText, MonPositions), Conf, ConfKeys)]
+            if not StaleFigures:
+                print('3. Figures up to date')
+                continue
+
+            print('3. Generating Figures...\n')
+
+            # Figures rendered by the pipeline workers, recorded as built once rendered
+            RenderTasks = []
+            SharedBlocks = []
+            # T2. Generate IGP Statistic Maps figures
+            if "FIG-STAT" in StaleFigures:
+                RenderTasks.append(("Plot Statistics Maps", wp2.plotIgpStatsMaps, (IgpStatsFile, yearDayText)))
+
+            # T3. Generate IGP Time figures
+            # With several render workers, the IGP INFO columns are read once and
+            # placed in shared memory for the workers of the IGP INFO figures
+            if "FIG-TIME" in StaleFigures and RenderProcs > 1:
+                with span("Read IGP INFO"):
+                    IgpInfoShared, IgpInfoBlock = shareData(wp2.readIgpInfoTimeData(IgpInfoFilePath))
+                RenderTasks += [("Plot Time " + Figures, wp2.plotIgpInfoTimeShared,
+                    (IgpInfoShared, yearDayText, MonPositions, [Figures])) for Figures in wp2.IgpInfoTimeFigures]
+                SharedBlocks.append(IgpInfoBlock)
+            elif "FIG-TIME" in StaleFigures:
+                RenderTasks.append(("Plot Time", wp2.plotIgpInfoTime, (IgpInfoFilePath, yearDayText, MonPositions)))
+
+            with span("Generate Figures"):
+                submitRender(Pipeline, RenderTasks, functools.partial(finishFigures,
+                    [Figure + " " + yearDayText for Figure in StaleFigures], SharedBlocks))
 
+    # Wait for the figures still being rendered
+    with span("Finish Figures"):
+        finishPipeline(Pipeline)
+finally:
+    # Terminate the render workers and remove the shared memory blocks left
+    # by a failed day or figure
+    abortPipeline(Pipeline)
+    releaseSharedData()
 
+# Write the profiler outputs, if enabled
+finishProfiler()
 
 
 #####################################################################
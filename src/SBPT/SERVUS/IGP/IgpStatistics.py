@@ -19,58 +19,128 @@
 # Import External and Internal functions and Libraries
 #----------------------------------------------------------------------
 from collections import OrderedDict
-from COMMON.Plots import generatePlot
+from itertools import groupby
 from COMMON import GnssConstants
+from COMMON.TimeStatistics import SUM, MAX
+from COMMON.Schemas import defineSchema, getSchemaFormat
 from math import sqrt
 import numpy as np
 
-# Define SAT INFO FILE Columns
+# Define IGP INFO FILE Columns
 """
-SatStatsIdx is a dictionary that maps the column names of the satellite statistics file to their corresponding indices.
+IgpInfoSchema defines the columns of the IGP INFO file: (Name, Dtype, Unit, Format).
+IgpInfoIdx is a dictionary that maps the column names of the IGP INFO file to their corresponding indices.
 """
-IgpInfoIdx = dict([
-    ("SoD", 0),
-    ("DOY", 1),
-    ("ID", 2),
-    ("BAND", 3),
-    ("BIT", 4),
-    ("LON", 5),
-    ("LAT", 6),
-    ("STATUS", 7),
-    ("GIVEI", 8),
-    ("GIVE", 9),
-    ("GIVD", 10),
-    ("GIVDE_STAT", 11),
-    ("GIVDE", 12),
-    ("SI-W", 13),
-    ("VTEC", 14),
-    ("NIPP", 15),
-    ("MMFLAG", 16),
-    ("IONMMRATIO", 17)    
+IgpInfoSchema = defineSchema("IGP_INFO", [
+    ("SoD", "int32", "s", None),
+    ("DOY", "int16", None, None),
+    ("ID", "int16", None, None),
+    ("BAND", "int8", None, None),
+    ("BIT", "int16", None, None),
+    ("LON", "float64", "deg", None),
+    ("LAT", "float64", "deg", None),
+    ("STATUS", "int8", None, None),
+    ("GIVEI", "int8", None, None),
+    ("GIVE", "float64", "m", None),
+    ("GIVD", "float64", "m", None),
+    ("GIVDE_STAT", "int8", None, None),
+    ("GIVDE", "float64", "m", None),
+    ("SI-W", "float64", None, None),
+    ("VTEC", "float64", "m", None),
+    ("NIPP", "int16", None, None),
+    ("MMFLAG", "int8", None, None),
+    ("IONMMRATIO", "float64", None, None),
 ])
-
-# Define SAT STATISTICS file Columns
-IgpStatsIdx = dict([
-    ("ID", 0),
-    ("BAND", 1),
-    ("BIT", 2),
-    ("LON", 3),
-    ("LAT", 4),
-    ("MON", 5),
-    ("MINIPPs", 6),
-    ("MAXIPPs", 7),
-    ("NTRANS", 8),
-    ("RMSGIVDE", 9),
-    ("MAXGIVD", 10),
-    ("MAXGIVE", 11),
-    ("MAXGIVEI", 12),
-    ("MAXVTEC", 13),
-    ("MAXSI", 14),
-    ("NMI", 15)    
+IgpInfoIdx = IgpInfoSchema["Idx"]
+
+# Define IGP STATISTICS file Columns
+IgpStatsSchema = defineSchema("IGP_STAT", [
+    ("ID", "int16", None, "%3d"),
+    ("BAND", "int8", None, "%3d"),
+    ("BIT", "int16", None, "%5d"),
+    ("LON", "float64", "deg", "%8.2f"),
+    ("LAT", "float64", "deg", "%8.2f"),
+    ("MON", "float64", "%", "%8.2f"),
+    ("MINIPPs", "int16", None, "%6d"),
+    ("MAXIPPs", "int16", None, "%6d"),
+    ("NTRANS", "int32", None, "%6d"),
+    ("RMSGIVDE", "float64", "m", "%10.4f"),
+    ("MAXGIVD", "float64", "m", "%8.3f"),
+    ("MAXGIVE", "float64", "m", "%8.3f"),
+    ("MAXGIVEI", "int8", None, "%8d"),
+    ("MAXVTEC", "float64", "m", "%8.3f"),
+    ("MAXSI", "float64", None, "%8.4f"),
+    ("NMI", "int32", None, "%6d"),
+])
+IgpStatsIdx = IgpStatsSchema["Idx"]
+
+# Define MONITORING WINDOWS file Columns
+IgpMonWinSchema = defineSchema("IGP_MONWIN", [
+    ("ID", "int16", None, "%3d"),               # IGP ID
+    ("START", "int32", "s", "%6d"),             # SoD of the first monitored sample of the window
+    ("END", "int32", "s", "%6d"),               # SoD of the last monitored sample of the window
+    ("DURATION", "int32", "s", "%6d"),          # Duration of the window [s]
+    ("NSAMPS", "int32", None, "%6d"),           # Number of samples of the window
+    ("MINIPPs", "int16", None, "%6d"),          # Minimum number of IPPs surrounding the IGP during the window
+])
+IgpMonWinIdx = IgpMonWinSchema["Idx"]
+
+# Define TIME BINNED STATISTICS file Columns
+IgpStatBinSchema = defineSchema("IGP_STATBIN", [
+    ("SoD", "int32", "s", "%6d"),               # SoD of the start of the time bin
+    ("ID", "int16", None, "%3d"),               # IGP ID
+    ("NSAMPS", "int32", None, "%6d"),           # Number of samples
+    ("MON", "float64", "%", "%6.2f"),           # Monitoring percentage
+    ("RMSGIVDE", "float64", "m", "%10.4f"),     # RMS of GIVDE
+    ("MAXSI", "float64", None, "%8.4f"),        # Maximum Safety Index
+])
+IgpStatBinIdx = IgpStatBinSchema["Idx"]
+
+# Define SLIDING WINDOW STATISTICS file Columns (all IGPs)
+IgpStatWinSchema = defineSchema("IGP_STATWIN", [
+    ("SoD", "int32", "s", "%6d"),               # SoD of the end of the window
+    ("NSAMPS", "int32", None, "%6d"),           # Number of samples
+    ("MON", "float64", "%", "%6.2f"),           # Monitoring percentage
+    ("RMSGIVDE", "float64", "m", "%10.4f"),     # RMS of GIVDE
+    ("MAXSI", "float64", None, "%8.4f"),        # Maximum Safety Index
+])
+IgpStatWinIdx = IgpStatWinSchema["Idx"]
+
+# Define OVERBOUNDING file Columns (per IGP, plus 0 for all the IGPs)
+IgpOverboundSchema = defineSchema("IGP_OVERBOUND", [
+    ("ID", "int16", None, "%3d"),               # IGP ID
+    ("NSAMPS", "int32", None, "%8d"),           # Number of monitored samples with GIVDE OK
+    ("NEMEAN", "float64", None, "%8.4f"),       # Mean of the normalized error GIVDE/SigmaGIVE
+    ("NESTD", "float64", None, "%8.4f"),        # Standard deviation of the normalized error
+    ("NEMAX", "float64", None, "%8.4f"),        # Maximum absolute normalized error
+    ("KOVB", "float64", None, "%8.4f"),         # Inflation factor of SigmaGIVE overbounding the normalized error
+])
+IgpOverboundIdx = IgpOverboundSchema["Idx"]
+
+# Ratio between the GIVE (99.9% bound) and SigmaGIVE
+GIVE_SIGMA_RATIO = 3.29
+
+# Accumulated fields of the time statistics, and their reduction
+TimeStatsFields = OrderedDict([
+    ("NSAMPS", SUM),
+    ("MON", SUM),
+    ("GIVDESUM2", SUM),
+    ("GIVDESAMPS", SUM),
+    ("MAXSI", MAX),
 ])
 
 # Define Satidistics Output file format list
-StatsOutputFormat = "%3d %3d %5d %8.2f %8.2f %8.2f %6d %6d %6d %10.4f %8.3f %8.3f %8d %8.3f %8.4f %6d"
+StatsOutputFormat = getSchemaFormat(IgpStatsSchema)
+
+# Define Monitoring Windows Output file format
+MonWinOutputFormat = getSchemaFormat(IgpMonWinSchema) + "\n"
+
+# Define Time Statistics Output file formats
+StatBinOutputFormat = getSchemaFormat(IgpStatBinSchema) + "\n"
+StatWinOutputFormat = getSchemaFormat(IgpStatWinSchema) + "\n"
+
+# Define OVERBOUNDING Output file format
+OverboundOutputFormat = getSchemaFormat(IgpOverboundSchema) + "\n"
 
 
 def splitLine(Line):
@@ -81,34 +151,15 @@ def splitLine(Line):
 
     return LineSplit
 
-def readIgpInfoEpoch(f):
+def readIgpInfoEpochs(f):
     """
-    FUNCTION: Read Igp Info Epoch
+    FUNCTION: Read Igp Info Epochs
+    Yield the split lines of each epoch of the IGP INFO file. The lines are
+    read in sequence, without seeks, so that f may be a decompression stream.
     """
-    EpochInfo = []
-    
-    # Read one line
-    Line = f.readline()
-    if(not Line):
-        return []
-    LineSplit = splitLine(Line)
-    Sod = LineSplit[IgpInfoIdx["SoD"]]
-    SodNext = Sod
-
-    while SodNext == Sod:
-        EpochInfo.append(LineSplit)
-        Pointer = f.tell()
-        Line = f.readline()
-        LineSplit = splitLine(Line)
-        try: 
-            SodNext = LineSplit[IgpInfoIdx["SoD"]]
-
-        except:
-            return EpochInfo
-
-    f.seek(Pointer)
-
-    return EpochInfo
+    Lines = (splitLine(Line) for Line in f if not Line.isspace())
+    for _, EpochInfo in groupby(Lines, key=lambda LineSplit: LineSplit[IgpInfoIdx["SoD"]]):
+        yield list(EpochInfo)
 
 def initializeOutputs(Outputs):    
     # Loop over all 287 IGPs of each constellation 
@@ -209,4 +260,64 @@ def computeIgpRmsFromInterOuputs(interOutputs, igpId):
 
     return rmsGIVDE
 
+def getEpochTimeStatsValues(epochInfo):
+    """
+    Get the values of the time statistics fields (see TimeStatsFields)
+    of all the IGPs of an epoch, as arrays.
+
+    Parameters:
+    - epochInfo: Information for all IGPs in a single epoch.
+
+    Returns:
+    - Ids: ID of each IGP.
+    - Values: Dictionary with the values of each field.
+    """
+    # Transpose the epoch into columns once
+    EpochColumns = list(zip(*epochInfo))
+    Ids = [int(igpId) for igpId in EpochColumns[IgpInfoIdx["ID"]]]
+    Mon = np.array(EpochColumns[IgpInfoIdx["STATUS"]]) == '1'
+    GivdeOk = Mon & (np.array(EpochColumns[IgpInfoIdx["GIVDE_STAT"]]) == '1')
+    Givde = np.array(EpochColumns[IgpInfoIdx["GIVDE"]], dtype=float)
+    Si = np.array(EpochColumns[IgpInfoIdx["SI-W"]], dtype=float)
+
+    Values = {
+        "NSAMPS": np.ones(len(epochInfo)),
+        "MON": Mon.astype(float),
+        "GIVDESUM2": np.where(GivdeOk, Givde**2, 0.0),
+        "GIVDESAMPS": GivdeOk.astype(float),
+        "MAXSI": np.where(GivdeOk, Si, 0.0),
+    }
+
+    return Ids, Values
+
+def getEpochNormalizedErrors(epochInfo):
+    """
+    Get the normalized errors GIVDE/SigmaGIVE of the monitored IGPs with
+    GIVDE OK of an epoch, as arrays (SigmaGIVE = GIVE / GIVE_SIGMA_RATIO).
+
+    Returns:
+    - Ids: ID of each normalized error.
+    - Errors: Normalized errors.
+    """
+    EpochColumns = list(zip(*epochInfo))
+    GivdeOk = (np.array(EpochColumns[IgpInfoIdx["STATUS"]]) == '1') & \
+        (np.array(EpochColumns[IgpInfoIdx["GIVDE_STAT"]]) == '1')
+    Give = np.array(EpochColumns[IgpInfoIdx["GIVE"]], dtype=float)
+    GivdeOk &= Give > 0
+    Givde = np.array(EpochColumns[IgpInfoIdx["GIVDE"]], dtype=float)
+
+    return np.array(EpochColumns[IgpInfoIdx["ID"]], dtype=int)[GivdeOk], \
+        Givde[GivdeOk] * GIVE_SIGMA_RATIO / Give[GivdeOk]
+
+def computeTimeStatsOutputs(Values):
+    """
+    Compute the Monitoring percentage and the GIVDE RMS from the accumulated
+    time statistics fields.
+
+    Returns:
+    - NSAMPS, MON, RMSGIVDE, MAXSI
+    """
+    Mon = Values["MON"] * 100.0 / Values["NSAMPS"] if Values["NSAMPS"] > 0 else 0.0
+    RmsGivde = sqrt(Values["GIVDESUM2"] / Values["GIVDESAMPS"]) if Values["GIVDESAMPS"] > 0 else 0.0
 
+    return Values["NSAMPS"], Mon, RmsGivde, Values["MAXSI"]
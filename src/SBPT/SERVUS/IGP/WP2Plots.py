@@ -25,18 +25,69 @@ import numpy as np
 import pandas as pd
 import COMMON.Plots as plt
 from COMMON import GnssConstants
-from COMMON.Files import readDataFile
+from COMMON.Files import readSchemaFile
+from COMMON.Indexing import buildLocationIndex, getLocationRows
+from COMMON.SharedData import attachData, releaseData
+from collections import OrderedDict
 import IgpFunctions as sft
-from IgpStatistics import IgpStatsIdx, IgpInfoIdx
+from IgpStatistics import IgpStatsIdx, IgpInfoIdx, IgpStatsSchema, IgpInfoSchema
 
 # Define relative path
 RelativePath = '/OUT/IGP/FIGURES/'
+
+# Default monitoring positions of the IGP time figures: LAT and LON [deg],
+# label used in the figure names (the position name by default) and
+# y-axis limits of the GIVD/VTEC figure (automatic by default)
+MonitoringPositions = OrderedDict([
+    ("CNTR", {"LAT": 45, "LON": 5, "Label": "CENTER"}),
+    ("SW-1", {"LAT": 20, "LON": -20, "GivdVtecYLim": [0, 5]}),
+    ("SW-2", {"LAT": 20, "LON": 35, "GivdVtecYLim": [0, 4]}),
+    ("NW-1", {"LAT": 65, "LON": -20}),
+    ("NW-2", {"LAT": 60, "LON": 35})
+])
+
+# IGP INFO columns of the time figures
+IgpInfoTimeColumns = ["SoD", "ID", "STATUS", "LAT", "LON", "GIVEI", "GIVDE", "GIVE", "GIVD", "VTEC"]
+
+# Groups of IGP INFO time figures, which can be rendered by separate workers:
+# monitored IGPs of all the day and time figures of the monitoring positions
+IgpInfoTimeFigures = ["MON", "POSITIONS"]
+
+# Names of the figures generated by each figure stage of the IGP module
+# (the time figures of each monitoring position add its label to the name)
+StageFigures = {
+    "FIG-STAT": ["IGP_MON_MAP", "IGP_MIN_NIPPs_MAP", "IGP_MAX_NIPPs_MAP", "IGP_MAX_VTEC_MAP",
+        "IGP_MAX_GIVD_MAP", "IGP_MAX_RMS_GIVDE_MAP", "IGP_MAX_GIVE_MAP", "IGP_MAX_GIVEi_MAP",
+        "IGP_MAX_SI_MAP", "IGP_NTRANS_MAP", "IGP_NMI_MAP"],
+    "FIG-TIME": ["IGP_TIME_MON", "IGP_TIME_VTEC_All_Positions", "IGP_TIME_SI_All_Positions"],
+}
+PositionFigures = ["IGP_TIME_GIVDE_GIVE_GIVEI", "IGP_TIME_GIVD_VTEC"]
 # ------------------------------------------------------------------------------------
 # EXTERNAL FUNCTIONS 
 # ------------------------------------------------------------------------------------
+def getFigurePaths(Stage, yearDayText, positions = None):
+    """
+    Get the paths of the figures generated by a figure stage (see StageFigures),
+    the outputs of the stage in the build graph.
+
+    Parameters:
+        Stage (str): Figure stage (FIG-STAT or FIG-TIME).
+        yearDayText (str): Year day text of the figures.
+        positions (dict): Monitoring positions of the time figures (see plotIgpInfoTime).
+    """
+    if positions is None:
+        positions = MonitoringPositions
+
+    Names = list(StageFigures[Stage])
+    if Stage == "FIG-TIME":
+        Names += [f'{Name}_{pos["Label"] if "Label" in pos else posName}'
+            for Name in PositionFigures for posName, pos in positions.items()]
+
+    return [sys.argv[1] + f'{RelativePath}{Name}_{yearDayText}_G123_50s.png' for Name in Names]
+
 def plotIgpStatsMaps(IgpStatsFile, yearDayText):    
     # Fecth all the columns
-    IgpStatsData = readDataFile(IgpStatsFile, IgpStatsIdx.values(), 1)
+    IgpStatsData = readSchemaFile(IgpStatsFile, IgpStatsSchema)
 
     plotIgpMapMon(IgpStatsData, yearDayText)
 
@@ -61,73 +112,115 @@ def plotIgpStatsMaps(IgpStatsFile, yearDayText):
     plotIgpMapNMI(IgpStatsData, yearDayText)
     return
 
-def plotIgpInfoTime(IgpInfoFile, yearDayText):
+def plotIgpInfoTime(IgpInfoFile, yearDayText, positions = None):
+    """
+    Plot the IGP Information against time.
 
-    positions = {
-    "CNTR": {"LAT": 45, "LON": 5},
-    "SW-1": {"LAT": 20, "LON": -20},
-    "SW-2": {"LAT": 20, "LON": 35},
-    "NW-1": {"LAT": 65, "LON": -20},
-    "NW-2": {"LAT": 60, "LON": 35}
-}
-    
+    Parameters:
+        IgpInfoFile (str): IGP_INFO file path.
+        yearDayText (str): Year day text for including in plot titles.
+        positions (dict): Monitoring positions (see MonitoringPositions).
+            The IGP nearest to each position is plotted. MonitoringPositions by default.
+    """
     # Fecth target columns
-    IgpInfoData = readDataFile(IgpInfoFile, [
-        IgpInfoIdx["SoD"], 
-        IgpInfoIdx["STATUS"],
-        IgpInfoIdx["LAT"],
-        IgpInfoIdx["LON"],
-        IgpInfoIdx["GIVEI"],
-        IgpInfoIdx["GIVDE"],
-        IgpInfoIdx["GIVE"],
-        IgpInfoIdx["GIVD"],
-        IgpInfoIdx["GIVEI"],
-        IgpInfoIdx["VTEC"]
-        ], 1)
-
-    plotIgpTimeMon(IgpInfoData, yearDayText)
-
-    # Plot the GIVDE, GIVE, GIVEi and Monitoring for IGP CENTER
-    plotIgpTimeGivdeGiveGiveiMon(IgpInfoData, yearDayText, positions["CNTR"], "CENTER")
-
-    # Plot the GIVDE, GIVE, GIVEi and Monitoring for IGP SOUTH 1
-    plotIgpTimeGivdeGiveGiveiMon(IgpInfoData, yearDayText, positions["SW-1"], "SW-1")
-
-    # Plot the GIVDE, GIVE, GIVEi and Monitoring for IGP SOUTH 2
-    plotIgpTimeGivdeGiveGiveiMon(IgpInfoData, yearDayText, positions["SW-2"], "SW-2")
-
-    # Plot the GIVDE, GIVE, GIVEi and Monitoring for IGP NORTH 1
-    plotIgpTimeGivdeGiveGiveiMon(IgpInfoData, yearDayText, positions["NW-1"], "NW-1")
-
-    # Plot the GIVDE, GIVE, GIVEi and Monitoring for IGP SOUTH 2
-    plotIgpTimeGivdeGiveGiveiMon(IgpInfoData, yearDayText, positions["NW-2"], "NW-2")
-    
-
-    # Plot GIVD and VTEC Evolution along the day for IGP CENTER
-    plotIgpTimeGivdVtecMon(IgpInfoData, yearDayText, positions["CNTR"], "CENTER")
-
-    # Plot GIVD and VTEC Evolution along the day for SOUTH 1
-    plotIgpTimeGivdVtecMon(IgpInfoData, yearDayText, positions["SW-1"], "SW-1", [0 , 5])
-
-    # Plot GIVD and VTEC Evolution along the day for SOUTH 2
-    plotIgpTimeGivdVtecMon(IgpInfoData, yearDayText, positions["SW-2"], "SW-2", [0 , 4])
-
-    # Plot GIVD and VTEC Evolution along the day for NORTH 1
-    plotIgpTimeGivdVtecMon(IgpInfoData, yearDayText, positions["NW-1"], "NW-1")
-
-    # Plot GIVD and VTEC Evolution along the day for NORTH 2
-    plotIgpTimeGivdVtecMon(IgpInfoData, yearDayText, positions["NW-2"], "NW-2")
-
+    IgpInfoData = readIgpInfoTimeData(IgpInfoFile)
+
+    plotIgpInfoTimeData(IgpInfoData, yearDayText, positions)
+
+def readIgpInfoTimeData(IgpInfoFile):
+    """
+    Read the IGP INFO columns of the time figures.
+    """
+    return readSchemaFile(IgpInfoFile, IgpInfoSchema, IgpInfoTimeColumns)
+
+def plotIgpInfoTimeShared(IgpInfoDescriptor, yearDayText, positions = None, Figures = IgpInfoTimeFigures):
+    """
+    Plot the IGP Information against time from the IGP INFO columns placed in
+    shared memory by the main process (see COMMON.SharedData), so that several
+    workers plot the same data without copying or reading it again.
+    """
+    IgpInfoData, Block = attachData(IgpInfoDescriptor)
+    plotIgpInfoTimeData(IgpInfoData, yearDayText, positions, Figures)
+
+    del IgpInfoData
+    releaseData(Block)
+
+def plotIgpInfoTimeData(IgpInfoData, yearDayText, positions = None, Figures = IgpInfoTimeFigures):
+    """
+    Plot the IGP Information against time.
+
+    Parameters:
+        IgpInfoData (DataFrame): IGP INFO columns of the time figures (see readIgpInfoTimeData).
+        yearDayText (str): Year day text for including in plot titles.
+        positions (dict): Monitoring positions (see plotIgpInfoTime).
+        Figures (list): Groups of figures to plot (see IgpInfoTimeFigures).
+    """
+    if positions is None:
+        positions = MonitoringPositions
+
+    if "MON" in Figures:
+        plotIgpTimeMon(IgpInfoData, yearDayText)
+
+    if "POSITIONS" not in Figures:
+        return
+
+    # Build the IGP spatial index once, and slice the rows of the IGP
+    # nearest to each monitoring position
+    LocationIndex = buildLocationIndex(
+        IgpInfoData[IgpInfoIdx["ID"]].to_numpy(),
+        IgpInfoData[IgpInfoIdx["LAT"]].to_numpy(),
+        IgpInfoData[IgpInfoIdx["LON"]].to_numpy())
+
+    PositionsData = OrderedDict({})
+    for posName, pos in positions.items():
+        Rows, IgpId, Lat, Lon = getLocationRows(LocationIndex, pos["LAT"], pos["LON"])
+        PositionsData[posName] = {
+            "ID": IgpId,
+            "LAT": Lat,
+            "LON": Lon,
+            "Label": pos["Label"] if "Label" in pos else posName,
+            "GivdVtecYLim": pos["GivdVtecYLim"] if "GivdVtecYLim" in pos else None,
+            "Data": IgpInfoData.iloc[Rows]
+            }
+
+    # Plot the GIVDE, GIVE, GIVEi and Monitoring for each position
+    for pos in PositionsData.values():
+        plotIgpTimeGivdeGiveGiveiMon(pos["Data"], yearDayText, pos, pos["Label"])
+
+    # Plot GIVD and VTEC Evolution along the day for each position
+    for pos in PositionsData.values():
+        plotIgpTimeGivdVtecMon(pos["Data"], yearDayText, pos, pos["Label"], pos["GivdVtecYLim"])
 
     # Plot VTEC Evolution along the day for all the positions
-    plotIgpTimeVtecAllPositions(IgpInfoData, yearDayText, positions)
+    plotIgpTimeVtecAllPositions(yearDayText, PositionsData)
 
     # Plot SI (Safey Index) Evolution along the day for all the positions
-    plotIgpTimeSiAllPositions(IgpInfoData, yearDayText, positions)
+    plotIgpTimeSiAllPositions(yearDayText, PositionsData)
     
 
     return
 
+def parseMonitoringPositions(PositionsText):
+    """
+    Parse the monitoring positions configured as a comma separated list of
+    NAME:LAT:LON or NAME:LAT:LON:YMIN:YMAX (y-axis limits of the GIVD/VTEC figure),
+    e.g. CNTR:45:5,SW-1:20:-20:0:5
+
+    Returns:
+        positions (dict): Monitoring positions, in the format of MonitoringPositions.
+    """
+    positions = OrderedDict({})
+    for PositionText in PositionsText.split(','):
+        Fields = PositionText.strip().split(':')
+        if len(Fields) not in [3, 5]:
+            sys.stderr.write("ERROR: Bad monitoring position: %s\n" % PositionText)
+            continue
+        positions[Fields[0]] = {"LAT": float(Fields[1]), "LON": float(Fields[2])}
+        if len(Fields) == 5:
+            positions[Fields[0]]["GivdVtecYLim"] = [float(Fields[3]), float(Fields[4])]
+
+    return positions
+
 # ------------------------------------------------------------------------------------
 # INTERNAL FUNCTIONS 
 # ------------------------------------------------------------------------------------
@@ -459,21 +552,19 @@ def plotIgpTimeMon(IgpInfoData, yearDayText):
 
 
 # Generate a Plot with the GIVDE, GIVE, GIVEi and Monitoring flag along the hour of the day for a specific Lon|Lat.
-def plotIgpTimeGivdeGiveGiveiMon(IgpInfoData, yearDayText, pos, posLabel):
+def plotIgpTimeGivdeGiveGiveiMon(IgpPosData, yearDayText, pos, posLabel):
     filePath = sys.argv[1] + f'{RelativePath}IGP_TIME_GIVDE_GIVE_GIVEI_{posLabel}_{yearDayText}_G123_50s.png' 
     lon = pos["LON"]
     lat = pos["LAT"]
-    title = f"IGP {posLabel} [Lon|Lat]:[{lon}:{lat}] {yearDayText}"    
+    title = f"IGP {posLabel} [Lon|Lat]:[{lon:g}:{lat:g}] {yearDayText}"    
     print( f'Ploting: {title}\n -> {filePath}')
 
-    # Extracting and Filtering  Target columns
-    FilterCondLon = IgpInfoData[IgpInfoIdx["LON"]] == lon
-    FilterCondLat = IgpInfoData[IgpInfoIdx["LAT"]] == lat
-    HOD = IgpInfoData[IgpInfoIdx["SoD"]][FilterCondLat][FilterCondLon] / GnssConstants.S_IN_H  # Converting to hours    
-    MON = IgpInfoData[IgpInfoIdx["STATUS"]][FilterCondLat][FilterCondLon]
-    GIVDE = IgpInfoData[IgpInfoIdx["GIVDE"]][FilterCondLat][FilterCondLon]
-    GIVE = IgpInfoData[IgpInfoIdx["GIVE"]][FilterCondLat][FilterCondLon]
-    GIVEI = IgpInfoData[IgpInfoIdx["GIVEI"]][FilterCondLat][FilterCondLon]       
+    # Extracting Target columns of the IGP
+    HOD = IgpPosData[IgpInfoIdx["SoD"]] / GnssConstants.S_IN_H  # Converting to hours    
+    MON = IgpPosData[IgpInfoIdx["STATUS"]]
+    GIVDE = IgpPosData[IgpInfoIdx["GIVDE"]]
+    GIVE = IgpPosData[IgpInfoIdx["GIVE"]]
+    GIVEI = IgpPosData[IgpInfoIdx["GIVEI"]]
    
     PlotConf = plt.createPlotConfig2DLines(
         filePath, title, 
@@ -495,20 +586,18 @@ def plotIgpTimeGivdeGiveGiveiMon(IgpInfoData, yearDayText, pos, posLabel):
 
 
 # Generate a Plot GIVD and VTEC Evolution along the day for a specific Lon|Lat.
-def plotIgpTimeGivdVtecMon(IgpInfoData, yearDayText, pos, posLabel, yLimits = None):
+def plotIgpTimeGivdVtecMon(IgpPosData, yearDayText, pos, posLabel, yLimits = None):
     filePath = sys.argv[1] + f'{RelativePath}IGP_TIME_GIVD_VTEC_{posLabel}_{yearDayText}_G123_50s.png' 
     lon = pos["LON"]
     lat = pos["LAT"]
-    title = f"IGP {posLabel} [Lon|Lat]:[{lon}:{lat}] {yearDayText}"    
+    title = f"IGP {posLabel} [Lon|Lat]:[{lon:g}:{lat:g}] {yearDayText}"    
     print( f'Ploting: {title}\n -> {filePath}')
 
-    # Extracting and Filtering  Target columns
-    FilterCondLon = IgpInfoData[IgpInfoIdx["LON"]] == lon
-    FilterCondLat = IgpInfoData[IgpInfoIdx["LAT"]] == lat
-    HOD = IgpInfoData[IgpInfoIdx["SoD"]][FilterCondLat][FilterCondLon] / GnssConstants.S_IN_H  # Converting to hours    
-    MON = IgpInfoData[IgpInfoIdx["STATUS"]][FilterCondLat][FilterCondLon]
-    GIVD = IgpInfoData[IgpInfoIdx["GIVD"]][FilterCondLat][FilterCondLon]
-    VTEC = IgpInfoData[IgpInfoIdx["VTEC"]][FilterCondLat][FilterCondLon]    
+    # Extracting Target columns of the IGP
+    HOD = IgpPosData[IgpInfoIdx["SoD"]] / GnssConstants.S_IN_H  # Converting to hours    
+    MON = IgpPosData[IgpInfoIdx["STATUS"]]
+    GIVD = IgpPosData[IgpInfoIdx["GIVD"]]
+    VTEC = IgpPosData[IgpInfoIdx["VTEC"]]
    
     PlotConf = plt.createPlotConfig2DLines(
         filePath, title, 
@@ -534,7 +623,7 @@ def plotIgpTimeGivdVtecMon(IgpInfoData, yearDayText, pos, posLabel, yLimits = No
 
 
 # Generate a Plot VTEC Evolution along the day for all the positions
-def plotIgpTimeVtecAllPositions(IgpInfoData, yearDayText, positions):
+def plotIgpTimeVtecAllPositions(yearDayText, positions):
     filePath = sys.argv[1] + f'{RelativePath}IGP_TIME_VTEC_All_Positions_{yearDayText}_G123_50s.png' 
     title = f"IGPs VTEC Evolution {yearDayText}"    
     print( f'Ploting: {title}\n -> {filePath}')
@@ -545,11 +634,10 @@ def plotIgpTimeVtecAllPositions(IgpInfoData, yearDayText, positions):
     for pos in positions:
         lon = positions[pos]["LON"]
         lat = positions[pos]["LAT"]
-        FilterCondLon = IgpInfoData[IgpInfoIdx["LON"]] == lon
-        FilterCondLat = IgpInfoData[IgpInfoIdx["LAT"]] == lat
-        VTECs.append(IgpInfoData[IgpInfoIdx["VTEC"]][FilterCondLat][FilterCondLon])
-        VTECsLabels.append(f'VTEC {pos} [{lon} {lat}]')
-        HOD = IgpInfoData[IgpInfoIdx["SoD"]][FilterCondLat][FilterCondLon] / GnssConstants.S_IN_H   
+        IgpPosData = positions[pos]["Data"]
+        VTECs.append(IgpPosData[IgpInfoIdx["VTEC"]])
+        VTECsLabels.append(f'VTEC {pos} [{lon:g} {lat:g}]')
+        HOD = IgpPosData[IgpInfoIdx["SoD"]] / GnssConstants.S_IN_H   
    
     PlotConf = plt.createPlotConfig2DLines(
         filePath, title, 
@@ -567,7 +655,7 @@ def plotIgpTimeVtecAllPositions(IgpInfoData, yearDayText, positions):
 
 
 # Generate a Plot SI (Safey Index) Evolution along the day for all the positions
-def plotIgpTimeSiAllPositions(IgpInfoData, yearDayText, positions):
+def plotIgpTimeSiAllPositions(yearDayText, positions):
     filePath = sys.argv[1] + f'{RelativePath}IGP_TIME_SI_All_Positions_{yearDayText}_G123_50s.png' 
     title = f"IGPs GIVDE/5.33*GIVE {yearDayText}"    
     print( f'Ploting: {title}\n -> {filePath}')
@@ -578,13 +666,12 @@ def plotIgpTimeSiAllPositions(IgpInfoData, yearDayText, positions):
     for pos in positions:
         lon = positions[pos]["LON"]
         lat = positions[pos]["LAT"]
-        FilterCondLon = IgpInfoData[IgpInfoIdx["LON"]] == lon
-        FilterCondLat = IgpInfoData[IgpInfoIdx["LAT"]] == lat
-        GIVDE = IgpInfoData[IgpInfoIdx["GIVDE"]][FilterCondLat][FilterCondLon]
-        GIVE = IgpInfoData[IgpInfoIdx["GIVE"]][FilterCondLat][FilterCondLon]
+        IgpPosData = positions[pos]["Data"]
+        GIVDE = IgpPosData[IgpInfoIdx["GIVDE"]]
+        GIVE = IgpPosData[IgpInfoIdx["GIVE"]]
         SI.append(GIVDE / (GIVE * 5.33))
-        SILabels.append(f'SI {pos} [{lon} {lat}]')
-        HOD = IgpInfoData[IgpInfoIdx["SoD"]][FilterCondLat][FilterCondLon] / GnssConstants.S_IN_H   
+        SILabels.append(f'SI {pos} [{lon:g} {lat:g}]')
+        HOD = IgpPosData[IgpInfoIdx["SoD"]] / GnssConstants.S_IN_H   
    
     PlotConf = plt.createPlotConfig2DLines(
         filePath, title, 
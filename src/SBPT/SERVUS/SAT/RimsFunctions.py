@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+########################################################################
+# RimsFunctions.py:
+# This script defines the geometry analysis of the RIMS network
+# against the satellites of the SAT INFO file
+#
+#  Project:        SBPT
+#  File:           RimsFunctions.py
+#
+#   Copyright 2020 GNSS Academy
+#
+# Internal dependencies:
+#   COMMON
+#   SatStatistics
+########################################################################
+
+
+# Import External and Internal functions and Libraries
+#----------------------------------------------------------------------
+from COMMON.Coordinates import llh2xyzArray, computeElevationAzimuth
+from COMMON.Files import readSchemaFile, writeSchemaFile
+import SatStatistics as stat
+import numpy as np
+
+# Define SAT INFO FILE Columns
+SatInfoIdx = stat.SatInfoIdx
+
+# Define RIMS file Columns
+RimsIdx = stat.RimsIdx
+
+# Define RIMS GEOMETRY file Columns
+RimsGeoIdx = stat.RimsGeoIdx
+
+# Number of header rows of the RIMS reference positions file
+RIMS_HEADER_ROWS = 15
+
+# Default number of SAT INFO samples processed at once
+RIMS_GEO_CHUNK = 20000
+
+# Minimum number of RIMS in view to compute the Inverse Radial DOP
+RIMS_MIN_DOP = 4
+
+# ------------------------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def computeInverseRadialDop(SatPos, RimsPos, Visible):
+    """
+    Compute the Inverse Radial DOP of the satellite positions estimated from
+    the ranges of the RIMS in view: 1 / sqrt(er' (H'H)^-1 er), where H holds
+    the unit vectors from the satellite to the RIMS and er is the radial direction.
+
+    Parameters:
+    - SatPos: Satellite positions [m] (NSamps x 3).
+    - RimsPos: RIMS positions [m] (NRims x 3).
+    - Visible: RIMS in view of each sample (NRims x NSamps).
+
+    Returns:
+    - Irdop: Inverse Radial DOP of each sample (0 if less than RIMS_MIN_DOP RIMS in view).
+    """
+    Los = RimsPos[:, None, :] - SatPos[None, :, :]
+    Los /= np.linalg.norm(Los, axis=-1, keepdims=True)
+
+    # Normal matrices of all the samples at once (NSamps x 3 x 3)
+    Normal = np.einsum('rs,rsi,rsj->sij', Visible.astype(float), Los, Los)
+
+    Irdop = np.zeros(len(SatPos))
+    Solvable = np.sum(Visible, axis=0) >= RIMS_MIN_DOP
+    Solvable[Solvable] = np.linalg.det(Normal[Solvable]) > 0
+    Radial = SatPos[Solvable] / np.linalg.norm(SatPos[Solvable], axis=-1, keepdims=True)
+    Cov = np.linalg.inv(Normal[Solvable])
+    Irdop[Solvable] = 1.0 / np.sqrt(np.einsum('si,sij,sj->s', Radial, Cov, Radial))
+
+    return Irdop
+
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def readRimsFile(RimsFile):
+    """
+    Read the selected RIMS of the RIMS reference positions file.
+
+    Returns:
+    - Rims: Dictionary with the "LON", "LAT", "HEI" and "MA" arrays of the
+      selected RIMS and their ECEF positions "XYZ" [m] (NRims x 3).
+    """
+    RimsData = readSchemaFile(RimsFile, stat.RimsSchema, ["SF", "LON", "LAT", "HEI", "MA"],
+        RIMS_HEADER_ROWS)
+    RimsData = RimsData[RimsData[RimsIdx["SF"]] == 1]
+
+    Rims = {Field: RimsData[RimsIdx[Field]].to_numpy(dtype=float) for Field in ["LON", "LAT", "HEI", "MA"]}
+    Rims["XYZ"] = np.column_stack(llh2xyzArray(Rims["LON"], Rims["LAT"], Rims["HEI"]))
+
+    return Rims
+
+def iterateRimsGeometry(Rims, SatPos, ChunkSize = RIMS_GEO_CHUNK):
+    """
+    Iterate over chunks of satellite samples, yielding the elevation and
+    azimuth of the samples seen from every RIMS.
+
+    Parameters:
+    - Rims: RIMS network (see readRimsFile).
+    - SatPos: Satellite positions [m] (NSamps x 3).
+    - ChunkSize: Number of samples per chunk, bounding the memory used.
+
+    Yields:
+    - Rows: Slice of the samples of the chunk.
+    - Elev, Azim: Elevation and azimuth [deg] (NRims x NChunk).
+    """
+    for First in range(0, len(SatPos), ChunkSize):
+        Rows = slice(First, min(First + ChunkSize, len(SatPos)))
+        Elev, Azim = computeElevationAzimuth(Rims["XYZ"], Rims["LON"], Rims["LAT"], SatPos[Rows])
+
+        yield Rows, Elev, Azim
+
+def computeRimsGeometry(RimsFile, SatInfoFile, RimsGeoFile, ChunkSize = RIMS_GEO_CHUNK):
+    """
+    Compute, for every sample of the SAT INFO file, the expected number of
+    RIMS in view (above their mask angle) and the Inverse Radial DOP of the
+    RIMS geometry, and write them next to the NRIMS and RDOP (Inverse Radial
+    DOP) of the SAT INFO file.
+
+    Parameters:
+    - RimsFile: RIMS reference positions file.
+    - SatInfoFile: SAT INFO file.
+    - RimsGeoFile: RIMS GEOMETRY output file.
+    - ChunkSize: Number of samples processed at once.
+    """
+    Rims = readRimsFile(RimsFile)
+    SatInfoData = readSchemaFile(SatInfoFile, stat.SatInfoSchema, ["SoD", "PRN",
+        "SAT-X", "SAT-Y", "SAT-Z", "NRIMS", "RDOP"])
+
+    SatPos = SatInfoData[[SatInfoIdx["SAT-X"], SatInfoIdx["SAT-Y"], SatInfoIdx["SAT-Z"]]].to_numpy(dtype=float) * 1000
+    NRimsExp = np.zeros(len(SatPos), dtype=int)
+    RdopExp = np.zeros(len(SatPos))
+
+    for Rows, Elev, _ in iterateRimsGeometry(Rims, SatPos, ChunkSize):
+        Visible = Elev >= Rims["MA"][:, None]
+        NRimsExp[Rows] = np.sum(Visible, axis=0)
+        RdopExp[Rows] = computeInverseRadialDop(SatPos[Rows], Rims["XYZ"], Visible)
+
+    # Write RIMS GEOMETRY file
+    writeSchemaFile(RimsGeoFile, stat.RimsGeoSchema, {
+        "SoD": SatInfoData[SatInfoIdx["SoD"]].to_numpy(),
+        "PRN": SatInfoData[SatInfoIdx["PRN"]].to_numpy(),
+        "NRIMS": SatInfoData[SatInfoIdx["NRIMS"]].to_numpy(),
+        "NRIMS-EXP": NRimsExp,
+        "RDOP": SatInfoData[SatInfoIdx["RDOP"]].to_numpy(),
+        "RDOP-EXP": RdopExp,
+    })
@@ -21,41 +21,80 @@
 #----------------------------------------------------------------------
 import sys
 from collections import OrderedDict
+from COMMON.Compression import openDataFile
+from COMMON.Files import writeDataLines, writeSchemaFile, writeSchemaRows
 from COMMON.Coordinates import xyz2llh
+from COMMON.Indexing import buildGroupIndex, computeStatusRuns, reduceRuns
+from COMMON.TimeStatistics import initializeTimeStats, isTimeStatsEnabled
+from COMMON.TimeStatistics import updateTimeStats, iterateTimeBins, iterateSlidingWindow
+from COMMON.Overbounding import OVERBOUND_MIN_PERCENTILE, OVERBOUND_RESOLUTION
+from COMMON.Overbounding import initializeOverbounding, updateOverbounding, iterateOverbounding
 import SatStatistics  as stat
 import numpy as np
-import copy
 
 # Define SAT INFO FILE Columns
 """
-SatStatsIdx is a dictionary that maps the column names of the satellite statistics file to their corresponding indices.
+The column maps are those of the schemas of SatStatistics (shared, not copied).
 """
-SatInfoIdx = copy.deepcopy(stat.SatInfoIdx)
+SatInfoIdx = stat.SatInfoIdx
 
 # Define SAT STATISTICS file Columns
-SatStatsIdx = copy.deepcopy(stat.SatStatsIdx)
+SatStatsIdx = stat.SatStatsIdx
 
-SatStatsTimeIdx = copy.deepcopy(stat.SatStatsTimeIdx)
+SatStatsTimeIdx = stat.SatStatsTimeIdx
+
+SatMonWinIdx = stat.SatMonWinIdx
+
+SatStatBinIdx = stat.SatStatBinIdx
+
+SatStatWinIdx = stat.SatStatWinIdx
 
 # Define Satidistics Output file format list
 StatsOutputFormatList = stat.StatsOutputFormat.split()
 
+# Statistics lines, with a delimiter after each field
+StatsLineFormat = "".join(Format + " " for Format in StatsOutputFormatList) + "\n"
+
 # ------------------------------------------------------------------------------------
 # EXTERNAL FUNCTIONS 
 # ------------------------------------------------------------------------------------
-def computeSatStats(satFile, EntGpsFile, satStatsFile):
+def computeSatStats(satFile, EntGpsFile, satStatsFile, satMonWinFile,
+    TimeBin = 0, satStatBinFile = None, SlidingWindow = 0, satStatWinFile = None,
+    satOverboundFile = None, OverboundMinP = OVERBOUND_MIN_PERCENTILE,
+    OverboundResolution = OVERBOUND_RESOLUTION):
+    """
+    Compute the daily Satellite Statistics reading the SAT INFO file once.
+
+    Optionally, the statistics per time bin of TimeBin seconds and per PRN
+    (satStatBinFile) and over a sliding window of SlidingWindow seconds
+    (satStatWinFile) are computed in the same pass.
+
+    If satOverboundFile is given, the Gaussian overbounding of the normalized
+    error SREW/SFLT-W is computed per PRN and for all the satellites, from the
+    histograms of the normalized errors above the OverboundMinP percentile [%]
+    (see COMMON.Overbounding).
+    """
     
     # Initialize Variables
     EndOfFile = False
     EpochInfo = []
     delim = " "
 
+    # Monitoring columns, processed at once at the end of the file
+    MonColumns = {"SoD": [], "PRN": [], "MONSTAT": [], "NRIMS": []}
+
+    # ENT-GPS columns, written at once at the end of the file
+    EntGpsColumns = OrderedDict((Column, []) for Column in SatStatsTimeIdx)
+
     # Open SAT INFO file
-    with open(satFile, 'r') as fsat:
+    with openDataFile(satFile) as fsat:
         
         # Read header line of Sat Information file
         fsat.readline()
 
+        # Epochs of the file, read in sequence
+        Epochs = stat.readSatInfoEpochs(fsat)
+
         # Open ENT-GPS Offset output file
         with open(EntGpsFile, 'w') as fEntGps:
             # Write Header of Output ENT-GPS file
@@ -72,12 +111,17 @@ def computeSatStats(satFile, EntGpsFile, satStatsFile):
                 # Initialize Outputs
                 stat.initializeOutputs(Outputs)
                 stat.initializeInterOutputs(InterOutputs)
+                TimeStats = initializeTimeStats(Outputs.keys(), stat.TimeStatsFields, TimeBin, SlidingWindow)
+
+                # Normalized error accumulators of the overbounding (optional)
+                Overbound = initializeOverbounding(Outputs.keys(), OverboundResolution) \
+                    if satOverboundFile is not None else None
 
                 # LOOP over all Epochs of SAT INFO file
                 # ----------------------------------------------------------
                 while not EndOfFile:                    
                     # Read Only One Epoch
-                    EpochInfo = stat.readSatInfoEpoch(fsat)
+                    EpochInfo = next(Epochs, [])
                     
                     # If EpochInfor is not Null
                     if EpochInfo != []:
@@ -86,21 +130,53 @@ def computeSatStats(satFile, EntGpsFile, satStatsFile):
                         entGps = stat.computeEntGpsAndSREb(EpochInfo, InterOutputs)
                         cntMon, cntNotMon, cntDu = stat.countMonitoredSatsInEpoch(EpochInfo)                        
                         
-                        # Write ENT-GPS Offset file
-                        fEntGps.write("%5s %10.4f %d %d %d\n" % (sod,entGps,cntMon, cntNotMon, cntDu))                    
+                        # Collect the ENT-GPS Offset of the epoch
+                        for Column, Value in zip(EntGpsColumns.values(), (sod, entGps, cntMon, cntNotMon, cntDu)):
+                            Column.append(Value)
                         
                         # Loop over all Satellites Information in Epoch
                         # --------------------------------------------------
                         for SatInfo in EpochInfo:
                             # Update the Intermediate Statistics
                             updateEpochStats(SatInfo, InterOutputs, Outputs)                                            
+
+                        # Collect the monitoring columns of the epoch
+                        for Column in MonColumns:
+                            MonColumns[Column].extend([SatInfo[SatInfoIdx[Column]] for SatInfo in EpochInfo])
+
+                        # Update the time binned and sliding window statistics
+                        if isTimeStatsEnabled(TimeStats):
+                            Prns, Values = stat.getEpochTimeStatsValues(EpochInfo)
+                            updateTimeStats(TimeStats, int(sod), Prns, Values)
+
+                        # Update the normalized error accumulators of the overbounding
+                        if Overbound is not None:
+                            Prns, Errors = stat.getEpochNormalizedErrors(EpochInfo)
+                            updateOverbounding(Overbound, Prns, Errors)
                     
                     else:
                         EndOfFile = True
+
+                # Write ENT-GPS Offset file
+                # ----------------------------------------------------------
+                writeDataLines(fEntGps, stat.EntGpsOutputFormat, list(EntGpsColumns.values()))
                 
+                # Compute the Monitoring Windows and the Number of Transitions
+                # ----------------------------------------------------------
+                computeMonitoringWindows(MonColumns, Outputs, satMonWinFile)
+
                 # Compute the final Statistics
                 # ----------------------------------------------------------
                 computeFinalStatistics(InterOutputs, Outputs)
+
+                # Write the time binned and sliding window Statistics Files
+                # ----------------------------------------------------------
+                writeTimeStats(TimeStats, satStatBinFile, satStatWinFile)
+
+                # Write the Overbounding File
+                # ----------------------------------------------------------
+                if Overbound is not None:
+                    writeOverbounding(Overbound, OverboundMinP, satOverboundFile)
                 
                 # Write Statistics File
                 # ----------------------------------------------------------
@@ -109,19 +185,10 @@ def computeSatStats(satFile, EntGpsFile, satStatsFile):
                 #header_string = "PRN	  MON	 RIMS-MIN	RIMS-MAX SREaRMS   SREcRMS     SRErRMS	   SREbRMS	   SREWRMS	   SREWMAX	   SFLTMAX	   SFLTMIN	   SIMAX	   FCMAX	   LTCbMAX	   LTCxMAX	   LTCyMAX	   LTCzMAX	   NMI	       NTRANS\n"
                 fOut.write(header_string)
 
-                for sat in Outputs.keys():
-                    
-                    # Remove 0% monitored satellites because we're not interested in them
-                    if(Outputs[sat]["MON"] != 0):
-                        
-                        for i, result in enumerate(Outputs[sat]):
-                            fOut.write(((StatsOutputFormatList[i] + delim) % Outputs[sat][result]))
-
-                        fOut.write("\n")
-
-                        # End of for i, result in enumerate(Outputs[sat]):
-                    # End of if(Outputs[sat]["MON"] != 0):
-                # End of for sat in Outputs.keys():
+                # Remove 0% monitored satellites because we're not interested in them
+                Sats = [sat for sat in Outputs.keys() if Outputs[sat]["MON"] != 0]
+                writeDataLines(fOut, StatsLineFormat,
+                    [[Outputs[sat][result] for sat in Sats] for result in SatStatsIdx])
             # End of with open(satStatsFile, 'w') as fOut:
         # End of with open(EntGpsFile, 'w') as fEntGps:
     # End of with open(satFile, 'r') as f:
@@ -180,11 +247,7 @@ def updateEpochStats(SatInfo, InterOutputs, Outputs):
     # Add Number of samples
     InterOutputs[satPrn]["NSAMPS"] = InterOutputs[satPrn]["NSAMPS"] + 1
 
-    # Add NTRANS Monitored to Not Monitored (MtoNM) or to Don't USE (MtoDU)
-    prevMon = InterOutputs[satPrn]["MONPREV"]
-    currMon = int(SatInfo[SatInfoIdx["MONSTAT"]])
-    if(((prevMon == 1) and (currMon == 0)) or ((prevMon == 1) and (currMon == -1))):
-        Outputs[satPrn]["NTRANS"] += 1        
+    # NTRANS is computed from the Monitoring Windows (see computeMonitoringWindows)
 
     # Reject if satellite is not MONITORED:
     if(SatInfo[SatInfoIdx["MONSTAT"]] != '1'):        
@@ -298,6 +361,69 @@ def updateEpochStatsMaxMin(SatInfo, satPrn, InterOutputs, Outputs):
     if(absLTCz > Outputs[satPrn]["LTCzMAX"]):
         Outputs[satPrn]["LTCzMAX"] = absLTCz
 
+def computeMonitoringWindows(MonColumns, Outputs, satMonWinFile):
+    """
+    Compute the Monitoring Windows of each satellite (runs of consecutive
+    monitored samples) and the Number of Transitions from Monitored to
+    Not Monitored or Don't Use (NTRANS), and write the Monitoring Windows file.
+
+    Parameters:
+    - MonColumns: SoD, PRN, MONSTAT and NRIMS columns of all the samples of the day.
+    - Outputs: Output dictionary, where NTRANS is updated.
+    - satMonWinFile: Monitoring Windows output file path.
+    """
+    Sod = np.array(MonColumns["SoD"], dtype=int)
+    MonStat = np.array(MonColumns["MONSTAT"], dtype=int)
+    NRims = np.array(MonColumns["NRIMS"], dtype=int)
+    SatIndex = buildGroupIndex(MonColumns["PRN"])
+
+    # Sampling step of the file, which splits the windows with missing samples
+    Sods = np.unique(Sod)
+    Step = int(np.min(np.diff(Sods))) if len(Sods) > 1 else 0
+
+    Runs = computeStatusRuns(SatIndex, Sod, MonStat, 1, Step, Step)
+    RimsMin = reduceRuns(Runs, NRims, np.minimum)
+
+    # Update the Number of Transitions
+    for Position, satPrn in enumerate(SatIndex["Keys"]):
+        if satPrn in Outputs:
+            Outputs[satPrn]["NTRANS"] = Runs["NTRANS"][Position]
+
+    # Write Monitoring Windows file
+    writeSchemaFile(satMonWinFile, stat.SatMonWinSchema, {
+        "PRN": SatIndex["Keys"][Runs["Codes"]],
+        "START": Runs["Start"],
+        "END": Runs["End"],
+        "DURATION": Runs["Duration"],
+        "NSAMPS": Runs["NSAMPS"],
+        "RIMS-MIN": RimsMin,
+    })
+
+def writeTimeStats(TimeStats, satStatBinFile, satStatWinFile):
+    """
+    Write the time binned (per PRN) and the sliding window (all satellites)
+    Statistics files, if enabled.
+    """
+    if TimeStats["TimeBin"] > 0:
+        # Skip the satellites without samples in the bin
+        Lines = [(BinStart, satPrn) + stat.computeTimeStatsOutputs(Values)
+            for BinStart, satPrn, Values in iterateTimeBins(TimeStats) if Values["NSAMPS"] != 0]
+        writeSchemaRows(satStatBinFile, stat.SatStatBinSchema, Lines)
+
+    if TimeStats["SlidingWindow"] > 0:
+        Lines = [(Values["SoD"],) + stat.computeTimeStatsOutputs(Values)
+            for Values in iterateSlidingWindow(TimeStats)]
+        writeSchemaRows(satStatWinFile, stat.SatStatWinSchema, Lines)
+
+def writeOverbounding(Overbound, OverboundMinP, satOverboundFile):
+    """
+    Write the Overbounding file: the moments of the normalized errors and
+    their overbounding inflation factor per PRN, and for all the satellites (PRN "ALL").
+    """
+    writeSchemaRows(satOverboundFile, stat.SatOverboundSchema,
+        [("ALL" if satPrn is None else satPrn, NSamps, Mean, Std, MaxAbs, Factor)
+            for satPrn, NSamps, Mean, Std, MaxAbs, Factor in iterateOverbounding(Overbound, OverboundMinP)])
+
 def computeFinalStatistics(InterOutputs, Outputs):
     for satLabel in Outputs.keys():
 
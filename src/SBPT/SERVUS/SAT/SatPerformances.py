@@ -16,11 +16,15 @@
 # -----------------------------------------------------------------
 #
 # Usage:
-# i.e: SatPerformances.py $SCEN_PATH
+# i.e: SatPerformances.py $SCEN_PATH [--no-plots] [--force]
+#      [--profile[=FILE]] [--profile-stacks[=FILE]]
 # 
 # Internal dependencies:
 #   COMMON
 #   SatFunctions
+#   SisreFunctions
+#   RimsFunctions
+#   ServiceAreaFunctions
 #   SatStatistics
 ########################################################################
 
@@ -29,35 +33,110 @@
 #----------------------------------------------------------------------
 # Add path to find all modules
 import sys, os
+import functools
 projectDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, projectDir)
 from COMMON.Dates import convertJulianDay2YearMonthDay
-from COMMON.Dates import convertYearMonthDay2Doy
-from COMMON.Files import readDataFile, readConf, processConf
-from SatFunctions import computeSatStats
-from SatStatistics import SatStatsIdx, SatStatsTimeIdx
-import WP1Plots  as wp1Plot
-import sys, os
+from COMMON.Dates import convertYearMonthDay2Doy, convertYearMonthDay2GpsWeek
+from COMMON.Files import readSchemaFile, readConf, processConf, readOptions
+from COMMON.Files import exportParquetFile, getParquetFilePath
+from COMMON.Parquet import isArrowAvailable
+from COMMON.Compression import findDataFile, removeCompressionSuffix
+from COMMON.Profiler import enableProfilerFromOptions, instrumentModule
+from COMMON.Profiler import span, finishProfiler
+from COMMON.Overbounding import OVERBOUND_MIN_PERCENTILE, OVERBOUND_RESOLUTION
+from COMMON.BuildGraph import loadBuildGraph, isStageStale, recordStage
+from COMMON.Pipeline import startPipeline, iteratePipeline, submitRender, finishPipeline, abortPipeline
+from COMMON.Pipeline import prefetchFiles, PIPELINE_QUEUE_SIZE
+from COMMON.SharedData import shareData, releaseData, releaseSharedData
+import SatFunctions
+import SisreFunctions
+import RimsFunctions
+import ServiceAreaFunctions
+from SatStatistics import SatStatsSchema, SatStatsTimeSchema, SatMonWinSchema
+from SatStatistics import SatInfoSchema, SisreInfoSchema, SisreStatsSchema
+from SatStatistics import SatStatBinSchema, SatStatWinSchema, SatOverboundSchema
+from SatStatistics import RimsGeoSchema, SatGridSchema, SatGridSiSchema
 
 
 #----------------------------------------------------------------------
 # INTERNAL FUNCTIONS
 #----------------------------------------------------------------------
 
+# Configuration keys the stages depend on (besides their input files)
+STATS_CONF_KEYS = ["STATS_TIME_BIN", "STATS_SLIDING_WINDOW",
+    "OVERBOUND", "OVERBOUND_MIN_PERCENTILE", "OVERBOUND_RESOLUTION"]
+SERVICE_AREA_CONF_KEYS = ["SERVICE_GRID_AREA", "SERVICE_GRID_STEP", "SERVICE_GRID_MASK"]
+SISRE_CONF_KEYS = ["SISRE_TSTEP", "SISRE_ANTEX"]
+
 def displayUsage():
-    sys.stderr.write("ERROR: Please provide path to SCENARIO as a unique argument\n")
+    sys.stderr.write("ERROR: Please provide path to SCENARIO as first argument\n")
+    sys.stderr.write("Options: --no-plots --force --profile[=FILE] --profile-stacks[=FILE]\n")
+
+def getDayInputFiles(Jd):
+    """
+    Get the input files of a day: SAT INFO, RIMS, NAV and SP3 files (the
+    compressed ones if only archived compressed).
+    """
+    Year, Month, Day = convertJulianDay2YearMonthDay(Jd)
+    Doy = convertYearMonthDay2Doy(Year, Month, Day)
+    Week, Dow = convertYearMonthDay2GpsWeek(Year, Month, Day)
+
+    SatInfoFilePath = Scen + \
+        '/OUT/SAT/' + 'SAT_INFO_Y%02dD%03d_G123_%ss.dat' % \
+            (Year % 100, Doy, Conf["TSTEP"])
+    RimsFilePath = Scen + \
+        '/INP/RIMS/' + 'RIMS_REF_POSITIONS_%s.dat' % \
+            (Year)
+    NavFilePath = Scen + \
+        '/INP/NAV/' + 'brdc%03d0.%02dn' % (Doy, Year % 100)
+    Sp3FilePath = Scen + \
+        '/INP/SP3/' + 'igs%04d%d.sp3' % (Week, Dow)
+
+    return findDataFile(SatInfoFilePath), findDataFile(RimsFilePath), \
+        findDataFile(NavFilePath), findDataFile(Sp3FilePath)
+
+def finishFigures(Stages, SharedBlocks):
+    """
+    Release the shared memory blocks of the figures of a day and record
+    their stages as built (called once the figures are rendered).
+    """
+    for Block in SharedBlocks:
+        releaseData(Block, Unlink=True)
+    for Stage in Stages:
+        recordStage(Build, Stage)
+
+def prefetchDay(Jd):
+    """
+    Prefetch the input files of a day (run by the pipeline reader thread).
+    """
+    return prefetchFiles(getDayInputFiles(Jd))
 
 #######################################################
 # MAIN BODY
 #######################################################
 
 # Check Input Arguments
-if len(sys.argv) != 2:
+if len(sys.argv) < 2 or sys.argv[1].startswith("--"):
     displayUsage()
     sys.exit()
 
 # Extract the arguments
 Scen = sys.argv[1]
+Options = readOptions(sys.argv[2:])
+
+# Enable the profiler if requested, tracing the functions of the SAT modules
+enableProfilerFromOptions(Options, Scen + '/OUT/PROFILE', 'SatPerformances')
+instrumentModule(SatFunctions, ["computeSatStats", "computeFinalStatistics"])
+instrumentModule(SisreFunctions, ["computeSisre"])
+instrumentModule(RimsFunctions, ["computeRimsGeometry"])
+instrumentModule(ServiceAreaFunctions, ["computeServiceArea", "readGridEpochs"])
+
+# Plotting modules are only imported if figures are generated
+GeneratePlots = "--no-plots" not in Options
+if GeneratePlots:
+    import WP1Plots  as wp1Plot
+    instrumentModule(wp1Plot)
 
 # Select the conf file name
 CfgFile = Scen + '/CFG/satperformances.cfg'
@@ -69,74 +148,289 @@ Conf = readConf(CfgFile)
 # Process Configuration Parameters
 Conf = processConf(Conf)
 
+# Time bin and sliding window of the intra-day Statistics [s] (optional, 0 to disable)
+TimeBin = int(Conf["STATS_TIME_BIN"]) if "STATS_TIME_BIN" in Conf else 0
+SlidingWindow = int(Conf["STATS_SLIDING_WINDOW"]) if "STATS_SLIDING_WINDOW" in Conf else 0
+
+# Gaussian overbounding of the normalized errors SREW/SFLT-W (optional):
+# percentile [%] above which the tails are overbounded and histogram resolution
+ComputeOverbound = "OVERBOUND" in Conf and int(Conf["OVERBOUND"]) == 1
+OverboundMinP = float(Conf["OVERBOUND_MIN_PERCENTILE"]) if "OVERBOUND_MIN_PERCENTILE" in Conf else \
+    OVERBOUND_MIN_PERCENTILE
+OverboundResolution = float(Conf["OVERBOUND_RESOLUTION"]) if "OVERBOUND_RESOLUTION" in Conf else \
+    OVERBOUND_RESOLUTION
+
+# SISRE analysis of the broadcast against the precise products (optional) and its time step [s]
+ComputeSisre = "SISRE" in Conf and int(Conf["SISRE"]) == 1
+SisreTStep = int(Conf["SISRE_TSTEP"]) if "SISRE_TSTEP" in Conf else 30
+
+# ANTEX file of the satellite antenna offsets of the SISRE analysis (optional):
+# without it the radial errors include the offset of the antenna phase centre
+AntexFilePath = findDataFile(Scen + '/INP/ATX/' + Conf["SISRE_ANTEX"]) if "SISRE_ANTEX" in Conf else None
+if ComputeSisre and AntexFilePath is not None and not os.path.isfile(AntexFilePath):
+    sys.stderr.write("ERROR: ANTEX file not found for SISRE: %s\n" % AntexFilePath)
+    AntexFilePath = None
+if ComputeSisre and AntexFilePath is None:
+    sys.stderr.write("ERROR: No ANTEX file (SISRE_ANTEX): the SISRE orbit errors are not corrected for the antenna offsets\n")
+
+# Geometry of the RIMS network against the satellites (optional)
+ComputeRimsGeometry = "RIMS_GEOMETRY" in Conf and int(Conf["RIMS_GEOMETRY"]) == 1
+
+# Protection Levels and Safety Index over a grid of users of the service area (optional):
+# area [LonMin, LonMax, LatMin, LatMax] and step [deg], mask angle [deg] and number of processes
+ComputeServiceArea = "SERVICE_GRID" in Conf and int(Conf["SERVICE_GRID"]) == 1
+if ComputeServiceArea:
+    ServiceArea = [float(Value) for Value in Conf["SERVICE_GRID_AREA"].split(',')]
+    ServiceStep = float(Conf["SERVICE_GRID_STEP"])
+    ServiceMask = float(Conf["SERVICE_GRID_MASK"]) if "SERVICE_GRID_MASK" in Conf else \
+        ServiceAreaFunctions.GRID_MASK_ANGLE
+    ServiceProcs = int(Conf["SERVICE_GRID_PROCS"]) if "SERVICE_GRID_PROCS" in Conf else 1
+
+# Export of the INFO and STAT products to Parquet datasets, partitioned by day
+# and GEO set (optional, needs pyarrow)
+ExportParquet = "PARQUET_EXPORT" in Conf and int(Conf["PARQUET_EXPORT"]) == 1
+if ExportParquet and not isArrowAvailable():
+    sys.stderr.write("ERROR: pyarrow not found, the Parquet export is disabled\n")
+    ExportParquet = False
+ParquetDir = Scen + '/OUT/SAT/PARQUET'
+
+# Build records of the stages: only the stale stages are rebuilt, unless forced
+Build = loadBuildGraph(Scen + '/OUT/SAT/BUILD_MANIFEST.json', "--force" in Options)
+
+# Pipeline of the days: number of days prefetched ahead and of figure
+# rendering processes (0 to render the figures of each day in sequence)
+PrefetchDays = int(Conf["PIPELINE_PREFETCH_DAYS"]) if "PIPELINE_PREFETCH_DAYS" in Conf else \
+    PIPELINE_QUEUE_SIZE
+RenderProcs = int(Conf["PIPELINE_RENDER_PROCS"]) if "PIPELINE_RENDER_PROCS" in Conf else 1
+
 # Print 
 print('------------------------------------')
 print('--> RUNNING SAT-PERFORMANCE ANALYSIS:')
 print('------------------------------------')
 
-# Loop over Julian Days in simulation
+# Loop over Julian Days in simulation: the inputs of the next days are
+# prefetched and the figures of the previous days rendered meanwhile
 #-----------------------------------------------------------------------
-for Jd in range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1):
+Pipeline = startPipeline(range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1), prefetchDay,
+    RenderProcs if GeneratePlots else 0, PrefetchDays)
+try:
+    for Jd, _ in iteratePipeline(Pipeline):
 
-    # Compute Year, Month and Day in order to build input file name
-    Year, Month, Day = convertJulianDay2YearMonthDay(Jd)
+        # Compute Year, Month and Day in order to build input file name
+        Year, Month, Day = convertJulianDay2YearMonthDay(Jd)
     
-    # Estimate the Day of Year DOY
-    Doy = convertYearMonthDay2Doy(Year, Month, Day)
-    yearDayText = 'Y%02dD%03d' % (Year % 100, Doy)
+        # Estimate the Day of Year DOY
+        Doy = convertYearMonthDay2Doy(Year, Month, Day)
+        yearDayText = 'Y%02dD%03d' % (Year % 100, Doy)
 
-    # Define the full path and name to the SAT INFO file to read
-    SatInfoFilePath = Scen + \
-        '/OUT/SAT/' + 'SAT_INFO_%s_G123_%ss.dat' % \
-            (yearDayText, Conf["TSTEP"])
+        # Define the full path and name to the SAT INFO, RIMS, NAV and SP3 files to read
+        SatInfoFilePath, RimsFilePath, NavFilePath, Sp3FilePath = getDayInputFiles(Jd)
 
-    # Define the name of the ENT-GPS instantaneous file
-    EntGpsFilePath = Scen + \
-        '/OUT/SAT/' + 'ENTGPS_%s_G123_%ss.dat' % \
-            (yearDayText, Conf["TSTEP"])
-    
-    # Define the name of the RIMS file
-    RimsFilePath = Scen + \
-        '/INP/RIMS/' + 'RIMS_REF_POSITIONS_%s.dat' % \
-            (Year)
+        # The output files are named after the uncompressed SAT INFO file
+        SatInfoFileName = removeCompressionSuffix(SatInfoFilePath)
 
-    # Define the name of the Output file Statistics
-    SatStatsFile = SatInfoFilePath.replace("INFO", "STAT")
+        # Define the name of the ENT-GPS instantaneous file
+        EntGpsFilePath = Scen + \
+            '/OUT/SAT/' + 'ENTGPS_%s_G123_%ss.dat' % \
+                (yearDayText, Conf["TSTEP"])
 
-    # Display Message
-    print('\n*** Processing Day of Year: ', Doy, '...***')
+        # Define the name of the Output file Statistics
+        SatStatsFile = SatInfoFileName.replace("INFO", "STAT")
 
-    # Display Message
-    print('1. Processing file:', SatInfoFilePath)
-    
-    # T3. Compute Satellite Statistics  FILE
-    computeSatStats(SatInfoFilePath, EntGpsFilePath, SatStatsFile)
+        # Define the name of the Output file Monitoring Windows
+        SatMonWinFile = SatInfoFileName.replace("INFO", "MONWIN")
 
-    # Display Creation message
-    print('2. Created files:','\n', SatStatsFile,'\n', EntGpsFilePath)
-    
-    # Display Reading Message
-    print('3. Reading file:', SatStatsFile)    
-    # Read Statistics file    
-    satStatsData = readDataFile(SatStatsFile, SatStatsIdx.values())
-
-    # Display Reading Message
-    print('4. Reading file:', SatInfoFilePath)
-    # Read Sat Info file    
-    satStatsTimeData = readDataFile(EntGpsFilePath, SatStatsTimeIdx.values())
-
-    # Display Generating figures Message
-    print('5. Generating Figures...\n')
-    
-    # T4. Generate Satellite RIMS figures   
-    wp1Plot.plotRims(RimsFilePath, yearDayText)
-    
-    # T5. Generate Satellite Statistics figures   
-    wp1Plot.plotSatStats(satStatsData, yearDayText)
-    
-    # T6. Generate Satellite Time and Info figures    
-    wp1Plot.plotSatStatsTime(satStatsTimeData, SatInfoFilePath, yearDayText)
+        # Define the name of the Output files of the time binned and sliding window Statistics
+        SatStatBinFile = SatInfoFileName.replace("INFO", "STATBIN")
+        SatStatWinFile = SatInfoFileName.replace("INFO", "STATWIN")
+
+        # Define the name of the Output file of the Overbounding (optional)
+        SatOverboundFile = SatInfoFileName.replace("INFO", "OVERBOUND") if ComputeOverbound else None
+
+        # Define the name of the Output file of the RIMS geometry
+        SatRimsGeoFile = SatInfoFileName.replace("INFO", "RIMSGEO")
+
+        # Define the names of the Output files of the service area grid
+        SatGridFile = SatInfoFileName.replace("INFO", "GRID")
+        SatGridSiFile = SatInfoFileName.replace("INFO", "GRIDSI")
+
+        # Define the names of the SISRE output files
+        SisreInfoFile = Scen + \
+            '/OUT/SAT/' + 'SISRE_INFO_%s_G123_%ss.dat' % \
+                (yearDayText, SisreTStep)
+        SisreStatsFile = SisreInfoFile.replace("INFO", "STAT")
+
+        # Display Message
+        print('\n*** Processing Day of Year: ', Doy, '...***')
+
+        # Output files of the Statistics stage
+        StatsOutputs = [SatStatsFile, EntGpsFilePath, SatMonWinFile] + \
+            ([SatStatBinFile] if TimeBin > 0 else []) + \
+            ([SatStatWinFile] if SlidingWindow > 0 else []) + \
+            ([SatOverboundFile] if ComputeOverbound else [])
+
+        with span("Day %s" % yearDayText, "day", Doy=Doy):
+
+            # Display Message
+            print('1. Processing file:', SatInfoFilePath)
+
+            # T3. Compute Satellite Statistics  FILE
+            if isStageStale(Build, "STAT " + yearDayText, [SatInfoFilePath], StatsOutputs, Conf, STATS_CONF_KEYS):
+                with span("Compute Statistics"):
+                    SatFunctions.computeSatStats(SatInfoFilePath, EntGpsFilePath, SatStatsFile, SatMonWinFile,
+                        TimeBin, SatStatBinFile, SlidingWindow, SatStatWinFile,
+                        SatOverboundFile, OverboundMinP, OverboundResolution)
+                recordStage(Build, "STAT " + yearDayText)
+
+                # Display Creation message
+                print('2. Created files:','\n', SatStatsFile,'\n', EntGpsFilePath,'\n', SatMonWinFile)
+                if ComputeOverbound:
+                    print('   Created overbounding file:','\n', SatOverboundFile)
+            else:
+                print('2. Statistics up to date:','\n', SatStatsFile)
+
+            # Compute the expected number of RIMS in view and Inverse Radial DOP
+            if ComputeRimsGeometry:
+                if not os.path.isfile(RimsFilePath):
+                    sys.stderr.write("ERROR: RIMS file not found: %s\n" % RimsFilePath)
+                elif isStageStale(Build, "RIMSGEO " + yearDayText, [RimsFilePath, SatInfoFilePath],
+                    [SatRimsGeoFile]):
+                    with span("Compute RIMS Geometry"):
+                        RimsFunctions.computeRimsGeometry(RimsFilePath, SatInfoFilePath, SatRimsGeoFile)
+                    recordStage(Build, "RIMSGEO " + yearDayText)
+                    print('   Created RIMS geometry file:','\n', SatRimsGeoFile)
+
+            # Compute the Protection Levels and Safety Index over the service area
+            if ComputeServiceArea and isStageStale(Build, "GRID " + yearDayText, [SatInfoFilePath],
+                [SatGridFile, SatGridSiFile], Conf, SERVICE_AREA_CONF_KEYS):
+                with span("Compute Service Area"):
+                    ServiceAreaFunctions.computeServiceArea(SatInfoFilePath, SatGridFile, SatGridSiFile,
+                        ServiceArea, ServiceStep, ServiceMask, ServiceProcs)
+                recordStage(Build, "GRID " + yearDayText)
+                print('   Created service area files:','\n', SatGridFile,'\n', SatGridSiFile)
 
+            # Compute the SISRE of the broadcast orbits and clocks
+            if ComputeSisre:
+                if not (os.path.isfile(NavFilePath) and os.path.isfile(Sp3FilePath)):
+                    sys.stderr.write("ERROR: NAV or SP3 file not found for SISRE: %s %s\n" % \
+                        (NavFilePath, Sp3FilePath))
+                elif isStageStale(Build, "SISRE " + yearDayText,
+                    [NavFilePath, Sp3FilePath] + ([AntexFilePath] if AntexFilePath else []),
+                    [SisreInfoFile, SisreStatsFile], Conf, SISRE_CONF_KEYS):
+                    with span("Compute SISRE"):
+                        SisreFunctions.computeSisre(NavFilePath, Sp3FilePath, Year, Month, Day,
+                            SisreTStep, SisreInfoFile, SisreStatsFile, AntexFilePath)
+                    recordStage(Build, "SISRE " + yearDayText)
+                    print('   Created SISRE files:','\n', SisreInfoFile,'\n', SisreStatsFile)
+
+            # Export the INFO, STAT and enabled optional products to the Parquet datasets
+            if ExportParquet:
+                ParquetProducts = [(SatInfoFilePath, SatInfoSchema), (SatStatsFile, SatStatsSchema),
+                    (EntGpsFilePath, SatStatsTimeSchema), (SatMonWinFile, SatMonWinSchema)]
+                if TimeBin > 0:
+                    ParquetProducts.append((SatStatBinFile, SatStatBinSchema))
+                if SlidingWindow > 0:
+                    ParquetProducts.append((SatStatWinFile, SatStatWinSchema))
+                if ComputeOverbound:
+                    ParquetProducts.append((SatOverboundFile, SatOverboundSchema))
+                if ComputeRimsGeometry:
+                    ParquetProducts.append((SatRimsGeoFile, RimsGeoSchema))
+                if ComputeServiceArea:
+                    ParquetProducts += [(SatGridFile, SatGridSchema), (SatGridSiFile, SatGridSiSchema)]
+                if ComputeSisre:
+                    ParquetProducts += [(SisreInfoFile, SisreInfoSchema), (SisreStatsFile, SisreStatsSchema)]
+                ParquetProducts = [(Path, Schema) for Path, Schema in ParquetProducts if os.path.isfile(Path)]
+                if isStageStale(Build, "PARQUET " + yearDayText, [Path for Path, _ in ParquetProducts],
+                    [getParquetFilePath(Path, Schema, ParquetDir) for Path, Schema in ParquetProducts]):
+                    with span("Export Parquet"):
+                        for Path, Schema in ParquetProducts:
+                            exportParquetFile(Path, Schema, ParquetDir)
+                    recordStage(Build, "PARQUET " + yearDayText)
+                    print('   Exported Parquet datasets:','\n', ParquetDir)
+
+            # Statistics are only read back to generate the figures
+            if not GeneratePlots:
+                continue
+
+            # Figures stages, with their input files and their figures as outputs:
+            # only the stale figures are generated
+            FigureStages = [
+                ("FIG-RIMS", [RimsFilePath]),
+                ("FIG-STAT", [SatStatsFile]),
+                ("FIG-TIME", [EntGpsFilePath, SatMonWinFile, SatInfoFilePath]),
+            ]
+            if ComputeServiceArea:
+                FigureStages.append(("FIG-GRID", [SatGridFile]))
+            StaleFigures = [Figure for Figure, Inputs in FigureStages
+                if isStageStale(Build, Figure + " " + yearDayText, Inputs,
+                    wp1Plot.getFigurePaths(Figure, yearDayText))]
+            if not StaleFigures:
+                print('3. Figures up to date')
+                continue
+
+            with span("Read Statistics"):
+                if "FIG-STAT" in StaleFigures:
+                    # Display Reading Message
+                    print('3. Reading file:', SatStatsFile)
+                    # Read Statistics file
+                    satStatsData = readSchemaFile(SatStatsFile, SatStatsSchema)
+
+                if "FIG-TIME" in StaleFigures:
+                    # Display Reading Message
+                    print('4. Reading file:', EntGpsFilePath)
+                    # Read ENT-GPS file
+                    satStatsTimeData = readSchemaFile(EntGpsFilePath, SatStatsTimeSchema)
+
+                    # Read Monitoring Windows file
+                    satMonWinData = readSchemaFile(SatMonWinFile, SatMonWinSchema)
+
+                    # With several render workers, the SAT INFO columns are read once
+                    # and placed in shared memory for the workers of the SAT INFO figures
+                    if RenderProcs > 1:
+                        print('   Reading file:', SatInfoFilePath)
+                        SatInfoShared, SatInfoBlock = shareData(wp1Plot.readSatInfoTimeData(SatInfoFilePath))
+
+            # Display Generating figures Message
+            print('5. Generating Figures...\n')
+
+            # Figures rendered by the pipeline workers, recorded as built once rendered
+            RenderTasks = []
+            SharedBlocks = []
+            # T4. Generate Satellite RIMS figures
+            if "FIG-RIMS" in StaleFigures:
+                RenderTasks.append(("Plot RIMS", wp1Plot.plotRims, (RimsFilePath, yearDayText)))
+
+            # T5. Generate Satellite Statistics figures
+            if "FIG-STAT" in StaleFigures:
+                RenderTasks.append(("Plot Statistics", wp1Plot.plotSatStats, (satStatsData, yearDayText)))
+
+            # T6. Generate Satellite Time and Info figures
+            if "FIG-TIME" in StaleFigures and RenderProcs > 1:
+                RenderTasks.append(("Plot Monitoring Time", wp1Plot.plotSatMonTime,
+                    (satStatsTimeData, satMonWinData, yearDayText)))
+                RenderTasks += [("Plot Time " + Figures, wp1Plot.plotSatInfoTimeShared,
+                    (SatInfoShared, yearDayText, [Figures])) for Figures in wp1Plot.SatInfoTimeFigures]
+                SharedBlocks.append(SatInfoBlock)
+            elif "FIG-TIME" in StaleFigures:
+                RenderTasks.append(("Plot Time", wp1Plot.plotSatStatsTime,
+                    (satStatsTimeData, satMonWinData, SatInfoFilePath, yearDayText)))
+
+            # Generate the service area maps
+            if "FIG-GRID" in StaleFigures:
+                RenderTasks.append(("Plot Service Area", wp1Plot.plotServiceAreaMaps, (SatGridFile, yearDayText)))
+
+            with span("Generate Figures"):
+                submitRender(Pipeline, RenderTasks, functools.partial(finishFigures,
+                    [Figure + " " + yearDayText for Figure in StaleFigures], SharedBlocks))
+
+    # Wait for the figures still being rendered
+    with span("Finish Figures"):
+        finishPipeline(Pipeline)
+finally:
+    # Terminate the render workers and remove the shared memory blocks left
+    # by a failed day or figure
+    abortPipeline(Pipeline)
+    releaseSharedData()
 
 print('------------------------------------')
 print('--> END OF SAT-PERFORMANCE ANALYSIS:')
@@ -144,6 +438,9 @@ print('------------------------------------')
 
 print('Check figures at the Output folder /OUT/SAT/FIGURES/')
 
+# Write the profiler outputs, if enabled
+finishProfiler()
+
 
 #######################################################
 #END OF SAT PERFORMANCES MODULE
@@ -19,90 +19,242 @@
 # Import External and Internal functions and Libraries
 #----------------------------------------------------------------------
 from collections import OrderedDict
-from COMMON.Plots import generatePlot
+from itertools import groupby
 from COMMON import GnssConstants
+from COMMON.TimeStatistics import SUM, MAX
+from COMMON.Schemas import defineSchema, getSchemaFormat
 from math import sqrt
 import numpy as np
 
 # Define SAT INFO FILE Columns
 """
-SatStatsIdx is a dictionary that maps the column names of the satellite statistics file to their corresponding indices.
+SatInfoSchema defines the columns of the SAT INFO file: (Name, Dtype, Unit, Format).
+SatInfoIdx is a dictionary that maps the column names of the SAT INFO file to their corresponding indices.
 """
-SatInfoIdx = dict([
-    ("SoD", 0),
-    ("DOY", 1),
-    ("PRN", 2),
-    ("SAT-X", 3),
-    ("SAT-Y", 4),
-    ("SAT-Z", 5),
-    ("MONSTAT", 6),
-    ("SRESTAT", 7),
-    ("SREx", 8),
-    ("SREy", 9),
-    ("SREz", 10),
-    ("SREb1", 11),
-    ("SREW", 12),
-    ("SFLT-W", 13),
-    ("UDREI", 14),
-    ("FC", 15),
-    ("AF0", 16),
-    ("AF1", 17),
-    ("LTCx", 18),
-    ("LTCy", 19),
-    ("LTCz", 20),
-    ("NRIMS", 21),
-    ("RDOP", 22)
+SatInfoSchema = defineSchema("SAT_INFO", [
+    ("SoD", "int32", "s", None),
+    ("DOY", "int16", None, None),
+    ("PRN", "object", None, None),
+    ("SAT-X", "float64", "km", None),
+    ("SAT-Y", "float64", "km", None),
+    ("SAT-Z", "float64", "km", None),
+    ("MONSTAT", "int8", None, None),
+    ("SRESTAT", "int8", None, None),
+    ("SREx", "float64", "m", None),
+    ("SREy", "float64", "m", None),
+    ("SREz", "float64", "m", None),
+    ("SREb1", "float64", "m", None),
+    ("SREW", "float64", "m", None),
+    ("SFLT-W", "float64", "m", None),
+    ("UDREI", "int8", None, None),
+    ("FC", "float64", "m", None),
+    ("AF0", "float64", "m", None),
+    ("AF1", "float64", "m/s", None),
+    ("LTCx", "float64", "m", None),
+    ("LTCy", "float64", "m", None),
+    ("LTCz", "float64", "m", None),
+    ("NRIMS", "int16", None, None),
+    ("RDOP", "float64", None, None),
 ])
+SatInfoIdx = SatInfoSchema["Idx"]
 
 # Define SAT STATISTICS file Columns
-SatStatsIdx = dict([
-    ("PRN", 0),
-    ("MON", 1),
-    ("RIMS-MIN", 2),
-    ("RIMS-MAX", 3),
-    ("SREaRMS", 4),
-    ("SREcRMS", 5),
-    ("SRErRMS", 6),
-    ("SREbRMS", 7),
-    ("SREWRMS", 8),
-    ("SREWMAX", 9),
-    ("SFLTMAX", 10),
-    ("SFLTMIN", 11),
-    ("SIMAX", 12),
-    ("FCMAX", 13),
-    ("LTCbMAX", 14),
-    ("LTCxMAX", 15),
-    ("LTCyMAX", 16),
-    ("LTCzMAX", 17),
-    ("NMI", 18),
-    ("NTRANS", 19)
+SatStatsSchema = defineSchema("SAT_STAT", [
+    ("PRN", "object", None, "%s"),
+    ("MON", "float64", "%", "%6.2f"),
+    ("RIMS-MIN", "int16", None, "%4d"),
+    ("RIMS-MAX", "int16", None, "%6d"),
+    ("SREaRMS", "float64", "m", "%10.3f"),
+    ("SREcRMS", "float64", "m", "%8.3f"),
+    ("SRErRMS", "float64", "m", "%8.3f"),
+    ("SREbRMS", "float64", "m", "%8.3f"),
+    ("SREWRMS", "float64", "m", "%8.3f"),
+    ("SREWMAX", "float64", "m", "%8.3f"),
+    ("SFLTMAX", "float64", "m", "%8.3f"),
+    ("SFLTMIN", "float64", "m", "%8.3f"),
+    ("SIMAX", "float64", None, "%8.3f"),
+    ("FCMAX", "float64", "m", "%8.3f"),
+    ("LTCbMAX", "float64", "m", "%8.3f"),
+    ("LTCxMAX", "float64", "m", "%8.3f"),
+    ("LTCyMAX", "float64", "m", "%8.3f"),
+    ("LTCzMAX", "float64", "m", "%8.3f"),
+    ("NMI", "float64", None, "%8.3f"),
+    ("NTRANS", "int32", None, "%4d"),
 ])
+SatStatsIdx = SatStatsSchema["Idx"]
 
 # Define STATISTICS TIME file Columns (ENT-GPS)
-SatStatsTimeIdx = dict([
-    ("SoD", 0),         # SOD
-    ("ENT-GPS", 1),     # ENT-GPS
-    ("MON", 2),         # Monitored
-    ("NMON", 3),        # Not Monitored
-    ("DU", 4),          # Dont Use
+SatStatsTimeSchema = defineSchema("ENTGPS", [
+    ("SoD", "int32", "s", "%5s"),               # SOD
+    ("ENT-GPS", "float64", "m", "%10.4f"),      # ENT-GPS
+    ("MON", "int16", None, "%d"),               # Monitored
+    ("NMON", "int16", None, "%d"),              # Not Monitored
+    ("DU", "int16", None, "%d"),                # Dont Use
 ])
+SatStatsTimeIdx = SatStatsTimeSchema["Idx"]
+
+# Define MONITORING WINDOWS file Columns
+SatMonWinSchema = defineSchema("SAT_MONWIN", [
+    ("PRN", "object", None, "%s"),              # Satellite PRN
+    ("START", "int32", "s", "%6d"),             # SoD of the first monitored sample of the window
+    ("END", "int32", "s", "%6d"),               # SoD of the last monitored sample of the window
+    ("DURATION", "int32", "s", "%6d"),          # Duration of the window [s]
+    ("NSAMPS", "int32", None, "%6d"),           # Number of samples of the window
+    ("RIMS-MIN", "int16", None, "%4d"),         # Minimum number of RIMS in view during the window
+])
+SatMonWinIdx = SatMonWinSchema["Idx"]
+
+# Define TIME BINNED STATISTICS file Columns
+SatStatBinSchema = defineSchema("SAT_STATBIN", [
+    ("SoD", "int32", "s", "%6d"),               # SoD of the start of the time bin
+    ("PRN", "object", None, "%s"),              # Satellite PRN
+    ("NSAMPS", "int32", None, "%6d"),           # Number of samples
+    ("MON", "float64", "%", "%6.2f"),           # Monitoring percentage
+    ("SREWRMS", "float64", "m", "%8.3f"),       # RMS of SREW
+    ("SIMAX", "float64", None, "%8.3f"),        # Maximum Safety Index
+])
+SatStatBinIdx = SatStatBinSchema["Idx"]
+
+# Define SLIDING WINDOW STATISTICS file Columns (all satellites)
+SatStatWinSchema = defineSchema("SAT_STATWIN", [
+    ("SoD", "int32", "s", "%6d"),               # SoD of the end of the window
+    ("NSAMPS", "int32", None, "%6d"),           # Number of samples
+    ("MON", "float64", "%", "%6.2f"),           # Monitoring percentage
+    ("SREWRMS", "float64", "m", "%8.3f"),       # RMS of SREW
+    ("SIMAX", "float64", None, "%8.3f"),        # Maximum Safety Index
+])
+SatStatWinIdx = SatStatWinSchema["Idx"]
+
+# Define OVERBOUNDING file Columns (per PRN, plus ALL for all the satellites)
+SatOverboundSchema = defineSchema("SAT_OVERBOUND", [
+    ("PRN", "object", None, "%s"),              # Satellite PRN
+    ("NSAMPS", "int32", None, "%8d"),           # Number of monitored samples with SRE OK
+    ("NEMEAN", "float64", None, "%8.4f"),       # Mean of the normalized error SREW/SFLT-W
+    ("NESTD", "float64", None, "%8.4f"),        # Standard deviation of the normalized error
+    ("NEMAX", "float64", None, "%8.4f"),        # Maximum absolute normalized error
+    ("KOVB", "float64", None, "%8.4f"),         # Inflation factor of SFLT-W overbounding the normalized error
+])
+SatOverboundIdx = SatOverboundSchema["Idx"]
+
+# Accumulated fields of the time statistics, and their reduction
+TimeStatsFields = OrderedDict([
+    ("NSAMPS", SUM),
+    ("MON", SUM),
+    ("SREWSUM2", SUM),
+    ("SREWSAMPS", SUM),
+    ("SIMAX", MAX),
+])
+
+# Define SISRE INFO file Columns
+SisreInfoSchema = defineSchema("SISRE_INFO", [
+    ("SoD", "int32", "s", "%5d"),               # SOD
+    ("DOY", "int16", None, "%3d"),              # Day of Year
+    ("PRN", "object", None, "%s"),              # Satellite PRN
+    ("SAT-X", "float64", "km", "%14.6f"),       # Precise satellite position [km]
+    ("SAT-Y", "float64", "km", "%14.6f"),
+    ("SAT-Z", "float64", "km", "%14.6f"),
+    ("PCO", "float64", "m", "%7.3f"),           # Antenna Z offset applied to the precise orbit [m] (nan: uncorrected)
+    ("SREr", "float64", "m", "%8.3f"),          # Radial orbit error [m]
+    ("SREa", "float64", "m", "%8.3f"),          # Along-track orbit error [m]
+    ("SREc", "float64", "m", "%8.3f"),          # Cross-track orbit error [m]
+    ("SREb", "float64", "m", "%8.3f"),          # Clock error [m]
+    ("SISRE-ORB", "float64", "m", "%8.3f"),     # Orbit-only SISRE [m]
+    ("SISRE", "float64", "m", "%8.3f"),         # Global average SISRE [m]
+    ("SISRE-WUL", "float64", "m", "%8.3f"),     # Worst User Location SISRE [m]
+    ("IODE", "int16", None, "%4d"),             # IODE of the broadcast ephemeris
+])
+SisreInfoIdx = SisreInfoSchema["Idx"]
+
+# Define SISRE STATISTICS file Columns
+SisreStatsSchema = defineSchema("SISRE_STAT", [
+    ("PRN", "object", None, "%s"),
+    ("MON", "float64", "%", "%6.2f"),           # Percentage of epochs with both products
+    ("NSAMPS", "int32", None, "%6d"),           # Number of samples
+    ("SREaRMS", "float64", "m", "%8.3f"),
+    ("SREcRMS", "float64", "m", "%8.3f"),
+    ("SRErRMS", "float64", "m", "%8.3f"),
+    ("SREbRMS", "float64", "m", "%8.3f"),
+    ("SISRE-ORBRMS", "float64", "m", "%8.3f"),
+    ("SISRERMS", "float64", "m", "%8.3f"),
+    ("SREWRMS", "float64", "m", "%8.3f"),
+    ("SREWMAX", "float64", "m", "%8.3f"),
+])
+SisreStatsIdx = SisreStatsSchema["Idx"]
+
+# Define RIMS file Columns
+RimsSchema = defineSchema("RIMS", [
+    ("SF", "int8", None, None),                 # Selection flag [0:OFF/1:ON]
+    ("SNA", "object", None, None),              # Station Name Acronym [%4s]
+    ("SID", "int16", None, None),               # Station Number ID [%2d]
+    ("LON", "float64", "deg", None),            # Longitude [deg]
+    ("LAT", "float64", "deg", None),            # Latitude [deg]
+    ("HEI", "float64", "m", None),              # Height [meters]
+    ("MA", "float64", "deg", None),             # Mask Angle [deg]
+    ("AT", "int16", "min", None),               # Acquisition Time [minutes]
+    ("SITE", "object", None, None),             # Site [%s]
+    ("COUNTRY", "object", None, None),          # Country [%s]
+])
+RimsIdx = RimsSchema["Idx"]
+
+# Define RIMS GEOMETRY file Columns
+RimsGeoSchema = defineSchema("SAT_RIMSGEO", [
+    ("SoD", "int32", "s", "%5d"),               # SOD
+    ("PRN", "object", None, "%s"),              # Satellite PRN
+    ("NRIMS", "int16", None, "%4d"),            # Number of RIMS of the SAT INFO file
+    ("NRIMS-EXP", "int16", None, "%4d"),        # Expected number of RIMS in view
+    ("RDOP", "float64", None, "%8.3f"),         # Inverse Radial DOP of the SAT INFO file
+    ("RDOP-EXP", "float64", None, "%8.3f"),     # Inverse Radial DOP of the RIMS in view
+])
+RimsGeoIdx = RimsGeoSchema["Idx"]
+
+# Define SERVICE AREA GRID file Columns
+SatGridSchema = defineSchema("SAT_GRID", [
+    ("LON", "float64", "deg", "%8.2f"),         # Longitude of the grid user [deg]
+    ("LAT", "float64", "deg", "%8.2f"),         # Latitude of the grid user [deg]
+    ("NSAMPS", "int32", None, "%6d"),           # Number of epochs with position solution
+    ("AVAIL", "float64", "%", "%7.2f"),         # APV-I availability [%]
+    ("MAXHPL", "float64", "m", "%8.3f"),        # Maximum HPL [m]
+    ("MAXVPL", "float64", "m", "%8.3f"),        # Maximum VPL [m]
+    ("MAXHSI", "float64", None, "%8.4f"),       # Maximum horizontal Safety Index (HPE/HPL)
+    ("MAXVSI", "float64", None, "%8.4f"),       # Maximum vertical Safety Index (VPE/VPL)
+    ("NMI", "int32", None, "%6d"),              # Number of Misleading Information (PE > PL)
+    ("NLOSS", "int32", None, "%6d"),            # Number of losses of the APV-I availability
+])
+SatGridIdx = SatGridSchema["Idx"]
 
-# Define RIMS file Columns 
-RimsIdx = dict([
-    ("SF", 0),          # Selection flag [0:OFF/1:ON]
-    ("SNA", 1),         # Station Name Acronym [%4s]
-    ("SID", 2),         # Station Number ID [%2d]
-    ("LON", 3),         # Longitude [deg]
-    ("LAT", 4),         # Latitude [deg]
-    ("HEI", 5),         # Height [meters]
-    ("MA", 6),          # Mask Angle [deg]
-    ("AT", 7),          # Acquisition Time [minutes]
-    ("SITE", 8),        # Site [%s] 
-    ("COUNTRY", 9)      # Country [%s]
+# Define SERVICE AREA SAFETY INDEX file Columns
+SatGridSiSchema = defineSchema("SAT_GRIDSI", [
+    ("PRN", "object", None, "%s"),              # Satellite PRN
+    ("SIMAX", "float64", None, "%8.4f"),        # Maximum Safety Index over the grid users
+    ("NMI", "int32", None, "%6d"),              # Number of epochs with SI > 1 for some user
 ])
+SatGridSiIdx = SatGridSiSchema["Idx"]
 
 # Define Satidistics Output file format list
-StatsOutputFormat = "%s %6.2f %4d %6d %10.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %4d"
+StatsOutputFormat = getSchemaFormat(SatStatsSchema)
+
+# Define ENT-GPS Output file format
+EntGpsOutputFormat = getSchemaFormat(SatStatsTimeSchema) + "\n"
+
+# Define Monitoring Windows Output file format
+MonWinOutputFormat = getSchemaFormat(SatMonWinSchema) + "\n"
+
+# Define Time Statistics Output file formats
+StatBinOutputFormat = getSchemaFormat(SatStatBinSchema) + "\n"
+StatWinOutputFormat = getSchemaFormat(SatStatWinSchema) + "\n"
+
+# Define OVERBOUNDING Output file format
+OverboundOutputFormat = getSchemaFormat(SatOverboundSchema) + "\n"
+
+# Define RIMS GEOMETRY Output file format
+RimsGeoOutputFormat = getSchemaFormat(RimsGeoSchema) + "\n"
+
+# Define SERVICE AREA Output file formats
+GridOutputFormat = getSchemaFormat(SatGridSchema) + "\n"
+GridSiOutputFormat = getSchemaFormat(SatGridSiSchema) + "\n"
+
+# Define SISRE INFO Output file format
+SisreInfoOutputFormat = getSchemaFormat(SisreInfoSchema) + "\n"
 
 
 def splitLine(Line):
@@ -113,34 +265,15 @@ def splitLine(Line):
 
     return LineSplit
 
-def readSatInfoEpoch(f):
+def readSatInfoEpochs(f):
     """
-    FUNCTION: Read Sat Info Epoch
+    FUNCTION: Read Sat Info Epochs
+    Yield the split lines of each epoch of the SAT INFO file. The lines are
+    read in sequence, without seeks, so that f may be a decompression stream.
     """
-    EpochInfo = []
-    
-    # Read one line
-    Line = f.readline()
-    if(not Line):
-        return []
-    LineSplit = splitLine(Line)
-    Sod = LineSplit[SatInfoIdx["SoD"]]
-    SodNext = Sod
-
-    while SodNext == Sod:
-        EpochInfo.append(LineSplit)
-        Pointer = f.tell()
-        Line = f.readline()
-        LineSplit = splitLine(Line)
-        try: 
-            SodNext = LineSplit[SatInfoIdx["SoD"]]
-
-        except:
-            return EpochInfo
-
-    f.seek(Pointer)
-
-    return EpochInfo
+    Lines = (splitLine(Line) for Line in f if not Line.isspace())
+    for _, EpochInfo in groupby(Lines, key=lambda LineSplit: LineSplit[SatInfoIdx["SoD"]]):
+        yield list(EpochInfo)
 
 def initializeOutputs(Outputs):
     
@@ -430,4 +563,69 @@ def countMonitoredSatsInEpoch(epochInfo):
             cntDu += 1
 
     
-    return cntMon, cntNotMon, cntDu
\ No newline at end of file
+    return cntMon, cntNotMon, cntDu
+
+def getEpochTimeStatsValues(epochInfo):
+    """
+    Get the values of the time statistics fields (see TimeStatsFields)
+    of all the satellites of an epoch, as arrays.
+
+    Parameters:
+    - epochInfo: Information for all satellites in a single epoch.
+
+    Returns:
+    - Prns: PRN of each satellite.
+    - Values: Dictionary with the values of each field.
+    """
+    # Transpose the epoch into columns once
+    EpochColumns = list(zip(*epochInfo))
+    Prns = EpochColumns[SatInfoIdx["PRN"]]
+    Mon = np.array(EpochColumns[SatInfoIdx["MONSTAT"]]) == '1'
+    SreOk = Mon & (np.array(EpochColumns[SatInfoIdx["SRESTAT"]]) == '1')
+    Srew = np.array(EpochColumns[SatInfoIdx["SREW"]], dtype=float)
+    Sflt = np.array(EpochColumns[SatInfoIdx["SFLT-W"]], dtype=float)
+
+    # Safety Index of the monitored satellites with SRE OK
+    Si = np.zeros(len(epochInfo))
+    Si[SreOk] = Srew[SreOk] / (5.33 * Sflt[SreOk])
+
+    Values = {
+        "NSAMPS": np.ones(len(epochInfo)),
+        "MON": Mon.astype(float),
+        "SREWSUM2": np.where(SreOk, Srew**2, 0.0),
+        "SREWSAMPS": SreOk.astype(float),
+        "SIMAX": Si,
+    }
+
+    return Prns, Values
+
+def getEpochNormalizedErrors(epochInfo):
+    """
+    Get the normalized errors SREW/SFLT-W of the monitored satellites with
+    SRE OK of an epoch, as arrays.
+
+    Returns:
+    - Prns: PRN of each normalized error.
+    - Errors: Normalized errors.
+    """
+    EpochColumns = list(zip(*epochInfo))
+    SreOk = (np.array(EpochColumns[SatInfoIdx["MONSTAT"]]) == '1') & \
+        (np.array(EpochColumns[SatInfoIdx["SRESTAT"]]) == '1')
+    Sflt = np.array(EpochColumns[SatInfoIdx["SFLT-W"]], dtype=float)
+    SreOk &= Sflt > 0
+    Srew = np.array(EpochColumns[SatInfoIdx["SREW"]], dtype=float)
+
+    return np.array(EpochColumns[SatInfoIdx["PRN"]])[SreOk], Srew[SreOk] / Sflt[SreOk]
+
+def computeTimeStatsOutputs(Values):
+    """
+    Compute the Monitoring percentage and the SREW RMS from the accumulated
+    time statistics fields.
+
+    Returns:
+    - NSAMPS, MON, SREWRMS, SIMAX
+    """
+    Mon = Values["MON"] * 100.0 / Values["NSAMPS"] if Values["NSAMPS"] > 0 else 0.0
+    SrewRms = sqrt(Values["SREWSUM2"] / Values["SREWSAMPS"]) if Values["SREWSAMPS"] > 0 else 0.0
+
+    return Values["NSAMPS"], Mon, SrewRms, Values["SIMAX"]
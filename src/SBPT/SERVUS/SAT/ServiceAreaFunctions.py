@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+
+########################################################################
+# ServiceAreaFunctions.py:
+# This script defines the analysis of the Safety Index and the
+# Protection Levels over a grid of users of the service area
+#
+#  Project:        SBPT
+#  File:           ServiceAreaFunctions.py
+#
+#   Copyright 2020 GNSS Academy
+#
+# Internal dependencies:
+#   COMMON
+#   SatStatistics
+########################################################################
+
+
+# Import External and Internal functions and Libraries
+#----------------------------------------------------------------------
+from collections import OrderedDict
+from itertools import islice
+from multiprocessing import Pool
+from COMMON import GnssConstants
+from COMMON.Compression import openDataFile
+from COMMON.Coordinates import llh2xyzArray, computeElevationAzimuth
+from COMMON.Files import writeSchemaFile
+from COMMON.Profiler import initWorker, getWorkerConfig
+import SatStatistics as stat
+import numpy as np
+
+# Define SAT INFO FILE Columns
+SatInfoIdx = stat.SatInfoIdx
+
+# Define SERVICE AREA GRID file Columns
+SatGridIdx = stat.SatGridIdx
+
+# Define SERVICE AREA SAFETY INDEX file Columns
+SatGridSiIdx = stat.SatGridSiIdx
+
+# Default mask angle of the grid users [deg]
+GRID_MASK_ANGLE = 5.0
+
+# Number of epochs processed by each task
+GRID_EPOCH_CHUNK = 64
+
+# Airborne noise of the users (MOPS AAD-B) [m]
+GRID_SIGMA_NOISE = 0.15
+
+# Number of parameters of the position solution (ENU and clock)
+NUM_PARAMS = 4
+
+# ------------------------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def createGrid(Area, Step):
+    """
+    Create the grid of users of the service area.
+
+    Parameters:
+    - Area: Limits of the grid [LonMin, LonMax, LatMin, LatMax] [deg].
+    - Step: Step of the grid [deg].
+    """
+    LonMin, LonMax, LatMin, LatMax = Area
+    Lon, Lat = np.meshgrid(np.arange(LonMin, LonMax + Step / 2, Step),
+        np.arange(LatMin, LatMax + Step / 2, Step))
+    Grid = {"LON": Lon.ravel(), "LAT": Lat.ravel()}
+    Grid["XYZ"] = np.column_stack(llh2xyzArray(Grid["LON"], Grid["LAT"], 0.0))
+
+    return Grid
+
+def computeUserSigmas2(Elev, SigmaFlt):
+    """
+    Compute the variance of the users pseudoranges [m2] (NGrid x NSats):
+    broadcast FLT sigma, MOPS troposphere and airborne (AAD-B) terms.
+    """
+    SinElev = np.sin(np.radians(Elev))
+    SigmaTropo = 0.12 * 1.001 / np.sqrt(0.002001 + SinElev**2)
+    SigmaMp = 0.13 + 0.53 * np.exp(-Elev / 10.0)
+
+    return SigmaFlt[None, :]**2 + SigmaTropo**2 + SigmaMp**2 + GRID_SIGMA_NOISE**2
+
+def computeGridEpoch(Grid, Mask, Epoch):
+    """
+    Compute the Protection Levels, Position Errors and Safety Indexes of all
+    the grid users at one epoch.
+
+    Returns:
+    - Hpl, Vpl, Hpe, Vpe: Protection levels and position errors (NGrid), NaN
+      where the position cannot be solved.
+    - SatSi: Maximum Safety Index of each satellite over the grid users.
+    """
+    Elev, Azim = computeElevationAzimuth(Grid["XYZ"], Grid["LON"], Grid["LAT"], Epoch["POS"])
+    Visible = (Elev >= Mask) & Epoch["USABLE"][None, :]
+
+    # Keep only the satellites in view of some user
+    InView = np.any(Visible, axis=0)
+    Elev, Azim, Visible = Elev[:, InView], Azim[:, InView], Visible[:, InView]
+    Pos, SigmaFlt = Epoch["POS"][InView], Epoch["SFLT"][InView]
+
+    # Geometry matrix in ENU of all the users at once (NGrid x NSats x 4)
+    CosElev = np.cos(np.radians(Elev))
+    G = np.stack((-CosElev * np.sin(np.radians(Azim)), -CosElev * np.cos(np.radians(Azim)),
+        -np.sin(np.radians(Elev)), np.ones_like(Elev)), axis=-1)
+    W = np.where(Visible, 1.0 / computeUserSigmas2(Elev, SigmaFlt), 0.0)
+
+    # Range errors: orbit error projected in the line of sight minus clock error
+    Los = Pos[None, :, :] - Grid["XYZ"][:, None, :]
+    Los /= np.linalg.norm(Los, axis=-1, keepdims=True)
+    RangeErrors = np.sum(Los * Epoch["SRE"][InView], axis=-1) - Epoch["SREB"][InView]
+
+    # Satellite Safety Index at each user
+    SatSi = np.zeros(len(InView))
+    SatSi[InView] = np.max(np.where(Visible, np.abs(RangeErrors), 0.0), axis=0) / \
+        (GnssConstants.MOPS_KV_PA * SigmaFlt)
+
+    # Weighted Least Squares covariance and position errors
+    NGrid = len(Grid["LON"])
+    Hpl, Vpl, Hpe, Vpe = [np.full(NGrid, np.nan) for _ in range(4)]
+    GtW = np.swapaxes(G * W[..., None], 1, 2)
+    Normal = np.matmul(GtW, G)
+    Solvable = np.sum(Visible, axis=1) >= NUM_PARAMS
+    Solvable[Solvable] = np.linalg.det(Normal[Solvable]) > 0
+    Cov = np.linalg.inv(Normal[Solvable])
+    PosErrors = np.matmul(Cov, np.matmul(GtW[Solvable], RangeErrors[Solvable][..., None]))[..., 0]
+
+    dEE, dNN, dEN, dUU = Cov[:, 0, 0], Cov[:, 1, 1], Cov[:, 0, 1], Cov[:, 2, 2]
+    Hpl[Solvable] = GnssConstants.MOPS_KH_PA * \
+        np.sqrt((dEE + dNN) / 2 + np.sqrt(((dEE - dNN) / 2)**2 + dEN**2))
+    Vpl[Solvable] = GnssConstants.MOPS_KV_PA * np.sqrt(dUU)
+    Hpe[Solvable] = np.hypot(PosErrors[:, 0], PosErrors[:, 1])
+    Vpe[Solvable] = np.abs(PosErrors[:, 2])
+
+    return Hpl, Vpl, Hpe, Vpe, SatSi
+
+def computeGridChunk(Task):
+    """
+    Compute the grid statistics of a chunk of epochs (run in the worker processes).
+
+    Returns:
+    - Result: Dictionary with the per-user reductions of the chunk, the
+      availability of its first and last epochs (to count the losses across
+      the chunks), and the per-satellite SI maxima.
+    """
+    Grid, Mask, Epochs, NSats = Task["Grid"], Task["Mask"], Task["Epochs"], Task["NSats"]
+    NGrid = len(Grid["LON"])
+    Result = {
+        "NEPOCHS": len(Epochs),
+        "NSAMPS": np.zeros(NGrid),
+        "MAXHPL": np.zeros(NGrid),
+        "MAXVPL": np.zeros(NGrid),
+        "MAXHSI": np.zeros(NGrid),
+        "MAXVSI": np.zeros(NGrid),
+        "NMI": np.zeros(NGrid),
+        "NAVAIL": np.zeros(NGrid),
+        "NLOSS": np.zeros(NGrid),
+        "FIRST": None,
+        "LAST": None,
+        "SATSIMAX": np.zeros(NSats),
+        "SATNMI": np.zeros(NSats),
+    }
+
+    for Epoch in Epochs:
+        Hpl, Vpl, Hpe, Vpe, SatSi = computeGridEpoch(Grid, Mask, Epoch)
+        Solved = np.isfinite(Hpl)
+        Result["NSAMPS"] += Solved
+        Avail = Solved & (Hpl <= GnssConstants.APVI_HAL) & (Vpl <= GnssConstants.APVI_VAL)
+        Result["NAVAIL"] += Avail
+        if Result["LAST"] is None:
+            Result["FIRST"] = Avail
+        else:
+            Result["NLOSS"] += Result["LAST"] & ~Avail
+        Result["LAST"] = Avail
+        with np.errstate(invalid='ignore'):
+            np.fmax(Result["MAXHPL"], Hpl, out=Result["MAXHPL"])
+            np.fmax(Result["MAXVPL"], Vpl, out=Result["MAXVPL"])
+            np.fmax(Result["MAXHSI"], Hpe / Hpl, out=Result["MAXHSI"])
+            np.fmax(Result["MAXVSI"], Vpe / Vpl, out=Result["MAXVSI"])
+            Result["NMI"] += (Hpe > Hpl) | (Vpe > Vpl)
+
+        np.maximum.at(Result["SATSIMAX"], Epoch["CODES"], SatSi)
+        np.add.at(Result["SATNMI"], Epoch["CODES"], SatSi > 1)
+
+    return Result
+
+def buildGridEpoch(EpochInfo, PrnCodes):
+    """
+    Build the arrays of an epoch of the SAT INFO file (its split lines) needed
+    by the grid analysis. The ENT-GPS offset of the epoch is removed from the
+    clock errors, as in the satellite statistics.
+    """
+    def getColumn(Column):
+        return np.array([LineSplit[SatInfoIdx[Column]] for LineSplit in EpochInfo])
+
+    Pos = np.column_stack([getColumn(Column) for Column in ["SAT-X", "SAT-Y", "SAT-Z"]]).astype(float) * 1000
+    Sre = np.column_stack([getColumn(Column) for Column in ["SREx", "SREy", "SREz"]]).astype(float)
+    Ok = getColumn("SRESTAT").astype(int) == 1
+    Sre[~Ok] = 0.0
+    SreR = np.sum(Sre * Pos, axis=1) / np.linalg.norm(Pos, axis=1)
+    SreB = getColumn("SREb1").astype(float)
+    EntGps = np.median(SreB[Ok] - SreR[Ok]) if np.any(Ok) else 0.0
+    SFlt = getColumn("SFLT-W").astype(float)
+
+    # The satellites are coded in the order they appear in the file
+    Codes = np.array([PrnCodes.setdefault(Prn, len(PrnCodes)) for Prn in getColumn("PRN")], dtype=int)
+
+    return {
+        "SoD": int(EpochInfo[0][SatInfoIdx["SoD"]]),
+        "CODES": Codes,
+        "POS": Pos,
+        "SRE": Sre,
+        "SREB": np.where(Ok, SreB - EntGps, 0.0),
+        "SFLT": SFlt,
+        "USABLE": (getColumn("MONSTAT").astype(int) == 1) & (SFlt > 0),
+    }
+
+def readGridEpochs(SatInfoFile, PrnCodes):
+    """
+    Read the SAT INFO file epoch by epoch, yielding the arrays of each epoch
+    needed by the grid analysis as the file is read, so that the memory used
+    does not grow with the length of the file.
+
+    Parameters:
+    - SatInfoFile: SAT INFO file (it may be compressed).
+    - PrnCodes: Dictionary with the code of each satellite, extended with the
+      new satellites as they are read.
+
+    Yields:
+    - Epoch: Dictionary with the arrays of the epoch (see buildGridEpoch).
+    """
+    with openDataFile(SatInfoFile) as f:
+        # Skip the header
+        f.readline()
+        for EpochInfo in stat.readSatInfoEpochs(f):
+            yield buildGridEpoch(EpochInfo, PrnCodes)
+
+def readGridTasks(SatInfoFile, Grid, Mask, PrnCodes, NTasks):
+    """
+    Read the SAT INFO file in chunks of GRID_EPOCH_CHUNK epochs, yielding
+    lists of up to NTasks tasks of the grid analysis, so that only the
+    epochs being processed are held in memory.
+    """
+    Epochs = readGridEpochs(SatInfoFile, PrnCodes)
+    while True:
+        Tasks = []
+        for _ in range(NTasks):
+            Chunk = list(islice(Epochs, GRID_EPOCH_CHUNK))
+            if not Chunk:
+                break
+            Tasks.append({"Grid": Grid, "Mask": Mask, "NSats": len(PrnCodes), "Epochs": Chunk})
+        if not Tasks:
+            return
+        yield Tasks
+
+def mergeGridResults(Merged, Result):
+    """
+    Merge the result of a chunk of epochs into the results of the previous
+    chunks (None before the first one). The chunks must be merged in order.
+    """
+    if Merged is None:
+        return Result
+
+    Merged["NLOSS"] += Result["NLOSS"] + (Merged["LAST"] & ~Result["FIRST"])
+    Merged["LAST"] = Result["LAST"]
+    Merged["NEPOCHS"] += Result["NEPOCHS"]
+    for Field in ["NSAMPS", "NAVAIL", "NMI"]:
+        Merged[Field] += Result[Field]
+    for Field in ["MAXHPL", "MAXVPL", "MAXHSI", "MAXVSI"]:
+        np.maximum(Merged[Field], Result[Field], out=Merged[Field])
+
+    # The satellites seen for the first time in the chunk extend the arrays
+    for Field, Merge in [("SATSIMAX", np.maximum), ("SATNMI", np.add)]:
+        Values = np.zeros(len(Result[Field]))
+        Values[:len(Merged[Field])] = Merged[Field]
+        Merged[Field] = Merge(Values, Result[Field])
+
+    return Merged
+
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def computeServiceArea(SatInfoFile, SatGridFile, SatGridSiFile, Area, Step,
+    Mask = GRID_MASK_ANGLE, NProcs = 1):
+    """
+    Compute the Protection Levels, the Position Errors and the Safety Indexes
+    of a grid of users over the service area, for every epoch of the SAT INFO
+    file, and write the availability, integrity and continuity maps.
+
+    The users see the monitored satellites above the mask angle, and the
+    variance of their pseudoranges combines the broadcast FLT sigma (SFLT-W)
+    with the MOPS troposphere and airborne models. The ionosphere is not
+    included, as it is analysed separately in the IGP module. The range
+    errors are the SRE vectors projected in the line of sight minus the SRE
+    clock component.
+
+    Parameters:
+    - SatInfoFile: SAT INFO file.
+    - SatGridFile: Output file with the statistics of each grid user.
+    - SatGridSiFile: Output file with the Safety Index of each satellite.
+    - Area: Limits of the grid [LonMin, LonMax, LatMin, LatMax] [deg].
+    - Step: Step of the grid [deg].
+    - Mask: Mask angle of the users [deg].
+    - NProcs: Number of worker processes (1 to run in the main process).
+    """
+    Grid = createGrid(Area, Step)
+    PrnCodes = {}
+
+    # The epochs are read and processed in chunks, NProcs at a time
+    Merged = None
+    if NProcs > 1:
+        with Pool(NProcs, initializer=initWorker, initargs=(getWorkerConfig(),)) as Workers:
+            for Tasks in readGridTasks(SatInfoFile, Grid, Mask, PrnCodes, NProcs):
+                for Result in Workers.map(computeGridChunk, Tasks):
+                    Merged = mergeGridResults(Merged, Result)
+    else:
+        for Tasks in readGridTasks(SatInfoFile, Grid, Mask, PrnCodes, 1):
+            Merged = mergeGridResults(Merged, computeGridChunk(Tasks[0]))
+    if Merged is None:
+        Merged = computeGridChunk({"Grid": Grid, "Mask": Mask, "NSats": 0, "Epochs": []})
+
+    Outputs = OrderedDict([("LON", Grid["LON"]), ("LAT", Grid["LAT"])])
+    Outputs["NSAMPS"] = Merged["NSAMPS"]
+    Outputs["AVAIL"] = Merged["NAVAIL"] * 100.0 / max(Merged["NEPOCHS"], 1)
+    for Field in ["MAXHPL", "MAXVPL", "MAXHSI", "MAXVSI", "NMI"]:
+        Outputs[Field] = Merged[Field]
+
+    # Continuity: number of losses of the availability
+    Outputs["NLOSS"] = Merged["NLOSS"]
+
+    # Write SERVICE AREA GRID file
+    writeSchemaFile(SatGridFile, stat.SatGridSchema, Outputs)
+
+    # Write SERVICE AREA SAFETY INDEX file
+    # (satellites sorted by PRN)
+    Prns = np.array(sorted(PrnCodes), dtype=object)
+    Order = np.array([PrnCodes[Prn] for Prn in Prns], dtype=int)
+    writeSchemaFile(SatGridSiFile, stat.SatGridSiSchema,
+        {"PRN": Prns, "SIMAX": Merged["SATSIMAX"][Order], "NMI": Merged["SATNMI"][Order]})
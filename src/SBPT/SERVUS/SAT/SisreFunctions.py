@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+
+########################################################################
+# SisreFunctions.py:
+# This script defines the Signal-In-Space Range Error (SISRE) analysis
+# of the broadcast GPS ephemerides against the IGS precise products
+#
+#  Project:        SBPT
+#  File:           SisreFunctions.py
+#
+#   Copyright 2020 GNSS Academy
+#
+# Internal dependencies:
+#   COMMON
+#   SatStatistics
+########################################################################
+
+
+# Import External and Internal functions and Libraries
+#----------------------------------------------------------------------
+from COMMON import GnssConstants
+from COMMON.Dates import convertYearMonthDay2GpsTime, convertYearMonthDay2Doy
+from COMMON.Ephemeris import readNavFile, selectEphemerides, computeBroadcastOrbits, NavIdx
+from COMMON.Ephemeris import readSp3File, interpolateSp3Orbits, interpolateSp3Clocks, readAntexOffsets
+from COMMON.Files import writeSchemaFile
+import SatStatistics as stat
+import numpy as np
+
+# Define SISRE INFO file Columns
+SisreInfoIdx = stat.SisreInfoIdx
+
+# SISRE weights of the radial and of the along/cross-track errors (GPS)
+SISRE_WR = 0.98
+SISRE_WAC = 1.0 / 7.0
+
+# Number of angles of the worst user location search
+WUL_ANGLES = 32
+
+# Time step of the central difference of the satellite velocities [s]
+VELOCITY_STEP = 1.0
+
+# ------------------------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def computeRacFrame(Positions, Times, Sp3):
+    """
+    Compute the unit vectors of the Radial, Along-track and Cross-track frame
+    of the precise orbits, the inertial velocity being derived from the
+    central difference of the interpolated positions.
+
+    Returns:
+    - Radial, Along, Cross: Unit vectors (NTimes x NSats x 3).
+    """
+    # The difference is one-sided at the limits of the SP3 time span
+    TimesBefore = np.maximum(Times - VELOCITY_STEP, Sp3["Times"][0])
+    TimesAfter = np.minimum(Times + VELOCITY_STEP, Sp3["Times"][-1])
+    Before = interpolateSp3Orbits(Sp3, TimesBefore)
+    After = interpolateSp3Orbits(Sp3, TimesAfter)
+    Velocities = (After - Before) / (TimesAfter - TimesBefore)[:, None, None]
+
+    # Add the Earth rotation to get the inertial velocity (w x r)
+    Velocities[..., 0] -= GnssConstants.OMEGA_EARTH * Positions[..., 1]
+    Velocities[..., 1] += GnssConstants.OMEGA_EARTH * Positions[..., 0]
+
+    Radial = Positions / np.linalg.norm(Positions, axis=-1, keepdims=True)
+    Cross = np.cross(Positions, Velocities)
+    Cross /= np.linalg.norm(Cross, axis=-1, keepdims=True)
+    Along = np.cross(Cross, Radial)
+
+    return Radial, Along, Cross
+
+def computeWulSisre(Radial, Clock, AlongCross, Distance):
+    """
+    Compute the SISRE at the Worst User Location, maximising the projection of
+    the orbit and clock errors over the lines of sight within the satellite
+    footprint (angle from the radial direction up to asin(Re/|r|)).
+    """
+    MaxAngles = np.arcsin(GnssConstants.EARTH_RADIUS / Distance)
+    Angles = MaxAngles[:, None] * np.linspace(0.0, 1.0, WUL_ANGLES)
+
+    Projections = np.abs(np.cos(Angles) * Radial[:, None] - Clock[:, None]) + \
+        np.sin(Angles) * AlongCross[:, None]
+
+    return np.max(Projections, axis=1)
+
+def computeRms(Values, Valid):
+    NSamps = np.sum(Valid, axis=0)
+    Sum2 = np.sum(np.where(Valid, Values, 0.0)**2, axis=0)
+
+    return np.sqrt(Sum2 / np.maximum(NSamps, 1))
+
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def computeSisre(NavFile, Sp3File, Year, Month, Day, TStep, SisreInfoFile, SisreStatsFile, AntexFile=None):
+    """
+    Compute the Signal-In-Space Range Error of the GPS broadcast orbits and
+    clocks against the IGS precise orbits and clocks, for all the satellites
+    and epochs of the day at once.
+
+    The orbit and clock differences are projected in the Radial, Along-track
+    and Cross-track frame, and the common clock offset of each epoch (GPS time
+    against IGS time) is removed. The broadcast positions refer to the antenna
+    phase centre and the precise ones to the centre of mass: the precise
+    positions are moved to the phase centre with the Z offset of the ANTEX
+    file, or left uncorrected (PCO nan) without it, in which case the offset
+    (about 1 to 1.6 m on IIR-A and IIF satellites) remains in the radial
+    errors. The X/Y offsets, which need the yaw attitude, are not applied.
+    The precise clocks are interpolated linearly from the SP3 epochs.
+
+    Parameters:
+    - NavFile: RINEX 2 GPS navigation file.
+    - Sp3File: SP3 precise orbit and clock file.
+    - Year, Month, Day: Date of the analysis.
+    - TStep: Time step of the analysis [s].
+    - SisreInfoFile: Output file with the SISRE of each satellite and epoch.
+    - SisreStatsFile: Output file with the SISRE Statistics per satellite
+      (SisreStatsIdx format).
+    - AntexFile: ANTEX file with the satellite antenna offsets (None to
+      leave the precise orbits at the centre of mass).
+    """
+    # Epochs of the day
+    Sods = np.arange(0, GnssConstants.S_IN_D, TStep)
+    Times = convertYearMonthDay2GpsTime(Year, Month, Day) + Sods
+
+    # Read the broadcast and precise products
+    Nav = readNavFile(NavFile)
+    Sp3 = readSp3File(Sp3File)
+    Prns = Sp3["Prns"]
+    NTimes, NSats = len(Times), len(Prns)
+
+    # Evaluate the precise orbits and clocks
+    PrecisePos = interpolateSp3Orbits(Sp3, Times)
+    PreciseClk = interpolateSp3Clocks(Sp3, Times)
+    Radial, Along, Cross = computeRacFrame(PrecisePos, Times, Sp3)
+
+    # Antenna phase centre offsets along the body Z axis, pointing to the Earth
+    Offsets = readAntexOffsets(AntexFile, Times[len(Times) // 2]) if AntexFile else {}
+    Pco = np.array([Offsets.get(Prn, np.nan) for Prn in Prns])
+    PrecisePco = PrecisePos - np.nan_to_num(Pco)[:, None] * Radial
+
+    # Select the broadcast ephemerides and evaluate them for all the samples
+    SampleTimes = np.repeat(Times, NSats)
+    Rows = selectEphemerides(Nav, np.tile(Prns, NTimes), SampleTimes).reshape(NTimes, NSats)
+    Valid = (Rows >= 0) & np.all(np.isfinite(PrecisePos), axis=-1) & np.isfinite(PreciseClk)
+
+    BroadcastPos = np.full_like(PrecisePos, np.nan)
+    BroadcastClk = np.full_like(PreciseClk, np.nan)
+    BroadcastPos[Valid], BroadcastClk[Valid] = \
+        computeBroadcastOrbits(Nav, Rows[Valid], SampleTimes.reshape(NTimes, NSats)[Valid])
+
+    # Orbit errors in Radial, Along-track and Cross-track
+    OrbitErrors = BroadcastPos - PrecisePco
+    dR = np.sum(OrbitErrors * Radial, axis=-1)
+    dA = np.sum(OrbitErrors * Along, axis=-1)
+    dC = np.sum(OrbitErrors * Cross, axis=-1)
+
+    # Clock errors, removing the offset of the time references at each epoch
+    dClk = (BroadcastClk - PreciseClk) * GnssConstants.SPEED_OF_LIGHT
+    ClockOffsets = np.zeros(NTimes)
+    EpochsValid = np.any(Valid, axis=1)
+    ClockOffsets[EpochsValid] = np.nanmedian(np.where(Valid, dClk - dR, np.nan)[EpochsValid], axis=1)
+    dClk -= ClockOffsets[:, None]
+
+    # Global, orbit-only and worst user location SISRE
+    AlongCross2 = dA**2 + dC**2
+    SisreOrb = np.sqrt((SISRE_WR * dR)**2 + SISRE_WAC**2 * AlongCross2)
+    Sisre = np.sqrt((SISRE_WR * dR - dClk)**2 + SISRE_WAC**2 * AlongCross2)
+    SisreWul = np.full_like(Sisre, np.nan)
+    SisreWul[Valid] = computeWulSisre(dR[Valid], dClk[Valid], np.sqrt(AlongCross2[Valid]),
+        np.linalg.norm(PrecisePos[Valid], axis=-1))
+
+    # Write SISRE INFO file
+    # ----------------------------------------------------------
+    EpochRows, SatColumns = np.nonzero(Valid)
+    Doy = convertYearMonthDay2Doy(Year, Month, Day)
+    Labels = np.array(["G%02d" % Prn for Prn in Prns])
+    Iode = Nav[Rows[Valid], NavIdx["IODE"]]
+    SatPos = PrecisePos[Valid] / 1000.0
+    writeSchemaFile(SisreInfoFile, stat.SisreInfoSchema, {
+        "SoD": Sods[EpochRows], "DOY": Doy, "PRN": Labels[SatColumns],
+        "SAT-X": SatPos[:, 0], "SAT-Y": SatPos[:, 1], "SAT-Z": SatPos[:, 2],
+        "PCO": Pco[SatColumns],
+        "SREr": dR[Valid], "SREa": dA[Valid], "SREc": dC[Valid], "SREb": dClk[Valid],
+        "SISRE-ORB": SisreOrb[Valid], "SISRE": Sisre[Valid], "SISRE-WUL": SisreWul[Valid],
+        "IODE": Iode})
+
+    # Write SISRE Statistics file
+    # ----------------------------------------------------------
+    NSamps = np.sum(Valid, axis=0)
+    Statistics = {
+        "PRN": np.array(["G%02d" % Prn for Prn in Prns]),
+        "MON": NSamps * 100.0 / NTimes,
+        "NSAMPS": NSamps,
+        "SREaRMS": computeRms(dA, Valid),
+        "SREcRMS": computeRms(dC, Valid),
+        "SRErRMS": computeRms(dR, Valid),
+        "SREbRMS": computeRms(dClk, Valid),
+        "SISRE-ORBRMS": computeRms(SisreOrb, Valid),
+        "SISRERMS": computeRms(Sisre, Valid),
+        "SREWRMS": computeRms(SisreWul, Valid),
+        "SREWMAX": np.max(np.where(Valid, SisreWul, 0.0), axis=0),
+    }
+
+    # Remove the satellites without samples
+    writeSchemaFile(SisreStatsFile, stat.SisreStatsSchema,
+        dict((Field, Values[NSamps > 0]) for Field, Values in Statistics.items()))
@@ -25,17 +25,47 @@ import numpy as np
 import COMMON.Plots as plt
 from COMMON import GnssConstants
 from COMMON.Coordinates import xyz2llh
-from COMMON.Files import readDataFile
+from COMMON.Files import readSchemaFile
+from COMMON.Indexing import buildGroupIndex, prnLabel2Number
+from COMMON.SharedData import attachData, releaseData
 import SatFunctions as sft
-from SatStatistics import SatStatsIdx, SatInfoIdx, SatStatsTimeIdx, RimsIdx
+from SatStatistics import SatStatsIdx, SatInfoIdx, SatStatsTimeIdx, SatMonWinIdx, RimsIdx, SatGridIdx
+from SatStatistics import SatInfoSchema, RimsSchema, SatGridSchema
 
 # Define relative path
 RelativePath = '/OUT/SAT/FIGURES/'
+
+# SAT INFO columns of the time figures
+SatInfoTimeColumns = ["SoD", "PRN", "MONSTAT", "NRIMS", "SREW", "SFLT-W", "RDOP", "SRESTAT",
+    "SAT-X", "SAT-Y", "SAT-Z"]
+
+# Groups of SAT INFO time figures, which can be rendered by separate workers
+SatInfoTimeFigures = ["MON3", "SREW", "SFLT", "SI"]
+
+# Names of the figures generated by each figure stage of the SAT module
+StageFigures = {
+    "FIG-RIMS": ["RIMS_MAP"],
+    "FIG-STAT": ["SAT_MON_PERCENTAGE", "SAT_NRIMS", "SAT_RMS_SRE_ACR", "SAT_RMS_SRE_B",
+        "SAT_MAX_RMS_SREW", "SAT_MAX_MIN_SigmaFLT", "SAT_MAX_SIW", "SAT_MAX_FC_LTCb",
+        "SAT_MAX_LTCxyz", "SAT_NMIs", "SAT_NTRANS"],
+    "FIG-TIME": ["SAT_MON1", "SAT_MON2", "SAT_ENT_GPS_OFFSET", "SAT_MON3", "SAT_SREW_PRN",
+        "SAT_SREW_RIMS", "SAT_SFLT_IDOP", "SAT_SFLT_NRIMS", "SAT_SI_PRN"],
+    "FIG-GRID": ["SAT_GRID_AVAIL_MAP", "SAT_GRID_MAXVPL_MAP", "SAT_GRID_MAXVSI_MAP",
+        "SAT_GRID_NLOSS_MAP"],
+}
 # ------------------------------------------------------------------------------------
 # EXTERNAL FUNCTIONS 
 # ------------------------------------------------------------------------------------
+def getFigurePaths(Stage, yearDayText):
+    """
+    Get the paths of the figures generated by a figure stage (see StageFigures),
+    the outputs of the stage in the build graph.
+    """
+    return [sys.argv[1] + f'{RelativePath}{Name}_{yearDayText}_G123_50s.png'
+        for Name in StageFigures[Stage]]
+
 def plotRims(RimsFilePath, yearDayText):
-    RimsData = readDataFile(RimsFilePath, [RimsIdx["SNA"],RimsIdx["LAT"],RimsIdx["LON"]], 15)
+    RimsData = readSchemaFile(RimsFilePath, RimsSchema, ["SNA", "LAT", "LON"], 15)
 
     # Display the network of RIMS configured in the Scenario
     plotRimsPositions(RimsData, yearDayText)
@@ -87,49 +117,113 @@ def plotSatStats(satStatsData, yearDayText):
     # Plot Number of Transitions
     plotNTRANS(satStatsData, yearDayText)
     
-def plotSatStatsTime(SatStatsTimeData, SatInfoFilePath, yearDayText):
+def plotSatStatsTime(SatStatsTimeData, SatMonWinData, SatInfoFilePath, yearDayText):
     """
     Plot Satellite Statistics against time.
 
     Parameters:
         SatStatsTimeData (DataFrame): DataFrame containing satellite information data.
+        SatMonWinData (DataFrame): DataFrame containing the satellites monitoring windows.
         SatInfoFilePath (str): File Path
         yearDayText (str): Year day text for including in plot titles.
 
     Returns:
         None
     """
-    SatInfoData = readDataFile(SatInfoFilePath,[
-        SatInfoIdx["SoD"], SatInfoIdx["PRN"], SatInfoIdx["MONSTAT"],SatInfoIdx["NRIMS"],
-        SatInfoIdx["SREW"], SatInfoIdx["SFLT-W"], SatInfoIdx["RDOP"], SatInfoIdx["SRESTAT"],
-        SatInfoIdx["SAT-X"],SatInfoIdx["SAT-Y"],SatInfoIdx["SAT-Z"]])        
-    
+    SatInfoData = readSatInfoTimeData(SatInfoFilePath)
+
+    # Plot the monitoring and ENT-GPS figures
+    plotSatMonTime(SatStatsTimeData, SatMonWinData, yearDayText)
+
+    # Plot the SAT INFO figures
+    plotSatInfoTime(SatInfoData, yearDayText)
+
+def readSatInfoTimeData(SatInfoFilePath):
+    """
+    Read the SAT INFO columns of the time figures.
+    """
+    return readSchemaFile(SatInfoFilePath, SatInfoSchema, SatInfoTimeColumns)
+
+def plotSatMonTime(SatStatsTimeData, SatMonWinData, yearDayText):
+    """
+    Plot the satellites monitoring and the ENT-GPS offset against time.
+    """
     # Plot the instantaneous number of satellites monitored as a function of the hour of the day 
     plotMON1(SatStatsTimeData, yearDayText)    
 
     # Plot the satellites monitoring windows as a function of the hour of the day   
-    plotMON2(SatInfoData, yearDayText)
-    
+    plotMON2(SatMonWinData, yearDayText)
+
+    #Plot the ENT-GPS Offset along the day
+    plotEntGpsOffset(SatStatsTimeData, yearDayText)
+
+def plotSatInfoTime(SatInfoData, yearDayText, Figures = SatInfoTimeFigures):
+    """
+    Plot the SAT INFO figures against time.
+
+    Parameters:
+        SatInfoData (DataFrame): SAT INFO columns of the time figures (see readSatInfoTimeData).
+        yearDayText (str): Year day text for including in plot titles.
+        Figures (list): Groups of figures to plot (see SatInfoTimeFigures).
+    """
+    # Build the PRN index once, shared by all the figures
+    SatIndex = buildGroupIndex(SatInfoData[SatInfoIdx["PRN"]].to_numpy(), prnLabel2Number)
+
     # Plot the satellites ground tracks on a map during monitoring periods    
-    plotMON3(SatInfoData, yearDayText)
+    if "MON3" in Figures:
+        plotMON3(SatInfoData, yearDayText)
 
-    # Plot the SREW for all satellites as a function of the hour of the day. PRN in the color bar.
-    plotSREWvsPRN(SatInfoData, yearDayText)
+    if "SREW" in Figures:
+        # Plot the SREW for all satellites as a function of the hour of the day. PRN in the color bar.
+        plotSREWvsPRN(SatInfoData, SatIndex, yearDayText)
 
-    # Plot the SREW for all satellites as a function of the hour of the day. RIMS in the color bar.
-    plotSREWvsRIMS(SatInfoData, yearDayText)
+        # Plot the SREW for all satellites as a function of the hour of the day. RIMS in the color bar.
+        plotSREWvsRIMS(SatInfoData, yearDayText)
 
-    # Plot the SigmaFLT for all satellites as a function of the hour of the day. Inverse Radial DOP in the color bar
-    plotSigmaFLTvsIDOP(SatInfoData, yearDayText)
+    if "SFLT" in Figures:
+        # Plot the SigmaFLT for all satellites as a function of the hour of the day. Inverse Radial DOP in the color bar
+        plotSigmaFLTvsIDOP(SatInfoData, yearDayText)
 
-    # Plot the SigmaFLT for all satellites as a function of the hour of the day. Number of RIMS in the color bar
-    plotSigmaFLTvsNRIMS(SatInfoData, yearDayText)
+        # Plot the SigmaFLT for all satellites as a function of the hour of the day. Number of RIMS in the color bar
+        plotSigmaFLTvsNRIMS(SatInfoData, yearDayText)
 
     # Plot the SI for all satellites as a function of the hour of the day. PRN in the color bar.
-    plotSIvsPRN(SatInfoData, yearDayText)
+    if "SI" in Figures:
+        plotSIvsPRN(SatInfoData, SatIndex, yearDayText)
 
-    #Plot the ENT-GPS Offset along the day
-    plotEntGpsOffset(SatStatsTimeData, yearDayText)
+def plotSatInfoTimeShared(SatInfoDescriptor, yearDayText, Figures = SatInfoTimeFigures):
+    """
+    Plot the SAT INFO figures against time from the SAT INFO columns placed in
+    shared memory by the main process (see COMMON.SharedData), so that several
+    workers plot the same data without copying or reading it again.
+    """
+    SatInfoData, Block = attachData(SatInfoDescriptor)
+    plotSatInfoTime(SatInfoData, yearDayText, Figures)
+
+    del SatInfoData
+    releaseData(Block)
+
+def plotServiceAreaMaps(SatGridFile, yearDayText):
+    """
+    Plot the availability, integrity and continuity maps of the service area grid.
+
+    Parameters:
+        SatGridFile (str): Service area grid statistics file.
+        yearDayText (str): Year day text for including in plot titles.
+    """
+    SatGridData = readSchemaFile(SatGridFile, SatGridSchema)
+
+    # Plot the APV-I availability
+    plotServiceAreaMap(SatGridData, "AVAIL", "APV-I Availability [%]", "AVAIL", yearDayText)
+
+    # Plot the Maximum VPL
+    plotServiceAreaMap(SatGridData, "MAXVPL", "Maximum VPL [m]", "MAXVPL", yearDayText)
+
+    # Plot the Maximum Vertical Safety Index
+    plotServiceAreaMap(SatGridData, "MAXVSI", "Maximum VPE/VPL", "MAXVSI", yearDayText)
+
+    # Plot the Number of losses of availability
+    plotServiceAreaMap(SatGridData, "NLOSS", "Number of APV-I Availability Losses", "NLOSS", yearDayText)
 
 # ------------------------------------------------------------------------------------
 # INTERNAL FUNCTIONS 
@@ -362,29 +456,30 @@ def plotMON1(SatStatsTimeData, yearDayText):
 
 
 # Plot the satellites monitoring windows as a function of the hour of the day
-def plotMON2(SatInfoData, yearDayText):
+def plotMON2(SatMonWinData, yearDayText):
     filePath = sys.argv[1] + f'{RelativePath}SAT_MON2_{yearDayText}_G123_50s.png' 
     title = f"Satellites Monitoring EGNOS SIS {yearDayText}"    
     print( f'Ploting: {title}\n -> {filePath}')
 
-    # Extracting Target columns    
-    FilterCond = SatInfoData[SatInfoIdx["MONSTAT"]] == 1
-    xData = SatInfoData[SatInfoIdx["SoD"]][FilterCond] / GnssConstants.S_IN_H
-    yData = [int(s[1:]) for s in SatInfoData[SatInfoIdx["PRN"]][FilterCond]]    
-    zData = SatInfoData[SatInfoIdx["NRIMS"]][FilterCond]
+    # Extracting Target columns: one segment per monitoring window
+    xData = SatMonWinData[SatMonWinIdx["START"]] / GnssConstants.S_IN_H
+    xEndData = (SatMonWinData[SatMonWinIdx["START"]] + SatMonWinData[SatMonWinIdx["DURATION"]]) / GnssConstants.S_IN_H
+    yData = np.array([prnLabel2Number(Prn) for Prn in SatMonWinData[SatMonWinIdx["PRN"]]])
+    zData = SatMonWinData[SatMonWinIdx["RIMS-MIN"]]
 
     PlotConf = plt.createPlotConfig2DLinesColorBar(
         filePath, title, 
-        xData, yData, zData,                            # xData, yData, zData 
-        "Hour of Day", "GPS-PRN", "Number of RIMS",     # xLabel, yLabel, zLabel 
-        '|' , False)                                    # marker, applyLimits
+        xData, yData, zData,                                    # xData, yData, zData 
+        "Hour of Day", "GPS-PRN", "Minimum Number of RIMS",     # xLabel, yLabel, zLabel 
+        '|' , False)                                            # marker, applyLimits
     
-    PlotConf["LineWidth"] = 2
+    PlotConf["LineWidth"] = 6
+    PlotConf["xEndData"] = {"GPS-PRN": xEndData}
     PlotConf["xTicks"] = range(0, 25)
     PlotConf["xLim"] = [0, 24]
     PlotConf["yTicks"] = range(0,33)
     PlotConf["yLim"] = [0, 32]    
-    
+
     plt.generatePlot(PlotConf)
 
 # Plot the satellites ground tracks on a map during monitoring periods
@@ -435,19 +530,21 @@ def plotMON3(SatInfoData, yearDayText):
     PlotConf["yTicks"] = range(PlotConf["LatMin"],PlotConf["LatMax"]+1,10)
     PlotConf["yLim"] = [PlotConf["LatMin"], PlotConf["LatMax"]]
     
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
     plt.generatePlot(PlotConf)
 
 # Plot the SREW for all satellites as a function of the hour of the day. PRN in the color bar.
-def plotSREWvsPRN(SatInfoData, yearDayText):
+def plotSREWvsPRN(SatInfoData, SatIndex, yearDayText):
     filePath = sys.argv[1] + f'{RelativePath}SAT_SREW_PRN_{yearDayText}_G123_50s.png' 
     title = f"Satellites SREW vs PRN EGNOS SIS {yearDayText}"    
     print( f'Ploting: {title}\n -> {filePath}')
 
     # Extracting Target columns    
     HOD = SatInfoData[SatInfoIdx["SoD"]] / GnssConstants.S_IN_H  # Converting to hours
-    PRN = SatInfoData[SatInfoIdx["PRN"]]  
     SREW = SatInfoData[SatInfoIdx["SREW"]]    
-    PRN_NUM = [int(s[1:]) for s in PRN]    
+    PRN_NUM = SatIndex["RowValues"]
 
     PlotConf = plt.createPlotConfig2DLinesColorBar(
         filePath, title, 
@@ -459,6 +556,9 @@ def plotSREWvsPRN(SatInfoData, yearDayText):
     PlotConf["xLim"] = [0, 24]
     PlotConf["ColorBarTicks"] = range(max(PRN_NUM))
     
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
     plt.generatePlot(PlotConf)
 
 # Plot the SREW for all satellites as a function of the hour of the day. RIMS in the color bar.
@@ -481,6 +581,9 @@ def plotSREWvsRIMS(SatInfoData, yearDayText):
     PlotConf["xTicks"] = range(0, 25)
     PlotConf["xLim"] = [0, 24]    
     
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
     plt.generatePlot(PlotConf)
 
 
@@ -507,6 +610,9 @@ def plotSigmaFLTvsIDOP(SatInfoData, yearDayText):
     PlotConf["ColorBarMin"] = 0
     PlotConf["ColorBarMax"] = 100
     
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
     plt.generatePlot(PlotConf)
 
 # Plot the SigmaFLT for all satellites as a function of the hour of the day
@@ -530,35 +636,28 @@ def plotSigmaFLTvsNRIMS(SatInfoData, yearDayText):
     PlotConf["xTicks"] = range(0, 25)
     PlotConf["xLim"] = [0, 24]
     
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
     plt.generatePlot(PlotConf)
 
 # Plot the SI for all satellites as a function of the hour of the day. PRN in the color bar.
-def plotSIvsPRN(SatInfoData, yearDayText):
+def plotSIvsPRN(SatInfoData, SatIndex, yearDayText):
     filePath = sys.argv[1] + f'{RelativePath}SAT_SI_PRN_{yearDayText}_G123_50s.png' 
     title = f"Satellites SREW/5.33S igmaFLT at WUL EGNOS SIS {yearDayText}"    
     print( f'Ploting: {title}\n -> {filePath}')
 
     # Extracting Target columns    
     HOD = SatInfoData[SatInfoIdx["SoD"]] / GnssConstants.S_IN_H  # Converting to hours
-    PRN = SatInfoData[SatInfoIdx["PRN"]]  
-    SREW = SatInfoData[SatInfoIdx["SREW"]]    
-    SFLT = SatInfoData[SatInfoIdx["SFLT-W"]]    
-    SRESTAT = SatInfoData[SatInfoIdx["SRESTAT"]]    
-
-    SI = np.array([])
-    HOD_FILT = np.array([])
-    PRN_FILT = np.array([])
-
-    for i in range (len(SREW)):
-        # Reject if satellite is not MONITORED:
-        mon  = SRESTAT[i]
-        if(mon != 1):
-            continue
-        HOD_FILT = np.append(HOD_FILT, HOD[i])
-        PRN_FILT = np.append(PRN_FILT, PRN[i])        
-        SI = np.append(SI, SREW[i] / (SFLT[i]*5.33))
+    SREW = SatInfoData[SatInfoIdx["SREW"]].to_numpy()
+    SFLT = SatInfoData[SatInfoIdx["SFLT-W"]].to_numpy()
+    SRESTAT = SatInfoData[SatInfoIdx["SRESTAT"]].to_numpy()
 
-    PRN_NUM = [int(s[1:]) for s in PRN_FILT]
+    # Reject if satellite is not MONITORED
+    FilterCond = SRESTAT == 1
+    HOD_FILT = HOD.to_numpy()[FilterCond]
+    SI = SREW[FilterCond] / (SFLT[FilterCond]*5.33)
+    PRN_NUM = SatIndex["RowValues"][FilterCond]
 
     PlotConf = plt.createPlotConfig2DLinesColorBar(
         filePath, title, 
@@ -570,6 +669,9 @@ def plotSIvsPRN(SatInfoData, yearDayText):
     PlotConf["xLim"] = [0, 24]      
     PlotConf["ColorBarTicks"] = range(max(PRN_NUM))
     
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
     plt.generatePlot(PlotConf)
 
 def plotEntGpsOffset(SatStatsTimeData, yearDayText):
@@ -590,4 +692,28 @@ def plotEntGpsOffset(SatStatsTimeData, yearDayText):
     
     PlotConf["xTicks"] = range(0, 25)
     PlotConf["xLim"] = [0, 24]
-    plt.generatePlot(PlotConf)
\ No newline at end of file
+    plt.generatePlot(PlotConf)
+
+# Plot a column of the service area grid statistics on a map
+def plotServiceAreaMap(SatGridData, Column, Label, FileTag, yearDayText):
+    filePath = sys.argv[1] + f'{RelativePath}SAT_GRID_{FileTag}_MAP_{yearDayText}_G123_50s.png'
+    title = f"Service Area: {Label} EGNOS SIS {yearDayText}"
+    print( f'Ploting: {title}\n -> {filePath}')
+
+    # Extracting Target columns
+    LON = SatGridData[SatGridIdx["LON"]]
+    LAT = SatGridData[SatGridIdx["LAT"]]
+    VALUES = SatGridData[SatGridIdx[Column]]
+
+    yLabel = "Latitude [deg]"
+    PlotConf = plt.createPlotConfig2DLinesColorBar(
+        filePath, title,
+        LON, LAT, VALUES,                           # xData, yData, zData
+        "Longitude [deg]", yLabel, Label,           # xLabel, yLabel, zLabel
+        's', False)                                 # Markers, applyLimits
+
+    plt.addMapToPlotConf(PlotConf,
+        int(min(LON)) - 5, int(max(LON)) + 5, 10,   # LonMin, LonMax, LonStep
+        int(min(LAT)) - 5, int(max(LAT)) + 5, 10)   # LatMin, LatMax, LatStep
+
+    plt.generatePlot(PlotConf)
@@ -0,0 +1,82 @@
+import os, sys
+
+# Add path to find the COMMON modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from COMMON.BuildGraph import loadBuildGraph, isStageStale, recordStage
+
+@pytest.fixture
+def files(tmp_path):
+    """
+    Manifest, input and output files of a stage.
+    """
+    Input = tmp_path / "SAT_INFO_Y19D014_G123_50s.dat"
+    Input.write_text("SoD PRN\n0 G01\n")
+    Output = tmp_path / "SAT_STAT_Y19D014_G123_50s.dat"
+
+    return str(tmp_path / "manifest.json"), str(Input), str(Output)
+
+def buildStage(Build, Stage, Input, Output, Conf=None, ConfKeys=()):
+    """
+    Build a stage if it is stale, returning whether it was built.
+    """
+    if not isStageStale(Build, Stage, [Input], [Output], Conf, ConfKeys):
+        return False
+    with open(Output, 'w') as f:
+        f.write(open(Input).read())
+    recordStage(Build, Stage)
+
+    return True
+
+def test_stage_built_once(files):
+    Manifest, Input, Output = files
+    assert buildStage(loadBuildGraph(Manifest), "STAT", Input, Output)
+
+    # Up to date in the same run and in the next run (manifest reloaded)
+    Build = loadBuildGraph(Manifest)
+    assert not buildStage(Build, "STAT", Input, Output)
+    assert not buildStage(loadBuildGraph(Manifest), "STAT", Input, Output)
+
+def test_changed_input_makes_stage_stale(files):
+    Manifest, Input, Output = files
+    buildStage(loadBuildGraph(Manifest), "STAT", Input, Output)
+
+    with open(Input, 'a') as f:
+        f.write("50 G01\n")
+    assert buildStage(loadBuildGraph(Manifest), "STAT", Input, Output)
+
+def test_missing_output_makes_stage_stale(files):
+    Manifest, Input, Output = files
+    buildStage(loadBuildGraph(Manifest), "STAT", Input, Output)
+
+    os.remove(Output)
+    assert buildStage(loadBuildGraph(Manifest), "STAT", Input, Output)
+    assert os.path.isfile(Output)
+
+def test_conf_keys_make_stage_stale(files):
+    Manifest, Input, Output = files
+    Conf = {"STATS_TIME_BIN": "3600", "OTHER": "1"}
+    buildStage(loadBuildGraph(Manifest), "STAT", Input, Output, Conf, ["STATS_TIME_BIN"])
+
+    # Only the keys of the stage are checked
+    Conf["OTHER"] = "0"
+    assert not buildStage(loadBuildGraph(Manifest), "STAT", Input, Output, Conf, ["STATS_TIME_BIN"])
+    Conf["STATS_TIME_BIN"] = "900"
+    assert buildStage(loadBuildGraph(Manifest), "STAT", Input, Output, Conf, ["STATS_TIME_BIN"])
+
+def test_unrecorded_stage_stays_stale(files):
+    # A stage checked but not built (e.g. failed) is rebuilt in the next run
+    Manifest, Input, Output = files
+    buildStage(loadBuildGraph(Manifest), "STAT", Input, Output)
+    with open(Input, 'a') as f:
+        f.write("50 G01\n")
+    assert isStageStale(loadBuildGraph(Manifest), "STAT", [Input], [Output])
+    assert isStageStale(loadBuildGraph(Manifest), "STAT", [Input], [Output])
+
+def test_missing_input_and_force(files):
+    Manifest, Input, Output = files
+    buildStage(loadBuildGraph(Manifest), "STAT", Input, Output)
+
+    assert isStageStale(loadBuildGraph(Manifest), "STAT", [Input + ".missing"], [Output])
+    assert isStageStale(loadBuildGraph(Manifest, Force=True), "STAT", [Input], [Output])
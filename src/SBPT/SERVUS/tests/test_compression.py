@@ -0,0 +1,86 @@
+import os, sys
+import bz2, gzip, lzma, shutil, subprocess
+
+# Add path to find the COMMON modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from pandas import read_csv
+from COMMON import Compression
+from COMMON.Compression import openDataFile, findDataFile, detectCompression, wrapDataReader
+
+# Lines of a small INFO-like file
+DATA = "SoD PRN VALUE\n" + "".join("%6d %s %10.4f\n" % (Sod, Prn, Sod * 0.01 + Code)
+    for Sod in range(0, 3000, 50) for Code, Prn in enumerate(["G01", "G05", "G12"]))
+
+def compressFile(Path, Codec):
+    """
+    Write the data into a compressed file, returning its path (None if the
+    compression is not available).
+    """
+    Data = DATA.encode()
+    if Codec == "gzip":
+        Path += ".gz"
+        with gzip.open(Path, 'wb') as f: f.write(Data)
+    elif Codec == "bzip2":
+        Path += ".bz2"
+        with bz2.open(Path, 'wb') as f: f.write(Data)
+    elif Codec == "xz":
+        Path += ".xz"
+        with lzma.open(Path, 'wb') as f: f.write(Data)
+    else:
+        if shutil.which("zstd") is None:
+            return None
+        Path += ".zst"
+        subprocess.run(["zstd", "-q", "-o", Path], input=Data, check=True)
+
+    return Path
+
+@pytest.fixture(params=["external", "python"])
+def decoder(request, monkeypatch):
+    """
+    Read with the external decoders, and with the Python fallback.
+    """
+    if request.param == "python":
+        monkeypatch.setattr(Compression, "findDecoder", lambda Codec: None)
+
+    return request.param
+
+@pytest.mark.parametrize("Codec", ["gzip", "bzip2", "xz", "zstd"])
+def test_round_trip(tmp_path, decoder, Codec):
+    Path = compressFile(str(tmp_path / "SAT_INFO_Y19D014_G123_50s.dat"), Codec)
+    if Path is None:
+        pytest.skip("zstd not installed")
+    if Codec == "zstd" and decoder == "python":
+        pytest.importorskip("zstandard")
+
+    assert detectCompression(Path) == Codec
+    # The uncompressed path is found through the suffix of the compressed file
+    assert findDataFile(Path[:Path.rindex(".")]) == Path
+
+    with openDataFile(Path[:Path.rindex(".")]) as f:
+        assert f.read() == DATA
+    with openDataFile(Path, 'rb') as f:
+        assert f.read() == DATA.encode()
+
+def test_partial_read_stops_decoder(tmp_path, decoder):
+    Path = compressFile(str(tmp_path / "SAT_INFO_Y19D014_G123_50s.dat"), "xz")
+    with openDataFile(Path) as f:
+        assert f.readline() == DATA.splitlines(True)[0]
+
+def test_wrapped_reader_matches_plain_file(tmp_path, decoder):
+    Plain = tmp_path / "plain.dat"
+    Plain.write_text(DATA)
+    Path = compressFile(str(tmp_path / "packed.dat"), "gzip")
+
+    readFile = wrapDataReader(read_csv)
+    Expected = read_csv(Plain, sep=r"\s+")
+    assert readFile(Path, sep=r"\s+").equals(Expected)
+
+def test_plain_file_is_not_decoded(tmp_path):
+    Plain = tmp_path / "plain.dat"
+    Plain.write_text(DATA)
+
+    assert detectCompression(str(Plain)) is None
+    with openDataFile(str(Plain)) as f:
+        assert f.read() == DATA
@@ -0,0 +1,94 @@
+import os, sys
+
+# Add path to find the COMMON modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from COMMON.Estimation import initializeEstimation, predictEstimation, updateEstimation
+from COMMON.Estimation import getEstimationState, monitorResiduals, buildPolynomialDesign
+
+def solveBatch(H, Y, Sigmas):
+    """
+    Batch WLSQ solution from the normal equations: (H' W H) X = H' W Y.
+    """
+    W = 1.0 / Sigmas**2
+    N = H.T @ (W[:, None] * H)
+    X = np.linalg.solve(N, H.T @ (W * Y))
+    Residuals = Y - H @ X
+
+    return X, np.linalg.inv(N), np.sum(W * Residuals**2)
+
+def buildParabola(NObs=1000, Seed=0):
+    Generator = np.random.default_rng(Seed)
+    Times = np.linspace(0.0, 100.0, NObs)
+    H = buildPolynomialDesign(Times, 2)
+    Sigmas = Generator.uniform(0.5, 2.0, NObs)
+    Y = H @ np.array([3.0, -0.2, 0.01]) + Generator.normal(0.0, Sigmas)
+
+    return H, Y, Sigmas
+
+@pytest.mark.parametrize("P0", [1e6, 1e12, None])
+def test_update_matches_batch_wlsq(P0):
+    H, Y, Sigmas = buildParabola()
+    Estimation = initializeEstimation(np.zeros(3), None if P0 is None else np.eye(3) * P0)
+    updateEstimation(Estimation, H, Y, Sigmas)
+
+    X, P, Chi2 = solveBatch(H, Y, Sigmas)
+    EstimatedX, EstimatedP = getEstimationState(Estimation)
+    # A finite a priori adds its (tiny) information to the batch solution
+    Tolerance = 1e-6 if P0 is None else 1e-5
+    np.testing.assert_allclose(EstimatedX, X, rtol=Tolerance, atol=Tolerance * 1e-2)
+    np.testing.assert_allclose(EstimatedP, P, rtol=Tolerance, atol=1e-12)
+    np.testing.assert_allclose(Estimation["Chi2"], Chi2, rtol=Tolerance)
+    assert Estimation["NObs"] == len(Y)
+
+def test_streamed_updates_match_batch_wlsq():
+    H, Y, Sigmas = buildParabola()
+    Estimation = initializeEstimation(np.zeros(3), None)
+    for First in range(0, len(Y), 137):
+        updateEstimation(Estimation, H[First:First + 137], Y[First:First + 137], Sigmas[First:First + 137])
+
+    X, _, Chi2 = solveBatch(H, Y, Sigmas)
+    np.testing.assert_allclose(getEstimationState(Estimation)[0], X, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(Estimation["Chi2"], Chi2, rtol=1e-8)
+
+def test_stacked_estimations():
+    Problems = [buildParabola(200, Seed) for Seed in range(4)]
+    H = np.stack([Problem[0] for Problem in Problems])
+    Y = np.stack([Problem[1] for Problem in Problems])
+    Sigmas = np.stack([Problem[2] for Problem in Problems])
+    Estimation = initializeEstimation(np.zeros((4, 3)), None)
+    updateEstimation(Estimation, H, Y, Sigmas)
+
+    for Index, Problem in enumerate(Problems):
+        np.testing.assert_allclose(getEstimationState(Estimation)[0][Index], solveBatch(*Problem)[0], rtol=1e-8, atol=1e-10)
+
+def test_unobservable_state_is_nan():
+    Estimation = initializeEstimation(np.zeros(3), None)
+    assert np.all(np.isnan(getEstimationState(Estimation)[0]))
+
+    H, Y, Sigmas = buildParabola(2)
+    updateEstimation(Estimation, H, Y, Sigmas)
+    assert np.all(np.isnan(getEstimationState(Estimation)[0]))
+
+def test_predict_constant_drift():
+    # Offset and drift propagated by dt = 10: X = F X, P = F P F' + Q
+    Estimation = initializeEstimation(np.array([1.0, 0.5]), np.diag([4.0, 1.0]))
+    F = np.array([[1.0, 10.0], [0.0, 1.0]])
+    Q = np.diag([0.1, 0.01])
+    predictEstimation(Estimation, F, Q)
+
+    X, P = getEstimationState(Estimation)
+    np.testing.assert_allclose(X, [6.0, 0.5])
+    np.testing.assert_allclose(P, F @ np.diag([4.0, 1.0]) @ F.T + Q)
+
+def test_monitor_flags_outlier():
+    H, Y, Sigmas = buildParabola(200)
+    Estimation = initializeEstimation(np.zeros(3), None)
+    updateEstimation(Estimation, H, Y, Sigmas)
+
+    Y = Y.copy()
+    Y[50] += 50.0 * Sigmas[50]
+    Normalized, Outliers = monitorResiduals(Estimation, H, Y, Sigmas)
+    assert Outliers[50] and np.sum(Outliers) == 1
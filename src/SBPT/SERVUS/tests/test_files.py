@@ -0,0 +1,80 @@
+import os, sys
+
+# Add path to find the COMMON modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from pandas import read_csv
+from COMMON.Schemas import defineSchema
+from COMMON.Files import readFixedFile, readDataFile, readSchemaFile, writeSchemaFile
+
+# Schema with the formats of the INFO and STAT files
+TestSchema = defineSchema("TEST_FIXED", [
+    ("SoD", "int32", "s", "%6d"),
+    ("PRN", "object", None, "%s"),
+    ("MONSTAT", "int8", None, "%3d"),
+    ("SREW", "float64", "m", "%8.3f"),
+    ("SFLT-W", "float64", "m", "%8.4f"),
+    ("AF1", "float64", "m/s", "%14.6f"),
+    ("NRIMS", "int16", None, "%4d"),
+])
+
+def writeTestFile(Path, NLines=500, Seed=0):
+    """
+    Write a file of the test schema with random values of both signs.
+    """
+    Generator = np.random.default_rng(Seed)
+    Columns = {
+        "SoD": np.arange(NLines) * 50,
+        "PRN": ["G%02d" % Prn for Prn in Generator.integers(1, 33, NLines)],
+        "MONSTAT": Generator.integers(-1, 2, NLines),
+        "SREW": Generator.normal(0.0, 50.0, NLines),
+        "SFLT-W": Generator.uniform(0.0, 10.0, NLines),
+        "AF1": Generator.normal(0.0, 1e-3, NLines),
+        "NRIMS": Generator.integers(0, 40, NLines),
+    }
+    writeSchemaFile(Path, TestSchema, Columns)
+
+@pytest.fixture
+def testFile(tmp_path):
+    Path = str(tmp_path / "SAT_INFO_Y19D014_G123_50s.dat")
+    writeTestFile(Path)
+
+    return Path
+
+def test_fixed_parser_matches_read_csv(testFile):
+    Expected = read_csv(testFile, sep=r"\s+", skiprows=1, header=None)
+    Columns, Labels = readFixedFile(testFile, range(len(TestSchema["Names"])))
+
+    assert Columns is not None
+    for Column, Values in Columns.items():
+        if Column in Labels:
+            Values = Labels[Column][Values]
+        np.testing.assert_array_equal(Values, Expected[Column].to_numpy())
+
+def test_read_schema_file_matches_read_csv(testFile):
+    Names = ["SoD", "PRN", "SREW", "NRIMS"]
+    Data = readSchemaFile(testFile, TestSchema, Names)
+    Expected = read_csv(testFile, sep=r"\s+", skiprows=1, header=None)
+
+    for Name in Names:
+        Index = TestSchema["Idx"][Name]
+        # Text columns may be held in the string dtype of pandas
+        if TestSchema["Dtypes"][Name] != "object":
+            assert Data[Index].dtype == np.dtype(TestSchema["Dtypes"][Name])
+        np.testing.assert_array_equal(Data[Index].to_numpy(), Expected[Index].to_numpy())
+
+def test_irregular_lines_fall_back_to_read_csv(tmp_path):
+    # Columns not aligned: the fast parser declines and read_csv is used
+    Path = str(tmp_path / "irregular.dat")
+    with open(Path, 'w') as f:
+        f.write("A B C\n1 2.5 x\n10 -3.25 yy\n100 4 z\n")
+
+    Columns, _ = readFixedFile(Path, [0, 1, 2])
+    assert Columns is None
+
+    Data = readDataFile(Path, [0, 1, 2])
+    assert Data[0].tolist() == [1, 10, 100]
+    assert Data[1].tolist() == [2.5, -3.25, 4.0]
+    assert Data[2].tolist() == ["x", "yy", "z"]
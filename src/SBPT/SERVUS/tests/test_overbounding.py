@@ -0,0 +1,72 @@
+import os, sys
+
+# Add path to find the COMMON modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from COMMON.StreamingStatistics import computeInverseNormal
+from COMMON.Overbounding import initializeOverbounding, updateOverbounding, iterateOverbounding
+
+def buildGaussianErrors(Sigma, NSamples=100000):
+    """
+    Normalized errors with the exact distribution of N(0, Sigma): the
+    quantiles of evenly spaced probabilities, of both signs.
+    """
+    Positive = Sigma * computeInverseNormal(0.5 + 0.5 * (np.arange(NSamples // 2) + 0.5) / (NSamples // 2))
+
+    return np.concatenate([Positive, -Positive])
+
+def computeOverbound(ErrorsByKey, EpochSize=None):
+    Overbound = initializeOverbounding(list(ErrorsByKey))
+    Keys = np.concatenate([[Key] * len(Errors) for Key, Errors in ErrorsByKey.items()])
+    Errors = np.concatenate(list(ErrorsByKey.values()))
+    EpochSize = EpochSize or len(Errors)
+    for First in range(0, len(Errors), EpochSize):
+        updateOverbounding(Overbound, Keys[First:First + EpochSize], Errors[First:First + EpochSize])
+
+    return {Key: Outputs for Key, *Outputs in iterateOverbounding(Overbound)}
+
+def test_gaussian_errors_are_overbounded_by_their_sigma():
+    Results = computeOverbound({"G01": buildGaussianErrors(1.0), "G05": buildGaussianErrors(2.5)})
+
+    for Key, Sigma in [("G01", 1.0), ("G05", 2.5)]:
+        N, Mean, Std, MaxAbs, K = Results[Key]
+        assert N == 100000
+        assert Mean == pytest.approx(0.0, abs=1e-9)
+        assert Std == pytest.approx(Sigma, rel=1e-3)
+        # The CDF is evaluated at the upper edge of the histogram bins, so
+        # the overbounding sigma is slightly above the true one
+        assert Sigma <= K <= Sigma * 1.02
+
+    # All the keys: the tails are those of the wider key
+    N, Mean, Std, MaxAbs, K = Results[None]
+    assert N == 200000
+    assert Std == pytest.approx(np.sqrt((1.0 + 2.5**2) / 2), rel=1e-3)
+    assert MaxAbs == Results["G05"][3]
+    assert 2.0 < K <= Results["G05"][4]
+
+def test_heavy_tails_inflate_the_sigma():
+    # N(0, 1) core with 5% of the samples from N(0, 3): the tails need K >> 1
+    Errors = np.concatenate([buildGaussianErrors(1.0, 95000), buildGaussianErrors(3.0, 5000)])
+    K = computeOverbound({"G01": Errors})["G01"][4]
+
+    assert 2.0 < K < 3.1
+
+def test_streamed_epochs_match_single_batch():
+    Generator = np.random.default_rng(0)
+    ErrorsByKey = {"G01": Generator.standard_normal(5000), "G12": 2 * Generator.standard_normal(3000)}
+    Single = computeOverbound(ErrorsByKey)
+    Streamed = computeOverbound(ErrorsByKey, EpochSize=37)
+
+    assert Single.keys() == Streamed.keys()
+    for Key in Single:
+        np.testing.assert_allclose(Streamed[Key], Single[Key], rtol=1e-9)
+
+def test_keys_without_samples_are_skipped():
+    Overbound = initializeOverbounding(["G01", "G02"])
+    updateOverbounding(Overbound, [], np.array([]))
+    assert list(iterateOverbounding(Overbound)) == []
+
+    updateOverbounding(Overbound, ["G02"] * 100, buildGaussianErrors(1.0, 100))
+    assert [Outputs[0] for Outputs in iterateOverbounding(Overbound)] == ["G02", None]
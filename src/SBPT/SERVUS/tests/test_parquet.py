@@ -0,0 +1,69 @@
+import os, sys
+
+# Add path to find the COMMON modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from COMMON.Schemas import defineSchema
+from COMMON.Files import readSchemaFile, writeSchemaFile, exportParquetFile, readParquetFile
+
+pytest.importorskip("pyarrow")
+
+# Schema of a small INFO-like file
+TestSchema = defineSchema("TEST_PARQUET", [
+    ("SoD", "int32", "s", "%6d"),
+    ("PRN", "object", None, "%s"),
+    ("MONSTAT", "int8", None, "%3d"),
+    ("SREW", "float64", "m", "%8.3f"),
+])
+
+def writeDay(Path, Offset):
+    Sods = np.repeat(np.arange(0, 7200, 600), 3)
+    writeSchemaFile(Path, TestSchema, {
+        "SoD": Sods,
+        "PRN": ["G01", "G05", "G12"] * (len(Sods) // 3),
+        "MONSTAT": np.tile([1, 0, 1], len(Sods) // 3),
+        "SREW": Sods * 1e-3 + Offset,
+    })
+
+@pytest.fixture
+def dataset(tmp_path):
+    """
+    Text files of two days, exported to the Parquet dataset.
+    """
+    ParquetDir = str(tmp_path / "PARQUET")
+    Files = {}
+    for Day, Offset in [("Y19D014", 0.0), ("Y19D015", 100.0)]:
+        Files[Day] = str(tmp_path / ("TEST_INFO_%s_G123_50s.dat" % Day))
+        writeDay(Files[Day], Offset)
+        exportParquetFile(Files[Day], TestSchema, ParquetDir)
+
+    return ParquetDir, Files
+
+def test_round_trip_matches_text_file(dataset):
+    ParquetDir, Files = dataset
+    Data = readParquetFile(ParquetDir, TestSchema, TestSchema["Names"], {"DAY": ["Y19D014"]})
+    Expected = readSchemaFile(Files["Y19D014"], TestSchema)
+
+    assert len(Data) == len(Expected)
+    for Name in TestSchema["Names"]:
+        np.testing.assert_array_equal(Data[Name].to_numpy(), Expected[TestSchema["Idx"][Name]].to_numpy())
+
+def test_filters_select_rows_and_days(dataset):
+    ParquetDir, _ = dataset
+
+    Data = readParquetFile(ParquetDir, TestSchema, ["SoD", "PRN", "SREW"],
+        {"SoD": (600, 1800), "PRN": ["G05"]})
+    # Both days, the SoD range included
+    assert sorted(Data["SoD"].tolist()) == [600, 600, 1200, 1200, 1800, 1800]
+    assert set(Data["PRN"]) == {"G05"}
+    np.testing.assert_allclose(np.sort(Data["SREW"].to_numpy()), [0.6, 1.2, 1.8, 100.6, 101.2, 101.8])
+
+def test_export_replaces_the_day(dataset):
+    ParquetDir, Files = dataset
+    writeDay(Files["Y19D014"], 10.0)
+    exportParquetFile(Files["Y19D014"], TestSchema, ParquetDir)
+
+    Data = readParquetFile(ParquetDir, TestSchema, ["SREW"], {"DAY": ["Y19D014"], "SoD": (0, 0)})
+    np.testing.assert_allclose(Data["SREW"].to_numpy(), [10.0, 10.0, 10.0])
@@ -0,0 +1,75 @@
+import os, sys
+
+# Add path to find the COMMON modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+from multiprocessing import Pool, shared_memory
+from COMMON.SharedData import shareData, attachData, releaseData, releaseSharedData, CreatedBlocks
+
+def buildTable(NRows=1000):
+    return pd.DataFrame({
+        0: np.arange(NRows, dtype=np.int32) * 50,
+        2: np.array(["G%02d" % (Row % 32 + 1) for Row in range(NRows)], dtype=object),
+        6: np.linspace(-1.0, 1.0, NRows),
+        7: (np.arange(NRows) % 3).astype(np.int8),
+    })
+
+def sumSharedColumn(Args):
+    """
+    Sum a column of the shared table in a worker process.
+    """
+    Descriptor, Label = Args
+    Data, Block = attachData(Descriptor, AsDataFrame=False)
+    Total = float(np.sum(Data[Label]))
+    del Data
+    releaseData(Block)
+
+    return Total
+
+def isBlockAlive(Name):
+    try:
+        shared_memory.SharedMemory(name=Name).close()
+    except FileNotFoundError:
+        return False
+
+    return True
+
+def test_round_trip():
+    Table = buildTable()
+    Descriptor, Block = shareData(Table)
+    try:
+        Data, Attached = attachData(Descriptor)
+        for Label in Table.columns:
+            np.testing.assert_array_equal(np.asarray(Data[Label]), Table[Label].to_numpy())
+        # Numeric columns keep their dtypes
+        assert Data[0].dtype == np.int32 and Data[7].dtype == np.int8
+        del Data
+        releaseData(Attached)
+    finally:
+        releaseData(Block, Unlink=True)
+
+    assert Descriptor["Name"] not in CreatedBlocks
+    assert not isBlockAlive(Descriptor["Name"])
+
+def test_workers_read_the_block():
+    Table = buildTable()
+    Descriptor, Block = shareData(Table)
+    try:
+        with Pool(2) as Workers:
+            Totals = Workers.map(sumSharedColumn, [(Descriptor, 0), (Descriptor, 6)])
+    finally:
+        releaseData(Block, Unlink=True)
+
+    assert Totals == pytest.approx([float(Table[0].sum()), float(Table[6].sum())])
+
+def test_release_shared_data_removes_the_blocks_left():
+    # Blocks not released (e.g. a failed day) are removed at the end
+    Names = [shareData(buildTable(NRows))[0]["Name"] for NRows in (10, 100)]
+    assert all(isBlockAlive(Name) for Name in Names)
+
+    releaseSharedData()
+    assert not CreatedBlocks
+    assert not any(isBlockAlive(Name) for Name in Names)
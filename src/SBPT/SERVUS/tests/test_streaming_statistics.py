@@ -0,0 +1,94 @@
+import os, sys
+
+# Add path to find the COMMON modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from COMMON.StreamingStatistics import initializeMoments, updateMoments, mergeMoments, getMomentsStatistics
+from COMMON.StreamingStatistics import initializeHistogram, updateHistogram, mergeHistograms
+from COMMON.StreamingStatistics import collapseHistogram, computeHistogramPercentile, computeInverseNormal
+
+def buildSamples(NSamples=20000, NKeys=5, Seed=0):
+    """
+    Samples of several keys with different means and spreads, far from 0 to
+    stress the accuracy of the variance.
+    """
+    Generator = np.random.default_rng(Seed)
+    Codes = Generator.integers(0, NKeys, NSamples)
+    Values = 1e4 + Codes * 10.0 + Generator.standard_normal(NSamples) * (Codes + 1)
+
+    return Values, Codes
+
+def streamMoments(Values, Codes, NKeys, BatchSize):
+    Moments = initializeMoments(NKeys)
+    for First in range(0, len(Values), BatchSize):
+        updateMoments(Moments, Values[First:First + BatchSize], Codes[First:First + BatchSize])
+
+    return Moments
+
+@pytest.mark.parametrize("BatchSize", [1, 37, 20000])
+def test_moments_match_numpy(BatchSize):
+    Values, Codes = buildSamples()
+    Stats = getMomentsStatistics(streamMoments(Values, Codes, 5, BatchSize))
+
+    for Code in range(5):
+        KeyValues = Values[Codes == Code]
+        assert Stats["N"][Code] == len(KeyValues)
+        assert Stats["MEAN"][Code] == pytest.approx(np.mean(KeyValues), rel=1e-12)
+        assert Stats["STD"][Code] == pytest.approx(np.std(KeyValues), rel=1e-9)
+        assert Stats["RMS"][Code] == pytest.approx(np.sqrt(np.mean(KeyValues**2)), rel=1e-12)
+        assert Stats["MIN"][Code] == np.min(KeyValues)
+        assert Stats["MAX"][Code] == np.max(KeyValues)
+
+def test_merged_moments_match_single_pass():
+    Values, Codes = buildSamples()
+    Half = len(Values) // 2
+    Moments = streamMoments(Values[:Half], Codes[:Half], 5, 1000)
+    mergeMoments(Moments, streamMoments(Values[Half:], Codes[Half:], 5, 1000))
+
+    Merged = getMomentsStatistics(Moments)
+    Single = getMomentsStatistics(streamMoments(Values, Codes, 5, len(Values)))
+    for Field in ["N", "MEAN", "STD", "MIN", "MAX"]:
+        np.testing.assert_allclose(Merged[Field], Single[Field], rtol=1e-9)
+
+def test_nan_samples_and_empty_keys():
+    Moments = initializeMoments(3)
+    updateMoments(Moments, [1.0, np.nan, 3.0], [0, 0, 2])
+    Stats = getMomentsStatistics(Moments)
+
+    np.testing.assert_array_equal(Stats["N"], [1, 0, 1])
+    np.testing.assert_array_equal(Stats["MEAN"], [1.0, 0.0, 3.0])
+    np.testing.assert_array_equal(Stats["MIN"], [1.0, 0.0, 3.0])
+
+def test_histogram_percentiles():
+    # 0.005, 0.015 ... 9.995: the percentiles are the upper edges of the bins
+    Values = (np.arange(1000) + 0.5) * 0.01
+    Histogram = initializeHistogram(0.01, 2)
+    updateHistogram(Histogram, Values[::-1], np.zeros(1000, dtype=int))
+    updateHistogram(Histogram, Values[:500] + 20.0, np.ones(500, dtype=int))
+
+    np.testing.assert_allclose(computeHistogramPercentile(Histogram, 50.0), [5.0, 22.5])
+    np.testing.assert_allclose(computeHistogramPercentile(Histogram, 95.0), [9.5, 24.75])
+    assert computeHistogramPercentile(collapseHistogram(Histogram), 100.0)[0] == pytest.approx(25.0)
+
+def test_merged_histograms_match_single_pass():
+    Values, Codes = buildSamples()
+    Values = np.abs(Values - 1e4)
+    Single = initializeHistogram(0.01, 5)
+    updateHistogram(Single, Values, Codes)
+
+    Histogram, Other = initializeHistogram(0.01, 5), initializeHistogram(0.01, 5)
+    updateHistogram(Histogram, Values[:100], Codes[:100])
+    updateHistogram(Other, Values[100:], Codes[100:])
+    mergeHistograms(Histogram, Other)
+
+    for Percentile in [50.0, 68.0, 95.0, 99.9]:
+        np.testing.assert_array_equal(computeHistogramPercentile(Histogram, Percentile),
+            computeHistogramPercentile(Single, Percentile))
+
+def test_inverse_normal():
+    # Quantiles of the standard normal distribution
+    P = np.array([0.001, 0.025, 0.5, 0.841344746, 0.975, 0.9999])
+    np.testing.assert_allclose(computeInverseNormal(P),
+        [-3.090232306, -1.959963985, 0.0, 1.0, 1.959963985, 3.719016485], atol=1e-8)
@@ -0,0 +1,176 @@
+import io
+import os
+import shutil
+import signal
+import subprocess
+import functools
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Transparent reading of compressed input files (e.g. archived INFO, LOS or
+# EMS files): the compression is detected by the magic bytes of the file, and
+# the file is decoded on the fly while it is read, without decompressing it to
+# disk. The decoding runs in an external decoder process (multi-threaded
+# where the codec supports it), in parallel with the parsing of the lines,
+# and falls back to the Python decoders if no external decoder is installed.
+# The files are read in sequence: the streams are not seekable.
+
+# Magic bytes of the supported compressions
+COMPRESSION_MAGIC = OrderedDict([
+    ("gzip", b"\x1f\x8b"),
+    ("bzip2", b"BZh"),
+    ("xz", b"\xfd7zXZ\x00"),
+    ("zstd", b"\x28\xb5\x2f\xfd"),
+])
+
+# Suffixes of the compressed files, tried when the file to read does not exist
+COMPRESSION_SUFFIXES = [".gz", ".bz2", ".xz", ".zst"]
+
+# External decoders of each compression, in order of preference (the
+# multi-threaded ones first), writing the decoded file to the standard output
+COMPRESSION_DECODERS = {
+    "gzip": [["pigz", "-dc"], ["gzip", "-dc"]],
+    "bzip2": [["lbzip2", "-dc"], ["pbzip2", "-dc"], ["bzip2", "-dc"]],
+    "xz": [["xz", "-dc", "-T0"]],
+    "zstd": [["zstd", "-dcq"]],
+}
+
+# Size of the buffer of the decoded stream [bytes]
+COMPRESSION_BUFFER = 1 << 20
+
+# ------------------------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=None)
+def findDecoder(Codec):
+    """
+    Find the first installed external decoder of a compression (None if none).
+    """
+    for Decoder in COMPRESSION_DECODERS[Codec]:
+        Command = shutil.which(Decoder[0])
+        if Command is not None:
+            return [Command] + Decoder[1:]
+
+    return None
+
+def openPythonDecoder(Codec, Path):
+    """
+    Open a compressed file with the Python decoder of its compression,
+    returning a binary stream of the decoded file.
+    """
+    if Codec == "gzip":
+        import gzip
+        return gzip.open(Path, 'rb')
+    if Codec == "bzip2":
+        import bz2
+        return bz2.open(Path, 'rb')
+    if Codec == "xz":
+        import lzma
+        return lzma.open(Path, 'rb')
+
+    # zstd has no Python decoder in the standard library
+    try:
+        import zstandard
+    except ImportError:
+        raise IOError("No zstd decoder found to read %s (install zstd or zstandard)" % Path)
+
+    return io.BufferedReader(
+        zstandard.ZstdDecompressor().stream_reader(open(Path, 'rb'), closefd=True),
+        COMPRESSION_BUFFER)
+
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def detectCompression(Path):
+    """
+    Detect the compression of a file from its magic bytes.
+
+    Returns:
+    - Codec: "gzip", "bzip2", "xz" or "zstd" (None if not compressed).
+    """
+    with open(Path, 'rb') as f:
+        Magic = f.read(max(len(Bytes) for Bytes in COMPRESSION_MAGIC.values()))
+
+    for Codec, Bytes in COMPRESSION_MAGIC.items():
+        if Magic.startswith(Bytes):
+            return Codec
+
+    return None
+
+def findDataFile(Path):
+    """
+    Find the file to read for a path: the path itself if it exists, or else
+    the path with the first compression suffix found (e.g. SAT_INFO_*.dat.gz).
+    The path is returned unchanged if none of them exists.
+    """
+    if os.path.exists(Path):
+        return Path
+    for Suffix in COMPRESSION_SUFFIXES:
+        if os.path.exists(Path + Suffix):
+            return Path + Suffix
+
+    return Path
+
+def removeCompressionSuffix(Path):
+    """
+    Remove the compression suffix of a path (e.g. to name the outputs of a
+    compressed input file as those of the uncompressed one).
+    """
+    for Suffix in COMPRESSION_SUFFIXES:
+        if Path.endswith(Suffix):
+            return Path[:-len(Suffix)]
+
+    return Path
+
+@contextmanager
+def openDataFile(Path, Mode='r'):
+    """
+    Open a data file to read it, decoding it on the fly if it is compressed
+    (see detectCompression), to be used as open in a with statement.
+
+    Parameters:
+    - Path: Path to the file (see findDataFile).
+    - Mode: 'r' to read text lines, 'rb' to read bytes.
+    """
+    Path = findDataFile(Path)
+    Codec = detectCompression(Path)
+    if Codec is None:
+        with open(Path, Mode) as f:
+            yield f
+        return
+
+    Decoder = findDecoder(Codec)
+    if Decoder is None:
+        with openPythonDecoder(Codec, Path) as f:
+            yield f if 'b' in Mode else io.TextIOWrapper(f)
+        return
+
+    Process = subprocess.Popen(Decoder + [Path], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        bufsize=COMPRESSION_BUFFER)
+    Stream = Process.stdout if 'b' in Mode else io.TextIOWrapper(Process.stdout)
+    try:
+        yield Stream
+    finally:
+        # Closing the stream before the end of the file stops the decoder
+        Stream.close()
+        Message = Process.stderr.read().decode(errors="replace").strip()
+        Process.stderr.close()
+        Process.wait()
+
+    if Process.returncode not in (0, -signal.SIGPIPE):
+        raise IOError("Error decoding %s: %s" % (Path, Message))
+
+def wrapDataReader(readFunction):
+    """
+    Wrap a function reading a file given as first argument (e.g. pandas
+    read_csv) so that it reads compressed files too (see openDataFile).
+    """
+    @functools.wraps(readFunction)
+    def readData(Path, *Args, **Kwargs):
+        with openDataFile(Path, 'rb') as f:
+            return readFunction(f, *Args, **Kwargs)
+
+    return readData
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 # Ref.: ESA_GNSS-Book_TM-23_Vol_I.pdf Section B.1.2 (Appendix B)
 def xyz2llh(x,y,z):
@@ -36,3 +37,61 @@ def llh2xyz(lon,lat,h):
     Z = ((1-0.0066943799901)*N + h)*(math.sin(math.radians(lat))) 
 
     return X,Y,Z
+
+# Vectorized version of xyz2llh, for arrays of positions
+def xyz2llhArray(x,y,z):
+    # --- WGS84 constants
+    a = 6378137.0
+    f = 1.0 / 298.257223563
+    # --- derived constants
+    b = a - f*a
+    e2 = (a**2 - b**2)/a**2
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    z = np.asarray(z, dtype=float)
+    clambda = np.arctan2(y,x)
+    p = np.sqrt(x**2 + y**2)
+    # first guess with h=0 meters
+    h = np.zeros_like(p)
+    N = np.full_like(p, a)
+    for _ in range(10):
+        theta = np.arctan2(z,p*(1.0-e2*N/(N+h)))
+        cs = np.cos(theta)
+        sn = np.sin(theta)
+        N = a**2/np.sqrt((a*cs)**2 + (b*sn)**2)
+        h_old = h
+        h = p/cs - N
+        if np.all(np.abs(h-h_old) <= 1.0e-6): break
+    return np.degrees(clambda), np.degrees(theta), h
+
+# Vectorized version of llh2xyz, for arrays of positions
+def llh2xyzArray(lon,lat,h):
+    lon = np.radians(np.asarray(lon, dtype=float))
+    lat = np.radians(np.asarray(lat, dtype=float))
+    N = 6378137.0 / np.sqrt(1 - 0.0066943799901*np.sin(lat)**2)
+
+    X = (N+h)*np.cos(lat)*np.cos(lon)
+    Y = (N+h)*np.cos(lat)*np.sin(lon)
+    Z = ((1-0.0066943799901)*N + h)*np.sin(lat)
+
+    return X,Y,Z
+
+# Elevation and azimuth [deg] of the satellites seen from the receivers,
+# for all the pairs at once (NRcvr x NSat), from the receiver positions
+# (NRcvr x 3, with their longitude and latitude) and satellite positions (NSat x 3)
+def computeElevationAzimuth(rcvrXyz, rcvrLon, rcvrLat, satXyz):
+    lon = np.radians(np.asarray(rcvrLon, dtype=float))[:, None]
+    lat = np.radians(np.asarray(rcvrLat, dtype=float))[:, None]
+    los = np.asarray(satXyz)[None, :, :] - np.asarray(rcvrXyz)[:, None, :]
+
+    # Rotate the line of sight to the local East-North-Up frame
+    east = -np.sin(lon)*los[..., 0] + np.cos(lon)*los[..., 1]
+    north = -np.sin(lat)*np.cos(lon)*los[..., 0] - np.sin(lat)*np.sin(lon)*los[..., 1] + \
+        np.cos(lat)*los[..., 2]
+    up = np.cos(lat)*np.cos(lon)*los[..., 0] + np.cos(lat)*np.sin(lon)*los[..., 1] + \
+        np.sin(lat)*los[..., 2]
+
+    elev = np.degrees(np.arctan2(up, np.sqrt(east**2 + north**2)))
+    azim = np.mod(np.degrees(np.arctan2(east, north)), 360.0)
+
+    return elev, azim
@@ -11,3 +11,15 @@ c_m_s = 299792458
 
 # Frequency fL1 in [Hz]
 fL1_Hz = 1575.42 * 10**6
+
+# Earth radius of the ionospheric shell model in [m]
+EARTH_RADIUS = 6378136.3
+
+# Height of the Iono layer in [m]
+IONO_HEIGHT = 350000.0
+
+# Seconds in one day
+S_IN_D = 86400
+
+# Speed of Light in [m/s] (as used by the shared COMMON models)
+SPEED_OF_LIGHT = 299792458.0
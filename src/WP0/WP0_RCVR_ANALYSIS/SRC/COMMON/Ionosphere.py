@@ -0,0 +1,132 @@
+import numpy as np
+from COMMON import GnssConstants
+from COMMON.Compression import openDataFile
+
+# Minimum period of the Klobuchar model cosine [s]
+KLOBUCHAR_MIN_PERIOD = 72000.0
+
+# Night-time (constant) vertical delay of the Klobuchar model [s]
+KLOBUCHAR_NIGHT_DELAY = 5e-9
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def computeObliquityFactor(Elev, Height=GnssConstants.IONO_HEIGHT):
+    """
+    Compute the obliquity factor mapping the vertical ionospheric delay
+    into the slant delay of the LOS, for a thin shell model.
+
+    Parameters:
+    - Elev: Elevation of the LOS [deg] (array-like).
+    - Height: Height of the ionospheric shell [m].
+
+    Returns:
+    - Obliquity: Obliquity factor 1 / sqrt(1 - (Re cos(E) / (Re + h))^2).
+    """
+    Ratio = GnssConstants.EARTH_RADIUS / (GnssConstants.EARTH_RADIUS + Height)
+
+    return 1.0 / np.sqrt(1.0 - (Ratio * np.cos(np.radians(Elev)))**2)
+
+def computePiercePoints(RcvrLat, RcvrLon, Elev, Azim, Height=GnssConstants.IONO_HEIGHT):
+    """
+    Compute the ionospheric pierce points of the LOS with the thin shell
+    model (Ref.: MOPS DO-229 Appendix A.4.4.10.1) for all the LOS at once.
+
+    Parameters:
+    - RcvrLat, RcvrLon: Receiver latitude and longitude [deg] (scalars,
+      or one value per LOS).
+    - Elev, Azim: Elevation and azimuth of the LOS [deg] (array-like).
+    - Height: Height of the ionospheric shell [m].
+
+    Returns:
+    - IppLat, IppLon: Latitude and longitude of the pierce points [deg],
+      the longitude in [-180, 180).
+    - Obliquity: Obliquity factor of each LOS.
+    """
+    Phi = np.radians(RcvrLat)
+    Elev = np.radians(np.asarray(Elev, dtype=float))
+    Azim = np.radians(np.asarray(Azim, dtype=float))
+    Ratio = GnssConstants.EARTH_RADIUS / (GnssConstants.EARTH_RADIUS + Height)
+
+    # Earth central angle between the receiver and the pierce point
+    RatioCosElev = Ratio * np.cos(Elev)
+    Psi = np.pi / 2 - Elev - np.arcsin(RatioCosElev)
+
+    SinPhiPp = np.sin(Phi) * np.cos(Psi) + np.cos(Phi) * np.sin(Psi) * np.cos(Azim)
+    PhiPp = np.arcsin(np.clip(SinPhiPp, -1.0, 1.0))
+
+    DeltaLon = np.arcsin(np.clip(np.sin(Psi) * np.sin(Azim) / np.cos(PhiPp), -1.0, 1.0))
+    # The pierce point is beyond the pole seen from the receiver
+    BeyondPole = ((Phi > np.radians(70)) & (np.tan(Psi) * np.cos(Azim) > np.tan(np.pi / 2 - Phi))) | \
+        ((Phi < -np.radians(70)) & (np.tan(Psi) * np.cos(Azim + np.pi) > np.tan(np.pi / 2 + Phi)))
+    DeltaLon = np.where(BeyondPole, np.pi - DeltaLon, DeltaLon)
+
+    IppLat = np.degrees(PhiPp)
+    IppLon = (RcvrLon + np.degrees(DeltaLon) + 180.0) % 360.0 - 180.0
+    Obliquity = 1.0 / np.sqrt(1.0 - RatioCosElev**2)
+
+    return IppLat, IppLon, Obliquity
+
+def readKlobucharParameters(NavFile):
+    """
+    Read the Klobuchar model coefficients from the header (ION ALPHA and
+    ION BETA records) of a RINEX 2 GPS navigation file.
+
+    Returns:
+    - Alpha, Beta: Arrays of the 4 coefficients of the amplitude and
+      of the period of the model (None if not found in the header).
+    """
+    Alpha, Beta = None, None
+
+    with openDataFile(NavFile) as f:
+        for Line in f:
+            if "END OF HEADER" in Line: break
+            # RINEX 2 may use the D exponent
+            if "ION ALPHA" in Line:
+                Alpha = np.array(Line[:60].replace('D', 'E').split(), dtype=float)
+            elif "ION BETA" in Line:
+                Beta = np.array(Line[:60].replace('D', 'E').split(), dtype=float)
+
+    return Alpha, Beta
+
+def computeKlobucharDelay(Alpha, Beta, RcvrLat, RcvrLon, Elev, Azim, Sod):
+    """
+    Compute the slant ionospheric delay on L1 of the GPS Klobuchar model
+    (Ref.: IS-GPS-200 Section 20.3.3.5.2.5) for all the LOS at once.
+
+    Parameters:
+    - Alpha, Beta: Klobuchar coefficients (see readKlobucharParameters).
+    - RcvrLat, RcvrLon: Receiver latitude and longitude [deg] (scalars,
+      or one value per LOS).
+    - Elev, Azim: Elevation and azimuth of the LOS [deg] (array-like).
+    - Sod: GPS seconds of day of the LOS (array-like).
+
+    Returns:
+    - Delay: Slant ionospheric delay on L1 [m].
+    """
+    # The model works in semicircles
+    Elev = np.asarray(Elev, dtype=float) / 180.0
+    Azim = np.radians(np.asarray(Azim, dtype=float))
+    Phi = np.asarray(RcvrLat, dtype=float) / 180.0
+    Lambda = np.asarray(RcvrLon, dtype=float) / 180.0
+
+    # Earth central angle and pierce point at 350 km
+    Psi = 0.0137 / (Elev + 0.11) - 0.022
+    PhiI = np.clip(Phi + Psi * np.cos(Azim), -0.416, 0.416)
+    LambdaI = Lambda + Psi * np.sin(Azim) / np.cos(PhiI * np.pi)
+
+    # Geomagnetic latitude and local time of the pierce point
+    PhiM = PhiI + 0.064 * np.cos((LambdaI - 1.617) * np.pi)
+    LocalTime = np.mod(43200.0 * LambdaI + np.asarray(Sod, dtype=float), GnssConstants.S_IN_D)
+
+    Obliquity = 1.0 + 16.0 * (0.53 - Elev)**3
+    Powers = PhiM[..., None]**np.arange(4)
+    Amplitude = np.maximum(Powers @ np.asarray(Alpha, dtype=float), 0.0)
+    Period = np.maximum(Powers @ np.asarray(Beta, dtype=float), KLOBUCHAR_MIN_PERIOD)
+
+    Phase = 2 * np.pi * (LocalTime - 50400.0) / Period
+    Daytime = Amplitude * (1.0 - Phase**2 / 2 + Phase**4 / 24)
+    Delay = Obliquity * (KLOBUCHAR_NIGHT_DELAY + np.where(np.abs(Phase) < 1.57, Daytime, 0.0))
+
+    return Delay * GnssConstants.SPEED_OF_LIGHT
@@ -0,0 +1,137 @@
+import os
+import re
+
+# Columnar export of the text products (INFO, STAT, ENTGPS, LOS, POS...) to
+# Parquet datasets, next to the text files, so that they can be queried over
+# many days without parsing the text again. Each file type is a dataset
+# directory partitioned by day and by GEO set (hive style, e.g.
+# SAT_INFO/DAY=Y19D014/GEO=G123/), with a file per text file. The readers
+# only load the requested columns, skip the partitions of the days and GEO
+# sets not requested and the row groups outside the requested ranges (by
+# their statistics, e.g. on SoD), and filter the rows while scanning (e.g.
+# on PRN or IGP ID). pyarrow is only needed if the datasets are used.
+
+# Compression of the Parquet files
+PARQUET_COMPRESSION = "zstd"
+
+# Number of rows of the row groups of the Parquet files, the unit skipped
+# by the readers from the statistics of its columns
+PARQUET_ROW_GROUP = 1 << 16
+
+# Day and GEO set in the name of the text files (e.g. SAT_INFO_Y19D014_G123_50s.dat)
+PARTITION_PATTERN = re.compile(r"_(Y\d{2}D\d{3})_(G\d+)_")
+
+# ------------------------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def importArrow():
+    """
+    Import pyarrow with its Parquet and dataset modules.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.dataset
+    except ImportError:
+        raise ImportError("pyarrow is needed to write and read the Parquet datasets (install pyarrow)")
+
+    return pyarrow
+
+def buildParquetFilter(Filters):
+    """
+    Build the filter expression of a dataset scan.
+
+    Parameters:
+    - Filters: Dictionary with the condition of each column (or partition):
+      a (Min, Max) tuple for the rows with Min <= value <= Max (None for no
+      bound), a list for the rows with one of its values, or else a value.
+
+    Returns:
+    - Filter: Expression for pyarrow.dataset (None if no filters).
+    """
+    pa = importArrow()
+    Filter = None
+    for Column, Condition in (Filters or {}).items():
+        Field = pa.dataset.field(Column)
+        if isinstance(Condition, tuple):
+            Min, Max = Condition
+            Conditions = ([Field >= Min] if Min is not None else []) + \
+                ([Field <= Max] if Max is not None else [])
+        elif isinstance(Condition, (list, set)):
+            Conditions = [Field.isin(list(Condition))]
+        else:
+            Conditions = [Field == Condition]
+        for Expression in Conditions:
+            Filter = Expression if Filter is None else Filter & Expression
+
+    return Filter
+
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def isArrowAvailable():
+    """
+    Check if pyarrow is installed (to export and read the Parquet datasets).
+    """
+    try:
+        importArrow()
+    except ImportError:
+        return False
+
+    return True
+
+def getFilePartitions(dataFilePath):
+    """
+    Get the partitions of a text file from its name: its day "DAY" (e.g.
+    Y19D014) and GEO set "GEO" (e.g. G123). Empty if not in the name.
+    """
+    Match = PARTITION_PATTERN.search(os.path.basename(dataFilePath))
+    if Match is None:
+        return {}
+
+    return {"DAY": Match.group(1), "GEO": Match.group(2)}
+
+def getParquetPath(ParquetDir, FileType, Partitions, Name):
+    """
+    Get the path of a Parquet file of a dataset:
+    ParquetDir/FileType/KEY=Value/.../Name.parquet
+    """
+    return os.path.join(ParquetDir, FileType,
+        *["%s=%s" % (Key, Value) for Key, Value in Partitions.items()], Name + ".parquet")
+
+def writeParquetData(Data, ParquetPath):
+    """
+    Write a table (DataFrame with the names of the columns) into a Parquet
+    file, with the statistics of the columns of each row group.
+    """
+    pa = importArrow()
+    os.makedirs(os.path.dirname(ParquetPath), exist_ok=True)
+    Table = pa.Table.from_pandas(Data, preserve_index=False)
+
+    # Written to a temporary file first, so that no reader sees a partial file
+    pa.parquet.write_table(Table, ParquetPath + ".tmp", compression=PARQUET_COMPRESSION,
+        row_group_size=PARQUET_ROW_GROUP, write_statistics=True)
+    os.replace(ParquetPath + ".tmp", ParquetPath)
+
+def readParquetData(ParquetDir, FileType, Columns=None, Filters=None):
+    """
+    Read the rows and columns of a Parquet dataset selected by filters.
+
+    Parameters:
+    - ParquetDir: Directory of the datasets.
+    - FileType: File type of the dataset (e.g. "SAT_INFO").
+    - Columns: List of the names of the columns to read (all by default).
+    - Filters: Conditions on the columns and partitions (e.g. {"DAY":
+      ["Y19D014"], "SoD": (0, 3600), "PRN": ["G01"]}, see buildParquetFilter).
+
+    Returns:
+    - Data: DataFrame with the selected rows and columns.
+    """
+    pa = importArrow()
+    Dataset = pa.dataset.dataset(os.path.join(ParquetDir, FileType), format="parquet",
+        partitioning="hive")
+
+    return Dataset.to_table(columns=Columns, filter=buildParquetFilter(Filters)).to_pandas()
@@ -1,19 +1,57 @@
-
 import sys, os
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-from mpl_toolkits.axes_grid1 import make_axes_locatable
 import numpy as np
-import conda
-CondaFileDir = conda.__file__
-CondaDir = CondaFileDir.split('lib')[0]
-ProjLib = os.path.join(os.path.join(CondaDir, 'share'), 'proj')
-os.environ["PROJ_LIB"] = ProjLib
-from mpl_toolkits.basemap import Basemap
 
-import warnings
-import matplotlib.cbook
-warnings.filterwarnings("ignore", category=matplotlib.cbook.mplDeprecation)
+# Resolution of the saved figures [dots per inch]
+FIGURE_DPI = 150.
+
+# Plotting libraries: they are imported on the first figure generated
+# (see importPlottingLibraries) so that compute-only runs do not pay their
+# import time and do not need them installed
+mpl = None
+plt = None
+make_axes_locatable = None
+Basemap = None
+
+def resolveProjLib():
+    """
+    Resolve the PROJ data directory needed by Basemap without importing conda:
+    keep PROJ_LIB if already defined, otherwise look in the active conda
+    environment and in the Python installation prefix.
+    """
+    if os.environ.get("PROJ_LIB"):
+        return os.environ["PROJ_LIB"]
+
+    for Prefix in [os.environ.get("CONDA_PREFIX"), sys.prefix]:
+        if not Prefix: continue
+        ProjLib = os.path.join(os.path.join(Prefix, 'share'), 'proj')
+        if os.path.isdir(ProjLib):
+            os.environ["PROJ_LIB"] = ProjLib
+            return ProjLib
+
+    return None
+
+def importPlottingLibraries():
+    global mpl, plt, make_axes_locatable
+
+    if plt is not None:
+        return
+
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.axes_grid1 import make_axes_locatable
+
+    import warnings
+    import matplotlib.cbook
+    warnings.filterwarnings("ignore", category=matplotlib.cbook.mplDeprecation)
+
+def importBasemap():
+    global Basemap
+
+    if Basemap is not None:
+        return
+
+    resolveProjLib()
+    from mpl_toolkits.basemap import Basemap
 
 #import PlotsConstants as Const
 
@@ -35,7 +73,7 @@ def saveFigure(fig, Path):
     try:
         os.makedirs(Dir)
     except: pass
-    fig.savefig(Path, dpi=150., bbox_inches='tight')
+    fig.savefig(Path, dpi=FIGURE_DPI, bbox_inches='tight')
     plt.close('all')
 
 def prepareAxis(PlotConf, ax):
@@ -164,6 +202,7 @@ def prepareColorPolarBar(PlotConf, ax, Values):
 
 
 def drawMap(PlotConf, ax,):
+    importBasemap()
     Map = Basemap(projection = 'cyl',
     llcrnrlat  = PlotConf["LatMin"]-0,
     urcrnrlat  = PlotConf["LatMax"]+0,
@@ -193,6 +232,123 @@ def drawMap(PlotConf, ax,):
     # Draw countries
     Map.drawcountries(linewidth=0.25)
 
+def getDecimationCells(PlotConf, xData, yData, DropOutside):
+    """
+    Compute the grid cell of each point, where the grid covers the axes with
+    cells of PlotConf["Decimate"] pixels (1 pixel if True), keyed on the figure
+    size and resolution, and on the axis limits (data limits if not configured).
+
+    Returns:
+    - xCell, yCell: Cell indices of the points.
+    - Ny: Number of cells in the y axis.
+    - Valid: Mask of the points to be considered (finite, and inside the
+      axis limits if DropOutside is set, as the others are not visible).
+    """
+    CellPixels = 1.0 if PlotConf["Decimate"] is True else float(PlotConf["Decimate"])
+    FigSize = PlotConf["FigSize"] if "FigSize" in PlotConf else (6.4, 4.8)
+    Nx = max(int(FigSize[0] * FIGURE_DPI / CellPixels), 1)
+    Ny = max(int(FigSize[1] * FIGURE_DPI / CellPixels), 1)
+
+    Valid = np.isfinite(xData) & np.isfinite(yData)
+    if not Valid.any():
+        return None
+
+    Cells = []
+    for Data, Lim, N in [(xData, "xLim", Nx), (yData, "yLim", Ny)]:
+        if Lim in PlotConf:
+            Min, Max = min(PlotConf[Lim]), max(PlotConf[Lim])
+        else:
+            Min, Max = Data[Valid].min(), Data[Valid].max()
+        if DropOutside:
+            Valid &= (Data >= Min) & (Data <= Max)
+        Span = (Max - Min) if Max > Min else 1.0
+        Cell = np.zeros(len(Data), dtype=np.int64)
+        Cell[Valid] = np.clip(((Data[Valid] - Min) / Span * N).astype(np.int64), 0, N - 1)
+        Cells.append(Cell)
+
+    return Cells[0], Cells[1], Ny, Valid
+
+def decimateScatterPoints(PlotConf, xData, yData):
+    """
+    Per-pixel binning: keep one point per grid cell, the last one drawn, so
+    that the figure looks the same. Isolated points (i.e. outliers) always
+    occupy their own cell, so they are never lost.
+    Returns the sorted indices of the points to be drawn.
+    """
+    Grid = getDecimationCells(PlotConf, xData, yData, DropOutside=True)
+    if Grid is None:
+        return np.arange(0)
+    xCell, yCell, Ny, Valid = Grid
+
+    Idx = np.flatnonzero(Valid)
+    Cells = xCell[Idx] * Ny + yCell[Idx]
+    _, LastReversed = np.unique(Cells[::-1], return_index=True)
+
+    return np.sort(Idx[len(Idx) - 1 - LastReversed])
+
+def decimateLinePoints(PlotConf, xData, yData):
+    """
+    Min/max preserving downsampling of a line (M4 aggregation): keep the first,
+    last, minimum and maximum points of each pixel column, so that the line
+    drawn is the same and its extremes remain visible.
+    Non-finite points are kept, as they break the line.
+    Returns the sorted indices of the points to be drawn, or None if the
+    x data is not sorted.
+    """
+    Grid = getDecimationCells(PlotConf, xData, yData, DropOutside=False)
+    if Grid is None:
+        return None
+    xCell, yCell, Ny, Valid = Grid
+
+    Idx = np.flatnonzero(Valid)
+    Columns = xCell[Idx]
+    if np.any(np.diff(Columns) < 0):
+        return None
+
+    # Segments of consecutive points in the same column
+    Starts = np.flatnonzero(np.r_[True, np.diff(Columns) != 0])
+    Ends = np.r_[Starts[1:], len(Idx)] - 1
+
+    # Sort by column and value, so that the minimum and maximum of each
+    # column are the first and last elements of its segment
+    Order = np.lexsort((yData[Idx], Columns))
+
+    Keep = np.concatenate((
+        Idx[Starts], Idx[Ends], Idx[Order[Starts]], Idx[Order[Ends]],
+        np.flatnonzero(~Valid)))
+
+    return np.unique(Keep)
+
+def decimateData(PlotConf, xData, yData, zData=None, Line=False):
+    """
+    Decimate the data of a label if PlotConf["Decimate"] is configured.
+    Non numeric data is not decimated.
+    """
+    if "Decimate" not in PlotConf or not PlotConf["Decimate"]:
+        return xData, yData, zData
+
+    try:
+        x = np.asarray(xData, dtype=float)
+        y = np.asarray(yData, dtype=float)
+    except (TypeError, ValueError):
+        return xData, yData, zData
+
+    if x.ndim != 1 or x.shape != y.shape:
+        return xData, yData, zData
+
+    if Line:
+        Keep = decimateLinePoints(PlotConf, x, y)
+    else:
+        Keep = decimateScatterPoints(PlotConf, x, y)
+
+    if Keep is None:
+        return xData, yData, zData
+
+    if zData is not None:
+        zData = np.asarray(zData)[Keep]
+
+    return x[Keep], y[Keep], zData
+
 def generateLinesPlot(PlotConf):
     LineWidth = 1.5
 
@@ -213,13 +369,20 @@ def generateLinesPlot(PlotConf):
 
     for Label in PlotConf["yData"].keys():
         if "ColorBar" in PlotConf:
-            ax.scatter(PlotConf["xData"][Label], PlotConf["yData"][Label], 
+            xData, yData, zData = PlotConf["xData"][Label], PlotConf["yData"][Label], PlotConf["zData"][Label]
+            if "Polar" not in PlotConf:
+                xData, yData, zData = decimateData(PlotConf, xData, yData, zData)
+            ax.scatter(xData, yData, 
             marker = PlotConf["Marker"],
             linewidth = LineWidth,
-            c = cmap(normalize(np.array(PlotConf["zData"][Label]))))
+            c = cmap(normalize(np.array(zData))))
 
         else:
-            ax.plot(PlotConf["xData"][Label], PlotConf["yData"][Label],
+            IsLine = "-" in PlotConf["Marker"] or ":" in PlotConf["Marker"]
+            xData, yData = PlotConf["xData"][Label], PlotConf["yData"][Label]
+            if "Polar" not in PlotConf:
+                xData, yData, _ = decimateData(PlotConf, xData, yData, Line=IsLine)
+            ax.plot(xData, yData,
             PlotConf["Marker"],
             linewidth = LineWidth,
             label = Label)
@@ -250,5 +413,7 @@ def generateLinesPlot(PlotConf):
     saveFigure(fig, PlotConf["Path"])
 
 def generatePlot(PlotConf):
+    importPlottingLibraries()
+
     if(PlotConf["Type"] == "Lines"):
         generateLinesPlot(PlotConf)
\ No newline at end of file
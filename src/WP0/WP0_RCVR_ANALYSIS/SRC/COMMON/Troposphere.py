@@ -0,0 +1,105 @@
+import numpy as np
+
+# MOPS troposphere model meteorological parameters (Ref.: MOPS DO-229 Appendix A.4.2.4)
+# Latitudes of the table [deg]
+TROPO_LATS = np.array([15.0, 30.0, 45.0, 60.0, 75.0])
+
+# Average and seasonal variation of the pressure [mbar], temperature [K],
+# water vapour pressure [mbar], temperature lapse rate [K/m] and water
+# vapour lapse rate, at each latitude of the table
+TROPO_AVERAGE = np.array([
+    [1013.25, 299.65, 26.31, 6.30e-3, 2.77],
+    [1017.25, 294.15, 21.79, 6.05e-3, 3.15],
+    [1015.75, 283.15, 11.66, 5.58e-3, 2.57],
+    [1011.75, 272.15,  6.78, 5.39e-3, 1.81],
+    [1013.00, 263.65,  4.11, 4.53e-3, 1.55]])
+TROPO_SEASONAL = np.array([
+    [ 0.00,  0.0, 0.00, 0.00e-3, 0.00],
+    [-3.75,  7.0, 8.85, 0.25e-3, 0.33],
+    [-2.25, 11.0, 7.24, 0.32e-3, 0.46],
+    [-1.75, 15.0, 5.36, 0.81e-3, 0.74],
+    [-0.50, 14.5, 3.39, 0.62e-3, 0.30]])
+
+# Day of year of the minimum of the seasonal variation (North and South)
+TROPO_DMIN_NORTH = 28
+TROPO_DMIN_SOUTH = 211
+
+# Refractivity constants [K/mbar] and [K^2/mbar], gas constant of dry air
+# [J/kg/K], gravity at the surface and at the centroid of the column [m/s^2]
+TROPO_K1 = 77.604
+TROPO_K2 = 382000.0
+TROPO_RD = 287.054
+TROPO_G = 9.80665
+TROPO_GM = 9.784
+
+# Sigma of the residual zenith delay of the model [m]
+TROPO_SIGMA_ZENITH = 0.12
+
+# ------------------------------------------------------------------------------------
+# EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------------------------
+
+def computeTropoMapping(Elev):
+    """
+    Compute the MOPS troposphere mapping function of the LOS elevations [deg],
+    including the low elevation term below 4 deg.
+    """
+    Elev = np.asarray(Elev, dtype=float)
+    Mapping = 1.001 / np.sqrt(0.002001 + np.sin(np.radians(Elev))**2)
+
+    return np.where(Elev < 4.0, Mapping * (1.0 + 0.015 * (4.0 - Elev)**2), Mapping)
+
+def computeMopsMeteo(Lat, Doy):
+    """
+    Interpolate the MOPS meteorological parameters at the given latitudes [deg]
+    and days of year.
+
+    Returns:
+    - Meteo: Parameters (... x 5) ordered as the TROPO_AVERAGE columns.
+    """
+    Lat = np.asarray(Lat, dtype=float)
+    AbsLat = np.clip(np.abs(Lat), TROPO_LATS[0], TROPO_LATS[-1])
+    Dmin = np.where(Lat >= 0, TROPO_DMIN_NORTH, TROPO_DMIN_SOUTH)
+    Season = np.cos(2 * np.pi * (np.asarray(Doy, dtype=float) - Dmin) / 365.25)
+
+    Meteo = np.stack([np.interp(AbsLat, TROPO_LATS, TROPO_AVERAGE[:, i]) -
+        np.interp(AbsLat, TROPO_LATS, TROPO_SEASONAL[:, i]) * Season
+        for i in range(TROPO_AVERAGE.shape[1])], axis=-1)
+
+    return Meteo
+
+def computeMopsZenithDelays(Lat, Height, Doy):
+    """
+    Compute the hydrostatic and wet zenith delays [m] of the MOPS troposphere
+    model at the given latitudes [deg], heights above sea level [m] and days of year.
+    """
+    Meteo = computeMopsMeteo(Lat, Doy)
+    P, T, E, Beta, Lambda = (Meteo[..., i] for i in range(5))
+
+    ZHyd = 1e-6 * TROPO_K1 * TROPO_RD * P / TROPO_GM
+    ZWet = 1e-6 * TROPO_K2 * TROPO_RD / (TROPO_GM * (Lambda + 1) - Beta * TROPO_RD) * E / T
+
+    Lapse = 1.0 - Beta * np.asarray(Height, dtype=float) / T
+    DHyd = Lapse**(TROPO_G / (TROPO_RD * Beta)) * ZHyd
+    DWet = Lapse**((Lambda + 1) * TROPO_G / (TROPO_RD * Beta) - 1) * ZWet
+
+    return DHyd, DWet
+
+def computeMopsTropoDelay(Lat, Height, Doy, Elev):
+    """
+    Compute the slant tropospheric delay of the MOPS model for all the LOS at once.
+
+    Parameters:
+    - Lat: Receiver latitude [deg] (scalar, or one value per LOS).
+    - Height: Receiver height above sea level [m] (scalar, or one value per LOS).
+    - Doy: Day of year (scalar, or one value per LOS).
+    - Elev: Elevation of the LOS [deg] (array-like).
+
+    Returns:
+    - Delay: Slant tropospheric delay [m].
+    - Sigma: Sigma of the residual slant delay [m].
+    """
+    DHyd, DWet = computeMopsZenithDelays(Lat, Height, Doy)
+    Mapping = computeTropoMapping(Elev)
+
+    return (DHyd + DWet) * Mapping, TROPO_SIGMA_ZENITH * Mapping
@@ -20,6 +20,7 @@ from COMMON.Plots import generatePlot
 import numpy as np
 # from pyproj import Transformer
 from COMMON.Coordinates import xyz2llh
+from COMMON.Ionosphere import computePiercePoints, computeKlobucharDelay
 
 # T3.1 Ionosphere STEC[m] vs ELEV
 def plotSatIonoStecElev(LosData):
@@ -58,6 +59,9 @@ def plotSatIonoStecElev(LosData):
     
     PlotConf["Path"] = sys.argv[1] + '/OUT/LOS/ION/' + 'IONO_STEC_vs_TIME_TLSA_D006Y15.png'  # Adjust path as needed
     
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
     # Generate plot
     generatePlot(PlotConf) 
 
@@ -102,6 +106,9 @@ def plotSatIonoPrnStec(LosData):
     
     PlotConf["Path"] = sys.argv[1] + '/OUT/LOS/ION/' + 'IONO_STEC_vs_PRN_TLSA_D006Y15.png'  # Adjust path as needed
     
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
     # Generate plot
     generatePlot(PlotConf) 
 
@@ -142,6 +149,9 @@ def plotSatIonoVtecTimeElev(LosData):
     
     PlotConf["Path"] = sys.argv[1] + '/OUT/LOS/ION/' + 'IONO_VTEC_vs_TIME_TLSA_D006Y15.png'  # Adjust path as needed
     
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
     # Generate plot
     generatePlot(PlotConf) 
 
@@ -186,6 +196,134 @@ def plotSatIonoPrnVtec(LosData):
     
     PlotConf["Path"] = sys.argv[1] + '/OUT/LOS/ION/' + 'IONO_VTEC_vs_PRN_TLSA_D006Y15.png'  # Adjust path as needed
     
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
     # Generate plot
     generatePlot(PlotConf) 
-    
\ No newline at end of file
+    
+# Ionospheric Pierce Points of all the LOS
+def computeLosPiercePoints(LosData, X_RCVR, Y_RCVR, Z_RCVR, Height=GnssConstants.IONO_HEIGHT):
+    """
+    Compute the ionospheric pierce points of all the LOS of the LOS file
+    at once, from the receiver position and the LOS elevation and azimuth.
+
+    Parameters:
+    - LosData: LOS data with the ELEV and AZIM columns.
+    - X_RCVR, Y_RCVR, Z_RCVR: Receiver WGS84 ECEF coordinates [m].
+    - Height: Height of the ionospheric shell [m].
+
+    Returns:
+    - IppLat, IppLon: Latitude and longitude of the pierce points [deg].
+    - Obliquity: Obliquity factor of each LOS.
+    """
+    RcvrLon, RcvrLat, _ = xyz2llh(X_RCVR, Y_RCVR, Z_RCVR)
+
+    return computePiercePoints(RcvrLat, RcvrLon,
+        LosData[LOS_IDX["ELEV"]].to_numpy(dtype=float),
+        LosData[LOS_IDX["AZIM"]].to_numpy(dtype=float), Height)
+
+# T3.5 Ionospheric Pierce Points (VTEC)
+def plotSatIonoIppMap(LosData, X_RCVR, Y_RCVR, Z_RCVR, Height=GnssConstants.IONO_HEIGHT):
+    print( 'Ploting the Ionospheric Pierce Points (VTEC) image ...')
+
+    IppLat, IppLon, _ = computeLosPiercePoints(LosData, X_RCVR, Y_RCVR, Z_RCVR, Height)
+    vtec = LosData[LOS_IDX["VTEC[m]"]]  # Extracting satellite VTEC information
+
+    # Plot settings
+    PlotConf = {}
+    PlotConf["Type"] = "Lines"
+    PlotConf["FigSize"] = (16.8, 15.2)
+    PlotConf["Title"] = "Ionospheric Pierce Points (VTEC) from TLSA on Year 2015 DoY 006"
+
+    # Frame the pierce points around the receiver
+    PlotConf["LonMin"] = int(np.floor(np.min(IppLon) / 5.0) * 5)
+    PlotConf["LonMax"] = int(np.ceil(np.max(IppLon) / 5.0) * 5)
+    PlotConf["LatMin"] = int(np.floor(np.min(IppLat) / 5.0) * 5)
+    PlotConf["LatMax"] = int(np.ceil(np.max(IppLat) / 5.0) * 5)
+    PlotConf["LonStep"] = 5
+    PlotConf["LatStep"] = 5
+
+    PlotConf["yLabel"] = "Latitude [deg]"
+    PlotConf["yTicks"] = range(PlotConf["LatMin"],PlotConf["LatMax"]+1,5)
+    PlotConf["yLim"] = [PlotConf["LatMin"], PlotConf["LatMax"]]
+
+    PlotConf["xLabel"] = "Longitude [deg]"
+    PlotConf["xTicks"] = range(PlotConf["LonMin"],PlotConf["LonMax"]+1,5)
+    PlotConf["xLim"] = [PlotConf["LonMin"], PlotConf["LonMax"]]
+
+    PlotConf["Grid"] = True
+    PlotConf["Map"] = True
+    PlotConf["Marker"] = '.'
+    PlotConf["LineWidth"] = 1.5
+
+    PlotConf["ColorBar"] = "gnuplot"
+    PlotConf["ColorBarLabel"] = "VTEC [m]"
+    PlotConf["ColorBarMin"] = min(vtec)
+    PlotConf["ColorBarMax"] = max(vtec)
+
+    PlotConf["xData"] = {}
+    PlotConf["yData"] = {}
+    PlotConf["zData"] = {}
+
+    Label = 0
+    PlotConf["xData"][Label] = IppLon
+    PlotConf["yData"][Label] = IppLat
+    PlotConf["zData"][Label] = vtec  # Using satellite VTEC in m
+
+    PlotConf["Path"] = sys.argv[1] + '/OUT/LOS/ION/' + 'IONO_IPP_MAP_TLSA_D006Y15.png'
+
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
+    # Generate plot
+    generatePlot(PlotConf)
+
+# T3.6 Klobuchar model STEC minus logged STEC vs TIME (ELEV)
+def plotSatIonoKlobucharResidual(LosData, Alpha, Beta, X_RCVR, Y_RCVR, Z_RCVR):
+    print( 'Ploting the Klobuchar model STEC residuals image ...')
+
+    # Evaluate the Klobuchar model for all the LOS at once
+    RcvrLon, RcvrLat, _ = xyz2llh(X_RCVR, Y_RCVR, Z_RCVR)
+    model = computeKlobucharDelay(Alpha, Beta, RcvrLat, RcvrLon,
+        LosData[LOS_IDX["ELEV"]].to_numpy(dtype=float),
+        LosData[LOS_IDX["AZIM"]].to_numpy(dtype=float),
+        LosData[LOS_IDX["SOD"]].to_numpy(dtype=float))
+    residual = model - LosData[LOS_IDX["STEC[m]"]]
+
+    # Plot settings
+    PlotConf = {}
+    PlotConf["Type"] = "Lines"
+    PlotConf["FigSize"] = (16.8, 15.2)
+    PlotConf["Title"] = "Klobuchar Model minus Logged STEC from TLSA on Year 2015 DoY 006"
+
+    PlotConf["yLabel"] = "Model - Logged STEC [m]"
+    PlotConf["xLabel"] = "Hour of Day 006"
+    PlotConf["xTicks"] = range(0, 25)
+    PlotConf["xLim"] = [0, 24]
+
+    PlotConf["Grid"] = True
+    PlotConf["Marker"] = '.'
+    PlotConf["LineWidth"] = 1.5
+
+    PlotConf["ColorBar"] = "gnuplot"
+    PlotConf["ColorBarLabel"] = "Elevation [deg]"
+    PlotConf["ColorBarMin"] = 0.
+    PlotConf["ColorBarMax"] = 90.
+
+    PlotConf["xData"] = {}
+    PlotConf["yData"] = {}
+    PlotConf["zData"] = {}
+
+    Label = 0
+    PlotConf["xData"][Label] = LosData[LOS_IDX["SOD"]] / GnssConstants.S_IN_H  # Converting to hours
+    PlotConf["yData"][Label] = residual
+    PlotConf["zData"][Label] = LosData[LOS_IDX["ELEV"]]  # Elevation data
+
+    PlotConf["Path"] = sys.argv[1] + '/OUT/LOS/ION/' + 'IONO_KLOB_RESIDUAL_vs_TIME_TLSA_D006Y15.png'
+
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
+    # Generate plot
+    generatePlot(PlotConf)
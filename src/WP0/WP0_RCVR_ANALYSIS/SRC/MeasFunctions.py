@@ -266,5 +266,8 @@ def plotSatMeasResidualsElev(LosData):
     
     PlotConf["Path"] = sys.argv[1] + '/OUT/LOS/MSR/' + 'MEAS_RESIDUALS_vs_TIME_TLSA_D006Y15.png'  # Adjust path as needed
     
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
     # Generate plot
     generatePlot(PlotConf)
\ No newline at end of file
@@ -20,11 +20,17 @@ from COMMON.Plots import generatePlot
 import numpy as np
 # from pyproj import Transformer
 from COMMON.Coordinates import xyz2llh
+from COMMON.Indexing import buildGroupIndex, iterateGroups
 
 
 # T2.1 Plot Satellite Visibility Figures
-def plotSatVisibility(LosData):
+def plotSatVisibility(LosData, PrnIndex=None):
     print( 'Ploting the Satellite Visibility image Periods ...')
+
+    # PRN index of the LOS rows, built here if not shared by the caller
+    if PrnIndex is None:
+        PrnIndex = buildGroupIndex(LosData[LOS_IDX["PRN"]].to_numpy())
+
     PlotConf = {}
 
     PlotConf["Type"] = "Lines"
@@ -33,9 +39,9 @@ def plotSatVisibility(LosData):
         " DoY 006"
 
     PlotConf["yLabel"] = "GPS-PRN"
-    PlotConf["yTicks"] = sorted(unique(LosData[LOS_IDX["PRN"]]))
-    PlotConf["yTicksLabels"] = sorted(unique(LosData[LOS_IDX["PRN"]]))
-    PlotConf["yLim"] = [0, max(unique(LosData[LOS_IDX["PRN"]])) + 1]
+    PlotConf["yTicks"] = PrnIndex["Keys"]
+    PlotConf["yTicksLabels"] = PrnIndex["Keys"]
+    PlotConf["yLim"] = [0, max(PrnIndex["Keys"]) + 1]
 
     PlotConf["xLabel"] = "Hour of DoY 006"
     PlotConf["xTicks"] = range(0, 25)
@@ -54,12 +60,13 @@ def plotSatVisibility(LosData):
     PlotConf["xData"] = {}
     PlotConf["yData"] = {}
     PlotConf["zData"] = {}
-    for prn in sorted(unique(LosData[LOS_IDX["PRN"]])):
+    Sod = LosData[LOS_IDX["SOD"]].to_numpy()
+    Elev = LosData[LOS_IDX["ELEV"]].to_numpy()
+    for prn, Rows in iterateGroups(PrnIndex):
         Label = "G" + ("%02d" % prn)
-        FilterCond = LosData[LOS_IDX["PRN"]] == prn
-        PlotConf["xData"][Label] = LosData[LOS_IDX["SOD"]][FilterCond] / GnssConstants.S_IN_H
-        PlotConf["yData"][Label] = LosData[LOS_IDX["PRN"]][FilterCond]
-        PlotConf["zData"][Label] = LosData[LOS_IDX["ELEV"]][FilterCond]
+        PlotConf["xData"][Label] = Sod[Rows] / GnssConstants.S_IN_H
+        PlotConf["yData"][Label] = np.full(len(Rows), prn)
+        PlotConf["zData"][Label] = Elev[Rows]
 
     PlotConf["Path"] = sys.argv[1] + '/OUT/LOS/SAT/' + 'SAT_VISIBILITY_TLSA_D006Y15.png'
 
@@ -230,12 +237,16 @@ def plotSatVelocities(LosData):
     generatePlot(PlotConf)
 
 # T2.5 NAV Satellite Clock
-def plotSatClock(LosData):
+def plotSatClock(LosData, PrnIndex=None):
     print( 'Ploting the Satellite Clock image ...')
 
+    # PRN index of the LOS rows, built here if not shared by the caller
+    if PrnIndex is None:
+        PrnIndex = buildGroupIndex(LosData[LOS_IDX["PRN"]].to_numpy())
+
     # Loop through each unique sorted PRN
-    for prn in sorted(unique(LosData[LOS_IDX["PRN"]])): 
-        prn_data = LosData[LosData[LOS_IDX["PRN"]] == prn]  # Filter data for the current PRN
+    for prn, Rows in iterateGroups(PrnIndex): 
+        prn_data = LosData.iloc[Rows]  # Rows of the current PRN
         
         sat_clock = prn_data[LOS_IDX["SV-CLK[m]"]]  # Extract satellite clock information for the current PRN
 
@@ -0,0 +1,183 @@
+## Copyright (C) GNSS ACADEMY 
+##
+## Name          : SppFunctions.py
+## Purpose       : Batch Single Point Positioning from the LOS file
+## Project       : WP0-JSNP
+## Component     : 
+## Author        : GNSS Academy
+## Creation date : 2024
+## File Version  : 1.0
+## Version date  : 
+##
+
+import sys, os
+from interfaces import LOS_IDX, POS_IDX, POS_OUTPUT_FORMAT
+sys.path.append(os.getcwd() + '/' + \
+    os.path.dirname(sys.argv[0]) + '/' + 'COMMON')
+from COMMON.Coordinates import xyz2llh, xyz2llhArray
+import numpy as np
+
+# Default corrections applied to the LOS pseudoranges
+SPP_CORRECTIONS = ["SV-CLK", "TGD", "DTR", "TROPO", "STEC"]
+
+# Sign of each correction in the corrected pseudorange
+# (as the C1 residuals: CLKP1 = SV-CLK - TGD + DTR)
+SPP_CORRECTION_SIGNS = {
+"SV-CLK": 1.0,
+"TGD": -1.0,
+"DTR": 1.0,
+"TROPO": -1.0,
+"STEC": -1.0
+}
+
+# Minimum number of satellites of a solution
+SPP_MIN_SATS = 4
+
+#######################################################
+# INTERNAL FUNCTIONS 
+#######################################################
+
+def stackEpochs(Sod):
+    """
+    Group the LOS rows by epoch into a padded (NEpochs x NMaxSats) matrix
+    of row positions, so that all the epochs can be solved at once.
+
+    Returns:
+    - Epochs: Sorted SOD of the epochs.
+    - Rows: Row positions of each epoch (-1 for the padding).
+    """
+    Order = np.argsort(Sod, kind="stable")
+    Epochs, Starts, Inverse, Counts = np.unique(Sod[Order],
+        return_index=True, return_inverse=True, return_counts=True)
+
+    # Position of each row inside its epoch
+    Ranks = np.arange(len(Order)) - Starts[Inverse]
+    Rows = np.full((len(Epochs), np.max(Counts)), -1)
+    Rows[Inverse, Ranks] = Order
+
+    return Epochs, Rows
+
+def computeEnuRotation(Lon, Lat):
+    """
+    Rotation matrix from ECEF to the local East-North-Up frame.
+    """
+    Lon, Lat = np.radians(Lon), np.radians(Lat)
+
+    return np.array([
+        [-np.sin(Lon), np.cos(Lon), 0.0],
+        [-np.sin(Lat) * np.cos(Lon), -np.sin(Lat) * np.sin(Lon), np.cos(Lat)],
+        [np.cos(Lat) * np.cos(Lon), np.cos(Lat) * np.sin(Lon), np.sin(Lat)]])
+
+def computeEnuDiagonal(Cov, Rotation):
+    """
+    Diagonal of the position covariances of all the epochs (NEpochs x 4 x 4)
+    rotated to East-North-Up, followed by the clock variance.
+    """
+    CovEnu = Rotation @ Cov[:, :3, :3] @ Rotation.T
+
+    return np.column_stack((np.diagonal(CovEnu, axis1=1, axis2=2), Cov[:, 3, 3]))
+
+#######################################################
+# EXTERNAL FUNCTIONS 
+#######################################################
+
+def computeSppSolutions(LosData, X_RCVR, Y_RCVR, Z_RCVR, Corrections=SPP_CORRECTIONS,
+    Mask=0.0, ElevWeighting=False):
+    """
+    Compute the Single Point Positioning solutions of all the epochs of the
+    LOS file at once, with stacked Weighted Least Squares.
+
+    The pseudoranges are corrected with the selected LOS columns and the
+    problem is linearised around the reference receiver position, using
+    the logged geometrical RANGE, so that a single stacked solve per day
+    is needed (the linearisation error is negligible for the metric
+    position errors of an SPP solution).
+
+    Parameters:
+    - LosData: LOS data with the SOD, DOY, YEAR, ELEV, MEAS, SAT-X/Y/Z,
+      RANGE and correction columns.
+    - X_RCVR, Y_RCVR, Z_RCVR: Reference receiver WGS84 ECEF coordinates [m].
+    - Corrections: LOS corrections applied (names of SPP_CORRECTION_SIGNS).
+    - Mask: Elevation mask [deg].
+    - ElevWeighting: Weight the measurements with sin(ELEV)^2 instead of
+      equal weights.
+
+    Returns:
+    - Solutions: Array with one row per solved epoch, in POS_IDX columns.
+    """
+    RcvrPos = np.array([X_RCVR, Y_RCVR, Z_RCVR])
+    Elev = LosData[LOS_IDX["ELEV"]].to_numpy(dtype=float)
+    SatPos = LosData[[LOS_IDX["SAT-X[m]"], LOS_IDX["SAT-Y[m]"], LOS_IDX["SAT-Z[m]"]]].to_numpy(dtype=float)
+
+    # Prefit residuals of the corrected pseudoranges
+    Prefits = LosData[LOS_IDX["MEAS[m]"]].to_numpy(dtype=float) - \
+        LosData[LOS_IDX["RANGE[m]"]].to_numpy(dtype=float)
+    for Correction in Corrections:
+        Prefits += SPP_CORRECTION_SIGNS[Correction] * \
+            LosData[LOS_IDX[Correction + "[m]"]].to_numpy(dtype=float)
+
+    # Geometry rows: minus the unit vectors towards the satellites and the clock
+    Los = SatPos - RcvrPos
+    Geometry = np.column_stack((-Los / np.linalg.norm(Los, axis=1, keepdims=True), np.ones(len(Los))))
+    Weights = np.sin(np.radians(Elev))**2 if ElevWeighting else np.ones(len(Elev))
+    Weights[Elev < Mask] = 0.0
+
+    # Stack the epochs, the padding having no weight
+    Epochs, Rows = stackEpochs(LosData[LOS_IDX["SOD"]].to_numpy(dtype=float))
+    Valid = Rows >= 0
+    G = np.where(Valid[..., None], Geometry[Rows], 0.0)
+    W = np.where(Valid, Weights[Rows], 0.0)
+    Y = np.where(Valid, Prefits[Rows], 0.0)
+
+    # Keep the epochs with enough satellites and a regular geometry
+    NSats = np.sum(W > 0, axis=1)
+    Used = (W > 0)[..., None]
+    NormalGeom = np.swapaxes(G * Used, 1, 2) @ G
+    Solvable = NSats >= SPP_MIN_SATS
+    Solvable[Solvable] = np.linalg.det(NormalGeom[Solvable]) > 0
+    G, W, Y, NormalGeom = G[Solvable], W[Solvable], Y[Solvable], NormalGeom[Solvable]
+
+    # Stacked Weighted Least Squares
+    GtW = np.swapaxes(G * W[..., None], 1, 2)
+    Cov = np.linalg.inv(GtW @ G)
+    Deltas = (Cov @ (GtW @ Y[..., None]))[..., 0]
+
+    # Position errors, formal sigmas and DOPs in the local frame of the reference
+    RcvrLon, RcvrLat, _ = xyz2llh(X_RCVR, Y_RCVR, Z_RCVR)
+    Rotation = computeEnuRotation(RcvrLon, RcvrLat)
+    Errors = Deltas[:, :3] @ Rotation.T
+    Sigmas = np.sqrt(computeEnuDiagonal(Cov, Rotation)[:, :3])
+    Dops = computeEnuDiagonal(np.linalg.inv(NormalGeom), Rotation)
+
+    Lon, Lat, Alt = xyz2llhArray(*(RcvrPos + Deltas[:, :3]).T)
+    FirstRows = Rows[Solvable, 0]
+
+    Solutions = np.zeros((len(FirstRows), len(POS_IDX)))
+    Solutions[:, POS_IDX["SOD"]] = Epochs[Solvable]
+    Solutions[:, POS_IDX["DOY"]] = LosData[LOS_IDX["DOY"]].to_numpy()[FirstRows]
+    Solutions[:, POS_IDX["YEAR"]] = LosData[LOS_IDX["YEAR"]].to_numpy()[FirstRows]
+    Solutions[:, POS_IDX["NSATS"]] = NSats[Solvable]
+    Solutions[:, POS_IDX["RX-LAT[DEG]"]] = Lat
+    Solutions[:, POS_IDX["RX-LON[DEG]"]] = Lon
+    Solutions[:, POS_IDX["RX-ALT[m]"]] = Alt
+    Solutions[:, [POS_IDX["EPE[m]"], POS_IDX["NPE[m]"], POS_IDX["UPE[m]"]]] = Errors
+    Solutions[:, [POS_IDX["SIG-EPE"], POS_IDX["SIG-NPE"], POS_IDX["SIG-UPE"]]] = Sigmas
+    Solutions[:, POS_IDX["GDOP"]] = np.sqrt(np.sum(Dops, axis=1))
+    Solutions[:, POS_IDX["PDOP"]] = np.sqrt(np.sum(Dops[:, :3], axis=1))
+    Solutions[:, POS_IDX["TDOP"]] = np.sqrt(Dops[:, 3])
+    Solutions[:, POS_IDX["HDOP"]] = np.sqrt(np.sum(Dops[:, :2], axis=1))
+    Solutions[:, POS_IDX["VDOP"]] = np.sqrt(Dops[:, 2])
+
+    return Solutions
+
+def writeSppPosFile(PosFile, Solutions):
+    """
+    Write the SPP solutions in the POS file format.
+    """
+    print( 'Writing the SPP solutions POS file ...')
+
+    with open(PosFile, 'w') as fOut:
+        fOut.write("#SOD    DOY YEAR  NSATS   RX-LAT[DEG]     RX-LON[DEG]   RX-ALT[m]"
+            "       EPE[m]   NPE[m]   UPE[m]  SIG-EPE  SIG-NPE  SIG-UPE"
+            "   GDOP      PDOP     TDOP     HDOP     VDOP\n")
+        fOut.writelines(POS_OUTPUT_FORMAT % tuple(Solution) for Solution in Solutions)
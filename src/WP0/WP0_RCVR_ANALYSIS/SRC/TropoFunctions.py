@@ -20,6 +20,7 @@ from COMMON.Plots import generatePlot
 import numpy as np
 # from pyproj import Transformer
 from COMMON.Coordinates import xyz2llh
+from COMMON.Troposphere import computeMopsTropoDelay
 
 # T4.1 Troposphere STD[m] vs Time (Elev)
 def plotSatTropoStdElev(LosData):
@@ -58,6 +59,9 @@ def plotSatTropoStdElev(LosData):
     
     PlotConf["Path"] = sys.argv[1] + '/OUT/LOS/TRO/' + 'TROPO_STD_vs_TIME_TLSA_D006Y15.png'  # Adjust path as needed
     
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
     # Generate plot
     generatePlot(PlotConf) 
 
@@ -102,5 +106,57 @@ def plotSatTropoZtdElev(LosData):
     
     PlotConf["Path"] = sys.argv[1] + '/OUT/LOS/TRO/' + 'TROPO_ZTD_vs_TIME_TLSA_D006Y15.png'  # Adjust path as needed
     
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
     # Generate plot
     generatePlot(PlotConf) 
+
+# T4.3 MOPS model STD minus logged STD vs TIME (Elev)
+def plotSatTropoMopsResidual(LosData, X_RCVR, Y_RCVR, Z_RCVR):
+    print( 'Ploting the MOPS model STD residuals image ...')
+
+    # Evaluate the MOPS model for all the LOS at once
+    # (the ellipsoidal height is taken as height above sea level)
+    RcvrLon, RcvrLat, RcvrHeight = xyz2llh(X_RCVR, Y_RCVR, Z_RCVR)
+    model, _ = computeMopsTropoDelay(RcvrLat, RcvrHeight,
+        LosData[LOS_IDX["DOY"]].to_numpy(dtype=float),
+        LosData[LOS_IDX["ELEV"]].to_numpy(dtype=float))
+    residual = model - LosData[LOS_IDX["TROPO[m]"]]
+
+    # Plot settings
+    PlotConf = {}
+    PlotConf["Type"] = "Lines"
+    PlotConf["FigSize"] = (16.8, 15.2)
+    PlotConf["Title"] = "MOPS Model minus Logged STD from TLSA on Year 2015 DoY 006"
+
+    PlotConf["yLabel"] = "Model - Logged STD [m]"
+    PlotConf["xLabel"] = "Hour of Day 006"
+    PlotConf["xTicks"] = range(0, 25)
+    PlotConf["xLim"] = [0, 24]
+
+    PlotConf["Grid"] = True
+    PlotConf["Marker"] = '.'
+    PlotConf["LineWidth"] = 1.5
+
+    PlotConf["ColorBar"] = "gnuplot"
+    PlotConf["ColorBarLabel"] = "Elevation [deg]"
+    PlotConf["ColorBarMin"] = 0.
+    PlotConf["ColorBarMax"] = 90.
+
+    PlotConf["xData"] = {}
+    PlotConf["yData"] = {}
+    PlotConf["zData"] = {}
+
+    Label = 0
+    PlotConf["xData"][Label] = LosData[LOS_IDX["SOD"]] / GnssConstants.S_IN_H  # Converting to hours
+    PlotConf["yData"][Label] = residual
+    PlotConf["zData"][Label] = LosData[LOS_IDX["ELEV"]]  # Elevation data
+
+    PlotConf["Path"] = sys.argv[1] + '/OUT/LOS/TRO/' + 'TROPO_MOPS_RESIDUAL_vs_TIME_TLSA_D006Y15.png'
+
+    # Decimation per pixel
+    PlotConf["Decimate"] = True
+
+    # Generate plot
+    generatePlot(PlotConf)
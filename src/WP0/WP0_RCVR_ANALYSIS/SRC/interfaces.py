@@ -1,48 +1,56 @@
+from COMMON.Schemas import defineSchema, getSchemaFormat
 
-LOS_IDX = {
-"SOD":0,
-"DOY":1,
-"YEAR":2,
-"PRN":3,
-"ELEV":4,
-"AZIM":5,
-"TOF[ms]":6,
-"MEAS[m]":7,
-"SNR[db-Hz]":8,
-"SAT-X[m]":9,
-"SAT-Y[m]":10,
-"SAT-Z[m]":11,
-"VEL-X[m/s]":12,
-"VEL-Y[m/s]":13,
-"VEL-Z[m/s]":14,
-"RANGE[m]":15,
-"SV-CLK[m]":16,
-"DTR[m]":17,
-"TGD[m]":18,
-"TROPO[m]":19,
-"STEC[m]":20,
-"VTEC[m]":21,
-"MPP[elev]":22
-}
+# gLAB LOS file columns: (Name, Dtype, Unit, Format)
+LOS_SCHEMA = defineSchema("LOS", [
+("SOD", "float64", "s", None),
+("DOY", "int16", None, None),
+("YEAR", "int16", None, None),
+("PRN", "int8", None, None),
+("ELEV", "float64", "deg", None),
+("AZIM", "float64", "deg", None),
+("TOF[ms]", "float64", "ms", None),
+("MEAS[m]", "float64", "m", None),
+("SNR[db-Hz]", "float64", "dB-Hz", None),
+("SAT-X[m]", "float64", "m", None),
+("SAT-Y[m]", "float64", "m", None),
+("SAT-Z[m]", "float64", "m", None),
+("VEL-X[m/s]", "float64", "m/s", None),
+("VEL-Y[m/s]", "float64", "m/s", None),
+("VEL-Z[m/s]", "float64", "m/s", None),
+("RANGE[m]", "float64", "m", None),
+("SV-CLK[m]", "float64", "m", None),
+("DTR[m]", "float64", "m", None),
+("TGD[m]", "float64", "m", None),
+("TROPO[m]", "float64", "m", None),
+("STEC[m]", "float64", "m", None),
+("VTEC[m]", "float64", "m", None),
+("MPP[elev]", "float64", None, None),
+])
+LOS_IDX = LOS_SCHEMA["Idx"]
 
 
-POS_IDX = {
-"SOD":0,
-"DOY":1,
-"YEAR":2,
-"NSATS":3,
-"RX-LAT[DEG]":4,
-"RX-LON[DEG]":5,
-"RX-ALT[m]":6,
-"EPE[m]":7,
-"NPE[m]":8,
-"UPE[m]":9,
-"SIG-EPE":10,
-"SIG-NPE":11,
-"SIG-UPE":12,
-"GDOP":13,
-"PDOP":14,
-"TDOP":15,
-"HDOP":16,
-"VDOP":17
-}
\ No newline at end of file
+# POS file columns (as the gLAB POS filter)
+POS_SCHEMA = defineSchema("POS", [
+("SOD", "float64", "s", "%6.1f"),
+("DOY", "int16", None, "%3d"),
+("YEAR", "int16", None, "%4d"),
+("NSATS", "int16", None, "%4d"),
+("RX-LAT[DEG]", "float64", "deg", "%15.9f"),
+("RX-LON[DEG]", "float64", "deg", "%15.9f"),
+("RX-ALT[m]", "float64", "m", "%15.9f"),
+("EPE[m]", "float64", "m", "%8.3f"),
+("NPE[m]", "float64", "m", "%8.3f"),
+("UPE[m]", "float64", "m", "%8.3f"),
+("SIG-EPE", "float64", "m", "%8.3f"),
+("SIG-NPE", "float64", "m", "%8.3f"),
+("SIG-UPE", "float64", "m", "%8.3f"),
+("GDOP", "float64", None, "%8.3f"),
+("PDOP", "float64", None, "%8.3f"),
+("TDOP", "float64", None, "%8.3f"),
+("HDOP", "float64", None, "%8.3f"),
+("VDOP", "float64", None, "%8.3f"),
+])
+POS_IDX = POS_SCHEMA["Idx"]
+
+# Output format of the POS files rows (as the gLAB POS filter)
+POS_OUTPUT_FORMAT = getSchemaFormat(POS_SCHEMA) + "\n"
@@ -19,7 +19,7 @@ Common = os.path.dirname(os.path.dirname(
 sys.path.insert(0, Common)
 
 from collections import OrderedDict
-from interfaces import LOS_IDX, POS_IDX
+from interfaces import LOS_IDX, POS_IDX, LOS_SCHEMA, POS_SCHEMA
 from pandas import read_csv
 from yaml import dump
 import SatFunctions
@@ -27,13 +27,37 @@ import IonoFunctions
 import TropoFunctions
 import MeasFunctions
 import PosFunctions
+import SppFunctions
+from COMMON.Profiler import enableProfilerFromOptions, instrumentModule
+from COMMON.Profiler import isProfilerEnabled, traceFunction, finishProfiler
+from COMMON.Indexing import buildGroupIndex
+from COMMON.Compression import wrapDataReader, findDataFile, removeCompressionSuffix
+from COMMON.Parquet import isArrowAvailable, getParquetPath, writeParquetData
+from COMMON.Schemas import wrapSchemaReader
+from COMMON import GnssConstants
+from COMMON.Ionosphere import readKlobucharParameters
 
 #######################################################
 # INTERNAL FUNCTIONS 
 #######################################################
 
 def displayUsage():
-    sys.stderr.write("ERROR: Please provide path to SCENARIO as a unique \nargument\n")
+    sys.stderr.write("ERROR: Please provide path to SCENARIO as first \nargument\n")
+    sys.stderr.write("Options: --profile[=FILE] --profile-stacks[=FILE]\n")
+
+def readOptions(Args):
+    Options = OrderedDict({})
+    for Arg in Args:
+        if not Arg.startswith("--"):
+            sys.stderr.write("ERROR: Bad option: %s\n" % Arg)
+            continue
+        if "=" in Arg:
+            Key, Value = Arg.split("=", 1)
+            Options[Key] = Value
+        else:
+            Options[Arg] = True
+
+    return Options
 
 def readConf(CfgFile):
     Conf = OrderedDict({})
@@ -54,6 +78,17 @@ def readConf(CfgFile):
 
     return Conf
 
+# PRN index of the LOS file rows: it is built on first use and shared by
+# all the plots, as every read of the LOS file keeps the same rows order
+LosPrnIndex = None
+
+def getLosPrnIndex(LosData):
+    global LosPrnIndex
+    if LosPrnIndex is None:
+        LosPrnIndex = buildGroupIndex(LosData[LOS_IDX["PRN"]].to_numpy())
+
+    return LosPrnIndex
+
 #######################################################
 # MAIN PROCESSING
 #######################################################
@@ -62,12 +97,27 @@ print( '-----------------------------')
 print( 'RUNNING RECEIVER ANALYSES ...')
 print( '-----------------------------')
 
-if len(sys.argv) != 2:
+if len(sys.argv) < 2 or sys.argv[1].startswith("--"):
     displayUsage()
     sys.exit()
 
 # Take the arguments
 Scen = sys.argv[1]
+Options = readOptions(sys.argv[2:])
+
+# LOS and POS files may be archived compressed: they are decoded on the fly
+read_csv = wrapDataReader(read_csv)
+
+# Enable the profiler if requested, tracing the file reads and the plot functions
+enableProfilerFromOptions(Options, Scen + '/OUT/PROFILE', 'receiver_analysis')
+if isProfilerEnabled():
+    read_csv = traceFunction(read_csv, "read")
+for Module in [SatFunctions, IonoFunctions, TropoFunctions, MeasFunctions, PosFunctions, SppFunctions]:
+    instrumentModule(Module)
+
+# LOS and POS columns are read with the dtypes of their schemas
+readLosFile = wrapSchemaReader(read_csv, LOS_SCHEMA)
+readPosFile = wrapSchemaReader(read_csv, POS_SCHEMA)
 
 # Path to conf
 CfgFile = Scen + '/CFG/receiver_analysis.cfg'
@@ -88,6 +138,23 @@ print('Reading Configuration file',CfgFile)
 LosFile = Scen + '/OUT/LOS/' + Conf["LOS_FILE"]
 PosFile = Scen + '/OUT/POS/' + Conf["POS_FILE"]
 
+# Export the LOS and POS files to Parquet datasets, partitioned by day
+# (optional, needs pyarrow)
+if(Conf.get("PARQUET_EXPORT") == '1'):
+    if not isArrowAvailable():
+        sys.stderr.write("ERROR: pyarrow not found, the Parquet export is disabled\n")
+    else:
+        for FileType, DataFile, readFile, Schema in [("LOS", LosFile, readLosFile, LOS_SCHEMA),
+            ("POS", PosFile, readPosFile, POS_SCHEMA)]:
+            if not os.path.exists(findDataFile(DataFile)): continue
+            ExportData = readFile(DataFile, sep=r"\s+", skiprows=1, header=None)
+            ExportData.columns = Schema["Names"]
+            Day = "Y%02dD%03d" % (ExportData["YEAR"].iloc[0] % 100, ExportData["DOY"].iloc[0]) \
+                if len(ExportData) > 0 else "UNKNOWN"
+            Name = os.path.splitext(os.path.basename(removeCompressionSuffix(DataFile)))[0]
+            writeParquetData(ExportData, getParquetPath(Scen + '/OUT/PARQUET', FileType, {"DAY": Day}, Name))
+        print('Exported Parquet datasets:', Scen + '/OUT/PARQUET')
+
 
 #-----------------------------------------------------------------------
 # PLOT SATELLITE ANALYSES
@@ -96,16 +163,16 @@ PosFile = Scen + '/OUT/POS/' + Conf["POS_FILE"]
 # T2.1 Plot Satellite Visibility figures
 if(Conf["PLOT_SATVIS"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["PRN"],LOS_IDX["ELEV"]])
 
     # Configure plot and call plot generation function
-    SatFunctions.plotSatVisibility(PosData)
+    SatFunctions.plotSatVisibility(PosData, getLosPrnIndex(PosData))
 
 # T2.2 Plot Satellite Geometrical Ranges figures
 if(Conf["PLOT_SATRNG"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["RANGE[m]"],LOS_IDX["ELEV"]])    
     
     # Configure plot and call plot generation function
@@ -114,7 +181,7 @@ if(Conf["PLOT_SATRNG"] == '1'):
 # T2.3 Plot Satellite Tracks figures
 if(Conf["PLOT_SATTRK"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],
     LOS_IDX["SAT-X[m]"],
     LOS_IDX["SAT-Y[m]"],
@@ -127,7 +194,7 @@ if(Conf["PLOT_SATTRK"] == '1'):
 # 2.4 Plot Satellite Velocity figures
 if(Conf["PLOT_SATVEL"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],
     LOS_IDX["PRN"],
     LOS_IDX["VEL-X[m/s]"],
@@ -143,16 +210,16 @@ if(Conf["PLOT_SATVEL"] == '1'):
 # T2.5 NAV Satellite Clock
 if(Conf["PLOT_SATCLK"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["SV-CLK[m]"],LOS_IDX["ELEV"],LOS_IDX["PRN"]])
     
     # Configure plot and call plot generation function
-    SatFunctions.plotSatClock(PosData)
+    SatFunctions.plotSatClock(PosData, getLosPrnIndex(PosData))
 
 #T2.6 Satellite Clock
 if(Conf["PLOT_SAT_CORRECTEDCLK"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["SV-CLK[m]"],LOS_IDX["DTR[m]"],LOS_IDX["TGD[m]"],LOS_IDX["PRN"]])
     
     # Configure plot and call plot generation function
@@ -161,7 +228,7 @@ if(Conf["PLOT_SAT_CORRECTEDCLK"] == '1'):
 # T2.7 Satellite TGD
 if(Conf["PLOT_SATTGD"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["TGD[m]"],LOS_IDX["PRN"]])
     
     # Configure plot and call plot generation function
@@ -170,7 +237,7 @@ if(Conf["PLOT_SATTGD"] == '1'):
 # T2.8 Satellite DTR
 if(Conf["PLOT_SATDTR"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["DTR[m]"],LOS_IDX["ELEV"]])
 
     # Configure plot and call plot generation function
@@ -179,7 +246,7 @@ if(Conf["PLOT_SATDTR"] == '1'):
 # T3.1 STEC vs TIME (ELEV)
 if(Conf["PLOT_IONO_STEC_ELEV"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["STEC[m]"],LOS_IDX["ELEV"]])
 
     # Configure plot and call plot generation function
@@ -188,7 +255,7 @@ if(Conf["PLOT_IONO_STEC_ELEV"] == '1'):
 # T3.2 PRN vs TIME (STEC)
 if(Conf["PLOT_IONO_PRN_STEC"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["STEC[m]"],LOS_IDX["PRN"]])
     
     # Configure plot and call plot generation function
@@ -197,7 +264,7 @@ if(Conf["PLOT_IONO_PRN_STEC"] == '1'):
 # T3.3 VTEC vs. Time
 if(Conf["PLOT_IONO_VTEC_TIME"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["VTEC[m]"],LOS_IDX["ELEV"]])
 
     # Configure plot and call plot generation function
@@ -206,16 +273,42 @@ if(Conf["PLOT_IONO_VTEC_TIME"] == '1'):
 # T3.4 PRN vs. TIME (VTEC)
 if(Conf["PLOT_IONO_PRN_VTEC"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["VTEC[m]"],LOS_IDX["PRN"]])
     
     # Configure plot and call plot generation function
     IonoFunctions.plotSatIonoPrnVtec(PosData)
 
+# T3.5 Ionospheric Pierce Points (VTEC)
+if(Conf.get("PLOT_IONO_IPP_MAP") == '1'):
+    # Read the cols we need from LOS file
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
+    usecols=[LOS_IDX["SOD"],LOS_IDX["ELEV"],LOS_IDX["AZIM"],LOS_IDX["VTEC[m]"]])
+
+    # Height of the ionospheric shell of the pierce points
+    IonoHeight = float(Conf["IONO_SHELL_HEIGHT"]) if "IONO_SHELL_HEIGHT" in Conf else GnssConstants.IONO_HEIGHT
+
+    # Configure plot and call plot generation function
+    IonoFunctions.plotSatIonoIppMap(PosData, float(Conf["X_RCVR"]), float(Conf["Y_RCVR"]),
+        float(Conf["Z_RCVR"]), IonoHeight)
+
+# T3.6 Klobuchar model vs logged STEC
+if(Conf.get("PLOT_IONO_KLOB_RESIDUAL") == '1'):
+    # Read the cols we need from LOS file
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
+    usecols=[LOS_IDX["SOD"],LOS_IDX["ELEV"],LOS_IDX["AZIM"],LOS_IDX["STEC[m]"]])
+
+    # Klobuchar coefficients broadcast in the NAV file header
+    Alpha, Beta = readKlobucharParameters(Scen + '/INP/NAV/' + Conf["NAV_FILE"])
+
+    # Configure plot and call plot generation function
+    IonoFunctions.plotSatIonoKlobucharResidual(PosData, Alpha, Beta,
+        float(Conf["X_RCVR"]), float(Conf["Y_RCVR"]), float(Conf["Z_RCVR"]))
+
 # T4.1 STD vs. Time (Elevation)
 if(Conf["PLOT_TROPO_STD_ELEV"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["TROPO[m]"],LOS_IDX["ELEV"]])
 
     # Configure plot and call plot generation function
@@ -224,7 +317,7 @@ if(Conf["PLOT_TROPO_STD_ELEV"] == '1'):
 # T4.2 ZTD vs. Time (Elevation)
 if(Conf["PLOT_TROPO_ZTD_ELEV"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["TROPO[m]"],LOS_IDX["ELEV"]])
     
     print( 'Ploting the Zenith Tropo Delay (ZTD) image ...')
@@ -232,10 +325,20 @@ if(Conf["PLOT_TROPO_ZTD_ELEV"] == '1'):
     # Configure plot and call plot generation function
     TropoFunctions.plotSatTropoZtdElev(PosData)
 
+# T4.3 MOPS model vs logged STD
+if(Conf.get("PLOT_TROPO_MOPS_RESIDUAL") == '1'):
+    # Read the cols we need from LOS file
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
+    usecols=[LOS_IDX["SOD"],LOS_IDX["DOY"],LOS_IDX["TROPO[m]"],LOS_IDX["ELEV"]])
+
+    # Configure plot and call plot generation function
+    TropoFunctions.plotSatTropoMopsResidual(PosData,
+        float(Conf["X_RCVR"]), float(Conf["Y_RCVR"]), float(Conf["Z_RCVR"]))
+
 # T5.1 PSR vs Time
 if(Conf["PLOT_MSR_PSR_ELEV"] == '1'): 
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["MEAS[m]"],LOS_IDX["ELEV"]])
     
     # Configure plot and call plot generation function
@@ -244,7 +347,7 @@ if(Conf["PLOT_MSR_PSR_ELEV"] == '1'):
 # T5.2 TAU vs Time
 if(Conf["PLOT_MSR_TAU_ELEV"] == '1'): 
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["MEAS[m]"],LOS_IDX["ELEV"]])
     
     # Configure plot and call plot generation function
@@ -253,7 +356,7 @@ if(Conf["PLOT_MSR_TAU_ELEV"] == '1'):
 # T5.3 ToF vs Time
 if(Conf["PLOT_MSR_TOF_ELEV"] == '1'): 
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],LOS_IDX["TOF[ms]"],LOS_IDX["ELEV"]])
     
     # Configure plot and call plot generation function
@@ -262,7 +365,7 @@ if(Conf["PLOT_MSR_TOF_ELEV"] == '1'):
 # T5.4 Doppler Frequency
 if(Conf["PLOT_MSR_DOPPLER_ELEV"] == '1'): 
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],
              LOS_IDX["SAT-X[m]"],
              LOS_IDX["SAT-Y[m]"],
@@ -283,7 +386,7 @@ if(Conf["PLOT_MSR_DOPPLER_ELEV"] == '1'):
 # T5.5 Residuals C1
 if(Conf["PLOT_MSR_RESIDUALS_ELEV"] == '1'): 
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],
              LOS_IDX["MEAS[m]"],
              LOS_IDX["RANGE[m]"],             
@@ -297,10 +400,38 @@ if(Conf["PLOT_MSR_RESIDUALS_ELEV"] == '1'):
     # Configure plot and call plot generation function
     MeasFunctions.plotSatMeasResidualsElev(PosData)
 
+# T6.0 Batch SPP solutions from the LOS file
+if(Conf.get("SPP_SOLUTION") == '1'):
+    # Corrections applied to the pseudoranges
+    Corrections = Conf["SPP_CORRECTIONS"].split(',') if "SPP_CORRECTIONS" in Conf \
+        else SppFunctions.SPP_CORRECTIONS
+    Corrections = [Correction.strip() for Correction in Corrections if Correction.strip()]
+
+    # Read the cols we need from LOS file
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
+    usecols=[LOS_IDX["SOD"],
+             LOS_IDX["DOY"],
+             LOS_IDX["YEAR"],
+             LOS_IDX["ELEV"],
+             LOS_IDX["MEAS[m]"],
+             LOS_IDX["SAT-X[m]"],
+             LOS_IDX["SAT-Y[m]"],
+             LOS_IDX["SAT-Z[m]"],
+             LOS_IDX["RANGE[m]"]] +
+             [LOS_IDX[Correction + "[m]"] for Correction in Corrections])
+
+    # Solve all the epochs at once and write them in POS format
+    SppSolutions = SppFunctions.computeSppSolutions(PosData,
+        float(Conf["X_RCVR"]), float(Conf["Y_RCVR"]), float(Conf["Z_RCVR"]),
+        Corrections,
+        float(Conf["SPP_MASK"]) if "SPP_MASK" in Conf else 0.0,
+        Conf.get("SPP_ELEV_WEIGHTING") == '1')
+    SppFunctions.writeSppPosFile(Scen + '/OUT/POS/' + Conf["SPP_POS_FILE"], SppSolutions)
+
 # T6.1. Satellites Used in PVT
 if(Conf["PLOT_POS_NUM_SAT"] == '1'):
     # Read the cols we need from POS file
-    PosData = read_csv(PosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readPosFile(PosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[POS_IDX["SOD"], POS_IDX["NSATS"]])
     
     # Configure plot and call plot generation function
@@ -309,7 +440,7 @@ if(Conf["PLOT_POS_NUM_SAT"] == '1'):
 # T6.2 (X)DOPS Plot the PDOP, GDOP, TDOP in order
 if(Conf["PLOT_POS_DOPS"] == '1'):
     # Read the cols we need from POS file
-    PosData = read_csv(PosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readPosFile(PosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[POS_IDX["SOD"],POS_IDX["PDOP"],POS_IDX["GDOP"],POS_IDX["TDOP"]])
     
     # Configure plot and call plot generation function
@@ -318,7 +449,7 @@ if(Conf["PLOT_POS_DOPS"] == '1'):
 # T6.3 H/V-DOPs Plot the HDOP and VDOP together with the number of satellites
 if(Conf["PLOT_POS_HVDOPS_NUM_SAT"] == '1'):
     # Read the cols we need from POS file
-    PosData = read_csv(PosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readPosFile(PosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[POS_IDX["SOD"],POS_IDX["HDOP"],POS_IDX["VDOP"], POS_IDX["NSATS"]])
     
     # Configure plot and call plot generation function
@@ -327,7 +458,7 @@ if(Conf["PLOT_POS_HVDOPS_NUM_SAT"] == '1'):
 # T6.4 Plot the East/North/Up Position Error (EPE, NPE, UPE)
 if(Conf["PLOT_POS_ENU"] == '1'):
     # Read the cols we need from POS file
-    PosData = read_csv(PosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readPosFile(PosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[POS_IDX["SOD"],POS_IDX["EPE[m]"],POS_IDX["NPE[m]"], POS_IDX["UPE[m]"]])
     
     # Configure plot and call plot generation function
@@ -336,7 +467,7 @@ if(Conf["PLOT_POS_ENU"] == '1'):
 # T6.5 Plot the Horizontal and Vertical Position Error (HPE) and VPE
 if(Conf["PLOT_POS_HPE_VPE"] == '1'):
     # Read the cols we need from POS file
-    PosData = read_csv(PosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readPosFile(PosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[POS_IDX["SOD"],POS_IDX["EPE[m]"],POS_IDX["NPE[m]"], POS_IDX["UPE[m]"]])
     
     # Configure plot and call plot generation function
@@ -346,7 +477,7 @@ if(Conf["PLOT_POS_HPE_VPE"] == '1'):
 # Y-axis and East Position Error X-axis)
 if(Conf["PLOT_POS_EPE_NPE"] == '1'):
     # Read the cols we need from POS file
-    PosData = read_csv(PosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readPosFile(PosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[POS_IDX["SOD"],POS_IDX["EPE[m]"],POS_IDX["NPE[m]"],POS_IDX["HDOP"]])
     
     # Configure plot and call plot generation function
@@ -356,7 +487,7 @@ if(Conf["PLOT_POS_EPE_NPE"] == '1'):
 # TXX Plot Satellite Polar View Challenge
 if(Conf["PLOT_SAT_POLAR_CHALLENGE"] == '1'):
     # Read the cols we need from LOS file
-    PosData = read_csv(LosFile, delim_whitespace=True, skiprows=1, header=None,\
+    PosData = readLosFile(LosFile, sep=r"\s+", skiprows=1, header=None,\
     usecols=[LOS_IDX["SOD"],
     LOS_IDX["AZIM"],
     LOS_IDX["PRN"],
@@ -364,3 +495,6 @@ if(Conf["PLOT_SAT_POLAR_CHALLENGE"] == '1'):
 
     # Configure plot and call plot generation function
     SatFunctions.plotSatPolar(PosData)
+
+# Write the profiler outputs, if enabled
+finishProfiler()